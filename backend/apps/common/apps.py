@@ -0,0 +1,16 @@
+"""通用应用配置"""
+
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    """通用应用配置类"""
+
+    name = "apps.common"
+    label = "common"
+
+    def ready(self):
+        # 安装缓存和Celery任务的指标采集
+        from apps.common import instrumentation
+
+        instrumentation.install()
@@ -0,0 +1,150 @@
+"""异步缓存客户端
+
+异步视图在事件循环中访问缓存，不能调用会阻塞线程的django-redis同步客户端。
+get_async_cache()返回的客户端提供get/set/delete/delete_many协程：
+
+- RedisAsyncCache: ASGI模式（ASYNC_CACHE["NATIVE"]）且缓存后端为django-redis时
+  使用redis.asyncio直连Redis。键（KEY_PREFIX、VERSION）和序列化与django-redis相同，
+  同步代码可以读到异步写入的值，反之亦然。每个事件循环使用独立的连接池
+- DjangoAsyncCache: 其余情况使用Django缓存后端自带的aget/aset等方法（LocMem、
+  Dummy以及WSGI模式下的django-redis，在线程中执行同步实现）。WSGI模式下每个
+  异步视图都运行在临时事件循环中，为其建立Redis连接得不偿失
+
+配置（ASYNC_CACHE）:
+    NATIVE: 是否使用redis.asyncio客户端（默认False，SERVER_MODE为asgi时开启）
+"""
+
+import asyncio
+import threading
+import weakref
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+REDIS_CACHE_BACKEND = "django_redis.cache.RedisCache"
+
+
+def get_async_cache_config():
+    """
+    读取ASYNC_CACHE配置
+
+    Returns:
+        dict: NATIVE
+    """
+    config = getattr(settings, "ASYNC_CACHE", None) or {}
+    return {"NATIVE": config.get("NATIVE", False)}
+
+
+class DjangoAsyncCache:
+    """Django缓存后端的异步接口"""
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    async def get(self, key, default=None):
+        return await self.cache.aget(key, default)
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        await self.cache.aset(key, value, timeout)
+
+    async def delete(self, key):
+        return await self.cache.adelete(key)
+
+    async def delete_many(self, keys):
+        await self.cache.adelete_many(keys)
+
+
+class RedisAsyncCache(DjangoAsyncCache):
+    """与django-redis共用键和序列化格式的redis.asyncio客户端"""
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS):
+        super().__init__(alias)
+        # 事件循环 → 客户端（连接不能跨事件循环使用）
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _connect(self):
+        from redis import asyncio as aioredis
+
+        params = settings.CACHES[self.alias]
+        location = params["LOCATION"]
+        if isinstance(location, (list, tuple)):
+            location = location[0]
+        # 配置了多个地址时第一个为主节点
+        location = location.split(",")[0]
+        options = params.get("OPTIONS", {})
+        kwargs = {
+            "password": options.get("PASSWORD"),
+            "socket_connect_timeout": options.get("SOCKET_CONNECT_TIMEOUT"),
+            "socket_timeout": options.get("SOCKET_TIMEOUT"),
+            "max_connections": options.get("CONNECTION_POOL_KWARGS", {}).get(
+                "max_connections"
+            ),
+        }
+        return aioredis.Redis.from_url(
+            location, **{key: value for key, value in kwargs.items() if value}
+        )
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._connect()
+        return client
+
+    async def get(self, key, default=None):
+        codec = self.cache.client
+        value = await self.client.get(codec.make_key(key))
+        return default if value is None else codec.decode(value)
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        codec = self.cache.client
+        key = codec.make_key(key)
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.cache.default_timeout
+        if timeout is not None and timeout <= 0:
+            # 与Django缓存一致：非正数超时表示立即过期
+            await self.client.delete(key)
+            return
+        await self.client.set(
+            key,
+            codec.encode(value),
+            px=None if timeout is None else int(timeout * 1000),
+        )
+
+    async def delete(self, key):
+        return bool(await self.client.delete(self.cache.client.make_key(key)))
+
+    async def delete_many(self, keys):
+        keys = [self.cache.client.make_key(key) for key in keys]
+        if keys:
+            await self.client.delete(*keys)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_async_cache(alias=DEFAULT_CACHE_ALIAS):
+    """
+    获取缓存别名对应的异步缓存客户端
+
+    Returns:
+        DjangoAsyncCache: 异步缓存客户端（同一实现在进程内复用）
+    """
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if backend == REDIS_CACHE_BACKEND and get_async_cache_config()["NATIVE"]:
+        cache_class = RedisAsyncCache
+    else:
+        cache_class = DjangoAsyncCache
+    key = (cache_class, alias)
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(key, cache_class(alias))
+    return cache
@@ -0,0 +1,56 @@
+"""异步API视图
+
+DRF的APIView只支持同步处理函数。AsyncAPIView的get/post等处理函数为协程：
+
+- 认证、权限和限流（APIView.initial）可能访问数据库和缓存，通过sync_to_async在
+  线程中执行
+- 处理函数在事件循环中执行，只能通过异步缓存客户端（apps.common.async_cache）、
+  Django的异步ORM接口或sync_to_async访问外部资源
+- 异常处理和响应封装与APIView相同
+
+ASGI部署下等待Redis、MySQL时不占用线程；WSGI部署下Django在每个请求的临时事件
+循环中执行处理函数，行为与同步视图相同。
+"""
+
+import inspect
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """处理函数为协程的APIView"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # csrf_exempt包装后的函数需要重新标记为协程函数，Django才会以异步方式调用
+        return markcoroutinefunction(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            # OPTIONS和405由APIView的同步方法处理
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
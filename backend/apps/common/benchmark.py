@@ -0,0 +1,106 @@
+"""基准测试工具模块
+
+为各应用的benchmark管理命令提供统一的计时、分位数统计和结果格式化。
+"""
+
+import time
+
+
+def percentile(sorted_values, fraction):
+    """
+    计算已排序样本的分位数（最近秩法）
+
+    Args:
+        sorted_values: 升序排列的样本列表
+        fraction: 分位（0~1之间，例如0.99表示p99）
+
+    Returns:
+        float: 分位数值，样本为空时返回0
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(len(sorted_values) * fraction)))
+    return sorted_values[index]
+
+
+def summarize(samples, cpu_seconds=None):
+    """
+    汇总耗时样本
+
+    Args:
+        samples: 每次调用的耗时列表（秒）
+        cpu_seconds: 可选，整个测量过程消耗的CPU时间（秒）
+
+    Returns:
+        dict: 包含count、total、mean、p50、p95、p99、max、ops_per_sec的统计结果
+    """
+    ordered = sorted(samples)
+    total = sum(ordered)
+    count = len(ordered)
+    result = {
+        "count": count,
+        "total": total,
+        "mean": total / count if count else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+        "ops_per_sec": count / total if total else 0.0,
+    }
+    if cpu_seconds is not None:
+        result["cpu_per_op"] = cpu_seconds / count if count else 0.0
+    return result
+
+
+def measure(func, iterations=1000, warmup=10, interval=0.0):
+    """
+    重复调用函数并统计每次调用的耗时
+
+    Args:
+        func: 无参可调用对象
+        iterations: 计时调用次数
+        warmup: 预热调用次数（不计入统计）
+        interval: 两次调用之间的间隔（秒），用于模拟请求到达速率，不计入耗时
+
+    Returns:
+        dict: summarize()的统计结果
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    # 注意：存在后台线程时，cpu_seconds包含后台线程消耗的CPU时间
+    cpu_start = time.process_time()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+        if interval:
+            time.sleep(interval)
+    cpu_seconds = time.process_time() - cpu_start
+
+    return summarize(samples, cpu_seconds=cpu_seconds)
+
+
+def format_result(name, stats):
+    """
+    将统计结果格式化为单行文本
+
+    Args:
+        name: 测试项名称
+        stats: summarize()的统计结果
+
+    Returns:
+        str: 格式化后的结果行（耗时单位为毫秒）
+    """
+    line = (
+        f"{name:<32} n={stats['count']:<7} "
+        f"mean={stats['mean'] * 1000:8.3f}ms "
+        f"p50={stats['p50'] * 1000:8.3f}ms "
+        f"p95={stats['p95'] * 1000:8.3f}ms "
+        f"p99={stats['p99'] * 1000:8.3f}ms "
+        f"ops/s={stats['ops_per_sec']:10.1f}"
+    )
+    if "cpu_per_op" in stats:
+        line += f" cpu/op={stats['cpu_per_op'] * 1000:8.3f}ms"
+    return line
@@ -0,0 +1,99 @@
+"""带连接池的MySQL数据库后端
+
+在Django的MySQL后端上增加apps.common.db.pool连接池，DATABASES中配置：
+
+    "ENGINE": "apps.common.db.backends.mysql",
+    "CONN_MAX_AGE": 0,
+    "POOL": {"MIN_SIZE": 2, "MAX_SIZE": 10, ...},
+
+- 连接建立（get_new_connection）从连接池取出，关闭（请求结束时）归还连接池，
+  CONN_MAX_AGE应为0，由连接池决定连接的复用和回收
+- 会话初始化（隔离级别等SET语句）只在连接新建时执行一次，autocommit状态不变时
+  不再发送SET autocommit
+- 连接在事务中被关闭时直接断开，不归还；发生过数据库错误的连接下次取出前先PING
+- 未配置POOL（或MAX_SIZE为0）时与Django的MySQL后端相同
+"""
+
+from apps.common.db.pool import ConnectionPool, PoolTimeout, get_pool
+from django.db.backends.mysql import base
+
+Database = base.Database
+
+
+def _ping(connection):
+    connection.ping()
+    return True
+
+
+def _reset(connection):
+    # 自动提交模式下没有未结束的事务
+    if not connection.get_autocommit():
+        connection.rollback()
+    return True
+
+
+def _close(connection):
+    connection.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """从连接池取用连接的MySQL后端"""
+
+    _pool = None
+
+    def _get_pool(self, conn_params):
+        config = self.settings_dict.get("POOL")
+        if not config or not config.get("MAX_SIZE", 1):
+            return None
+        key = (
+            self.alias,
+            conn_params.get("host"),
+            conn_params.get("port"),
+            conn_params.get("unix_socket"),
+            conn_params.get("database"),
+            conn_params.get("user"),
+        )
+
+        def connect():
+            connection = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            connection._pool_initialized = False
+            return connection
+
+        return get_pool(
+            key,
+            lambda: ConnectionPool(self.alias, connect, _ping, _reset, _close, config),
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self._get_pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = pool.checkout()
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+        self._pool = pool
+        return connection
+
+    def init_connection_state(self):
+        if getattr(self.connection, "_pool_initialized", False):
+            return
+        super().init_connection_state()
+        if self._pool is not None:
+            self.connection._pool_initialized = True
+
+    def _set_autocommit(self, autocommit):
+        # 复用的连接通常已处于目标状态，避免多一次往返
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
+
+    def _close(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.checkin(
+                self.connection,
+                reusable=not self.in_atomic_block,
+                verify=self.errors_occurred,
+            )
@@ -0,0 +1,299 @@
+"""数据库连接池
+
+每个进程（gunicorn worker、Celery worker子进程）为每个数据库别名维护一个连接池，
+Django在请求结束关闭连接时把连接归还连接池，下一个请求（任意线程）直接取用，
+省去TCP握手、认证和会话初始化。
+
+- MIN_SIZE/MAX_SIZE: 最少保留的空闲连接数/最多打开的连接数。连接全部占用时，
+  取连接最多等待TIMEOUT秒，超时抛出PoolTimeout
+- MAX_LIFETIME: 连接建立超过该秒数后不再复用（应小于MySQL的wait_timeout）
+- MAX_IDLE: 超过MIN_SIZE的空闲连接闲置超过该秒数后关闭
+- CHECK_IDLE: 取出闲置超过该秒数的连接时先执行健康检查（PING），失败则丢弃并
+  重新取用；刚归还的连接不检查，避免每次取用都多一次往返
+
+连接池与具体驱动无关，由调用方提供创建、健康检查、归还前重置和关闭连接的函数。
+fork后的子进程不复用父进程的连接池（父子进程共享socket）。
+"""
+
+import collections
+import os
+import threading
+import time
+
+from apps.common import metrics
+
+DEFAULT_MIN_SIZE = 2
+DEFAULT_MAX_SIZE = 10
+DEFAULT_MAX_LIFETIME = 1800
+DEFAULT_MAX_IDLE = 300
+DEFAULT_TIMEOUT = 5
+DEFAULT_CHECK_IDLE = 1
+
+POOL_CONNECTIONS = metrics.gauge("db_pool_connections", "连接池中的连接数", ["alias", "state"])
+POOL_WAIT = metrics.histogram(
+    "db_pool_wait_seconds",
+    "从连接池取连接的等待时间",
+    ["alias"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+POOL_CREATED = metrics.counter(
+    "db_pool_connections_created_total", "连接池新建的连接数", ["alias"]
+)
+POOL_CLOSED = metrics.counter(
+    "db_pool_connections_closed_total",
+    "连接池关闭的连接数（lifetime、idle、unhealthy、discarded）",
+    ["alias", "reason"],
+)
+POOL_TIMEOUTS = metrics.counter("db_pool_timeouts_total", "等待连接超时的次数", ["alias"])
+
+
+def get_pool_config(config):
+    """
+    补全连接池配置（DATABASES[alias]["POOL"]）
+
+    Returns:
+        dict: MIN_SIZE、MAX_SIZE、MAX_LIFETIME、MAX_IDLE、TIMEOUT、CHECK_IDLE
+    """
+    config = config or {}
+    return {
+        "MIN_SIZE": config.get("MIN_SIZE", DEFAULT_MIN_SIZE),
+        "MAX_SIZE": config.get("MAX_SIZE", DEFAULT_MAX_SIZE),
+        "MAX_LIFETIME": config.get("MAX_LIFETIME", DEFAULT_MAX_LIFETIME),
+        "MAX_IDLE": config.get("MAX_IDLE", DEFAULT_MAX_IDLE),
+        "TIMEOUT": config.get("TIMEOUT", DEFAULT_TIMEOUT),
+        "CHECK_IDLE": config.get("CHECK_IDLE", DEFAULT_CHECK_IDLE),
+    }
+
+
+class PoolTimeout(Exception):
+    """等待TIMEOUT秒后仍没有可用连接"""
+
+
+class _Entry:
+    __slots__ = ("connection", "created_at", "returned_at")
+
+    def __init__(self, connection, created_at):
+        self.connection = connection
+        self.created_at = created_at
+        self.returned_at = created_at
+
+
+class ConnectionPool:
+    """线程安全的连接池"""
+
+    def __init__(self, alias, connect, check, reset, close, config=None):
+        """
+        Args:
+            alias: 数据库别名（指标标签）
+            connect: 创建新连接的函数
+            check: 健康检查函数，连接可用时返回True
+            reset: 归还前重置连接状态的函数（例如回滚未结束的事务）
+            close: 关闭连接的函数
+            config: DATABASES[alias]["POOL"]
+        """
+        self.alias = alias
+        self.config = get_pool_config(config)
+        self._connect = connect
+        self._check = check
+        self._reset = reset
+        self._close = close
+        self._idle = collections.deque()
+        self._in_use = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self._wait = POOL_WAIT.labels(alias=alias)
+        self._idle_gauge = POOL_CONNECTIONS.labels(alias=alias, state="idle")
+        self._in_use_gauge = POOL_CONNECTIONS.labels(alias=alias, state="in_use")
+
+    def checkout(self):
+        """
+        取出一个连接
+
+        Returns:
+            object: 数据库连接
+
+        Raises:
+            PoolTimeout: 等待TIMEOUT秒后仍没有可用连接
+        """
+        start = time.monotonic()
+        deadline = start + self.config["TIMEOUT"]
+        while True:
+            entry = self._acquire(deadline)
+            if entry is None:
+                self._wait.observe(time.monotonic() - start)
+                return self._create()
+
+            now = time.monotonic()
+            if now - entry.created_at >= self.config["MAX_LIFETIME"]:
+                self._discard(entry, "lifetime")
+                continue
+            if now - entry.returned_at >= self.config["CHECK_IDLE"] and not self._safe(
+                self._check, entry.connection
+            ):
+                self._discard(entry, "unhealthy")
+                continue
+            self._wait.observe(now - start)
+            return entry.connection
+
+    def _acquire(self, deadline):
+        """取一个空闲连接；返回None表示调用方可以新建连接"""
+        with self._condition:
+            while True:
+                if self._idle:
+                    # 后进先出：优先复用最近归还的连接，多余的连接闲置后关闭
+                    entry = self._idle.pop()
+                    self._in_use[id(entry.connection)] = entry
+                    self._update_gauges()
+                    return entry
+                if self._size < self.config["MAX_SIZE"]:
+                    self._size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    POOL_TIMEOUTS.labels(alias=self.alias).inc()
+                    raise PoolTimeout(
+                        f"数据库{self.alias}连接池已满（{self.config['MAX_SIZE']}），"
+                        f"等待{self.config['TIMEOUT']}秒后仍无可用连接"
+                    )
+                self._condition.wait(remaining)
+
+    def _create(self):
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        POOL_CREATED.labels(alias=self.alias).inc()
+        with self._condition:
+            self._in_use[id(connection)] = _Entry(connection, time.monotonic())
+            self._update_gauges()
+        return connection
+
+    def checkin(self, connection, reusable=True, verify=False):
+        """
+        归还连接
+
+        Args:
+            connection: checkout()取出的连接
+            reusable: False时直接关闭（例如连接在事务中被关闭）
+            verify: True时下次取出前先做健康检查（例如连接上发生过错误）
+        """
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # 不属于本连接池（例如fork前取出的连接）
+            self._safe(self._close, connection)
+            return
+
+        if reusable and not self._safe(self._reset, connection):
+            reusable = False
+        now = time.monotonic()
+        if not reusable or now - entry.created_at >= self.config["MAX_LIFETIME"]:
+            self._discard(entry, "discarded" if not reusable else "lifetime")
+            return
+
+        entry.returned_at = float("-inf") if verify else now
+        expired = []
+        with self._condition:
+            self._idle.append(entry)
+            # 最早归还的连接在队首，超过MIN_SIZE的部分闲置超时后关闭
+            while (
+                len(self._idle) > self.config["MIN_SIZE"]
+                and now - self._idle[0].returned_at >= self.config["MAX_IDLE"]
+                and self._idle[0] is not entry
+            ):
+                expired.append(self._idle.popleft())
+                self._size -= 1
+            self._update_gauges()
+            self._condition.notify()
+        for stale in expired:
+            POOL_CLOSED.labels(alias=self.alias, reason="idle").inc()
+            self._safe(self._close, stale.connection)
+
+    def _discard(self, entry, reason):
+        """关闭已取出的连接并释放名额"""
+        POOL_CLOSED.labels(alias=self.alias, reason=reason).inc()
+        self._safe(self._close, entry.connection)
+        with self._condition:
+            self._in_use.pop(id(entry.connection), None)
+            self._size -= 1
+            self._update_gauges()
+            self._condition.notify()
+
+    def close(self):
+        """关闭全部空闲连接（正在使用的连接归还时关闭）"""
+        with self._condition:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._size -= len(idle)
+            self.config = dict(self.config, MAX_LIFETIME=0)
+            self._update_gauges()
+        for entry in idle:
+            self._safe(self._close, entry.connection)
+
+    def stats(self):
+        """
+        Returns:
+            dict: size、idle、in_use
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+            }
+
+    def _update_gauges(self):
+        self._idle_gauge.set(len(self._idle))
+        self._in_use_gauge.set(len(self._in_use))
+
+    @staticmethod
+    def _safe(func, connection):
+        try:
+            result = func(connection)
+        except Exception:
+            return False
+        return result is not False
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+# fork后丢弃的父进程连接池，保留引用避免连接对象被回收时关闭父进程仍在使用的socket
+_inherited = []
+
+
+def get_pool(key, factory):
+    """
+    获取当前进程中key对应的连接池
+
+    Args:
+        key: 连接池标识（别名和连接参数）
+        factory: 连接池不存在时创建连接池的函数
+
+    Returns:
+        ConnectionPool: 连接池
+    """
+    global _pools, _pools_pid
+    pid = os.getpid()
+    pool = _pools.get(key) if _pools_pid == pid else None
+    if pool is None:
+        with _pools_lock:
+            if _pools_pid != pid:
+                _inherited.append(_pools)
+                _pools = {}
+                _pools_pid = pid
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = factory()
+    return pool
+
+
+def close_pools():
+    """关闭当前进程全部连接池的空闲连接"""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,277 @@
+"""读写分离数据库路由
+
+DATABASE_ROUTING配置了只读副本（DATABASES中的别名）时，ReplicaRouter：
+
+- 写操作（save/update/delete、select_for_update等）和事务中的查询使用default
+- 其他读查询发往副本，配置多个副本时随机选择
+- 读己之写：发生写操作后STICKY_SECONDS秒内，当前上下文（请求、线程、Celery任务）
+  的读查询都使用default；ReplicaRoutingMiddleware通过Cookie把这段时间延续到同一
+  客户端的后续请求（例如注册后立即验证邮箱或访问需要认证的接口）
+- 延迟感知：每个进程最多每LAG_CHECK_INTERVAL秒查询一次副本的复制延迟（MySQL的
+  Seconds_Behind_Source），延迟超过MAX_LAG、复制中断或副本不可用时读查询回退default
+
+副本可能尚未同步其他客户端刚写入的数据，"查不到即失败"的查找使用read_or_primary()，
+副本上没有结果时回到default重查。
+
+配置（DATABASE_ROUTING）:
+    REPLICAS: 副本别名列表（默认["replica"]，DATABASES中不存在的别名忽略）
+    MAX_LAG: 可接受的最大复制延迟秒数（默认5）
+    LAG_CHECK_INTERVAL: 复制延迟检查间隔秒数（默认5）
+    STICKY_SECONDS: 写操作后读查询固定使用default的秒数（默认10）
+    COOKIE_NAME: 延续读己之写的Cookie名称（默认db_primary_until）
+"""
+
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from apps.common import metrics
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLICAS = ["replica"]
+DEFAULT_MAX_LAG = 5
+DEFAULT_LAG_CHECK_INTERVAL = 5
+DEFAULT_STICKY_SECONDS = 10
+DEFAULT_COOKIE_NAME = "db_primary_until"
+
+# (语句, 延迟列)：MySQL 8.0.22起使用REPLICA术语，旧版本只支持SLAVE
+MYSQL_LAG_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+)
+
+REPLICA_LAG = metrics.gauge(
+    "db_replica_lag_seconds", "只读副本的复制延迟（复制中断或不可用时为-1）", ["alias"]
+)
+ROUTED_READS = metrics.counter(
+    "db_router_reads_total",
+    "读查询的路由结果（replica、pinned、atomic、lagging）",
+    ["reason"],
+)
+LAG_CHECK_ERRORS = metrics.counter(
+    "db_replica_lag_check_errors_total",
+    "无法查询副本复制延迟的次数（query: 复制状态语句均执行失败，例如缺少REPLICATION " "CLIENT权限；connection: 副本不可用）",
+    ["alias", "reason"],
+)
+PRIMARY_FALLBACKS = metrics.counter(
+    "db_replica_fallbacks_total", "副本上查不到结果后回到default重查的次数"
+)
+
+_routed = {
+    reason: ROUTED_READS.labels(reason=reason)
+    for reason in ("replica", "pinned", "atomic", "lagging")
+}
+
+# 当前上下文的读查询在该时刻（time.time()）之前使用default
+_primary_until = contextvars.ContextVar("db_primary_until", default=0.0)
+
+# 别名 → (检查时刻, 复制延迟)
+_lags = {}
+_lags_lock = threading.Lock()
+
+
+def get_routing_config():
+    """
+    读取DATABASE_ROUTING配置
+
+    Returns:
+        dict: REPLICAS、MAX_LAG、LAG_CHECK_INTERVAL、STICKY_SECONDS、COOKIE_NAME
+    """
+    config = getattr(settings, "DATABASE_ROUTING", None) or {}
+    return {
+        "REPLICAS": [
+            alias
+            for alias in config.get("REPLICAS", DEFAULT_REPLICAS)
+            if alias in settings.DATABASES and alias != DEFAULT_DB_ALIAS
+        ],
+        "MAX_LAG": config.get("MAX_LAG", DEFAULT_MAX_LAG),
+        "LAG_CHECK_INTERVAL": config.get(
+            "LAG_CHECK_INTERVAL", DEFAULT_LAG_CHECK_INTERVAL
+        ),
+        "STICKY_SECONDS": config.get("STICKY_SECONDS", DEFAULT_STICKY_SECONDS),
+        "COOKIE_NAME": config.get("COOKIE_NAME", DEFAULT_COOKIE_NAME),
+    }
+
+
+def pin_primary(seconds):
+    """当前上下文在接下来seconds秒内的读查询使用default"""
+    until = time.time() + seconds
+    if until > _primary_until.get():
+        _primary_until.set(until)
+
+
+def get_primary_until():
+    """当前上下文读查询使用default的截止时刻（time.time()）"""
+    return _primary_until.get()
+
+
+@contextlib.contextmanager
+def use_primary():
+    """代码块内的读查询使用default"""
+    token = _primary_until.set(float("inf"))
+    try:
+        yield
+    finally:
+        _primary_until.reset(token)
+
+
+@contextlib.contextmanager
+def primary_until(until):
+    """
+    代码块内按until（time.time()）恢复读己之写状态，退出时还原
+
+    ReplicaRoutingMiddleware在请求开始时用Cookie中的时刻调用，避免同一线程上
+    前一个请求的状态影响下一个请求。
+    """
+    token = _primary_until.set(until)
+    try:
+        yield
+    finally:
+        _primary_until.reset(token)
+
+
+def measure_lag(alias):
+    """
+    查询副本的复制延迟
+
+    无法查询延迟时（复制状态语句均执行失败、副本不可用）记录警告日志并计入
+    LAG_CHECK_ERRORS，与复制延迟过大区分。
+
+    Returns:
+        float: 延迟秒数；复制中断、无法查询或副本不可用时为inf，不是MySQL副本时为0
+    """
+    connection = connections[alias]
+    try:
+        if connection.vendor != "mysql":
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            errors = []
+            for statement, column in MYSQL_LAG_QUERIES:
+                try:
+                    cursor.execute(statement)
+                except DatabaseError as error:
+                    errors.append(f"{statement}: {error}")
+                    continue
+                row = cursor.fetchone()
+                if row is None:
+                    # 没有复制配置（例如测试中副本指向default）
+                    return 0.0
+                columns = [description[0] for description in cursor.description]
+                lag = dict(zip(columns, row)).get(column)
+                return float("inf") if lag is None else float(lag)
+        LAG_CHECK_ERRORS.labels(alias=alias, reason="query").inc()
+        logger.warning(
+            f"无法查询副本{alias}的复制延迟（检查复制状态权限），读查询使用default: " f"{'; '.join(errors)}"
+        )
+    except Exception as error:
+        LAG_CHECK_ERRORS.labels(alias=alias, reason="connection").inc()
+        logger.warning(f"查询副本{alias}复制延迟失败: {error}", exc_info=True)
+    return float("inf")
+
+
+def get_replica_lag(alias, interval):
+    """
+    副本的复制延迟（进程内缓存interval秒）
+
+    缓存过期时由一个线程检查，其他线程沿用上次的结果，不等待检查完成。
+    """
+    entry = _lags.get(alias)
+    if entry is not None and time.monotonic() - entry[0] < interval:
+        return entry[1]
+    if not _lags_lock.acquire(blocking=entry is None):
+        return entry[1]
+    try:
+        entry = _lags.get(alias)
+        if entry is None or time.monotonic() - entry[0] >= interval:
+            lag = measure_lag(alias)
+            entry = _lags[alias] = (time.monotonic(), lag)
+            REPLICA_LAG.labels(alias=alias).set(lag if lag != float("inf") else -1)
+        return entry[1]
+    finally:
+        _lags_lock.release()
+
+
+def reset_replica_lags():
+    """清空复制延迟缓存，下次路由时重新检查"""
+    with _lags_lock:
+        _lags.clear()
+
+
+def read_or_primary(queryset, fetch):
+    """
+    在路由选择的数据库上执行fetch(queryset)，查询发往副本且结果为空时在default重查
+
+    用于刚写入就可能被读取、查不到会直接报错的查找（新用户登录、刚签发的令牌、
+    新用户的JWT）。结果非空时只有一次查询。
+
+    Args:
+        queryset: 查询集
+        fetch: 执行查询的函数，例如list或lambda qs: qs.first()
+
+    Returns:
+        fetch的返回值
+    """
+    db = queryset.db
+    result = fetch(queryset.using(db))
+    if not result and db != DEFAULT_DB_ALIAS:
+        PRIMARY_FALLBACKS.inc()
+        result = fetch(queryset.using(DEFAULT_DB_ALIAS))
+    return result
+
+
+class ReplicaRouter:
+    """读查询发往只读副本、写操作使用default的数据库路由"""
+
+    def db_for_read(self, model, **hints):
+        config = get_routing_config()
+        replicas = config["REPLICAS"]
+        if not replicas:
+            return None
+
+        if _primary_until.get() > time.time():
+            _routed["pinned"].inc()
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # 事务中的读查询需要看到本事务的写入
+            _routed["atomic"].inc()
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # 关联对象与实例来自同一个库
+            return instance._state.db
+
+        healthy = [
+            alias
+            for alias in replicas
+            if get_replica_lag(alias, config["LAG_CHECK_INTERVAL"]) <= config["MAX_LAG"]
+        ]
+        if not healthy:
+            _routed["lagging"].inc()
+            return DEFAULT_DB_ALIAS
+        _routed["replica"].inc()
+        return healthy[0] if len(healthy) == 1 else random.choice(healthy)
+
+    def db_for_write(self, model, **hints):
+        config = get_routing_config()
+        if config["REPLICAS"]:
+            pin_primary(config["STICKY_SECONDS"])
+        # 显式返回default：从副本读出的实例保存时也写入default
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与default数据相同
+        databases = {DEFAULT_DB_ALIAS, *get_routing_config()["REPLICAS"]}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,277 @@
+"""依赖健康检查模块
+
+健康检查端点被k8s存活/就绪探针、nginx和docker healthcheck频繁访问。每次访问都
+直接探测依赖时，探测本身会给数据库和Redis带来额外负载，依赖变慢时请求还会堆积。
+
+本模块缓存各依赖的探测结果：
+
+- 结果未超过INTERVAL秒时直接返回，端点开销为O(1)
+- 结果过期时由一个后台线程刷新，请求仍立即返回当前结果（先返回旧结果，后台更新）
+- 进程内第一次访问时同步探测一次，后续请求等待该次探测完成
+- 同一时刻每个进程最多一轮刷新；单个探测超过TIMEOUT秒记为timeout，仍未结束的
+  探测不会被重复提交
+
+探测项（HEALTH_CHECKS["PROBES"]）：
+
+- database: 各数据库连接执行SELECT 1（关键）
+- cache: django-redis执行PING，其他缓存后端执行一次读取（关键）
+- celery_broker: 读取Celery队列长度，超过CELERY_MAX_DEPTH时记为异常
+- smtp: 与SMTP服务器建立TCP连接（非SMTP邮件后端时跳过）
+
+关键探测失败时整体状态为unhealthy（就绪检查返回503），只有非关键探测失败时为
+degraded（仍返回200）。每个探测的耗时记入health_probe_duration_seconds直方图。
+"""
+
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+
+from apps.common import metrics
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_SKIPPED = "skipped"
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+UNHEALTHY = "unhealthy"
+
+DEFAULT_INTERVAL = 10
+DEFAULT_TIMEOUT = 2
+DEFAULT_PROBES = ("database", "cache")
+DEFAULT_CELERY_QUEUE = "celery"
+DEFAULT_CELERY_MAX_DEPTH = 10000
+
+PROBE_DURATION = metrics.histogram(
+    "health_probe_duration_seconds", "依赖健康探测耗时", ["probe"]
+)
+PROBE_UP = metrics.gauge("health_probe_up", "依赖健康探测结果（1正常，0异常）", ["probe"])
+
+
+def get_health_config():
+    """
+    读取HEALTH_CHECKS配置
+
+    Returns:
+        dict: INTERVAL、TIMEOUT、PROBES、CELERY_QUEUE、CELERY_MAX_DEPTH
+    """
+    config = getattr(settings, "HEALTH_CHECKS", None) or {}
+    return {
+        "INTERVAL": config.get("INTERVAL", DEFAULT_INTERVAL),
+        "TIMEOUT": config.get("TIMEOUT", DEFAULT_TIMEOUT),
+        "PROBES": tuple(config.get("PROBES", DEFAULT_PROBES)),
+        "CELERY_QUEUE": config.get("CELERY_QUEUE", DEFAULT_CELERY_QUEUE),
+        "CELERY_MAX_DEPTH": config.get("CELERY_MAX_DEPTH", DEFAULT_CELERY_MAX_DEPTH),
+    }
+
+
+class ProbeFailed(Exception):
+    """探测成功执行但结果异常（例如队列积压）"""
+
+
+def probe_database(config):
+    """各数据库连接执行SELECT 1"""
+    for alias in connections:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    return {"databases": list(connections)}
+
+
+def probe_cache(config):
+    """django-redis执行PING，其他缓存后端执行一次读取"""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend == "django_redis.cache.RedisCache":
+        from django_redis import get_redis_connection
+
+        get_redis_connection("default").ping()
+    else:
+        caches["default"].get("health_check:probe")
+    return {"backend": backend.rsplit(".", 1)[-1]}
+
+
+def probe_celery_broker(config):
+    """读取Celery队列长度"""
+    from bravo.celery import app
+
+    queue = config["CELERY_QUEUE"]
+    with app.connection_for_read() as connection:
+        connection.ensure_connection(max_retries=1, timeout=config["TIMEOUT"])
+        try:
+            with connection.channel() as channel:
+                depth = channel.queue_declare(queue=queue, passive=True).message_count
+        except connection.channel_errors:
+            # 队列尚未声明（没有积压的消息）
+            depth = 0
+    if depth > config["CELERY_MAX_DEPTH"]:
+        raise ProbeFailed(f"队列{queue}积压{depth}条消息")
+    return {"queue": queue, "depth": depth}
+
+
+def probe_smtp(config):
+    """与SMTP服务器建立TCP连接"""
+    if not settings.EMAIL_BACKEND.endswith("smtp.EmailBackend"):
+        return None
+    address = (settings.EMAIL_HOST, settings.EMAIL_PORT)
+    socket.create_connection(address, timeout=config["TIMEOUT"]).close()
+    return {"host": settings.EMAIL_HOST, "port": settings.EMAIL_PORT}
+
+
+# 探测名 → (探测函数, 是否关键)
+PROBES = {
+    "database": (probe_database, True),
+    "cache": (probe_cache, True),
+    "celery_broker": (probe_celery_broker, False),
+    "smtp": (probe_smtp, False),
+}
+
+
+def run_probe(name, config):
+    """
+    执行一个探测并记录耗时
+
+    Returns:
+        dict: status、critical、latency_ms、checked_at、detail
+    """
+    probe, critical = PROBES[name]
+    start = time.perf_counter()
+    try:
+        detail = probe(config)
+        status = STATUS_OK if detail is not None else STATUS_SKIPPED
+    except Exception as error:
+        detail = {"error": str(error) or type(error).__name__}
+        status = STATUS_ERROR
+    finally:
+        # 探测在线程池中执行，关闭本线程的数据库连接
+        connections.close_all()
+    elapsed = time.perf_counter() - start
+
+    PROBE_DURATION.labels(probe=name).observe(elapsed)
+    PROBE_UP.labels(probe=name).set(0 if status == STATUS_ERROR else 1)
+    return {
+        "status": status,
+        "critical": critical,
+        "latency_ms": round(elapsed * 1000, 3),
+        "checked_at": time.time(),
+        "detail": detail,
+    }
+
+
+class HealthMonitor:
+    """缓存探测结果，过期时在后台刷新"""
+
+    def __init__(self):
+        self._results = {}
+        self._refreshed_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._in_flight = {}
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # fork后的子进程中线程池的线程不存在，需要重新创建
+        if self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=len(PROBES), thread_name_prefix="health-probe"
+                    )
+                    self._in_flight = {}
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def results(self):
+        """
+        获取各依赖的探测结果
+
+        Returns:
+            dict: 探测名 → run_probe()的结果
+        """
+        config = get_health_config()
+        if not self._has_results(config):
+            # 进程内第一次访问：同步探测，并发的首次请求等待同一轮结果
+            with self._refresh_lock:
+                if not self._has_results(config):
+                    self.refresh(config)
+        elif time.time() - self._refreshed_at >= config["INTERVAL"]:
+            if self._refresh_lock.acquire(blocking=False):
+                threading.Thread(
+                    target=self._refresh_in_background,
+                    args=(config,),
+                    name="health-refresh",
+                    daemon=True,
+                ).start()
+        return {name: self._results[name] for name in config["PROBES"]}
+
+    def _has_results(self, config):
+        return all(name in self._results for name in config["PROBES"])
+
+    def _refresh_in_background(self, config):
+        try:
+            self.refresh(config)
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self, config=None):
+        """执行一轮探测（调用方负责保证同一时刻只有一轮）"""
+        config = config or get_health_config()
+        futures = {}
+        for name in config["PROBES"]:
+            future = self._in_flight.get(name)
+            if future is None or future.done():
+                future = self._get_executor().submit(run_probe, name, config)
+                self._in_flight[name] = future
+            futures[name] = future
+
+        done, _ = wait_futures(futures.values(), timeout=config["TIMEOUT"])
+        results = dict(self._results)
+        for name, future in futures.items():
+            if future in done:
+                results[name] = future.result()
+            else:
+                PROBE_UP.labels(probe=name).set(0)
+                results[name] = {
+                    "status": STATUS_TIMEOUT,
+                    "critical": PROBES[name][1],
+                    "latency_ms": None,
+                    "checked_at": time.time(),
+                    "detail": {"error": f"探测超过{config['TIMEOUT']}秒未完成"},
+                }
+        self._results = results
+        self._refreshed_at = time.time()
+
+    def reset(self):
+        """清空探测结果（测试用）"""
+        with self._refresh_lock:
+            self._results = {}
+            self._refreshed_at = 0.0
+
+
+monitor = HealthMonitor()
+
+
+def overall_status(results):
+    """
+    根据各探测结果计算整体状态
+
+    Returns:
+        str: healthy、degraded或unhealthy
+    """
+    failed = [
+        result
+        for result in results.values()
+        if result["status"] in (STATUS_ERROR, STATUS_TIMEOUT)
+    ]
+    if any(result["critical"] for result in failed):
+        return UNHEALTHY
+    if failed:
+        return DEGRADED
+    return HEALTHY
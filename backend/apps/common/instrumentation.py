@@ -0,0 +1,193 @@
+"""缓存和Celery任务的指标采集
+
+install()在应用启动时调用（CommonConfig.ready）：
+
+- 缓存：包装django.core.cache.caches创建的每个缓存实例的读写方法，记录各操作
+  耗时，get/get_many记录命中和未命中次数。只替换实例上的方法，缓存后端类型
+  不变（get_redis_connection、按BACKEND选择实现的代码不受影响）；BaseCache的
+  get_many等方法内部调用self.get时只记录最外层操作
+- Celery：通过task_prerun/task_postrun信号记录任务耗时，按任务名和结束状态分类
+"""
+
+import functools
+import threading
+import time
+
+from apps.common import metrics, prometheus
+from django.core.cache import caches
+
+# 缓存操作通常在亚毫秒级
+CACHE_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# get和get_many单独包装（同时记录命中/未命中）
+CACHE_OPERATIONS = (
+    "set",
+    "set_many",
+    "add",
+    "delete",
+    "delete_many",
+    "incr",
+    "decr",
+    "touch",
+    "has_key",
+)
+
+CACHE_DURATION = metrics.histogram(
+    "cache_operation_duration_seconds",
+    "缓存操作耗时",
+    ["alias", "operation"],
+    buckets=CACHE_BUCKETS,
+)
+CACHE_REQUESTS = metrics.counter(
+    "cache_requests_total", "缓存读取结果（hit、miss）", ["alias", "result"]
+)
+TASK_DURATION = metrics.histogram(
+    "celery_task_duration_seconds",
+    "Celery任务执行耗时",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+
+_MISSING = object()
+_local = threading.local()
+
+
+class _Timer:
+    """记录最外层缓存操作的耗时，嵌套调用（BaseCache.get_many内部的get等）不记录"""
+
+    __slots__ = ("duration", "start")
+
+    def __init__(self, duration):
+        self.duration = duration
+
+    def __enter__(self):
+        if getattr(_local, "active", False):
+            self.start = None
+            return False
+        _local.active = True
+        self.start = time.perf_counter()
+        return True
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            self.duration.observe(time.perf_counter() - self.start)
+            _local.active = False
+
+
+def _timed(alias, operation, method):
+    duration = CACHE_DURATION.labels(alias=alias, operation=operation)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _Timer(duration):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument_cache(cache, alias):
+    """
+    包装缓存实例的读写方法
+
+    Returns:
+        BaseCache: 同一个缓存实例
+    """
+    if getattr(cache, "_metrics_instrumented", False):
+        return cache
+    hits = CACHE_REQUESTS.labels(alias=alias, result="hit")
+    misses = CACHE_REQUESTS.labels(alias=alias, result="miss")
+    get_duration = CACHE_DURATION.labels(alias=alias, operation="get")
+    get_many_duration = CACHE_DURATION.labels(alias=alias, operation="get_many")
+    original_get = cache.get
+    original_get_many = cache.get_many
+
+    @functools.wraps(original_get)
+    def get(key, default=None, version=None):
+        with _Timer(get_duration) as outermost:
+            value = original_get(key, _MISSING, version=version)
+        if value is _MISSING:
+            if outermost:
+                misses.inc()
+            return default
+        if outermost:
+            hits.inc()
+        return value
+
+    @functools.wraps(original_get_many)
+    def get_many(keys, version=None):
+        keys = list(keys)
+        with _Timer(get_many_duration) as outermost:
+            values = original_get_many(keys, version=version)
+        if outermost:
+            hits.inc(len(values))
+            misses.inc(len(keys) - len(values))
+        return values
+
+    cache.get = get
+    cache.get_many = get_many
+    for operation in CACHE_OPERATIONS:
+        method = getattr(cache, operation)
+        setattr(cache, operation, _timed(alias, operation, method))
+    cache._metrics_instrumented = True
+    return cache
+
+
+def instrument_caches():
+    """为之后创建的每个缓存实例（各线程、各别名）安装指标采集"""
+    if getattr(caches, "_metrics_instrumented", False):
+        return
+    create_connection = caches.create_connection
+
+    def create_instrumented(alias):
+        return instrument_cache(create_connection(alias), alias)
+
+    caches.create_connection = create_instrumented
+    caches._metrics_instrumented = True
+
+
+_task_starts = {}
+
+
+def _task_prerun(task_id=None, **kwargs):
+    _task_starts[task_id] = time.perf_counter()
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    start = _task_starts.pop(task_id, None)
+    if start is None:
+        return
+    TASK_DURATION.labels(task=task.name, state=state or "UNKNOWN").observe(
+        time.perf_counter() - start
+    )
+    prometheus.maybe_flush()
+
+
+def instrument_celery():
+    """连接Celery任务信号"""
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid="metrics_prerun")
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid="metrics_postrun")
+
+
+def install():
+    """METRICS["ENABLED"]为True时安装缓存和Celery指标采集"""
+    if not prometheus.get_metrics_config()["ENABLED"]:
+        return
+    instrument_caches()
+    instrument_celery()
@@ -0,0 +1,75 @@
+"""健康检查基准测试命令
+
+对比就绪检查每次请求直接探测依赖与使用缓存探测结果（apps.common.health）时的
+耗时，以及每次请求实际执行的探测次数。
+
+--latency-ms为每个探测额外增加的耗时，模拟网络往返或依赖变慢。
+
+用法:
+    python manage.py benchmark_health --iterations 2000 --latency-ms 1
+"""
+
+import itertools
+import time
+
+from apps.common import health
+from apps.common.benchmark import format_result, measure
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+BENCHMARK_PROBES = ("database", "cache")
+
+
+class Command(BaseCommand):
+    help = "对比直接探测依赖与缓存探测结果时健康检查的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000, help="请求次数")
+        parser.add_argument("--latency-ms", type=float, default=1.0, help="每个探测额外的毫秒数")
+
+    def handle(self, *args, **options):
+        latency = options["latency_ms"] / 1000
+        calls = itertools.count()
+        original = dict(health.PROBES)
+
+        def slow(probe):
+            def wrapper(config):
+                next(calls)
+                time.sleep(latency)
+                return probe(config)
+
+            return wrapper
+
+        for name in BENCHMARK_PROBES:
+            probe, critical = original[name]
+            health.PROBES[name] = (slow(probe), critical)
+
+        try:
+            with override_settings(
+                HEALTH_CHECKS={"PROBES": BENCHMARK_PROBES, "INTERVAL": 10}
+            ):
+                config = health.get_health_config()
+
+                def direct():
+                    results = {
+                        name: health.run_probe(name, config)
+                        for name in config["PROBES"]
+                    }
+                    return health.overall_status(results)
+
+                def cached():
+                    return health.overall_status(health.monitor.results())
+
+                health.monitor.reset()
+                for name, func in (("direct", direct), ("cached", cached)):
+                    before = next(calls)
+                    stats = measure(func, options["iterations"], warmup=0)
+                    # 每次next()本身也计数一次
+                    probes = next(calls) - before - 1
+                    self.stdout.write(format_result(name, stats))
+                    self.stdout.write(
+                        f"  探测次数/请求: {probes / (stats['count'] or 1):.4f}"
+                    )
+        finally:
+            health.PROBES.update(original)
+            health.monitor.reset()
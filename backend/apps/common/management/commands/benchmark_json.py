@@ -0,0 +1,80 @@
+"""JSON序列化基准测试命令
+
+对比DRF的JSONRenderer/JSONParser与orjson实现（apps.common.renderers/parsers）
+序列化、解析登录和验证码响应的耗时，以及浏览器请求（Accept含text/html）在启用
+可浏览API时内容协商选中BrowsableAPIRenderer的情况。
+
+用法:
+    python manage.py benchmark_json --iterations 20000
+"""
+
+import io
+import uuid
+
+from apps.common.benchmark import format_result, measure
+from apps.common.parsers import ORJSONParser
+from apps.common.renderers import ORJSONRenderer
+from apps.users.captcha_pool import next_captcha
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.request import Request
+
+BROWSER_ACCEPT = "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+
+
+def login_payload():
+    return {
+        "user": {
+            "id": str(uuid.uuid4()),
+            "email": "benchmark@example.com",
+            "is_email_verified": True,
+        },
+        "token": "eyJhbGciOiJIUzI1NiJ9." + "a" * 200 + ".signature",
+        "refresh_token": "eyJhbGciOiJIUzI1NiJ9." + "b" * 200 + ".signature",
+    }
+
+
+def captcha_payload():
+    captcha_id, captcha_image, _ = next_captcha()
+    return {"captcha_id": captcha_id, "captcha_image": captcha_image, "expires_in": 300}
+
+
+class Command(BaseCommand):
+    help = "对比stdlib json与orjson序列化、解析登录和验证码响应的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000, help="每项调用次数")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        payloads = {"login": login_payload(), "captcha": captcha_payload()}
+
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            self.stdout.write(f"{name}: {len(body)} bytes")
+            for label, renderer, parser in (
+                ("json", JSONRenderer(), JSONParser()),
+                ("orjson", ORJSONRenderer(), ORJSONParser()),
+            ):
+                render = measure(lambda: renderer.render(data), iterations)
+                parse = measure(
+                    lambda: parser.parse(io.BytesIO(body), None, {}), iterations
+                )
+                self.stdout.write(format_result(f"  render {label}", render))
+                self.stdout.write(format_result(f"  parse {label}", parse))
+
+        request = Request(RequestFactory().get("/", HTTP_ACCEPT=BROWSER_ACCEPT))
+        negotiation = DefaultContentNegotiation()
+        for label, renderers in (
+            ("json+browsable", [JSONRenderer(), BrowsableAPIRenderer()]),
+            ("orjson", [ORJSONRenderer()]),
+        ):
+            selected, _ = negotiation.select_renderer(request, renderers)
+            stats = measure(
+                lambda: negotiation.select_renderer(request, renderers), iterations
+            )
+            self.stdout.write(format_result(f"negotiate {label}", stats))
+            self.stdout.write(f"  浏览器请求选中: {type(selected).__name__}")
@@ -0,0 +1,75 @@
+"""指标采集开销基准测试命令
+
+测量Prometheus指标采集带来的额外耗时：
+
+- request: 通过测试客户端请求/health/live/，对比加载和不加载MetricsMiddleware
+- cache get: 对比原始LocMemCache与安装指标采集后的get（命中）
+- observe: 单次直方图observe
+- scrape: 一次/metrics/导出（collect + render）
+
+用法:
+    python manage.py benchmark_metrics --iterations 5000
+"""
+
+from apps.common import prometheus
+from apps.common.benchmark import format_result, measure
+from apps.common.instrumentation import instrument_cache
+from apps.common.metrics import Histogram
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+METRICS_MIDDLEWARE = "apps.common.middleware.MetricsMiddleware"
+
+
+class Command(BaseCommand):
+    help = "测量请求、缓存操作和指标导出的指标采集开销"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000, help="每项次数")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        middleware = [
+            name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE
+        ]
+
+        p50s = {}
+        for name, stack in (
+            ("request (no metrics)", middleware),
+            ("request (metrics)", [METRICS_MIDDLEWARE] + middleware),
+        ):
+            with override_settings(MIDDLEWARE=stack):
+                client = Client()
+                stats = measure(lambda: client.get("/health/live/"), iterations)
+            p50s[name] = stats["p50"]
+            self.stdout.write(format_result(name, stats))
+        overhead = p50s["request (metrics)"] - p50s["request (no metrics)"]
+        self.stdout.write(f"  中间件开销/请求(p50): {overhead * 1e6:.1f}us")
+
+        raw = LocMemCache("benchmark-raw", {})
+        instrumented = instrument_cache(LocMemCache("benchmark", {}), "benchmark")
+        for name, cache in (("cache get (raw)", raw), ("cache get", instrumented)):
+            cache.set("key", "value")
+            stats = measure(lambda: cache.get("key"), iterations)
+            p50s[name] = stats["p50"]
+            self.stdout.write(format_result(name, stats))
+        overhead = p50s["cache get"] - p50s["cache get (raw)"]
+        self.stdout.write(f"  缓存采集开销/操作(p50): {overhead * 1e6:.2f}us")
+
+        histogram = Histogram("benchmark_seconds")
+        self.stdout.write(
+            format_result(
+                "observe", measure(lambda: histogram.observe(0.01), iterations)
+            )
+        )
+        self.stdout.write(
+            format_result(
+                "scrape",
+                measure(
+                    lambda: prometheus.render(prometheus.collect()),
+                    max(iterations // 100, 10),
+                ),
+            )
+        )
@@ -0,0 +1,103 @@
+"""分页基准测试命令
+
+在用户表中插入--rows行数据，对比页码分页（StandardResultsSetPagination：COUNT(*)
++ OFFSET）与键集分页（KeysetPagination）在不同翻页深度的单页耗时。键集分页的
+游标取自目标页的前一行（不计入耗时），与客户端逐页翻到该处时携带的游标相同。
+
+压测数据在事务中插入，结束后回滚。
+
+用法:
+    python manage.py benchmark_pagination --rows 5000000 --page-size 20 --repeat 20
+"""
+
+import time
+from datetime import timedelta
+
+from apps.common.benchmark import format_result, measure
+from apps.common.pagination import KeysetPagination, StandardResultsSetPagination
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+# 翻页深度（占总页数的比例）
+DEPTHS = (0.0, 0.01, 0.1, 0.5, 0.9, 1.0)
+INSERT_BATCH_SIZE = 10000
+ORDERING = ("-date_joined", "id")
+
+
+class Command(BaseCommand):
+    help = "对比页码分页与键集分页在不同翻页深度的单页耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000000, help="插入的用户数")
+        parser.add_argument("--page-size", type=int, default=20, help="每页条数")
+        parser.add_argument("--repeat", type=int, default=20, help="每个深度的请求次数")
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        with transaction.atomic():
+            self.insert(options["rows"])
+            queryset = get_user_model().objects.order_by(*ORDERING)
+            total = queryset.count()
+            pages = max(1, (total + page_size - 1) // page_size)
+            self.stdout.write(f"用户数: {total}  页数: {pages}")
+
+            factory = APIRequestFactory()
+            for depth in DEPTHS:
+                page = min(pages, int(depth * pages) + 1)
+                offset_request = Request(
+                    factory.get("/", {"page": page, "page_size": page_size})
+                )
+                keyset_url = self.keyset_url(queryset, page, page_size)
+                keyset_request = Request(factory.get(keyset_url))
+
+                offset = measure(
+                    lambda: StandardResultsSetPagination().paginate_queryset(
+                        queryset, offset_request
+                    ),
+                    options["repeat"],
+                    warmup=1,
+                )
+                keyset = measure(
+                    lambda: KeysetPagination().paginate_queryset(
+                        queryset, keyset_request
+                    ),
+                    options["repeat"],
+                    warmup=1,
+                )
+                self.stdout.write(f"第{page}页（深度{depth:.0%}）")
+                self.stdout.write(format_result("  page number (offset)", offset))
+                self.stdout.write(format_result("  keyset", keyset))
+            transaction.set_rollback(True)
+
+    def insert(self, rows):
+        """批量插入压测用户（每10个用户注册时间相同）"""
+        User = get_user_model()
+        now = timezone.now()
+        start = time.perf_counter()
+        for begin in range(0, rows, INSERT_BATCH_SIZE):
+            User.objects.bulk_create(
+                User(
+                    username=f"bench-page-{i}",
+                    email=f"bench-page-{i}@example.com",
+                    password="!",
+                    date_joined=now - timedelta(seconds=i // 10),
+                )
+                for i in range(begin, min(rows, begin + INSERT_BATCH_SIZE))
+            )
+        self.stdout.write(f"插入{rows}行: {time.perf_counter() - start:.1f}s")
+
+    def keyset_url(self, queryset, page, page_size):
+        """客户端翻到第page页时请求的URL（游标为上一页最后一行）"""
+        url = f"/?page_size={page_size}"
+        if page == 1:
+            return url
+        # 对空查询分页只为初始化排序字段和请求，再由上一页最后一行生成游标
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get(url))
+        paginator.paginate_queryset(queryset.none(), request)
+        row = queryset[(page - 1) * page_size - 1]
+        return paginator.encode_cursor(row)
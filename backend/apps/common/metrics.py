@@ -0,0 +1,229 @@
+"""进程内指标模块
+
+提供计数器（Counter）、仪表（Gauge）和直方图（Histogram）三类轻量指标，
+接口与prometheus_client保持一致（inc/dec/set/observe/labels），
+各子系统通过模块级函数注册指标，同名指标重复注册时返回同一实例。
+"""
+
+import bisect
+import threading
+
+# 默认直方图分桶（秒）
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class _Metric:
+    """指标基类，负责标签子指标的管理"""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation="", labelnames=(), **kwargs):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *values, **labelkwargs):
+        """
+        获取指定标签值对应的子指标
+
+        Returns:
+            _Metric: 子指标实例（同一标签值返回同一实例）
+        """
+        if labelkwargs:
+            values = tuple(str(labelkwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"指标{self.name}的标签数量不匹配: {values}")
+
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = type(self)(self.name, self.documentation, **self._kwargs)
+                self._children[values] = child
+            return child
+
+    def samples(self):
+        """
+        返回指标的全部采样值
+
+        Returns:
+            list: [(标签字典, 采样值字典)]
+        """
+        if not self.labelnames:
+            return [({}, self._value())]
+        with self._lock:
+            children = list(self._children.items())
+        return [
+            (dict(zip(self.labelnames, values)), child._value())
+            for values, child in children
+        ]
+
+    def _value(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation="", labelnames=(), **kwargs):
+        super().__init__(name, documentation, labelnames, **kwargs)
+        self._count = 0.0
+
+    def inc(self, amount=1):
+        """计数器增加指定值"""
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        with self._lock:
+            self._count += amount
+
+    def get(self):
+        """返回当前计数"""
+        return self._count
+
+    def _value(self):
+        return {"value": self._count}
+
+
+class Gauge(_Metric):
+    """可增可减的仪表"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation="", labelnames=(), **kwargs):
+        super().__init__(name, documentation, labelnames, **kwargs)
+        self._current = 0.0
+
+    def set(self, value):
+        """设置当前值"""
+        with self._lock:
+            self._current = float(value)
+
+    def inc(self, amount=1):
+        """增加指定值"""
+        with self._lock:
+            self._current += amount
+
+    def dec(self, amount=1):
+        """减少指定值"""
+        with self._lock:
+            self._current -= amount
+
+    def get(self):
+        """返回当前值"""
+        return self._current
+
+    def _value(self):
+        return {"value": self._current}
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation="", labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, buckets=buckets)
+        self.buckets = tuple(sorted(buckets))
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, amount):
+        """记录一次观测值"""
+        index = bisect.bisect_left(self.buckets, amount)
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._sum += amount
+            self._count += 1
+
+    def _value(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self._bucket_counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "sum": self._sum, "count": self._count}
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric_class, name, documentation="", labelnames=(), **kw):
+        """
+        注册指标（同名指标只注册一次）
+
+        Returns:
+            _Metric: 指标实例
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, documentation, labelnames, **kw)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"指标{name}已注册为{metric.kind}类型")
+            return metric
+
+    def collect(self):
+        """
+        返回全部已注册指标
+
+        Returns:
+            list: 指标实例列表
+        """
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self):
+        """
+        返回全部指标的采样快照
+
+        Returns:
+            dict: {指标名: [(标签字典, 采样值字典)]}
+        """
+        return {metric.name: metric.samples() for metric in self.collect()}
+
+
+# 进程级默认注册表
+registry = MetricsRegistry()
+
+
+def counter(name, documentation="", labelnames=()):
+    """注册或获取计数器"""
+    return registry.register(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation="", labelnames=()):
+    """注册或获取仪表"""
+    return registry.register(Gauge, name, documentation, labelnames)
+
+
+def histogram(name, documentation="", labelnames=(), buckets=DEFAULT_BUCKETS):
+    """注册或获取直方图"""
+    return registry.register(
+        Histogram, name, documentation, labelnames, buckets=buckets
+    )
@@ -0,0 +1,224 @@
+"""通用中间件模块
+
+中间件同时支持同步和异步调用：ASGI部署下异步视图之前的中间件链保持异步，
+请求不会因为某个只支持同步的中间件而占用线程。
+"""
+
+import contextvars
+import time
+
+from apps.common import metrics, prometheus
+from apps.common.db import routers
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# 请求内的数据库查询次数分桶
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+KNOWN_METHODS = frozenset(
+    ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE"]
+)
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "请求处理耗时", ["view", "method"]
+)
+REQUESTS = metrics.counter("http_requests_total", "请求数", ["view", "method", "status"])
+REQUEST_QUERIES = metrics.histogram(
+    "http_request_db_queries",
+    "单个请求执行的数据库查询次数",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_DURATION = metrics.histogram(
+    "http_request_db_duration_seconds", "单个请求的数据库查询总耗时", ["view"]
+)
+
+
+class QueryStats:
+    """connection.execute_wrapper回调，累计查询次数和耗时"""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+# 当前请求的查询统计；ASGI下查询在sync_to_async的线程中执行，上下文随之传递
+_query_stats = contextvars.ContextVar("request_query_stats", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_stats(connection):
+    """在数据库连接上安装查询统计（只统计请求处理期间的查询）"""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _connection_created(sender, connection, **kwargs):
+    install_query_stats(connection)
+
+
+def view_label(request):
+    """
+    请求的视图标签：URL名称（captcha、login、preview等）
+
+    未命名的路由使用路由模式，未匹配任何路由（404）时为<unmatched>，
+    标签取值数量与路由数量一致。
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unmatched>"
+    return match.url_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    记录每个请求的耗时和数据库查询次数/耗时
+
+    放在MIDDLEWARE第一位，耗时包含其余中间件。METRICS["ENABLED"]为False时不加载。
+    查询统计安装在每个数据库连接上（新建的连接通过connection_created信号），
+    同步请求和ASGI下在线程中执行的查询都能统计到。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not prometheus.get_metrics_config()["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # (视图, 方法, 状态码) → 子指标，避免每个请求重复查找标签
+        self._children = {}
+        connection_created.connect(
+            _connection_created, dispatch_uid="metrics_query_stats"
+        )
+
+    def _get_children(self, view, method, status):
+        key = (view, method, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                REQUEST_DURATION.labels(view=view, method=method),
+                REQUESTS.labels(view=view, method=method, status=status),
+                REQUEST_QUERIES.labels(view=view),
+                REQUEST_QUERY_DURATION.labels(view=view),
+            )
+        return children
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # 信号注册前已建立的连接
+        for connection in connections.all(initialized_only=True):
+            install_query_stats(connection)
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self._record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self._record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def _record(self, request, response, elapsed, stats):
+        method = request.method if request.method in KNOWN_METHODS else "other"
+        duration, requests, queries, query_duration = self._get_children(
+            view_label(request), method, response.status_code
+        )
+        duration.observe(elapsed)
+        requests.inc()
+        queries.observe(stats.count)
+        query_duration.observe(stats.seconds)
+        prometheus.maybe_flush()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    跨请求的读己之写（apps.common.db.routers）
+
+    请求中发生写操作时，在响应中设置Cookie记录STICKY_SECONDS秒后的时刻；之后该
+    客户端的请求在此之前的读查询都使用default，不会读到尚未同步写入的副本。
+    未配置只读副本时不加载。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not routers.get_routing_config()["REPLICAS"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config, until = self._start(request)
+        with routers.primary_until(until):
+            response = self.get_response(request)
+            pinned = routers.get_primary_until()
+        return self._finish(request, response, config, until, pinned)
+
+    async def __acall__(self, request):
+        # sync_to_async执行的写操作设置的状态会带回当前上下文
+        config, until = self._start(request)
+        with routers.primary_until(until):
+            response = await self.get_response(request)
+            pinned = routers.get_primary_until()
+        return self._finish(request, response, config, until, pinned)
+
+    def _start(self, request):
+        config = routers.get_routing_config()
+        now = time.time()
+        try:
+            until = float(request.COOKIES.get(config["COOKIE_NAME"], 0))
+        except ValueError:
+            until = 0.0
+        # Cookie由客户端提供，最多信任STICKY_SECONDS秒
+        return config, min(until, now + config["STICKY_SECONDS"])
+
+    def _finish(self, request, response, config, until, pinned):
+        """请求中发生了写操作时设置Cookie"""
+        now = time.time()
+        if pinned > until and pinned > now:
+            response.set_cookie(
+                config["COOKIE_NAME"],
+                f"{pinned:.3f}",
+                max_age=max(1, round(pinned - now)),
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
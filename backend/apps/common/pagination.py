@@ -1,6 +1,340 @@
 # 分页配置模板
+"""分页
 
-from rest_framework.pagination import PageNumberPagination
+- KeysetPagination: 键集（游标）分页，默认分页类。按索引列排序（例如User的
+  (-date_joined, id)），下一页的条件为“排在上一页最后一行之后”，不执行COUNT(*)、
+  不使用OFFSET，每页耗时与翻页深度无关。游标为不透明字符串，只能前后翻页
+- StandardResultsSetPagination: 页码分页。每页执行COUNT(*)，深页的OFFSET需要扫描并
+  丢弃前面所有行，耗时随页码线性增长，只用于需要跳页的小表
+
+配置（PAGINATION）:
+    COUNT_CACHE_TTL: 近似总数的缓存时间（秒）
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import (
+    EmptyResultSet,
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_COUNT_CACHE_TTL = 300
+
+# 游标格式版本，格式变化时递增（旧版本游标视为无效）
+CURSOR_VERSION = 1
+COUNT_CACHE_KEY_PREFIX = "pagination:count:"
+
+
+def get_pagination_config():
+    """
+    读取PAGINATION配置
+
+    Returns:
+        dict: COUNT_CACHE_TTL
+    """
+    config = getattr(settings, "PAGINATION", None) or {}
+    return {"COUNT_CACHE_TTL": config.get("COUNT_CACHE_TTL", DEFAULT_COUNT_CACHE_TTL)}
+
+
+def encode_cursor(values, reverse=False):
+    """
+    将排序键编码为游标
+
+    Args:
+        values: 排序字段的值（datetime等类型转为ISO格式字符串）
+        reverse: 是否向前翻页（取排在values之前的行）
+
+    Returns:
+        str: URL安全的Base64字符串
+    """
+    payload = {"v": CURSOR_VERSION, "k": values}
+    if reverse:
+        payload["r"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    解码游标
+
+    Returns:
+        tuple: (排序字段的值列表, 是否向前翻页)
+
+    Raises:
+        ValueError: 游标格式无效或版本不匹配
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError("无效的游标") from error
+    if (
+        not isinstance(payload, dict)
+        or payload.get("v") != CURSOR_VERSION
+        or not isinstance(payload.get("k"), list)
+    ):
+        raise ValueError("无效的游标")
+    return payload["k"], bool(payload.get("r"))
+
+
+def _cursor_value(value):
+    """排序键转为可写入JSON的值"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    return value
+
+
+def estimate_count(queryset):
+    """
+    近似总数（缓存COUNT_CACHE_TTL秒）
+
+    未过滤的MySQL查询使用表统计信息（information_schema.TABLES.TABLE_ROWS，InnoDB
+    估算值，无需扫描），其余查询执行COUNT(*)并缓存结果。
+
+    Returns:
+        int: 行数
+    """
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    digest = hashlib.sha1(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    key = COUNT_CACHE_KEY_PREFIX + digest
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    count = None
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor == "mysql" and not query.where and not query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            count = int(row[0])
+    if count is None:
+        count = queryset.count()
+    cache.set(key, count, get_pagination_config()["COUNT_CACHE_TTL"])
+    return count
+
+
+class KeysetPagination(BasePagination):
+    """
+    键集分页
+
+    排序依次取分页类的ordering、视图的ordering、模型Meta.ordering，末尾自动补充主键
+    保证顺序唯一。排序字段必须是模型自身的非空字段，并应建立与排序一致的联合索引。
+    请求参数:
+        cursor: 上一次响应中next/previous链接携带的游标
+        page_size: 每页条数（最大max_page_size）
+        count: 为1/true时响应中包含近似总数count
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = None
+    invalid_cursor_message = "无效的游标"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(queryset, view)
+        self.fields = [self._get_field(queryset.model, name) for name in self.keys]
+
+        values, reverse = None, False
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            values, reverse = self.decode_cursor(encoded)
+
+        self.count = None
+        if self.count_requested(request):
+            self.count = estimate_count(queryset)
+
+        if reverse:
+            queryset = queryset.order_by(*(self._flip(name) for name in self.keys))
+        else:
+            queryset = queryset.order_by(*self.keys)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+
+        # 多取一行判断是否还有下一页
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        """
+        获取排序字段（末尾补充主键）
+
+        Returns:
+            list: 例如["-date_joined", "pk"]
+        """
+        ordering = (
+            self.ordering
+            or getattr(view, "ordering", None)
+            or queryset.model._meta.ordering
+            or ["-pk"]
+        )
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        ordering = list(ordering)
+        for name in ordering:
+            if not isinstance(name, str) or name.lstrip("-") in ("", "?"):
+                raise ImproperlyConfigured(f"键集分页只支持按字段名排序: {name!r}")
+
+        pk = queryset.model._meta.pk
+        if not any(self._get_field(queryset.model, name) == pk for name in ordering):
+            ordering.append("pk")
+        return ordering
+
+    def count_requested(self, request):
+        if not self.count_query_param:
+            return False
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() in ("1", "true")
+
+    def keyset_filter(self, values, reverse=False):
+        """
+        排在游标之后（reverse时为之前）的行的过滤条件
+
+        以(-date_joined, id)为例：date_joined <= x AND (date_joined < x OR
+        (date_joined = x AND id > y))。第一个条件让数据库按索引范围扫描。
+
+        Returns:
+            Q: 过滤条件
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.keys, values):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") != reverse else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+
+        first = self.keys[0]
+        lookup = "lte" if first.startswith("-") != reverse else "gte"
+        return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & condition
+
+    def decode_cursor(self, encoded):
+        """
+        解码游标并将排序键转换为字段类型
+
+        Raises:
+            NotFound: 游标无效（与DRF的CursorPagination一致）
+        """
+        try:
+            values, reverse = decode_cursor(encoded)
+            if len(values) != len(self.fields):
+                raise ValueError("游标与排序字段不匹配")
+            values = [
+                field.to_python(value) for field, value in zip(self.fields, values)
+            ]
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, row, reverse=False):
+        values = [
+            _cursor_value(
+                row[field.attname]
+                if isinstance(row, dict)
+                else getattr(row, field.attname)
+            )
+            for field in self.fields
+        ]
+        cursor = encode_cursor(values, reverse)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    @staticmethod
+    def _get_field(model, name):
+        name = name.lstrip("-")
+        if name == "pk":
+            return model._meta.pk
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist as error:
+            raise ImproperlyConfigured(
+                f"键集分页的排序字段必须是{model.__name__}的字段: {name}"
+            ) from error
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -0,0 +1,35 @@
+"""JSON解析器
+
+ORJSONParser使用orjson解析UTF-8请求体，解析错误与DRF的JSONParser一样返回
+ParseError（400）。orjson不接受NaN/Infinity（相当于STRICT_JSON）。orjson未安装
+或请求体不是UTF-8编码时退回JSONParser。
+"""
+
+import codecs
+
+from apps.common.renderers import ORJSONRenderer
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson缺失时使用DRF的JSONParser
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+    """基于orjson的JSON解析器"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,286 @@
+"""Prometheus指标导出
+
+将apps.common.metrics注册表中的指标转换为Prometheus文本格式（version 0.0.4），
+由/metrics/端点返回。
+
+gunicorn多个worker（以及Celery worker子进程）各自持有独立的进程内注册表，
+一次抓取只会落到其中一个进程。配置METRICS["MULTIPROC_DIR"]后启用多进程聚合：
+
+- 各进程每隔FLUSH_INTERVAL秒将本进程的指标快照写入metrics-<pid>.json（写临时
+  文件后原子替换），写入在请求/任务结束时顺带检查，不启动后台线程
+- 抓取时先写入当前进程的快照，再读取目录下全部快照合并：计数器和直方图按标签
+  求和，仪表增加pid标签，只保留仍在运行的进程
+- 已退出进程（例如达到--max-requests后被替换的worker）的计数器和直方图合并进
+  metrics-archive.json后删除原文件，保证计数单调且文件数量不随重启增长
+
+未配置MULTIPROC_DIR时只导出当前进程的指标。MULTIPROC_DIR应在服务启动前清空
+（例如使用tmpfs），避免旧进程的快照与复用的pid混淆。
+"""
+
+import fcntl
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+from apps.common import metrics
+from django.conf import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_FLUSH_INTERVAL = 5
+
+SNAPSHOT_PATTERN = "metrics-*.json"
+ARCHIVE_NAME = "metrics-archive.json"
+LOCK_NAME = "metrics.lock"
+
+
+def get_metrics_config():
+    """
+    读取METRICS配置
+
+    Returns:
+        dict: ENABLED、MULTIPROC_DIR、FLUSH_INTERVAL
+    """
+    config = getattr(settings, "METRICS", None) or {}
+    return {
+        "ENABLED": config.get("ENABLED", True),
+        "MULTIPROC_DIR": config.get("MULTIPROC_DIR") or None,
+        "FLUSH_INTERVAL": config.get("FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+    }
+
+
+def _format_bound(bound):
+    return "+Inf" if math.isinf(bound) else repr(float(bound))
+
+
+def dump(registry=None):
+    """
+    导出注册表的可序列化快照
+
+    Returns:
+        dict: {指标名: {kind, documentation, samples: [[标签字典, 采样值字典]]}}
+    """
+    registry = registry or metrics.registry
+    data = {}
+    for metric in registry.collect():
+        samples = []
+        for labels, value in metric.samples():
+            if metric.kind == "histogram":
+                value = dict(
+                    value,
+                    buckets={
+                        _format_bound(bound): count
+                        for bound, count in value["buckets"].items()
+                    },
+                )
+            samples.append([labels, value])
+        data[metric.name] = {
+            "kind": metric.kind,
+            "documentation": metric.documentation,
+            "samples": samples,
+        }
+    return data
+
+
+def merge(snapshots):
+    """
+    合并多个进程的快照
+
+    Args:
+        snapshots: [(pid, dump()结果)]，pid为None表示不区分进程（不加pid标签）
+
+    Returns:
+        dict: 与dump()相同结构的合并结果
+    """
+    merged = {}
+    for pid, data in snapshots:
+        for name, metric in data.items():
+            target = merged.setdefault(
+                name,
+                {
+                    "kind": metric["kind"],
+                    "documentation": metric["documentation"],
+                    "samples": {},
+                },
+            )
+            for labels, value in metric["samples"]:
+                if metric["kind"] == "gauge" and pid is not None:
+                    labels = dict(labels, pid=str(pid))
+                key = tuple(sorted(labels.items()))
+                existing = target["samples"].get(key)
+                if existing is None:
+                    target["samples"][key] = [labels, json.loads(json.dumps(value))]
+                elif metric["kind"] == "histogram":
+                    existing[1]["sum"] += value["sum"]
+                    existing[1]["count"] += value["count"]
+                    for bound, count in value["buckets"].items():
+                        buckets = existing[1]["buckets"]
+                        buckets[bound] = buckets.get(bound, 0) + count
+                elif metric["kind"] == "counter":
+                    existing[1]["value"] += value["value"]
+                else:
+                    existing[1]["value"] = value["value"]
+    for metric in merged.values():
+        metric["samples"] = list(metric["samples"].values())
+    return merged
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in items) + "}"
+
+
+def render(data):
+    """
+    转换为Prometheus文本格式
+
+    Args:
+        data: dump()或merge()的结果
+
+    Returns:
+        str: 文本格式的指标
+    """
+    lines = []
+    for name in sorted(data):
+        metric = data[name]
+        documentation = metric["documentation"].replace("\\", "\\\\")
+        lines.append(f"# HELP {name} {documentation.replace(chr(10), ' ')}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for labels, value in metric["samples"]:
+            if metric["kind"] == "histogram":
+                buckets = sorted(
+                    value["buckets"].items(), key=lambda item: float(item[0])
+                )
+                for bound, count in buckets:
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels, le=bound)} {count}"
+                    )
+                lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+            else:
+                lines.append(
+                    f"{name}{_format_labels(labels)} {float(value['value'])!r}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+def _write_json(directory, name, data):
+    """写临时文件后原子替换，读取方不会看到写了一半的文件"""
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as file:
+        json.dump(data, file)
+    os.replace(path, os.path.join(directory, name))
+
+
+def _read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_flush_lock = threading.Lock()
+_next_flush = 0.0
+
+
+def flush(config=None):
+    """将当前进程的指标快照写入MULTIPROC_DIR（未配置时不做任何事）"""
+    global _next_flush
+    config = config or get_metrics_config()
+    _next_flush = time.monotonic() + config["FLUSH_INTERVAL"]
+    if config["MULTIPROC_DIR"]:
+        _write_json(config["MULTIPROC_DIR"], f"metrics-{os.getpid()}.json", dump())
+
+
+def maybe_flush():
+    """距离上次写入超过FLUSH_INTERVAL时写入快照（同一时刻只有一个线程写入）"""
+    if time.monotonic() < _next_flush:
+        return
+    if _flush_lock.acquire(blocking=False):
+        try:
+            if time.monotonic() >= _next_flush:
+                flush()
+        finally:
+            _flush_lock.release()
+
+
+def _archive_dead(directory, dead):
+    """将已退出进程的计数器和直方图合并进归档文件并删除原快照"""
+    with open(os.path.join(directory, LOCK_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE_NAME)
+        snapshots = [(None, _read_json(archive_path) or {})]
+        paths = []
+        for path in dead:
+            data = _read_json(path)
+            if data is None:
+                continue
+            paths.append(path)
+            snapshots.append(
+                (
+                    None,
+                    {
+                        name: metric
+                        for name, metric in data.items()
+                        if metric["kind"] != "gauge"
+                    },
+                )
+            )
+        if paths:
+            _write_json(directory, ARCHIVE_NAME, merge(snapshots))
+            for path in paths:
+                os.remove(path)
+
+
+def collect():
+    """
+    收集需要导出的指标
+
+    Returns:
+        dict: 单进程时为dump()结果，多进程时为全部进程快照的merge()结果
+    """
+    config = get_metrics_config()
+    directory = config["MULTIPROC_DIR"]
+    if not directory:
+        return dump()
+
+    with _flush_lock:
+        flush(config)
+    live, dead = [], []
+    for path in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)):
+        pid = os.path.basename(path)[len("metrics-") : -len(".json")]
+        if not pid.isdigit():
+            # metrics-archive.json
+            continue
+        pid = int(pid)
+        (live if _pid_alive(pid) else dead).append((pid, path))
+    if dead:
+        _archive_dead(directory, [path for _, path in dead])
+
+    snapshots = [(None, _read_json(os.path.join(directory, ARCHIVE_NAME)) or {})]
+    for pid, path in live:
+        data = _read_json(path)
+        if data is not None:
+            snapshots.append((pid, data))
+    return merge(snapshots)
@@ -0,0 +1,54 @@
+"""JSON渲染器
+
+ORJSONRenderer使用orjson序列化响应，输出与DRF的JSONRenderer一致：
+
+- datetime/date/time、Decimal、timedelta、惰性翻译字符串、QuerySet等orjson不直接
+  支持（或格式不同）的类型交给DRF的JSONEncoder.default处理，例如UTC时间以Z结尾、
+  Decimal输出为数字
+- UUID输出为字符串，非字符串键转为字符串，\\u2028/\\u2029转义
+- 紧凑格式、不转义非ASCII字符（COMPACT_JSON、UNICODE_JSON为默认值时）
+
+orjson未安装、请求带indent参数（BrowsableAPIRenderer）、修改了COMPACT_JSON/
+UNICODE_JSON或数据超出orjson支持范围（例如超过64位的整数）时退回JSONRenderer。
+与JSONRenderer的区别：NaN和Infinity输出为null。
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson缺失时使用DRF的JSONRenderer
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """基于orjson的JSON渲染器"""
+
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # orjson.JSONEncodeError：交给JSONRenderer序列化（或抛出原始异常）
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # 与JSONRenderer一致，转义\u2028和\u2029，保证输出是JavaScript的严格子集
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -6,5 +6,8 @@ from . import views
 
 urlpatterns = [
     path("health/", views.health_check, name="health_check"),
+    path("health/live/", views.health_live, name="health_live"),
+    path("health/ready/", views.health_ready, name="health_ready"),
+    path("metrics/", views.metrics, name="metrics"),
     path("info/", views.api_info, name="api_info"),
 ]
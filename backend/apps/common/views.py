@@ -1,6 +1,8 @@
 """通用视图模块"""
 
-from django.http import JsonResponse
+from apps.common import health, prometheus
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
@@ -17,18 +19,56 @@ def health_check(request):
         response["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
         return response
 
+    # 依赖状态来自缓存的探测结果，不在请求中直接探测
+    results = health.monitor.results()
+    status = health.overall_status(results)
     data = {
-        "status": "healthy",
+        "status": status,
         "message": "Bravo API is running",
         "version": "1.0.0",
-        "timestamp": "2024-01-15T10:00:00Z",
+        "timestamp": timezone.now().isoformat(),
+        "services": {
+            name: (
+                "unavailable"
+                if result["status"] in (health.STATUS_ERROR, health.STATUS_TIMEOUT)
+                else "connected"
+            )
+            for name, result in results.items()
+        },
     }
 
-    response = JsonResponse(data)
+    response = JsonResponse(data, status=503 if status == health.UNHEALTHY else 200)
     response["Access-Control-Allow-Origin"] = "*"
     return response
 
 
+@require_http_methods(["GET", "HEAD"])
+def health_live(request):
+    """存活检查端点：进程能处理请求即返回200，不检查依赖"""
+    return JsonResponse({"status": "alive"})
+
+
+@require_http_methods(["GET", "HEAD"])
+def health_ready(request):
+    """就绪检查端点：关键依赖（数据库、缓存）异常时返回503"""
+    results = health.monitor.results()
+    status = health.overall_status(results)
+    return JsonResponse(
+        {"status": status, "checks": results},
+        status=503 if status == health.UNHEALTHY else 200,
+    )
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Prometheus指标端点（nginx不转发该路径，只供内部网络抓取）"""
+    if not prometheus.get_metrics_config()["ENABLED"]:
+        raise Http404
+    return HttpResponse(
+        prometheus.render(prometheus.collect()), content_type=prometheus.CONTENT_TYPE
+    )
+
+
 @csrf_exempt
 @require_http_methods(["GET", "POST", "OPTIONS"])
 def api_info(request):
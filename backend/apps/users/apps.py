@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""用户应用配置"""
+
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    """用户应用配置类"""
+
+    name = "apps.users"
+    label = "users"
+
+    def ready(self):
+        # 注册信号处理器
+        from apps.users import signals  # noqa: F401
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""带验证缓存的JWT认证
+
+JWTAuthentication对每个已认证请求都要校验签名并从数据库查询一次用户。
+CachedJWTAuthentication缓存"已验证令牌 → 用户快照"：
+
+- 一级缓存：进程内有界LRU，键为令牌的SHA256，条目在令牌过期时刻或
+  LOCAL_TTL秒后（取较早者）失效
+- 二级缓存（可选）：Django缓存（Redis），多个工作进程共享，条目带有用户的
+  缓存代次，用户失效后旧条目不再命中
+
+缓存未命中时回退到JWTAuthentication的完整校验（签名、用户存在、is_active）。
+用户快照只包含认证和权限检查读取的字段（AUTH_SNAPSHOT_FIELDS），不含密码哈希，
+其余字段在访问时从数据库延迟加载。
+用户保存/删除或登出时调用invalidate_user_tokens()使该用户的缓存失效：当前进程
+的一级缓存立即清除，二级缓存通过更新代次失效；其他进程的一级缓存最迟在
+LOCAL_TTL秒后失效。代次键的有效期长于二级缓存条目（见_generation_timeout），
+不会随用户数无限累积。
+
+配置（JWT_AUTH_CACHE）:
+    MAX_ENTRIES: 一级缓存最大条目数（默认10000）
+    LOCAL_TTL: 一级缓存条目最长存活秒数（默认30，为0时禁用一级缓存）
+    SHARED: 是否启用二级缓存（默认False）
+    SHARED_TTL: 二级缓存条目最长存活秒数（默认300）
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from apps.common import metrics
+from apps.common.async_cache import get_async_cache
+from apps.common.db.routers import PRIMARY_FALLBACKS, use_primary
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+JWT_AUTH_KEY_PREFIX = "jwt_auth:"
+JWT_AUTH_GENERATION_KEY_PREFIX = "jwt_auth_gen:"
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_LOCAL_TTL = 30
+DEFAULT_SHARED_TTL = 300
+
+# 用户快照包含的字段（主键之外），不得包含password等敏感字段
+AUTH_SNAPSHOT_FIELDS = (
+    "username",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "is_email_verified",
+)
+
+AUTH_CACHE_LOOKUPS = metrics.counter("jwt_auth_cache_total", "JWT认证缓存查找结果", ["result"])
+
+
+def get_auth_cache_config():
+    """
+    读取JWT_AUTH_CACHE配置
+
+    Returns:
+        dict: MAX_ENTRIES、LOCAL_TTL、SHARED、SHARED_TTL
+    """
+    config = getattr(settings, "JWT_AUTH_CACHE", None) or {}
+    return {
+        "MAX_ENTRIES": config.get("MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+        "LOCAL_TTL": config.get("LOCAL_TTL", DEFAULT_LOCAL_TTL),
+        "SHARED": config.get("SHARED", False),
+        "SHARED_TTL": config.get("SHARED_TTL", DEFAULT_SHARED_TTL),
+    }
+
+
+class VerifiedTokenCache:
+    """进程内已验证令牌的有界LRU缓存（线程安全）"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        读取未过期的条目
+
+        Returns:
+            tuple: (用户ID, 用户快照, 已验证令牌)，未命中或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1:]
+
+    def set(self, key, expires_at, user_id, snapshot, token, max_entries):
+        """写入条目，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = (expires_at, user_id, snapshot, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        """删除指定用户的全部条目"""
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v[1] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_token_cache = VerifiedTokenCache()
+
+
+def _generation_key(user_id):
+    return f"{JWT_AUTH_GENERATION_KEY_PREFIX}{user_id}"
+
+
+def _generation_timeout(config):
+    """
+    代次键的有效期（秒）
+
+    二级缓存条目最多存活SHARED_TTL秒；另留出一个LOCAL_TTL（至少默认值）的余量，
+    覆盖读取代次到写入条目之间的请求耗时。代次键过期时带有旧代次的条目均已过期，
+    之后读到的代次为None，与新写入的条目一致。
+    """
+    return config["SHARED_TTL"] + max(config["LOCAL_TTL"], DEFAULT_LOCAL_TTL)
+
+
+def invalidate_user_tokens(user_id):
+    """
+    使指定用户的已验证令牌缓存失效（用户保存/删除、登出时调用）
+
+    参数:
+        user_id: 用户ID
+    """
+    local_token_cache.discard_user(user_id)
+    config = get_auth_cache_config()
+    if config["SHARED"]:
+        # 更新代次，带有旧代次的二级缓存条目不再命中
+        cache.set(
+            _generation_key(user_id), uuid.uuid4().hex, _generation_timeout(config)
+        )
+
+
+async def ainvalidate_user_tokens(user_id):
+    """invalidate_user_tokens()的异步版本（异步视图中使用）"""
+    local_token_cache.discard_user(user_id)
+    config = get_auth_cache_config()
+    if config["SHARED"]:
+        await get_async_cache().set(
+            _generation_key(user_id), uuid.uuid4().hex, _generation_timeout(config)
+        )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """缓存已验证令牌与用户快照的JWTAuthentication"""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        config = get_auth_cache_config()
+        key = hashlib.sha256(raw_token).hexdigest()
+
+        if config["LOCAL_TTL"] > 0:
+            entry = local_token_cache.get(key)
+            if entry is not None:
+                AUTH_CACHE_LOOKUPS.labels(result="local").inc()
+                _, snapshot, validated_token = entry
+                return self._restore_user(snapshot), validated_token
+
+        if config["SHARED"]:
+            result = self._get_shared(key, raw_token, config)
+            if result is not None:
+                AUTH_CACHE_LOOKUPS.labels(result="shared").inc()
+                return result
+
+        AUTH_CACHE_LOOKUPS.labels(result="miss").inc()
+        validated_token = self.get_validated_token(raw_token)
+        # 先读取代次再查询用户：查询期间发生的失效会使写入的条目代次过时
+        generation = None
+        if config["SHARED"]:
+            user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+            generation = cache.get(_generation_key(user_id))
+        user = self.get_user(validated_token)
+        self._store(key, user, validated_token, generation, config)
+        return user, validated_token
+
+    def get_user(self, validated_token):
+        try:
+            return super().get_user(validated_token)
+        except AuthenticationFailed as error:
+            # 只读副本可能尚未同步刚注册的用户，回到主库重查
+            if (
+                error.detail.get("code") != "user_not_found"
+                or router.db_for_read(self.user_model) == DEFAULT_DB_ALIAS
+            ):
+                raise
+        PRIMARY_FALLBACKS.inc()
+        with use_primary():
+            return super().get_user(validated_token)
+
+    def _snapshot(self, user):
+        """用户快照：主键和AUTH_SNAPSHOT_FIELDS的(字段名, 值)，按模型字段顺序排列"""
+        fields = [
+            field.attname
+            for field in user._meta.concrete_fields
+            if field.primary_key or field.attname in AUTH_SNAPSHOT_FIELDS
+        ]
+        return fields, [getattr(user, name) for name in fields]
+
+    def _restore_user(self, snapshot):
+        """从快照构造用户实例（每个请求使用独立实例，快照以外的字段延迟加载）"""
+        fields, values = snapshot
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, fields, values)
+
+    def _store(self, key, user, validated_token, generation, config):
+        exp = validated_token.get("exp")
+        now = time.time()
+        if exp is None or exp <= now:
+            return
+        snapshot = self._snapshot(user)
+
+        if config["LOCAL_TTL"] > 0:
+            local_token_cache.set(
+                key,
+                min(exp, now + config["LOCAL_TTL"]),
+                user.pk,
+                snapshot,
+                validated_token,
+                config["MAX_ENTRIES"],
+            )
+
+        if config["SHARED"]:
+            cache.set(
+                JWT_AUTH_KEY_PREFIX + key,
+                {
+                    "user_id": user.pk,
+                    "generation": generation,
+                    "snapshot": snapshot,
+                    "token_class": api_settings.AUTH_TOKEN_CLASSES.index(
+                        type(validated_token)
+                    ),
+                    "payload": validated_token.payload,
+                },
+                max(1, int(min(exp - now, config["SHARED_TTL"]))),
+            )
+
+    def _get_shared(self, key, raw_token, config):
+        entry = cache.get(JWT_AUTH_KEY_PREFIX + key)
+        if entry is None:
+            return None
+        payload = entry["payload"]
+        if payload.get("exp", 0) <= time.time():
+            return None
+        if cache.get(_generation_key(entry["user_id"])) != entry["generation"]:
+            return None
+
+        # 重建令牌对象不再校验签名（条目仅由签名校验通过的令牌写入）
+        token_class = api_settings.AUTH_TOKEN_CLASSES[entry["token_class"]]
+        validated_token = token_class(raw_token, verify=False)
+        if config["LOCAL_TTL"] > 0:
+            local_token_cache.set(
+                key,
+                min(payload["exp"], time.time() + config["LOCAL_TTL"]),
+                entry["user_id"],
+                entry["snapshot"],
+                validated_token,
+                config["MAX_ENTRIES"],
+            )
+        return self._restore_user(entry["snapshot"]), validated_token
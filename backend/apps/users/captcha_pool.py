@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""验证码预渲染池
+
+每个工作进程维护一个预渲染验证码池，池中保存(answer, PNG字节)对。
+请求线程只需从池中取出一张图片并生成新的captcha_id，渲染工作由后台线程完成；
+池中数量低于低水位时自动触发后台补充。
+"""
+
+import collections
+import logging
+import threading
+import uuid
+
+from apps.common import metrics
+from apps.users.utils import (
+    encode_captcha_image,
+    generate_captcha_answer,
+    render_captcha_png,
+)
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认池配置
+DEFAULT_POOL_SIZE = 200
+DEFAULT_LOW_WATERMARK = 50
+
+POOL_HITS = metrics.counter("captcha_pool_hits_total", "从预渲染池中取到验证码的次数", ["pool"])
+POOL_MISSES = metrics.counter(
+    "captcha_pool_misses_total", "预渲染池为空时同步渲染验证码的次数", ["pool"]
+)
+POOL_RENDERED = metrics.counter(
+    "captcha_pool_rendered_total", "后台线程预渲染的验证码数量", ["pool"]
+)
+POOL_REFILLS = metrics.counter("captcha_pool_refills_total", "触发后台补充的次数", ["pool"])
+POOL_SIZE = metrics.gauge("captcha_pool_size", "预渲染池中的验证码数量", ["pool"])
+
+
+class CaptchaPool:
+    """预渲染验证码池（进程内共享，线程安全）"""
+
+    def __init__(
+        self,
+        name="default",
+        size=DEFAULT_POOL_SIZE,
+        low_watermark=DEFAULT_LOW_WATERMARK,
+    ):
+        """
+        Args:
+            name: 池名称，用于指标标签
+            size: 池容量（补充时填充到该数量）
+            low_watermark: 低水位，池中数量低于该值时触发后台补充
+        """
+        self.name = name
+        self.size = size
+        self.low_watermark = min(low_watermark, size)
+        self._items = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._refill_thread = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def render_one(self):
+        """
+        渲染一张验证码
+
+        Returns:
+            tuple: (answer, PNG字节)
+        """
+        answer = generate_captcha_answer()
+        return answer, render_captcha_png(answer)
+
+    def pop(self):
+        """
+        从池中取出一张验证码，池为空时同步渲染
+
+        Returns:
+            tuple: (answer, PNG字节)
+        """
+        try:
+            item = self._items.popleft()
+            POOL_HITS.labels(self.name).inc()
+        except IndexError:
+            item = self.render_one()
+            POOL_MISSES.labels(self.name).inc()
+
+        remaining = len(self._items)
+        POOL_SIZE.labels(self.name).set(remaining)
+        if remaining < self.low_watermark:
+            self.schedule_refill()
+        return item
+
+    def fill(self):
+        """
+        将池填充到容量上限（在调用线程中同步执行）
+
+        Returns:
+            int: 本次渲染的验证码数量
+        """
+        rendered = 0
+        while len(self._items) < self.size:
+            self._items.append(self.render_one())
+            rendered += 1
+        if rendered:
+            POOL_RENDERED.labels(self.name).inc(rendered)
+        POOL_SIZE.labels(self.name).set(len(self._items))
+        return rendered
+
+    def schedule_refill(self):
+        """
+        启动后台补充线程（同一时间最多一个）
+
+        Returns:
+            bool: 是否启动了新的补充线程
+        """
+        with self._lock:
+            if self._refill_thread is not None and self._refill_thread.is_alive():
+                return False
+            self._refill_thread = threading.Thread(
+                target=self._refill,
+                name=f"captcha-pool-{self.name}",
+                daemon=True,
+            )
+            self._refill_thread.start()
+        POOL_REFILLS.labels(self.name).inc()
+        return True
+
+    def wait_for_refill(self, timeout=None):
+        """等待当前的后台补充完成（主要用于测试和基准测试）"""
+        thread = self._refill_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _refill(self):
+        try:
+            self.fill()
+        except Exception:
+            # 补充失败不影响请求线程，请求线程会回退到同步渲染
+            logger.exception(f"验证码池补充失败: pool={self.name}")
+
+    def stats(self):
+        """
+        返回池的运行统计
+
+        Returns:
+            dict: 包含size、capacity、low_watermark、hits、misses等信息
+        """
+        return {
+            "pool": self.name,
+            "size": len(self._items),
+            "capacity": self.size,
+            "low_watermark": self.low_watermark,
+            "hits": POOL_HITS.labels(self.name).get(),
+            "misses": POOL_MISSES.labels(self.name).get(),
+            "rendered": POOL_RENDERED.labels(self.name).get(),
+            "refills": POOL_REFILLS.labels(self.name).get(),
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool_config():
+    """
+    读取验证码池配置
+
+    Returns:
+        dict: 包含ENABLED、SIZE、LOW_WATERMARK的配置字典
+    """
+    config = getattr(settings, "CAPTCHA_POOL", {})
+    return {
+        "ENABLED": config.get("ENABLED", False),
+        "SIZE": config.get("SIZE", DEFAULT_POOL_SIZE),
+        "LOW_WATERMARK": config.get("LOW_WATERMARK", DEFAULT_LOW_WATERMARK),
+    }
+
+
+def get_captcha_pool():
+    """
+    获取进程级验证码池（懒加载）
+
+    Returns:
+        CaptchaPool: 验证码池实例
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = get_pool_config()
+                _pool = CaptchaPool(
+                    size=config["SIZE"], low_watermark=config["LOW_WATERMARK"]
+                )
+    return _pool
+
+
+def next_captcha_png():
+    """
+    获取一张新验证码的PNG图片（启用预渲染池时从池中取出）
+
+    Returns:
+        tuple: (captcha_id, PNG字节, answer)
+    """
+    if get_pool_config()["ENABLED"]:
+        answer, image_bytes = get_captcha_pool().pop()
+    else:
+        answer = generate_captcha_answer()
+        image_bytes = render_captcha_png(answer)
+    return str(uuid.uuid4()), image_bytes, answer
+
+
+def next_captcha():
+    """
+    获取一张新验证码（启用预渲染池时从池中取出）
+
+    Returns:
+        tuple: (captcha_id, captcha_image_base64, answer)，格式与generate_captcha()一致
+    """
+    captcha_id, image_bytes, answer = next_captcha_png()
+    return captcha_id, encode_captcha_image(image_bytes), answer
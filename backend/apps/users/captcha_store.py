@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""验证码存储后端
+
+验证验证码必须是"比较并删除"的原子操作，否则并发请求可能重复使用同一验证码。
+
+- RedisCaptchaStore: 通过Lua脚本在一次Redis往返中完成比较和删除
+- CacheCaptchaStore: 通用Django缓存后端（LocMem等），依赖cache.delete()的返回值
+  保证只有一个请求能删除成功
+
+get_captcha_store()根据CAPTCHA_STORE_BACKEND配置或当前缓存后端自动选择实现。
+存储和丢弃验证码另有异步版本（astore、adiscard），供异步视图通过异步缓存客户端调用。
+"""
+
+import threading
+
+from apps.common.async_cache import get_async_cache
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+CAPTCHA_KEY_PREFIX = "captcha:"
+CAPTCHA_IMAGE_KEY_PREFIX = "captcha_image:"
+
+
+class CacheCaptchaStore:
+    """基于Django缓存接口的验证码存储"""
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def store(self, captcha_id, answer, expires_in):
+        """
+        存储验证码答案（统一转为大写，验证时不区分大小写）
+
+        Args:
+            captcha_id: 验证码ID
+            answer: 验证码答案
+            expires_in: 过期时间（秒）
+        """
+        self.cache.set(CAPTCHA_KEY_PREFIX + captcha_id, answer.upper(), expires_in)
+
+    async def astore(self, captcha_id, answer, expires_in):
+        """store()的异步版本"""
+        await get_async_cache(self.cache_alias).set(
+            CAPTCHA_KEY_PREFIX + captcha_id, answer.upper(), expires_in
+        )
+
+    def verify(self, captcha_id, answer):
+        """
+        验证并消费验证码（验证成功后删除，答案错误时保留）
+
+        Args:
+            captcha_id: 验证码ID
+            answer: 用户输入的验证码答案
+
+        Returns:
+            bool: 验证是否成功
+        """
+        key = CAPTCHA_KEY_PREFIX + captcha_id
+        stored_answer = self.cache.get(key)
+        if stored_answer is None or stored_answer.upper() != answer.upper():
+            return False
+        # 并发验证同一验证码时，只有成功删除的请求视为验证通过
+        return bool(self.cache.delete(key))
+
+    def discard(self, captcha_id):
+        """删除验证码答案及其图片"""
+        self.cache.delete_many(
+            [CAPTCHA_KEY_PREFIX + captcha_id, CAPTCHA_IMAGE_KEY_PREFIX + captcha_id]
+        )
+
+    async def adiscard(self, captcha_id):
+        """discard()的异步版本"""
+        await get_async_cache(self.cache_alias).delete_many(
+            [CAPTCHA_KEY_PREFIX + captcha_id, CAPTCHA_IMAGE_KEY_PREFIX + captcha_id]
+        )
+
+
+class RedisCaptchaStore(CacheCaptchaStore):
+    """基于django-redis的验证码存储，验证操作只需一次Redis往返"""
+
+    # 比较并删除：值相同才删除，返回1表示验证通过
+    VERIFY_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if stored and stored == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+    def __init__(self, cache_alias="default"):
+        super().__init__(cache_alias)
+        self._script = None
+        self._script_lock = threading.Lock()
+
+    def _get_script(self):
+        if self._script is None:
+            with self._script_lock:
+                if self._script is None:
+                    from django_redis import get_redis_connection
+
+                    client = get_redis_connection(self.cache_alias)
+                    self._script = client.register_script(self.VERIFY_SCRIPT)
+        return self._script
+
+    def verify(self, captcha_id, answer):
+        """
+        验证并消费验证码（Lua脚本原子执行）
+
+        存储时答案已统一转为大写，这里将用户输入按缓存客户端相同的方式序列化后
+        直接与Redis中的值比较。
+        """
+        cache = self.cache
+        key = cache.client.make_key(CAPTCHA_KEY_PREFIX + captcha_id)
+        encoded_answer = cache.client.encode(answer.upper())
+        return self._get_script()(keys=[key], args=[encoded_answer]) == 1
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store_class(cache_alias):
+    backend = getattr(settings, "CAPTCHA_STORE_BACKEND", None)
+    if backend:
+        return import_string(backend)
+
+    cache_backend = settings.CACHES.get(cache_alias, {}).get("BACKEND", "")
+    if cache_backend == "django_redis.cache.RedisCache":
+        return RedisCaptchaStore
+    return CacheCaptchaStore
+
+
+def get_captcha_store(cache_alias="default"):
+    """
+    获取验证码存储实例
+
+    配置了CAPTCHA_STORE_BACKEND时使用指定实现，否则缓存后端为django-redis时
+    使用RedisCaptchaStore，其余情况（LocMem、Dummy等）使用CacheCaptchaStore。
+
+    Returns:
+        CacheCaptchaStore: 验证码存储实例（同一实现在进程内复用）
+    """
+    store_class = _get_store_class(cache_alias)
+    store_key = (store_class, cache_alias)
+    store = _stores.get(store_key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(store_key, store_class(cache_alias))
+    return store
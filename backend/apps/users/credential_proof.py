@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""登录凭证证明（credential proof）
+
+前端先调用预验证API（完整校验密码），几秒后再用相同凭证调用登录API。
+预验证成功时签发一个短期、一次性的凭证证明，登录时携带该证明即可跳过
+第二次高开销的密码哈希校验。
+
+证明仅保存在服务端缓存中（缓存键为令牌的SHA256），并绑定：
+
+- 用户ID与当前密码哈希的指纹（修改密码后立即失效）
+- 预验证时提交的密码的HMAC（登录时输入的密码必须与预验证时一致）
+- 预验证时已消费的验证码ID（登录时复用同一验证码）
+- 客户端IP与User-Agent
+
+证明在过期（CREDENTIAL_PROOF_TTL）、被使用一次或同一用户签发新证明后失效。
+证明代替登录时的验证码：与登录提交的用户或密码不一致时按验证码错误拒绝，不校验密码。
+"""
+
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.throttling import BaseThrottle
+
+CREDENTIAL_PROOF_KEY_PREFIX = "credential_proof:"
+CREDENTIAL_PROOF_USER_KEY_PREFIX = "credential_proof_user:"
+
+# 默认有效期（秒）：覆盖预验证到提交登录的正常间隔
+DEFAULT_CREDENTIAL_PROOF_TTL = 60
+
+
+def get_credential_proof_ttl():
+    """返回凭证证明有效期（秒）"""
+    return getattr(settings, "CREDENTIAL_PROOF_TTL", DEFAULT_CREDENTIAL_PROOF_TTL)
+
+
+def _proof_key(token):
+    return CREDENTIAL_PROOF_KEY_PREFIX + hashlib.sha256(token.encode()).hexdigest()
+
+
+def _hmac(token, purpose, value):
+    return salted_hmac(
+        f"apps.users.credential_proof.{purpose}.{token}", value
+    ).hexdigest()
+
+
+def _client_fingerprint(request):
+    """客户端指纹：IP（与频率限制一致的识别方式）+ User-Agent"""
+    ident = BaseThrottle().get_ident(request)
+    user_agent = request.META.get("HTTP_USER_AGENT", "")
+    return hashlib.sha256(f"{ident}|{user_agent}".encode()).hexdigest()
+
+
+def issue_credential_proof(user, password, captcha_id, request):
+    """
+    为预验证成功的凭证签发证明
+
+    同一用户只保留最新的一个证明，签发新证明时旧证明立即失效。
+
+    Args:
+        user: 预验证通过的用户
+        password: 预验证时提交的密码
+        captcha_id: 预验证时已消费的验证码ID
+        request: 当前请求（用于绑定客户端）
+
+    Returns:
+        str: 凭证证明令牌
+    """
+    token = secrets.token_urlsafe(32)
+    ttl = get_credential_proof_ttl()
+    user_key = CREDENTIAL_PROOF_USER_KEY_PREFIX + str(user.pk)
+
+    previous_key = cache.get(user_key)
+    if previous_key:
+        cache.delete(previous_key)
+
+    proof_key = _proof_key(token)
+    cache.set(
+        proof_key,
+        {
+            "user_id": str(user.pk),
+            "password_hash": _hmac(token, "password_hash", user.password),
+            "password": _hmac(token, "password", password),
+            "captcha_id": captcha_id,
+            "client": _client_fingerprint(request),
+        },
+        timeout=ttl,
+    )
+    cache.set(user_key, proof_key, timeout=ttl)
+    return token
+
+
+def consume_credential_proof(token, captcha_id, request):
+    """
+    消费凭证证明（一次性）
+
+    Args:
+        token: 凭证证明令牌
+        captcha_id: 登录请求中的验证码ID
+        request: 当前请求
+
+    Returns:
+        CredentialProof或None: 证明存在、未被使用且验证码和客户端均匹配时返回
+    """
+    if not token or not captcha_id:
+        return None
+
+    key = _proof_key(token)
+    data = cache.get(key)
+    # 并发使用同一证明时，只有成功删除的请求有效
+    if data is None or not cache.delete(key):
+        return None
+
+    if data["captcha_id"] != captcha_id or not constant_time_compare(
+        data["client"], _client_fingerprint(request)
+    ):
+        return None
+    return CredentialProof(token, data)
+
+
+class CredentialProof:
+    """已消费的凭证证明"""
+
+    def __init__(self, token, data):
+        self.token = token
+        self.data = data
+
+    def matches(self, user, password):
+        """
+        检查证明是否对应该用户及本次提交的密码
+
+        Args:
+            user: 登录用户
+            password: 登录时提交的密码
+
+        Returns:
+            bool: 用户、密码哈希和提交的密码均与预验证时一致
+        """
+        return (
+            self.data["user_id"] == str(user.pk)
+            and constant_time_compare(
+                self.data["password_hash"],
+                _hmac(self.token, "password_hash", user.password),
+            )
+            and constant_time_compare(
+                self.data["password"], _hmac(self.token, "password", password)
+            )
+        )
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮件模板编译缓存
+
+邮件模板（users/emails/*.html|txt）只包含静态文本和简单变量（例如
+{{ verification_url }}）。每封邮件都通过render_to_string渲染时，需要重新
+遍历模板节点、创建Context并解析变量。
+
+本模块在每个工作进程中把模板编译一次，拆分为静态片段和变量槽位，渲染时只需
+转义变量值并拼接字符串：
+
+- 模板只包含文本节点和不带过滤器的单层变量时才编译，否则回退到Django渲染
+- 编译后使用带有需转义字符的探测值分别渲染，与Django渲染结果不一致时回退
+- 变量值不是字符串或上下文缺少变量时，该次渲染回退到Django渲染
+
+模板配置（TEMPLATES）变化时自动清空缓存。
+"""
+
+import logging
+import threading
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import Context
+from django.template.base import TextNode, VariableNode
+from django.template.loader import get_template
+from django.utils.html import conditional_escape
+
+logger = logging.getLogger(__name__)
+
+# 编译验证使用的探测值：包含autoescape需要转义的字符
+PROBE_VALUE = "https://example.com/?a=1&b=<2>\"'"
+
+
+class CompiledEmailTemplate:
+    """拆分为静态片段和变量槽位的Django模板"""
+
+    def __init__(self, template):
+        """
+        Args:
+            template: django.template.base.Template实例
+        """
+        self.template = template
+        self.autoescape = template.engine.autoescape
+        self.parts = None
+        self.slots = None
+        self._compile()
+
+    def _compile(self):
+        parts = []
+        slots = []
+        for node in self.template.nodelist:
+            if isinstance(node, TextNode):
+                # 相邻的静态文本合并为一个片段
+                if parts and not (slots and slots[-1][0] == len(parts) - 1):
+                    parts[-1] += node.s
+                else:
+                    parts.append(node.s)
+            elif isinstance(node, VariableNode) and self._is_simple(node):
+                slots.append((len(parts), node.filter_expression.var.var))
+                parts.append("")
+            else:
+                return
+
+        compiled = (parts, slots)
+        probe = {name: f"{PROBE_VALUE}{name}" for _, name in slots}
+        if self._render_compiled(compiled, probe) != self.template.render(
+            Context(probe, autoescape=self.autoescape)
+        ):
+            logger.warning(f"邮件模板编译结果与Django渲染不一致，回退: {self.name}")
+            return
+        self.parts, self.slots = compiled
+
+    @staticmethod
+    def _is_simple(node):
+        """不带过滤器、不需要翻译的单层变量"""
+        expression = node.filter_expression
+        variable = expression.var
+        return (
+            not expression.filters
+            and hasattr(variable, "lookups")
+            and variable.lookups is not None
+            and len(variable.lookups) == 1
+            and not variable.translate
+        )
+
+    @property
+    def name(self):
+        return self.template.origin.template_name
+
+    @property
+    def compiled(self):
+        return self.parts is not None
+
+    def _render_compiled(self, compiled, context):
+        parts, slots = compiled
+        rendered = list(parts)
+        for index, name in slots:
+            value = context[name]
+            rendered[index] = conditional_escape(value) if self.autoescape else value
+        return "".join(rendered)
+
+    def render(self, context):
+        """
+        渲染模板
+
+        Args:
+            context: 模板上下文字典
+
+        Returns:
+            str: 渲染结果（与render_to_string一致）
+        """
+        if self.compiled and all(
+            isinstance(context.get(name), str) for _, name in self.slots
+        ):
+            return str(self._render_compiled((self.parts, self.slots), context))
+        return self.template.render(Context(context, autoescape=self.autoescape))
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_compiled_template(template_name):
+    """
+    获取编译后的邮件模板（每个进程每个模板只编译一次）
+
+    Returns:
+        CompiledEmailTemplate: 编译后的模板
+    """
+    template = _templates.get(template_name)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(template_name)
+            if template is None:
+                template = CompiledEmailTemplate(get_template(template_name).template)
+                _templates[template_name] = template
+    return template
+
+
+def render_email_template(template_name, context):
+    """
+    渲染邮件模板（render_to_string的快速版本）
+
+    Args:
+        template_name: 模板名
+        context: 模板上下文字典
+
+    Returns:
+        str: 渲染结果
+    """
+    return get_compiled_template(template_name).render(context)
+
+
+def clear_template_cache():
+    """清空已编译的邮件模板"""
+    with _templates_lock:
+        _templates.clear()
+
+
+@receiver(setting_changed)
+def _clear_on_templates_changed(setting, **kwargs):
+    if setting == "TEMPLATES":
+        clear_template_cache()
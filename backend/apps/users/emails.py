@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""用户邮件构建
+
+根据邮件类型和参数渲染模板并构建EmailMultiAlternatives（纯文本 + HTML）。
+模板通过email_templates编译缓存渲染，结果与render_to_string一致。
+邮件队列只保存类型和参数，发送时再调用build_message()构建邮件。
+"""
+
+from apps.users.email_templates import render_email_template
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+
+EMAIL_VERIFICATION = "email_verification"
+PASSWORD_RESET = "password_reset"
+
+# 邮件类型 → (主题, 模板名（不含扩展名）, 链接上下文变量名)
+MESSAGE_TYPES = {
+    EMAIL_VERIFICATION: (
+        "请验证您的邮箱",
+        "users/emails/email_verification",
+        "verification_url",
+    ),
+    PASSWORD_RESET: ("重置您的密码", "users/emails/password_reset", "reset_url"),
+}
+
+# 日志中使用的邮件名称
+MESSAGE_LABELS = {EMAIL_VERIFICATION: "邮箱验证邮件", PASSWORD_RESET: "密码重置邮件"}
+
+
+def build_url(kind, token):
+    """
+    构建邮件中的链接（使用后端API URL，前端会调用这个API）
+
+    Args:
+        kind: 邮件类型
+        token: 验证/重置令牌
+
+    Returns:
+        str: 链接地址
+    """
+    backend_domain = getattr(settings, "BACKEND_DOMAIN", "http://localhost:8000")
+    if kind == EMAIL_VERIFICATION:
+        return f"{backend_domain}/api/auth/email/verify/{token}/"
+    return f"{backend_domain}/api/auth/password/reset/?token={token}"
+
+
+def build_message(kind, email, token, connection=None):
+    """
+    构建邮件消息
+
+    Args:
+        kind: 邮件类型（EMAIL_VERIFICATION或PASSWORD_RESET）
+        email: 收件人邮箱
+        token: 验证/重置令牌
+        connection: 可选，发送邮件使用的连接
+
+    Returns:
+        EmailMultiAlternatives: 邮件消息
+    """
+    subject, template_name, url_name = MESSAGE_TYPES[kind]
+    context = {url_name: build_url(kind, token)}
+
+    # 获取发件人邮箱（如果未设置则使用默认值）
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@bravo.com")
+
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=render_email_template(f"{template_name}.txt", context),  # 纯文本版本
+        from_email=from_email,
+        to=[email],
+        connection=connection,
+    )
+    msg.attach_alternative(
+        render_email_template(f"{template_name}.html", context), "text/html"
+    )  # HTML版本
+    return msg
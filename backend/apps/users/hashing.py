@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""密码哈希执行器
+
+密码哈希（PBKDF2等）是刻意设计的高CPU开销操作。登录、预验证、注册和重置密码
+不再在请求线程中直接计算哈希，而是提交给进程级哈希执行器：
+
+- inline: 在调用线程中执行（未配置PASSWORD_HASHING时的默认行为）
+- thread: 线程池执行（hashlib计算PBKDF2时会释放GIL，线程池即可利用多核）
+- process: 进程池执行（适用于不释放GIL的哈希算法）
+
+执行器限制排队中的任务数量，超出上限或等待超时时抛出PasswordHashingUnavailable，
+由DRF返回503并携带Retry-After响应头，避免请求在队列中无限堆积。
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from apps.common import metrics
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+HASHING_MODES = ("inline", "thread", "process")
+
+# 默认配置：每个工作线程/进程最多排队的任务数、等待结果的超时时间（秒）
+DEFAULT_QUEUE_PER_WORKER = 4
+DEFAULT_TIMEOUT = 5.0
+
+HASH_SECONDS = metrics.histogram(
+    "password_hash_seconds", "密码哈希任务耗时（含排队时间）", ["operation", "mode"]
+)
+HASH_PENDING = metrics.gauge("password_hash_pending", "排队或执行中的密码哈希任务数")
+HASH_REJECTED = metrics.counter(
+    "password_hash_rejected_total", "因队列已满或超时被拒绝的密码哈希任务数", ["reason"]
+)
+
+
+class PasswordHashingUnavailable(APIException):
+    """密码哈希执行器繁忙（队列已满或等待超时）"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = {"error": "服务繁忙，请稍后重试", "code": "SERVICE_BUSY"}
+    default_code = "SERVICE_BUSY"
+
+    def __init__(self, wait=1):
+        super().__init__()
+        # DRF会将wait写入Retry-After响应头
+        self.wait = wait
+
+
+def _init_process_worker():
+    """进程池子进程初始化：加载Django配置"""
+    import django
+
+    django.setup()
+
+
+def _verify_password(password, encoded):
+    """
+    校验密码（在执行器中运行）
+
+    Returns:
+        tuple: (密码是否正确, 是否需要使用当前首选哈希算法重新哈希)
+    """
+    needs_update = []
+    is_correct = hashers.check_password(password, encoded, setter=needs_update.append)
+    return is_correct, bool(needs_update)
+
+
+def _make_password(password):
+    """生成密码哈希（在执行器中运行）"""
+    return hashers.make_password(password)
+
+
+class PasswordHashingExecutor:
+    """有界的密码哈希执行器（线程安全）"""
+
+    def __init__(self, mode="inline", workers=None, max_pending=None, timeout=None):
+        """
+        Args:
+            mode: 执行模式，inline、thread或process
+            workers: 工作线程/进程数，默认等于CPU核数
+            max_pending: 排队及执行中任务数上限，默认workers * 4
+            timeout: 等待单个任务结果的超时时间（秒）
+        """
+        if mode not in HASHING_MODES:
+            raise ValueError(f"不支持的密码哈希执行模式: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * DEFAULT_QUEUE_PER_WORKER
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.mode == "thread":
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="password-hashing",
+                        )
+                    else:
+                        # 使用spawn启动子进程，避免在多线程的gunicorn进程中fork
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=_init_process_worker,
+                        )
+        return self._pool
+
+    def _release_slot(self, _future=None):
+        self._slots.release()
+        HASH_PENDING.dec()
+
+    def submit(self, operation, func, *args):
+        """
+        执行哈希任务并等待结果
+
+        Args:
+            operation: 操作名称，用于指标标签（verify、make）
+            func: 可被子进程导入的模块级函数
+            *args: 函数参数
+
+        Returns:
+            任务返回值
+
+        Raises:
+            PasswordHashingUnavailable: 队列已满或等待超时
+        """
+        if not self._slots.acquire(blocking=False):
+            HASH_REJECTED.labels("queue_full").inc()
+            raise PasswordHashingUnavailable()
+        HASH_PENDING.inc()
+
+        start = time.perf_counter()
+        if self.mode == "inline":
+            try:
+                return func(*args)
+            finally:
+                self._release_slot()
+                HASH_SECONDS.labels(operation, self.mode).observe(
+                    time.perf_counter() - start
+                )
+
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BrokenProcessPool:
+            self._release_slot()
+            self._reset_pool()
+            raise PasswordHashingUnavailable()
+        # 名额在任务真正结束时释放，超时放弃等待的任务仍然占用队列名额
+        future.add_done_callback(self._release_slot)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            HASH_REJECTED.labels("timeout").inc()
+            raise PasswordHashingUnavailable()
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise PasswordHashingUnavailable()
+        finally:
+            HASH_SECONDS.labels(operation, self.mode).observe(
+                time.perf_counter() - start
+            )
+
+    def _reset_pool(self):
+        """子进程异常退出后丢弃进程池，下次提交时重新创建"""
+        logger.error("密码哈希进程池异常，重新创建")
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait=True):
+        """关闭线程池/进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def stats(self):
+        """
+        返回执行器状态
+
+        Returns:
+            dict: 执行模式、工作数、排队上限和当前排队数
+        """
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": int(HASH_PENDING.get()),
+        }
+
+
+_executor = None
+_executor_config = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_config():
+    """
+    读取PASSWORD_HASHING配置
+
+    Returns:
+        dict: MODE、WORKERS、MAX_PENDING、TIMEOUT
+    """
+    config = getattr(settings, "PASSWORD_HASHING", None) or {}
+    return {
+        "MODE": config.get("MODE", "inline"),
+        "WORKERS": config.get("WORKERS"),
+        "MAX_PENDING": config.get("MAX_PENDING"),
+        "TIMEOUT": config.get("TIMEOUT"),
+    }
+
+
+def get_hashing_executor():
+    """
+    获取进程级密码哈希执行器（配置变化时重新创建）
+
+    Returns:
+        PasswordHashingExecutor: 执行器实例
+    """
+    global _executor, _executor_config
+    config = get_hashing_config()
+    if _executor is None or _executor_config != config:
+        with _executor_lock:
+            if _executor is None or _executor_config != config:
+                if _executor is not None:
+                    _executor.shutdown(wait=False)
+                _executor = PasswordHashingExecutor(
+                    mode=config["MODE"],
+                    workers=config["WORKERS"],
+                    max_pending=config["MAX_PENDING"],
+                    timeout=config["TIMEOUT"],
+                )
+                _executor_config = config
+    return _executor
+
+
+def check_user_password(user, raw_password):
+    """
+    通过执行器校验用户密码
+
+    与User.check_password()行为一致：密码正确且哈希算法或参数已过时时，
+    使用当前首选算法重新哈希并保存。
+
+    Args:
+        user: 用户对象
+        raw_password: 用户输入的密码
+
+    Returns:
+        bool: 密码是否正确
+
+    Raises:
+        PasswordHashingUnavailable: 执行器繁忙
+    """
+    if raw_password is None or not hashers.is_password_usable(user.password):
+        return False
+
+    executor = get_hashing_executor()
+    is_correct, must_update = executor.submit(
+        "verify", _verify_password, raw_password, user.password
+    )
+    if is_correct and must_update:
+        user.password = executor.submit("make", _make_password, raw_password)
+        user.save(update_fields=["password"])
+    return is_correct
+
+
+def hash_password(raw_password):
+    """
+    通过执行器生成密码哈希
+
+    Args:
+        raw_password: 明文密码
+
+    Returns:
+        str: 可直接赋值给user.password的哈希字符串
+
+    Raises:
+        PasswordHashingUnavailable: 执行器繁忙
+    """
+    return get_hashing_executor().submit("make", _make_password, raw_password)
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""待发送邮件队列
+
+发送邮件的Celery任务只把邮件（类型、收件人、令牌）写入队列，由drain_mail_queue
+任务批量取出后通过同一个邮件连接发送，避免每封邮件都建立一次SMTP连接。
+
+- RedisMailQueue: Redis列表，多个Celery工作进程共享
+- MemoryMailQueue: 进程内队列（LocMem、Dummy等缓存后端，适用于开发和测试）。
+  只对当前进程可见，Celery未启用同步执行（eager）时邮件不入队、直接发送
+
+取出的邮件先移入取出者（owner）的处理中列表，发送或安排重试后才删除
+（reserve_batch/ack）。drain任务结束时把未处理的邮件放回队首（release）；工作
+进程被杀死或超时时，租约过期后由下一次drain放回队首（recover），邮件至少发送一次。
+
+get_mail_queue()根据MAIL_QUEUE_BACKEND配置或当前缓存后端自动选择实现。
+"""
+
+import json
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+MAIL_QUEUE_KEY = "mail_queue"
+MAIL_QUEUE_OWNERS_KEY = "mail_queue:owners"
+MAIL_QUEUE_INFLIGHT_KEY_PREFIX = "mail_queue:inflight:"
+MAIL_QUEUE_LEASE_KEY_PREFIX = "mail_queue:lease:"
+
+# 处理中列表的租约（秒），每取出一批续期。应长于一批邮件的最长发送时间
+# （drain_mail_queue的硬超时为300秒），租约过期视为取出者已退出
+MAIL_QUEUE_LEASE_TTL = 360
+
+# 默认配置：每批最多发送的邮件数、第一封邮件入队后等待攒批的时间（毫秒）、
+# 每封邮件最多尝试次数（含首次）、重试退避的初始和最大延迟（秒）、
+# 同一(用户, 用途)只发送最新令牌的合并窗口（秒，应覆盖最长重试时间）
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_WAIT_MS = 200
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_RETRY_DELAY = 60
+DEFAULT_RETRY_DELAY_MAX = 600
+DEFAULT_COALESCE_WINDOW = 1800
+
+
+def get_mail_batching_config():
+    """
+    读取MAIL_BATCHING配置
+
+    Returns:
+        dict: BATCH_SIZE、MAX_WAIT_MS、MAX_ATTEMPTS、RETRY_DELAY、RETRY_DELAY_MAX、
+            COALESCE_WINDOW
+    """
+    config = getattr(settings, "MAIL_BATCHING", None) or {}
+    return {
+        "BATCH_SIZE": config.get("BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        "MAX_WAIT_MS": config.get("MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS),
+        "MAX_ATTEMPTS": config.get("MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        "RETRY_DELAY": config.get("RETRY_DELAY", DEFAULT_RETRY_DELAY),
+        "RETRY_DELAY_MAX": config.get("RETRY_DELAY_MAX", DEFAULT_RETRY_DELAY_MAX),
+        "COALESCE_WINDOW": config.get("COALESCE_WINDOW", DEFAULT_COALESCE_WINDOW),
+    }
+
+
+class MemoryMailQueue:
+    """进程内邮件队列（线程安全）"""
+
+    # 队列是否由多个进程共享
+    shared = False
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+        self._items = deque()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def push(self, item):
+        """
+        邮件入队
+
+        Args:
+            item: 可JSON序列化的邮件字典
+        """
+        with self._lock:
+            self._items.append(item)
+
+    def reserve_batch(self, owner, size):
+        """
+        取出最多size封邮件，移入owner的处理中列表
+
+        Args:
+            owner: 取出者标识（每次drain唯一）
+            size: 最多取出的邮件数
+
+        Returns:
+            list: 邮件字典列表（先入先出）
+        """
+        with self._lock:
+            items = [self._items.popleft() for _ in range(min(size, len(self._items)))]
+            self._inflight.setdefault(owner, []).extend(items)
+            return items
+
+    def ack(self, owner, item):
+        """邮件已发送或已安排重试，从owner的处理中列表删除"""
+        with self._lock:
+            self._inflight[owner].remove(item)
+
+    def release(self, owner):
+        """
+        将owner未处理的邮件按原顺序放回队首
+
+        Returns:
+            int: 放回的邮件数
+        """
+        with self._lock:
+            items = self._inflight.pop(owner, [])
+            self._items.extendleft(reversed(items))
+            return len(items)
+
+    def recover(self):
+        """
+        将已退出的取出者未处理的邮件放回队首
+
+        进程内队列随进程退出一起丢失，进程内的取出者总会调用release()。
+
+        Returns:
+            int: 放回的邮件数
+        """
+        return 0
+
+    def clear(self):
+        """清空队列和处理中列表"""
+        with self._lock:
+            self._items.clear()
+            self._inflight.clear()
+
+    def size(self):
+        return len(self._items)
+
+
+class RedisMailQueue(MemoryMailQueue):
+    """基于django-redis列表的邮件队列"""
+
+    shared = True
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection(self.cache_alias)
+
+    def _key(self, name):
+        return caches[self.cache_alias].make_key(name)
+
+    @property
+    def key(self):
+        return self._key(MAIL_QUEUE_KEY)
+
+    def push(self, item):
+        self.client.rpush(self.key, json.dumps(item))
+
+    def reserve_batch(self, owner, size):
+        # LMOVE逐封原子地移入处理中列表，多个消费者不会取到同一封邮件；
+        # 登记取出者并续期租约，进程退出后由recover()放回
+        pipe = self.client.pipeline(transaction=True)
+        pipe.sadd(self._key(MAIL_QUEUE_OWNERS_KEY), owner)
+        pipe.set(
+            self._key(MAIL_QUEUE_LEASE_KEY_PREFIX + owner), 1, ex=MAIL_QUEUE_LEASE_TTL
+        )
+        inflight = self._key(MAIL_QUEUE_INFLIGHT_KEY_PREFIX + owner)
+        for _ in range(size):
+            pipe.lmove(self.key, inflight, "LEFT", "RIGHT")
+        results = pipe.execute()[2:]
+        return [json.loads(item) for item in results if item is not None]
+
+    def ack(self, owner, item):
+        # 邮件字典经json.loads/json.dumps往返后与入队时的字符串相同
+        self.client.lrem(
+            self._key(MAIL_QUEUE_INFLIGHT_KEY_PREFIX + owner), 1, json.dumps(item)
+        )
+
+    def release(self, owner):
+        count = self._requeue(owner)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._key(MAIL_QUEUE_LEASE_KEY_PREFIX + owner))
+        pipe.srem(self._key(MAIL_QUEUE_OWNERS_KEY), owner)
+        pipe.execute()
+        return count
+
+    def recover(self):
+        count = 0
+        owners_key = self._key(MAIL_QUEUE_OWNERS_KEY)
+        for owner in self.client.smembers(owners_key):
+            owner = owner.decode()
+            if self.client.exists(self._key(MAIL_QUEUE_LEASE_KEY_PREFIX + owner)):
+                continue
+            count += self._requeue(owner)
+            self.client.srem(owners_key, owner)
+        return count
+
+    def clear(self):
+        owners_key = self._key(MAIL_QUEUE_OWNERS_KEY)
+        owners = [owner.decode() for owner in self.client.smembers(owners_key)]
+        self.client.delete(
+            self.key,
+            owners_key,
+            *(self._key(MAIL_QUEUE_INFLIGHT_KEY_PREFIX + owner) for owner in owners),
+            *(self._key(MAIL_QUEUE_LEASE_KEY_PREFIX + owner) for owner in owners),
+        )
+
+    def size(self):
+        return self.client.llen(self.key)
+
+    def _requeue(self, owner):
+        """将owner处理中列表的邮件逐封移回队首（保持原顺序）"""
+        inflight = self._key(MAIL_QUEUE_INFLIGHT_KEY_PREFIX + owner)
+        count = 0
+        while self.client.lmove(inflight, self.key, "RIGHT", "LEFT") is not None:
+            count += 1
+        return count
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def _get_queue_class(cache_alias):
+    backend = getattr(settings, "MAIL_QUEUE_BACKEND", None)
+    if backend:
+        return import_string(backend)
+
+    cache_backend = settings.CACHES.get(cache_alias, {}).get("BACKEND", "")
+    if cache_backend == "django_redis.cache.RedisCache":
+        return RedisMailQueue
+    return MemoryMailQueue
+
+
+def get_mail_queue(cache_alias="default"):
+    """
+    获取邮件队列实例（同一实现在进程内复用）
+
+    Returns:
+        MemoryMailQueue: 邮件队列实例
+    """
+    queue_class = _get_queue_class(cache_alias)
+    queue_key = (queue_class, cache_alias)
+    queue = _queues.get(queue_key)
+    if queue is None:
+        with _queues_lock:
+            queue = _queues.setdefault(queue_key, queue_class(cache_alias))
+    return queue
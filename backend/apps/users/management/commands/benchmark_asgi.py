@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""WSGI/ASGI并发压测命令
+
+对比一个worker在两种部署模式下能同时处理的请求数，请求获取验证码API
+（/api/auth/captcha/，每个请求写两次缓存）：
+
+- wsgi: --threads个线程（gthread worker）各自循环发送请求，等待缓存时占用线程
+- asgi: 一个事件循环中同时保持--connections个请求（uvicorn worker），等待缓存时
+  事件循环处理其他请求
+
+缓存替换为每次读写额外耗时--latency-ms的LocMem缓存，模拟Redis网络往返：同步
+接口用time.sleep，异步接口用asyncio.sleep（对应ASGI模式下的redis.asyncio客户端）。
+压测期间关闭验证码接口的频率限制。
+
+用法:
+    python manage.py benchmark_asgi --requests 2000 --threads 4 --connections 100
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from apps.common.benchmark import format_result, summarize
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+BENCHMARK_URL = "/api/auth/captcha/"
+
+
+class LatencyLocMemCache(LocMemCache):
+    """每次读写额外耗时LATENCY秒的LocMem缓存，并记录同时等待缓存的请求数"""
+
+    LATENCY = 0.0
+    waiting = 0
+    peak = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        cls.waiting = cls.peak = 0
+
+    @classmethod
+    def enter(cls):
+        with cls.lock:
+            cls.waiting += 1
+            cls.peak = max(cls.peak, cls.waiting)
+
+    @classmethod
+    def leave(cls):
+        with cls.lock:
+            cls.waiting -= 1
+
+    def wait(self):
+        self.enter()
+        try:
+            time.sleep(self.LATENCY)
+        finally:
+            self.leave()
+
+    async def await_(self):
+        self.enter()
+        try:
+            await asyncio.sleep(self.LATENCY)
+        finally:
+            self.leave()
+
+    def get(self, key, default=None, version=None):
+        self.wait()
+        return super().get(key, default, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.wait()
+        super().set(key, value, timeout, version)
+
+    def delete(self, key, version=None):
+        self.wait()
+        return super().delete(key, version)
+
+    async def aget(self, key, default=None, version=None):
+        await self.await_()
+        return super().get(key, default, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        await self.await_()
+        super().set(key, value, timeout, version)
+
+    async def adelete(self, key, version=None):
+        await self.await_()
+        return super().delete(key, version)
+
+
+class Command(BaseCommand):
+    help = "对比WSGI线程与ASGI事件循环下单个worker的并发请求数和吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="每种模式的请求数")
+        parser.add_argument("--threads", type=int, default=4, help="WSGI worker线程数")
+        parser.add_argument("--connections", type=int, default=100, help="ASGI同时保持的请求数")
+        parser.add_argument(
+            "--latency-ms", type=float, default=5.0, help="每次缓存读写额外的毫秒数"
+        )
+
+    def handle(self, *args, **options):
+        LatencyLocMemCache.LATENCY = options["latency_ms"] / 1000
+        caches = {
+            "default": {
+                "BACKEND": f"{__name__}.LatencyLocMemCache",
+                "LOCATION": "benchmark-asgi",
+            }
+        }
+        with override_settings(
+            CACHES=caches,
+            CAPTCHA_POOL={"ENABLED": False},
+            RATE_LIMITS={"captcha": {}},
+        ):
+            for name, load, concurrency in (
+                ("wsgi", self.load_wsgi, options["threads"]),
+                ("asgi", self.load_asgi, options["connections"]),
+            ):
+                LatencyLocMemCache.reset()
+                start = time.perf_counter()
+                samples = load(options["requests"], concurrency)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(format_result(name, summarize(samples)))
+                self.stdout.write(
+                    f"  吞吐量: {len(samples) / elapsed:.1f} req/s  "
+                    f"同时等待缓存的请求数峰值: {LatencyLocMemCache.peak}"
+                )
+
+    def load_wsgi(self, total, threads):
+        """
+        线程池并发执行请求（WSGIHandler）
+
+        Returns:
+            list: 每个请求的耗时
+        """
+        local = threading.local()
+
+        def request(_):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = Client()
+            start = time.perf_counter()
+            response = client.get(BENCHMARK_URL)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f"请求失败: {response.status_code}")
+            return elapsed
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(request, range(total)))
+
+    def load_asgi(self, total, connections):
+        """
+        在一个事件循环中并发执行请求（ASGIHandler）
+
+        Returns:
+            list: 每个请求的耗时
+        """
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(connections)
+
+            async def request():
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(BENCHMARK_URL)
+                    elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise CommandError(f"请求失败: {response.status_code}")
+                return elapsed
+
+            return await asyncio.gather(*(request() for _ in range(total)))
+
+        return asyncio.run(run())
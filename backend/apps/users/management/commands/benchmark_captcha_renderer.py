@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""验证码渲染器微基准测试命令
+
+对比逐次加载字体、逐字绘制的原始实现与字形缓存渲染器（CaptchaRenderer）
+单张验证码的渲染耗时和CPU时间。
+
+用法:
+    python manage.py benchmark_captcha_renderer --iterations 2000
+"""
+
+import io
+import random
+
+from apps.common.benchmark import format_result, measure
+from apps.users.captcha_renderer import get_captcha_renderer
+from apps.users.utils import generate_captcha_answer
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFont
+
+
+def render_captcha_png_legacy(answer):
+    """
+    原始验证码渲染实现（作为基准对照保留）
+
+    每次调用都重新加载字体、逐字绘制文字、逐点绘制噪点。
+    """
+    # 创建图片（120x40像素）
+    width, height = 120, 40
+    image = Image.new("RGB", (width, height), color=(255, 255, 255))
+    draw = ImageDraw.Draw(image)
+
+    # 尝试使用系统字体，如果失败则使用默认字体
+    try:
+        # 尝试使用DejaVu Sans字体（Linux常见字体）
+        font = ImageFont.truetype(
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24
+        )
+    except (OSError, IOError):
+        try:
+            # 尝试使用Arial字体（Windows常见字体）
+            font = ImageFont.truetype("arial.ttf", 24)
+        except (OSError, IOError):
+            # 使用默认字体
+            font = ImageFont.load_default()
+
+    # 绘制验证码文字
+    text_x = 10
+    text_y = 8
+    for char in answer:
+        # 随机颜色（深色，确保在白色背景上可见）
+        # 注意：验证码图片生成不需要密码学级别的随机数
+        color = (
+            random.randint(0, 100),  # nosec B311
+            random.randint(0, 100),  # nosec B311
+            random.randint(0, 100),  # nosec B311
+        )
+        # 随机位置偏移（增加识别难度）
+        offset_x = random.randint(-2, 2)  # nosec B311
+        offset_y = random.randint(-2, 2)  # nosec B311
+        draw.text(
+            (text_x + offset_x, text_y + offset_y),
+            char,
+            fill=color,
+            font=font,
+        )
+        text_x += 25
+
+    # 添加干扰线
+    for _ in range(3):
+        start_x = random.randint(0, width)  # nosec B311
+        start_y = random.randint(0, height)  # nosec B311
+        end_x = random.randint(0, width)  # nosec B311
+        end_y = random.randint(0, height)  # nosec B311
+        line_color = (
+            random.randint(150, 200),  # nosec B311
+            random.randint(150, 200),  # nosec B311
+            random.randint(150, 200),  # nosec B311
+        )
+        draw.line([(start_x, start_y), (end_x, end_y)], fill=line_color, width=1)
+
+    # 添加噪点
+    for _ in range(50):
+        x = random.randint(0, width)  # nosec B311
+        y = random.randint(0, height)  # nosec B311
+        noise_color = (
+            random.randint(100, 200),  # nosec B311
+            random.randint(100, 200),  # nosec B311
+            random.randint(100, 200),  # nosec B311
+        )
+        draw.point((x, y), fill=noise_color)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = "对比原始验证码渲染与字形缓存渲染器的单张渲染耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000, help="每种实现的调用次数")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        renderer = get_captcha_renderer()
+        answers = [generate_captcha_answer() for _ in range(64)]
+
+        def run(render):
+            index = [0]
+
+            def call():
+                index[0] = (index[0] + 1) % len(answers)
+                render(answers[index[0]])
+
+            return measure(call, iterations=iterations)
+
+        legacy_stats = run(render_captcha_png_legacy)
+        sprite_stats = run(renderer.render_png)
+        image_stats = run(renderer.render_image)
+
+        self.stdout.write(format_result("legacy (逐次加载字体)", legacy_stats))
+        self.stdout.write(format_result("CaptchaRenderer.render_png", sprite_stats))
+        self.stdout.write(format_result("CaptchaRenderer.render_image", image_stats))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"CPU加速比（含PNG编码）: "
+                f"{legacy_stats['cpu_per_op'] / sprite_stats['cpu_per_op']:.1f}x, "
+                f"（仅绘制）: "
+                f"{legacy_stats['cpu_per_op'] / image_stats['cpu_per_op']:.1f}x"
+            )
+        )
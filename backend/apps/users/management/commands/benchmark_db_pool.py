@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""数据库连接池压测命令
+
+多个线程并发请求登录API（/api/auth/login/），每个请求结束后按WSGIHandler的方式
+关闭数据库连接（CONN_MAX_AGE为0），对比：
+
+- no pool: 每个请求新建并断开MySQL连接（Django MySQL后端的行为）
+- pool: 连接归还apps.common.db连接池，下一个请求直接复用
+
+要求default数据库使用apps.common.db.backends.mysql。为突出连接开销，压测期间
+使用MD5密码哈希并放宽登录频率限制。测试用户在压测结束后删除。
+
+用法:
+    python manage.py benchmark_db_pool --requests 2000 --threads 4
+"""
+
+import threading
+import time
+import uuid
+
+from apps.common.benchmark import format_result, summarize
+from apps.common.db.pool import POOL_CREATED, close_pools
+from apps.users.models import User
+from apps.users.utils import store_captcha
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+POOL_ENGINE = "apps.common.db.backends.mysql"
+BENCHMARK_PASSWORD = "BenchmarkPass123"
+BENCHMARK_CAPTCHA = "AB12"
+
+
+class Command(BaseCommand):
+    help = "并发请求登录API，对比每个请求新建连接与使用连接池的延迟"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="总请求数")
+        parser.add_argument("--threads", type=int, default=4, help="并发线程数")
+
+    def handle(self, *args, **options):
+        if connection.settings_dict["ENGINE"] != POOL_ENGINE:
+            raise CommandError(f"default数据库的ENGINE需要为{POOL_ENGINE}")
+        pool_config = connection.settings_dict.get("POOL") or {}
+
+        email = f"benchmark-{uuid.uuid4().hex[:12]}@example.com"
+        with override_settings(
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+            RATE_LIMITS={"login": {}},
+        ):
+            user = User.objects.create_user(
+                username=email.split("@")[0],
+                email=email,
+                password=BENCHMARK_PASSWORD,
+                is_email_verified=True,
+            )
+            try:
+                for name, pool in (("no pool", None), ("pool", pool_config)):
+                    self.set_pool(pool)
+                    created = POOL_CREATED.labels(alias="default")
+                    before = created.get()
+                    stats = self.load(email, options["requests"], options["threads"])
+                    self.stdout.write(format_result(f"login ({name})", stats))
+                    if pool is not None:
+                        self.stdout.write(f"  新建连接数: {created.get() - before:.0f}")
+            finally:
+                self.set_pool(pool_config)
+                user.delete()
+
+    def set_pool(self, pool):
+        """切换default数据库是否使用连接池（所有线程共享同一个settings_dict）"""
+        connections.close_all()
+        close_pools()
+        connection.settings_dict["POOL"] = pool
+
+    def load(self, email, total, threads):
+        """
+        并发执行登录请求
+
+        Returns:
+            dict: 每个请求耗时的统计结果
+        """
+        samples = []
+        errors = []
+        lock = threading.Lock()
+        per_thread = total // threads
+
+        def worker():
+            client = Client()
+            local = []
+            try:
+                for _ in range(per_thread):
+                    captcha_id = str(uuid.uuid4())
+                    store_captcha(captcha_id, BENCHMARK_CAPTCHA)
+                    start = time.perf_counter()
+                    response = client.post(
+                        "/api/auth/login/",
+                        {
+                            "email": email,
+                            "password": BENCHMARK_PASSWORD,
+                            "captcha_id": captcha_id,
+                            "captcha_answer": BENCHMARK_CAPTCHA,
+                        },
+                        content_type="application/json",
+                    )
+                    # 测试客户端不会在请求结束时关闭连接，这里按WSGIHandler的方式关闭
+                    connections.close_all()
+                    local.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        raise CommandError(f"登录失败: {response.status_code}")
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+                with lock:
+                    samples.extend(local)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        if errors:
+            raise CommandError(str(errors[0]))
+        return summarize(samples)
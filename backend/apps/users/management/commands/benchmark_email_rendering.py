@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮件渲染基准测试命令
+
+对比每封邮件（纯文本 + HTML两个模板）使用render_to_string与编译缓存
+render_email_template渲染的耗时，输出单个工作进程每秒可渲染的邮件数。
+
+用法:
+    python manage.py benchmark_email_rendering --iterations 5000
+"""
+
+import itertools
+
+from apps.common.benchmark import format_result, measure
+from apps.users.email_templates import render_email_template
+from apps.users.emails import EMAIL_VERIFICATION, MESSAGE_TYPES, build_url
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+
+class Command(BaseCommand):
+    help = "对比render_to_string与编译缓存渲染邮件的吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000, help="渲染邮件数")
+
+    def handle(self, *args, **options):
+        for kind, (_, template_name, url_name) in MESSAGE_TYPES.items():
+            tokens = itertools.count()
+
+            def render(renderer):
+                context = {url_name: build_url(kind, f"token-{next(tokens)}")}
+                return (
+                    renderer(f"{template_name}.txt", context),
+                    renderer(f"{template_name}.html", context),
+                )
+
+            # 先确认两种方式渲染结果一致
+            context = {url_name: build_url(kind, "verify&<token>")}
+            for extension in ("txt", "html"):
+                name = f"{template_name}.{extension}"
+                if render_email_template(name, context) != render_to_string(
+                    name, context
+                ):
+                    raise AssertionError(f"渲染结果不一致: {name}")
+
+            label = "邮箱验证" if kind == EMAIL_VERIFICATION else "密码重置"
+            baseline = measure(
+                lambda: render(render_to_string), iterations=options["iterations"]
+            )
+            compiled = measure(
+                lambda: render(render_email_template), iterations=options["iterations"]
+            )
+            self.stdout.write(format_result(f"{label} render_to_string", baseline))
+            self.stdout.write(format_result(f"{label} compiled", compiled))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label} 邮件/秒/进程: {baseline['ops_per_sec']:.0f} -> "
+                    f"{compiled['ops_per_sec']:.0f}"
+                )
+            )
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""JWT认证基准测试命令
+
+对比每个已认证请求在以下认证方式下的数据库查询次数和耗时：
+
+- jwt: JWTAuthentication（每次校验签名并查询用户）
+- cached (local): CachedJWTAuthentication命中进程内缓存
+- cached (shared): CachedJWTAuthentication禁用进程内缓存、命中二级缓存
+
+测试用户在事务中创建，结束后回滚。
+
+用法:
+    python manage.py benchmark_jwt_auth --iterations 5000
+"""
+
+import uuid
+
+from apps.common.benchmark import format_result, measure
+from apps.users.authentication import CachedJWTAuthentication, local_token_cache
+from apps.users.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = "对比JWTAuthentication与CachedJWTAuthentication每个请求的查询次数和耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000, help="认证次数")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=f"benchmark-{uuid.uuid4().hex[:12]}",
+                email=f"benchmark-{uuid.uuid4().hex[:12]}@example.com",
+                password="!",
+            )
+            request = Request(
+                RequestFactory().get(
+                    "/api/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+                )
+            )
+            iterations = options["iterations"]
+
+            local_token_cache.clear()
+            self.report("jwt", JWTAuthentication(), request, iterations)
+            self.report(
+                "cached (local)", CachedJWTAuthentication(), request, iterations
+            )
+            with override_settings(JWT_AUTH_CACHE={"LOCAL_TTL": 0, "SHARED": True}):
+                self.report(
+                    "cached (shared)", CachedJWTAuthentication(), request, iterations
+                )
+            local_token_cache.clear()
+            transaction.set_rollback(True)
+
+    def report(self, name, authenticator, request, iterations):
+        """预热后统计单次认证的查询次数和耗时"""
+        authenticator.authenticate(request)
+        with CaptureQueriesContext(connection) as queries:
+            authenticator.authenticate(request)
+        stats = measure(lambda: authenticator.authenticate(request), iterations)
+        self.stdout.write(format_result(name, stats))
+        self.stdout.write(f"  数据库查询/请求: {len(queries.captured_queries)}")
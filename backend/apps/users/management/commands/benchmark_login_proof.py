@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""登录凭证证明基准测试命令
+
+模拟前端"预验证 → 登录"流程，对比登录请求携带与不携带凭证证明时
+登录步骤的耗时和CPU时间。测试用户在事务中创建，结束后回滚。
+
+用法:
+    python manage.py benchmark_login_proof --iterations 50
+"""
+
+import time
+import uuid
+
+from apps.common.benchmark import format_result, summarize
+from apps.users.credential_proof import issue_credential_proof
+from apps.users.models import User
+from apps.users.serializers import PreviewLoginSerializer, UserLoginSerializer
+from apps.users.utils import store_captcha
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+BENCHMARK_PASSWORD = "BenchmarkPass123"
+BENCHMARK_CAPTCHA = "AB12"
+
+
+class Command(BaseCommand):
+    help = "对比登录时携带/不携带预验证凭证证明的CPU开销"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="登录流程次数")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            email = f"benchmark-{uuid.uuid4().hex[:12]}@example.com"
+            User.objects.create_user(
+                username=email.split("@")[0],
+                email=email,
+                password=BENCHMARK_PASSWORD,
+                is_email_verified=True,
+            )
+            self.request = RequestFactory().post(
+                "/api/auth/login/", HTTP_USER_AGENT="benchmark"
+            )
+
+            baseline = self.run_flow(email, options["iterations"], use_proof=False)
+            with_proof = self.run_flow(email, options["iterations"], use_proof=True)
+            transaction.set_rollback(True)
+
+        self.stdout.write(format_result("login (重新校验密码)", baseline))
+        self.stdout.write(format_result("login (凭证证明)", with_proof))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "登录CPU/次: "
+                f"{baseline['cpu_per_op'] * 1000:.2f}ms -> "
+                f"{with_proof['cpu_per_op'] * 1000:.2f}ms；"
+                "预验证+登录整体CPU约为原来的 "
+                f"{self.flow_ratio(baseline, with_proof):.0%}"
+            )
+        )
+
+    def run_flow(self, email, iterations, use_proof):
+        """
+        执行预验证+登录流程，只统计登录步骤
+
+        Returns:
+            dict: 登录步骤的统计结果（含cpu_per_op和preview_cpu_per_op）
+        """
+        samples = []
+        login_cpu = 0.0
+        preview_cpu = 0.0
+        for _ in range(iterations):
+            captcha_id = str(uuid.uuid4())
+            store_captcha(captcha_id, BENCHMARK_CAPTCHA)
+            data = {
+                "email": email,
+                "password": BENCHMARK_PASSWORD,
+                "captcha_id": captcha_id,
+                "captcha_answer": BENCHMARK_CAPTCHA,
+            }
+
+            cpu_start = time.process_time()
+            preview = PreviewLoginSerializer(data=data)
+            preview.is_valid(raise_exception=True)
+            if use_proof:
+                data["credential_proof"] = issue_credential_proof(
+                    preview.validated_data["user"],
+                    BENCHMARK_PASSWORD,
+                    captcha_id,
+                    self.request,
+                )
+            else:
+                # 未携带证明时登录需要新的验证码（预验证已消费旧验证码）
+                data["captcha_id"] = str(uuid.uuid4())
+                store_captcha(data["captcha_id"], BENCHMARK_CAPTCHA)
+            preview_cpu += time.process_time() - cpu_start
+
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            login = UserLoginSerializer(data=data, context={"request": self.request})
+            login.is_valid(raise_exception=True)
+            samples.append(time.perf_counter() - start)
+            login_cpu += time.process_time() - cpu_start
+
+        stats = summarize(samples, cpu_seconds=login_cpu)
+        stats["preview_cpu_per_op"] = preview_cpu / iterations if iterations else 0.0
+        return stats
+
+    @staticmethod
+    def flow_ratio(baseline, with_proof):
+        before = baseline["preview_cpu_per_op"] + baseline["cpu_per_op"]
+        after = with_proof["preview_cpu_per_op"] + with_proof["cpu_per_op"]
+        return after / before if before else 0.0
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮件发送吞吐基准测试命令
+
+在本地启动一个最小的SMTP替身服务器（每条SMTP响应前可注入延迟，模拟网络往返），
+对比以下两种发送方式的吞吐量和SMTP连接数：
+
+- per-message: 每封邮件调用EmailMultiAlternatives.send()，各自建立连接（原实现）
+- batched: 邮件入队后由drain_mail_queue批量取出，共用一个连接发送
+
+用法:
+    python manage.py benchmark_mail_delivery --messages 500 --latency-ms 2
+"""
+
+import socketserver
+import threading
+import time
+
+from apps.users.emails import EMAIL_VERIFICATION, build_message
+from apps.users.mail_queue import get_mail_queue
+from apps.users.tasks import drain_mail_queue
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """只实现发送流程所需命令的SMTP会话"""
+
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.count("connections")
+        self.reply("220 localhost ESMTP stand-in")
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line.rstrip(b"\r\n") == b".":
+                    in_data = False
+                    self.server.count("messages")
+                    self.reply("250 OK")
+                continue
+            command = line[:4].upper()
+            if command == b"DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                # EHLO/HELO/MAIL/RCPT/RSET/NOOP
+                self.reply("250 OK")
+
+
+class SMTPStandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), SMTPStandInHandler)
+        self.latency = latency
+        self.counters = {"connections": 0, "messages": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self.counters = {"connections": 0, "messages": 0}
+
+
+class Command(BaseCommand):
+    help = "对比逐封发送与批量发送邮件的吞吐量和SMTP连接数"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=500, help="邮件数量")
+        parser.add_argument(
+            "--latency-ms", type=float, default=1.0, help="每条SMTP响应的延迟（毫秒）"
+        )
+        parser.add_argument("--batch-size", type=int, default=50, help="每批邮件数")
+
+    def handle(self, *args, **options):
+        server = SMTPStandInServer(options["latency_ms"] / 1000)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with override_settings(
+                EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+                EMAIL_HOST="127.0.0.1",
+                EMAIL_PORT=server.server_address[1],
+                EMAIL_USE_TLS=False,
+                EMAIL_USE_SSL=False,
+                EMAIL_HOST_USER="",
+                EMAIL_HOST_PASSWORD="",
+                MAIL_QUEUE_BACKEND="apps.users.mail_queue.MemoryMailQueue",
+                MAIL_BATCHING={"BATCH_SIZE": options["batch_size"]},
+            ):
+                total = options["messages"]
+                self.report("per-message", server, total, self.send_per_message)
+                self.report("batched", server, total, self.send_batched)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def report(self, name, server, total, func):
+        server.reset()
+        start = time.perf_counter()
+        func(total)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{name:<12} messages={server.counters['messages']:<6} "
+            f"connections={server.counters['connections']:<6} "
+            f"elapsed={elapsed:8.3f}s throughput={total / elapsed:10.1f} msg/s"
+        )
+
+    @staticmethod
+    def send_per_message(total):
+        for index in range(total):
+            build_message(
+                EMAIL_VERIFICATION, f"user{index}@example.com", f"token-{index}"
+            ).send(fail_silently=False)
+
+    @staticmethod
+    def send_batched(total):
+        queue = get_mail_queue()
+        for index in range(total):
+            queue.push(
+                {
+                    "kind": EMAIL_VERIFICATION,
+                    "user_id": index,
+                    "email": f"user{index}@example.com",
+                    "token": f"token-{index}",
+                    "attempts": 0,
+                }
+            )
+        drain_mail_queue()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""密码哈希策略基准测试命令
+
+按当前PASSWORD_HASHER_PARAMS配置测量各哈希策略校验一次密码的延迟和CPU时间，
+并换算为每个CPU核心每秒可处理的登录次数。
+
+用法:
+    python manage.py benchmark_password_hashers --iterations 20
+"""
+
+import os
+
+from apps.common.benchmark import format_result, measure
+from apps.users.hashers import TUNABLE_HASHERS
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+BENCHMARK_PASSWORD = "BenchmarkPass123"
+
+# 各策略需要展示的成本参数
+COST_PARAMS = {
+    "argon2": ("time_cost", "memory_cost", "parallelism"),
+    "scrypt": ("work_factor", "block_size", "parallelism"),
+    "pbkdf2_sha256": ("iterations",),
+}
+
+
+class Command(BaseCommand):
+    help = "测量各密码哈希策略的校验延迟和每核登录吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="每种策略的校验次数")
+        parser.add_argument(
+            "--algorithm",
+            choices=sorted(TUNABLE_HASHERS),
+            action="append",
+            help="需要测试的策略（可重复指定，默认全部）",
+        )
+
+    def handle(self, *args, **options):
+        algorithms = options["algorithm"] or list(TUNABLE_HASHERS)
+        policy = getattr(settings, "PASSWORD_HASH_POLICY", None)
+        self.stdout.write(f"CPU核数: {os.cpu_count()}  当前策略: {policy}")
+
+        for algorithm in algorithms:
+            hasher = TUNABLE_HASHERS[algorithm]()
+            try:
+                encoded = hasher.encode(BENCHMARK_PASSWORD, hasher.salt())
+            except ValueError as e:
+                self.stdout.write(self.style.WARNING(f"{algorithm}: 跳过（{e}）"))
+                continue
+
+            stats = measure(
+                lambda: hasher.verify(BENCHMARK_PASSWORD, encoded),
+                iterations=options["iterations"],
+                warmup=2,
+            )
+            params = {name: getattr(hasher, name) for name in COST_PARAMS[algorithm]}
+            self.stdout.write(format_result(algorithm, stats))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  登录/秒/核: {1 / stats['cpu_per_op']:.1f}  参数: {params}"
+                )
+            )
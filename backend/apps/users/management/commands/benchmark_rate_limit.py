@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""频率限制基准测试命令
+
+对比每次请求的频率限制检查耗时：
+
+- drf: SimpleRateThrottle（缓存中保存时间戳列表，每次读取、修改并写回整个列表）
+- gcra (1 dim): RateLimitThrottle，只检查IP
+- gcra (4 dims): RateLimitThrottle，同时检查IP、用户、邮箱和验证码ID
+
+限制设置为--limit次/分钟，测试期间请求不会被拒绝，DRF实现的时间戳列表随请求
+增长到--limit个元素。
+
+用法:
+    python manage.py benchmark_rate_limit --limit 1000
+"""
+
+import json
+
+from apps.common.benchmark import format_result, measure
+from apps.users.throttling import RateLimitThrottle
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LegacyThrottle(SimpleRateThrottle):
+    """原PreviewLoginThrottle的实现方式（按IP）"""
+
+    scope = "benchmark"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class BenchmarkView:
+    throttle_scope = "benchmark"
+
+
+class Command(BaseCommand):
+    help = "对比DRF SimpleRateThrottle与GCRA多维度频率限制的检查耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000, help="每分钟限制次数")
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        rate = f"{limit}/min"
+        request = Request(
+            RequestFactory().post(
+                "/api/auth/login/",
+                data=json.dumps(
+                    {"email": "bench@example.com", "captcha_id": "captcha-id"}
+                ),
+                content_type="application/json",
+            ),
+            parsers=[JSONParser()],
+        )
+        request.user = AnonymousUser()
+        view = BenchmarkView()
+        iterations = limit - 20  # measure()预热10次，另留余量
+
+        LegacyThrottle.THROTTLE_RATES = {"benchmark": rate}
+        self.report("drf", LegacyThrottle, request, view, iterations)
+
+        dimensions = {
+            "gcra (1 dim)": {"ip": rate},
+            "gcra (4 dims)": {
+                "ip": rate,
+                "user": rate,
+                "email": rate,
+                "captcha": rate,
+            },
+        }
+        for name, rules in dimensions.items():
+            with override_settings(RATE_LIMITS={"benchmark": rules}):
+                self.report(name, RateLimitThrottle, request, view, iterations)
+
+    def report(self, name, throttle_class, request, view, iterations):
+        cache.clear()
+
+        def check():
+            if not throttle_class().allow_request(request, view):
+                raise CommandError(f"{name}: 请求被拒绝，请增大--limit")
+
+        self.stdout.write(format_result(name, measure(check, iterations)))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""单IP洪泛下的频率限制压测命令
+
+多个线程从同一IP持续请求登录预验证API（/api/auth/preview/），对比关闭和开启
+进程内拒绝缓存时被拒绝请求（429）的吞吐量，以及访问共享限制器的次数。
+
+缓存后端不是Redis时，共享限制器每次检查额外等待--rtt-ms毫秒，模拟一次Redis
+往返；使用Redis时设置--rtt-ms 0。
+
+用法:
+    python manage.py benchmark_rate_limit_flood --requests 5000 --threads 1
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from apps.users.rate_limit import RATE_LIMIT_CHECKS, CacheRateLimiter
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+FLOOD_IP = "203.0.113.7"
+
+
+class LatencyRateLimiter(CacheRateLimiter):
+    """每次检查共享状态前等待rtt秒，模拟Redis往返"""
+
+    rtt = 0.0
+
+    def check(self, limits, now):
+        time.sleep(self.rtt)
+        return super().check(limits, now)
+
+
+class Command(BaseCommand):
+    help = "单IP洪泛时对比开启/关闭进程内拒绝缓存的429吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="总请求数")
+        parser.add_argument("--threads", type=int, default=1, help="并发线程数")
+        parser.add_argument("--rtt-ms", type=float, default=0.5, help="模拟往返毫秒")
+
+    def handle(self, *args, **options):
+        # 每个400/429响应都会记录一条警告日志，压测期间关闭
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        LatencyRateLimiter.rtt = options["rtt_ms"] / 1000
+        limiter = f"{__name__}.LatencyRateLimiter" if options["rtt_ms"] else None
+        for enabled in (False, True):
+            with override_settings(
+                RATE_LIMITER_BACKEND=limiter,
+                RATE_LIMIT_LOCAL_DENY={"ENABLED": enabled},
+            ):
+                self.flood(
+                    "local deny on" if enabled else "local deny off",
+                    options["requests"],
+                    options["threads"],
+                )
+
+    def flood(self, name, total, threads):
+        cache.clear()
+        statuses = Counter()
+        lock = threading.Lock()
+        body = json.dumps(
+            {
+                "email": "victim@example.com",
+                "password": "x",
+                "captcha_id": "x",
+                "captcha_answer": "x",
+            }
+        )
+        checks = {
+            result: RATE_LIMIT_CHECKS.labels(result=result).get()
+            for result in ("allowed", "denied", "denied_local")
+        }
+
+        def worker(count):
+            client = Client(REMOTE_ADDR=FLOOD_IP)
+            local = Counter()
+            for _ in range(count):
+                response = client.post(
+                    "/api/auth/preview/", data=body, content_type="application/json"
+                )
+                local[response.status_code] += 1
+            with lock:
+                statuses.update(local)
+
+        per_thread = total // threads
+        workers = [
+            threading.Thread(target=worker, args=(per_thread,)) for _ in range(threads)
+        ]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        shared = sum(
+            RATE_LIMIT_CHECKS.labels(result=result).get() - checks[result]
+            for result in ("allowed", "denied")
+        )
+        denied = statuses[429]
+        self.stdout.write(
+            f"{name:<16} 请求 {sum(statuses.values())}，429 {denied}，"
+            f"耗时 {elapsed:.2f}s，{sum(statuses.values()) / elapsed:.0f} req/s，"
+            f"共享限制器检查 {shared:.0f} 次"
+        )
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""过期令牌清理基准测试命令
+
+向users_email_verification写入测试记录（前EXPIRED比例已过期超过保留期，
+其余未过期），统计：
+
+- 清理前后按token查找记录的延迟
+- --dry-run统计耗时
+- 分块清理的总耗时、删除速率和单块最长耗时（近似单条DELETE的锁持有时间）
+
+用法:
+    python manage.py benchmark_token_purge --rows 10000000 --expired 0.9
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from apps.common.benchmark import format_result, measure
+from apps.users.models import EmailVerification, User
+from apps.users.token_purge import purge_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+SEED_PREFIX = "bench_purge_"
+
+
+class Command(BaseCommand):
+    help = "在大表上测试分块清理过期令牌的速率和单块耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000000, help="测试记录数")
+        parser.add_argument("--expired", type=float, default=0.9, help="已过期比例")
+        parser.add_argument("--batch-size", type=int, default=10000, help="批量写入大小")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="清理块大小")
+        parser.add_argument("--lookups", type=int, default=1000, help="token查找次数")
+
+    def handle(self, *args, **options):
+        total = options["rows"]
+        user, _ = User.objects.get_or_create(
+            username=f"{SEED_PREFIX}user",
+            defaults={"email": f"{SEED_PREFIX}user@example.com", "password": "!"},
+        )
+        now = timezone.now()
+        expired_rows = int(total * options["expired"])
+        self.seed(user, total, expired_rows, options["batch_size"], now)
+
+        rng = random.Random(42)  # nosec B311
+
+        def lookup():
+            token = f"{SEED_PREFIX}{rng.randrange(expired_rows, total)}"
+            return EmailVerification.objects.get(token=token)
+
+        cutoff = now - timedelta(days=7)
+        self.stdout.write(
+            format_result("lookup (before)", measure(lookup, options["lookups"]))
+        )
+
+        start = time.perf_counter()
+        dry_run = purge_model(
+            EmailVerification, cutoff, options["chunk_size"], dry_run=True
+        )
+        self.stdout.write(
+            f"dry-run: {dry_run['rows']} 条待清理，{dry_run['chunks']} 块，"
+            f"耗时 {time.perf_counter() - start:.3f}s"
+        )
+
+        start = time.perf_counter()
+        result = purge_model(EmailVerification, cutoff, options["chunk_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"purge: 删除 {result['rows']} 条，{result['chunks']} 块，"
+            f"耗时 {elapsed:.3f}s（{result['rows'] / elapsed:.0f} 行/秒），"
+            f"单块最长耗时 {result['max_chunk_seconds'] * 1000:.1f}ms"
+        )
+        self.stdout.write(
+            format_result("lookup (after)", measure(lookup, options["lookups"]))
+        )
+
+        EmailVerification.objects.filter(user=user).delete()
+        user.delete()
+
+    def seed(self, user, total, expired_rows, batch_size, now):
+        """写入测试记录：旧记录已过期超过保留期，最新的记录未过期"""
+        expired_at = now - timedelta(days=30)
+        valid_until = now + timedelta(hours=24)
+        for start in range(0, total, batch_size):
+            EmailVerification.objects.bulk_create(
+                [
+                    EmailVerification(
+                        user=user,
+                        email=user.email,
+                        token=f"{SEED_PREFIX}{index}",
+                        expires_at=expired_at if index < expired_rows else valid_until,
+                    )
+                    for index in range(start, min(start + batch_size, total))
+                ]
+            )
+            self.stdout.write(f"已写入 {min(start + batch_size, total)}/{total}")
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""令牌存储基准测试命令
+
+对比各令牌存储完成一次令牌生命周期（签发 + 消费）的数据库查询次数和耗时：
+
+- db: DatabaseTokenStore
+- cache: 当前缓存后端对应的CacheTokenStore/RedisTokenStore
+- dual: DualTokenStore（迁移期间）
+
+测试用户在事务中创建，结束后回滚。
+
+用法:
+    python manage.py benchmark_token_store --iterations 2000
+"""
+
+import itertools
+import secrets
+import uuid
+from datetime import timedelta
+
+from apps.common.benchmark import format_result, measure
+from apps.users.emails import EMAIL_VERIFICATION
+from apps.users.models import User
+from apps.users.token_store import TOKEN_VALID, get_token_store
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "对比数据库与缓存令牌存储签发和消费令牌的查询次数和耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000, help="令牌数")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=f"benchmark-{uuid.uuid4().hex[:12]}",
+                email=f"benchmark-{uuid.uuid4().hex[:12]}@example.com",
+                password="!",
+            )
+            for backend in ("db", "cache", "dual"):
+                with override_settings(TOKEN_STORE={"BACKEND": backend}):
+                    self.report(backend, user, options["iterations"])
+            transaction.set_rollback(True)
+
+    def report(self, name, user, iterations):
+        """统计一次签发 + 消费的查询次数和耗时"""
+        store = get_token_store()
+        counter = itertools.count()
+
+        def lifecycle():
+            token = f"{secrets.token_urlsafe(16)}-{next(counter)}"
+            expires_at = timezone.now() + timedelta(hours=24)
+            store.issue(EMAIL_VERIFICATION, user.id, user.email, token, expires_at)
+            if store.consume(EMAIL_VERIFICATION, token).status != TOKEN_VALID:
+                raise CommandError(f"{name}: 令牌消费失败")
+
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            lifecycle()
+        stats = measure(lifecycle, iterations)
+        self.stdout.write(format_result(name, stats))
+        self.stdout.write(f"  数据库查询/令牌: {len(queries.captured_queries)}")
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""用户查找基准测试命令
+
+向用户表批量写入测试用户后，对比以下查找方式的延迟：
+
+- exact: email = 'value'（原实现，大小写不一致时查不到）
+- iexact: email__iexact（MySQL翻译为LIKE，无法使用索引）
+- lower: LOWER(email) = 'value'（find_user_by_email_or_username，命中函数索引）
+
+用法:
+    python manage.py benchmark_user_lookup --users 1000000 --keep
+    python manage.py benchmark_user_lookup --users 1000000 --skip-seed
+
+测试用户的用户名以bench_lookup_开头，未指定--keep时测试结束后删除。
+"""
+
+import random
+
+from apps.common.benchmark import format_result, measure
+from apps.users.models import User
+from apps.users.utils import filter_users_by_email, find_user_by_email_or_username
+from django.core.management.base import BaseCommand
+
+SEED_PREFIX = "bench_lookup_"
+
+
+def seed_email(index):
+    return f"{SEED_PREFIX}{index}@example.com"
+
+
+class Command(BaseCommand):
+    help = "在大用户表上对比精确、iexact和LOWER函数索引三种邮箱查找方式"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000000, help="测试用户数量")
+        parser.add_argument("--batch-size", type=int, default=10000, help="批量写入大小")
+        parser.add_argument("--iterations", type=int, default=1000, help="每种方式的查找次数")
+        parser.add_argument("--skip-seed", action="store_true", help="复用已写入的测试用户")
+        parser.add_argument("--keep", action="store_true", help="测试结束后保留测试用户")
+
+    def handle(self, *args, **options):
+        total = options["users"]
+        if not options["skip_seed"]:
+            self.seed(total, options["batch_size"])
+
+        # 查询使用大小写混合的输入
+        rng = random.Random(42)  # nosec B311
+
+        def mixed_case_email():
+            return seed_email(rng.randrange(total)).upper()
+
+        def exact():
+            return User.objects.filter(email=mixed_case_email()).first()
+
+        def iexact():
+            return User.objects.filter(email__iexact=mixed_case_email()).first()
+
+        def lower():
+            return find_user_by_email_or_username(mixed_case_email())
+
+        iterations = options["iterations"]
+        for name, func in (("exact", exact), ("iexact", iexact), ("lower", lower)):
+            self.stdout.write(format_result(name, measure(func, iterations=iterations)))
+
+        self.stdout.write("LOWER查询执行计划:")
+        self.stdout.write(filter_users_by_email(mixed_case_email()).explain())
+
+        if not options["keep"]:
+            deleted, _ = User.objects.filter(username__startswith=SEED_PREFIX).delete()
+            self.stdout.write(f"已删除测试用户: {deleted}")
+
+    def seed(self, total, batch_size):
+        """批量写入测试用户（使用不可用密码，避免计算哈希）"""
+        existing = User.objects.filter(username__startswith=SEED_PREFIX).count()
+        for start in range(existing, total, batch_size):
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f"{SEED_PREFIX}{index}",
+                        email=seed_email(index),
+                        password="!",
+                    )
+                    for index in range(start, min(start + batch_size, total))
+                ]
+            )
+            self.stdout.write(f"已写入 {min(start + batch_size, total)}/{total}")
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""密码哈希参数校准命令
+
+在当前硬件上逐步调整各算法的成本参数，选出单次哈希耗时不超过目标延迟的
+最高成本，并输出可直接写入环境变量的配置。
+
+用法:
+    python manage.py calibrate_password_hasher --target-ms 50
+    python manage.py calibrate_password_hasher --algorithm argon2 --memory-kib 65536
+
+参数低于OWASP建议下限时会输出警告（此时应提高目标延迟或改用其他算法）。
+"""
+
+import statistics
+import time
+
+from apps.users.hashers import TUNABLE_HASHERS, build_hasher
+from django.core.management.base import BaseCommand
+
+CALIBRATION_PASSWORD = "CalibratePass123"
+
+# OWASP密码存储建议的最低成本参数
+SAFETY_FLOORS = {
+    "argon2": {"time_cost": 2, "memory_cost": 19456},
+    "scrypt": {"work_factor": 2**17},
+    "pbkdf2_sha256": {"iterations": 600000},
+}
+
+# 成本参数对应的环境变量（见bravo/settings/base.py中的PASSWORD_HASHER_PARAMS）
+ENV_NAMES = {
+    "argon2": {
+        "time_cost": "PASSWORD_ARGON2_TIME_COST",
+        "memory_cost": "PASSWORD_ARGON2_MEMORY_COST",
+        "parallelism": "PASSWORD_ARGON2_PARALLELISM",
+    },
+    "scrypt": {
+        "work_factor": "PASSWORD_SCRYPT_WORK_FACTOR",
+        "block_size": "PASSWORD_SCRYPT_BLOCK_SIZE",
+        "parallelism": "PASSWORD_SCRYPT_PARALLELISM",
+    },
+    "pbkdf2_sha256": {"iterations": "PASSWORD_PBKDF2_ITERATIONS"},
+}
+
+# PBKDF2按探测结果线性外推，其余算法逐级提高成本
+PBKDF2_PROBE_ITERATIONS = 100000
+SCRYPT_MIN_LOG2_N = 10
+SCRYPT_MAX_LOG2_N = 22
+ARGON2_MAX_TIME_COST = 20
+
+
+def time_hasher(hasher, samples):
+    """
+    测量哈希器单次编码耗时的中位数
+
+    Returns:
+        float: 耗时（秒）
+    """
+    salt = hasher.salt()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.encode(CALIBRATION_PASSWORD, salt)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = "按目标延迟校准密码哈希器的成本参数"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=sorted(TUNABLE_HASHERS),
+            action="append",
+            help="需要校准的算法（可重复指定，默认全部）",
+        )
+        parser.add_argument(
+            "--target-ms", type=float, default=50.0, help="目标单次哈希延迟（毫秒）"
+        )
+        parser.add_argument("--samples", type=int, default=3, help="每组参数的测量次数")
+        parser.add_argument(
+            "--memory-kib", type=int, default=19456, help="Argon2内存成本（KiB）"
+        )
+        parser.add_argument(
+            "--parallelism", type=int, default=1, help="Argon2/scrypt并行度"
+        )
+        parser.add_argument("--block-size", type=int, default=8, help="scrypt块大小（r）")
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        samples = options["samples"]
+        algorithms = options["algorithm"] or list(TUNABLE_HASHERS)
+
+        for algorithm in algorithms:
+            try:
+                params, elapsed = getattr(self, f"calibrate_{algorithm}")(
+                    target, samples, options
+                )
+            except ValueError as e:
+                # Argon2依赖argon2-cffi，未安装时跳过
+                self.stdout.write(self.style.WARNING(f"{algorithm}: 跳过（{e}）"))
+                continue
+            self.report(algorithm, params, elapsed)
+
+    def calibrate_pbkdf2_sha256(self, target, samples, options):
+        probe = time_hasher(
+            build_hasher("pbkdf2_sha256", iterations=PBKDF2_PROBE_ITERATIONS), samples
+        )
+        iterations = max(
+            10000, round(PBKDF2_PROBE_ITERATIONS * target / probe / 10000) * 10000
+        )
+        params = {"iterations": iterations}
+        return params, time_hasher(build_hasher("pbkdf2_sha256", **params), samples)
+
+    def calibrate_scrypt(self, target, samples, options):
+        best = None
+        for log2_n in range(SCRYPT_MIN_LOG2_N, SCRYPT_MAX_LOG2_N + 1):
+            params = {
+                "work_factor": 2**log2_n,
+                "block_size": options["block_size"],
+                "parallelism": options["parallelism"],
+            }
+            elapsed = time_hasher(build_hasher("scrypt", **params), samples)
+            if best is not None and elapsed > target:
+                break
+            best = (params, elapsed)
+        return best
+
+    def calibrate_argon2(self, target, samples, options):
+        best = None
+        for time_cost in range(1, ARGON2_MAX_TIME_COST + 1):
+            params = {
+                "time_cost": time_cost,
+                "memory_cost": options["memory_kib"],
+                "parallelism": options["parallelism"],
+            }
+            elapsed = time_hasher(build_hasher("argon2", **params), samples)
+            if best is not None and elapsed > target:
+                break
+            best = (params, elapsed)
+        return best
+
+    def report(self, algorithm, params, elapsed):
+        self.stdout.write(
+            f"{algorithm}: {params} 单次哈希 {elapsed * 1000:.1f}ms "
+            f"（约 {1 / elapsed:.1f} 次登录/秒/核）"
+        )
+        for name, floor in SAFETY_FLOORS[algorithm].items():
+            if params[name] < floor:
+                self.stdout.write(
+                    self.style.WARNING(f"  警告: {name}={params[name]} 低于建议下限 {floor}")
+                )
+        for name, value in params.items():
+            self.stdout.write(
+                self.style.SUCCESS(f"  {ENV_NAMES[algorithm][name]}={value}")
+            )
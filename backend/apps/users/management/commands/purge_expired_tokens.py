@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""过期令牌清理命令
+
+按主键区间分块删除过期超过保留期的邮箱验证和密码重置记录，与Celery beat
+定时任务purge_expired_tokens_task使用同一实现。
+
+用法:
+    python manage.py purge_expired_tokens --dry-run
+    python manage.py purge_expired_tokens --chunk-size 2000 --sleep 0.2
+"""
+
+from apps.users.token_purge import get_token_purge_config, purge_expired_tokens
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "分块清理过期的邮箱验证和密码重置记录"
+
+    def add_arguments(self, parser):
+        config = get_token_purge_config()
+        parser.add_argument("--dry-run", action="store_true", help="只统计待清理记录数，不删除")
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=config["RETENTION_DAYS"],
+            help="删除过期超过该天数的记录",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=config["CHUNK_SIZE"],
+            help="每块主键区间大小",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=config["SLEEP"],
+            help="块之间的休眠秒数（限制删除速率）",
+        )
+
+    def handle(self, *args, **options):
+        results = purge_expired_tokens(
+            retention_days=options["retention_days"],
+            chunk_size=options["chunk_size"],
+            sleep=options["sleep"],
+            dry_run=options["dry_run"],
+        )
+        action = "待清理" if options["dry_run"] else "已清理"
+        for table, result in results.items():
+            self.stdout.write(
+                f"{table}: {action} {result['rows']} 条记录，"
+                f"{result['chunks']} 块，"
+                f"单块最长耗时 {result['max_chunk_seconds'] * 1000:.1f}ms"
+            )
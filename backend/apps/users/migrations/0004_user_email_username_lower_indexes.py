@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:10
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_add_email_unique_constraint"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email"),
+                name="idx_user_email_lower",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Lower("username"),
+                name="idx_user_username_lower",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_user_email_username_lower_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emailverification",
+            index=models.Index(fields=["expires_at"], name="idx_email_verify_expires"),
+        ),
+        migrations.AddIndex(
+            model_name="passwordreset",
+            index=models.Index(fields=["expires_at"], name="idx_pwd_reset_expires"),
+        ),
+    ]
@@ -2,8 +2,18 @@
 # REQ-ID: REQ-2025-003-user-login
 """用户模型"""
 
+from datetime import timedelta
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+# 连续登录失败达到该次数后锁定账户
+MAX_FAILED_LOGIN_ATTEMPTS = 5
+# 账户锁定时长
+LOGIN_LOCKOUT_DURATION = timedelta(minutes=10)
 
 
 class User(AbstractUser):
@@ -70,6 +80,11 @@ class User(AbstractUser):
         verbose_name_plural = "用户"
         indexes = [
             models.Index(fields=["is_email_verified"], name="idx_email_verified"),
+            # 大小写不敏感的邮箱/用户名查找（LOWER(email)、LOWER(username)函数索引）
+            models.Index(Lower("email"), name="idx_user_email_lower"),
+            models.Index(Lower("username"), name="idx_user_username_lower"),
+            # 用户列表键集分页的排序(-date_joined, id)
+            models.Index(fields=["-date_joined", "id"], name="idx_user_joined_id"),
         ]
         ordering = ["-date_joined"]  # 按注册时间倒序排列
         # 注意：email和username的唯一约束由AbstractUser的字段定义提供
@@ -83,10 +98,50 @@ class User(AbstractUser):
         """检查账户是否被锁定"""
         if self.locked_until is None:
             return False
-        from django.utils import timezone
-
         return timezone.now() < self.locked_until
 
+    def record_failed_login(self):
+        """
+        记录一次登录失败（单条UPDATE原子完成计数和锁定）
+
+        失败次数在数据库中原子递增，达到MAX_FAILED_LOGIN_ATTEMPTS时同一条语句
+        设置锁定到期时间，并发失败请求不会丢失计数。实例字段按本次更新同步，
+        并发时可能比数据库中的值略旧，但锁定状态以数据库为准。
+
+        Returns:
+            bool: 本次失败后账户是否被锁定
+        """
+        now = timezone.now()
+        locked_until = now + LOGIN_LOCKOUT_DURATION
+        # 注意：locked_until必须排在failed_login_attempts之前，
+        # MySQL按从左到右的顺序执行SET，CASE需要读取递增前的失败次数
+        type(self).objects.filter(pk=self.pk).update(
+            locked_until=Case(
+                When(
+                    failed_login_attempts__gte=MAX_FAILED_LOGIN_ATTEMPTS - 1,
+                    then=Value(locked_until),
+                ),
+                default=F("locked_until"),
+            ),
+            failed_login_attempts=F("failed_login_attempts") + 1,
+        )
+
+        self.failed_login_attempts += 1
+        if self.failed_login_attempts >= MAX_FAILED_LOGIN_ATTEMPTS:
+            self.locked_until = locked_until
+            return True
+        return False
+
+    def reset_failed_logins(self):
+        """清除登录失败次数和锁定状态（仅在需要时执行一条UPDATE）"""
+        if self.failed_login_attempts == 0 and self.locked_until is None:
+            return
+        type(self).objects.filter(pk=self.pk).update(
+            failed_login_attempts=0, locked_until=None
+        )
+        self.failed_login_attempts = 0
+        self.locked_until = None
+
 
 class EmailVerification(models.Model):
     """邮箱验证模型"""
@@ -133,6 +188,8 @@ class EmailVerification(models.Model):
         indexes = [
             models.Index(fields=["token"], name="idx_email_verify_token"),
             models.Index(fields=["user", "email"], name="idx_email_verify_user"),
+            # 过期记录清理按expires_at范围统计
+            models.Index(fields=["expires_at"], name="idx_email_verify_expires"),
         ]
         ordering = ["-created_at"]  # 按创建时间倒序排列
 
@@ -191,6 +248,8 @@ class PasswordReset(models.Model):
         indexes = [
             models.Index(fields=["token"], name="idx_pwd_reset_token"),
             models.Index(fields=["user"], name="idx_pwd_reset_user"),
+            # 过期记录清理按expires_at范围统计
+            models.Index(fields=["expires_at"], name="idx_pwd_reset_expires"),
         ]
         ordering = ["-created_at"]  # 按创建时间倒序排列
 
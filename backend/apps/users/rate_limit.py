@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""GCRA频率限制器
+
+GCRA（通用信元速率算法）每个限制键只保存一个理论到达时间（TAT）：
+
+- 速率limit/period对应发射间隔T = period / limit
+- 请求到达时new_tat = max(tat, now) + T，new_tat - now <= period时允许并保存
+  new_tat，否则拒绝，需等待new_tat - period - now秒
+- 允许period内最多limit次突发请求，与固定窗口计数相比没有窗口边界处的双倍突发
+
+一次检查同时覆盖多个限制键（IP、用户、邮箱、验证码ID等维度）：任一维度超限时
+整个请求被拒绝，且不计入任何维度。
+
+- RedisRateLimiter: 通过Lua脚本在一次Redis往返中检查并更新全部维度
+- CacheRateLimiter: 通用Django缓存后端（LocMem等），get_many/set_many两次访问，
+  并发请求之间不是原子的，适用于开发和测试
+
+get_rate_limiter()根据RATE_LIMITER_BACKEND配置或当前缓存后端自动选择实现。
+
+进程内拒绝缓存：共享限制器拒绝请求时返回每个超限键的等待时间，在该时间之前
+包含这个键的任何请求都会被拒绝（被拒绝的请求不更新TAT）。因此将超限键及其
+解除时间记入进程内缓存（RATE_LIMIT_LOCAL_DENY），之后的请求只要包含未解除的
+超限键就直接拒绝，不访问Redis。缓存条目数有上限，单个条目最多保留MAX_TTL秒，
+共享状态被手动清除时最多延迟MAX_TTL秒生效。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from apps.common import metrics
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+RATE_LIMIT_KEY_PREFIX = "rate_limit:"
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# 比较TAT时的浮点误差容限（秒），保证周期内恰好允许limit次请求
+TOLERANCE = 1e-6
+
+DEFAULT_LOCAL_DENY_MAX_ENTRIES = 10000
+DEFAULT_LOCAL_DENY_MAX_TTL = 60
+
+RATE_LIMIT_CHECKS = metrics.counter(
+    "rate_limit_checks_total",
+    "频率限制检查结果（allowed、denied、denied_local）",
+    ["result"],
+)
+
+
+def get_local_deny_config():
+    """
+    读取RATE_LIMIT_LOCAL_DENY配置（默认关闭）
+
+    Returns:
+        dict: ENABLED、MAX_ENTRIES、MAX_TTL
+    """
+    config = getattr(settings, "RATE_LIMIT_LOCAL_DENY", None) or {}
+    return {
+        "ENABLED": config.get("ENABLED", False),
+        "MAX_ENTRIES": config.get("MAX_ENTRIES", DEFAULT_LOCAL_DENY_MAX_ENTRIES),
+        "MAX_TTL": config.get("MAX_TTL", DEFAULT_LOCAL_DENY_MAX_TTL),
+    }
+
+
+def parse_rate(rate):
+    """
+    解析速率字符串（与DRF相同的格式）
+
+    Args:
+        rate: 例如"10/min"、"5/hour"、"100/day"
+
+    Returns:
+        tuple: (次数, 周期秒数)
+    """
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+class LocalDenyCache:
+    """进程内超限键的有界LRU缓存（线程安全）"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def wait(self, keys, now):
+        """
+        检查请求是否包含未解除的超限键
+
+        Args:
+            keys: 本次请求的限制键
+            now: 当前时间戳
+
+        Returns:
+            float: 需要等待的秒数，没有超限键时为0
+        """
+        wait = 0.0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                cached_until, denied_until = entry
+                if cached_until <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                wait = max(wait, denied_until - now)
+        return wait
+
+    def add(self, key, now, wait, max_ttl, max_entries):
+        """记录超限键，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = (now + min(wait, max_ttl), now + wait)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_deny_cache = LocalDenyCache()
+
+
+class CacheRateLimiter:
+    """基于Django缓存接口的GCRA频率限制器"""
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def hit(self, limits, now=None):
+        """
+        检查并记录一次请求
+
+        Args:
+            limits: [(键, 次数, 周期秒数), ...]
+            now: 当前时间戳（测试用）
+
+        Returns:
+            tuple: (是否允许, 需要等待的秒数)，允许时等待秒数为0
+        """
+        if not limits:
+            return True, 0.0
+        now = time.time() if now is None else now
+        config = get_local_deny_config()
+        if config["ENABLED"]:
+            wait = local_deny_cache.wait([key for key, _, _ in limits], now)
+            if wait > 0:
+                RATE_LIMIT_CHECKS.labels(result="denied_local").inc()
+                return False, wait
+
+        denials = self.check(limits, now)
+        if not denials:
+            RATE_LIMIT_CHECKS.labels(result="allowed").inc()
+            return True, 0.0
+
+        RATE_LIMIT_CHECKS.labels(result="denied").inc()
+        if config["ENABLED"]:
+            for key, wait in denials:
+                local_deny_cache.add(
+                    key, now, wait, config["MAX_TTL"], config["MAX_ENTRIES"]
+                )
+        return False, max(wait for _, wait in denials)
+
+    def check(self, limits, now):
+        """
+        在共享存储中检查并记录一次请求
+
+        Returns:
+            list: 超限的[(键, 等待秒数), ...]，为空表示允许
+        """
+        keys = [RATE_LIMIT_KEY_PREFIX + key for key, _, _ in limits]
+        stored = self.cache.get_many(keys)
+
+        updates = {}
+        denials = []
+        for cache_key, (key, limit, period) in zip(keys, limits):
+            new_tat = max(stored.get(cache_key, now), now) + period / limit
+            if new_tat - now > period + TOLERANCE:
+                denials.append((key, new_tat - period - now))
+            updates[cache_key] = new_tat
+
+        if not denials:
+            # 同一请求的各维度周期不同，按最长周期设置过期时间
+            self.cache.set_many(updates, max(period for _, _, period in limits))
+        return denials
+
+
+class RedisRateLimiter(CacheRateLimiter):
+    """基于django-redis的GCRA频率限制器，一次检查只需一次Redis往返"""
+
+    # KEYS: 各维度的键；ARGV: now, 每个维度的发射间隔和周期, 浮点误差容限
+    # 全部维度通过才写入新的TAT，返回超限维度的{序号, 等待秒数, ...}
+    HIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[#ARGV])
+local tats = {}
+local denials = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2])
+    local period = tonumber(ARGV[i * 2 + 1])
+    local tat = tonumber(redis.call('GET', key) or now)
+    local new_tat = math.max(tat, now) + interval
+    if new_tat - now > period + tolerance then
+        table.insert(denials, i)
+        table.insert(denials, tostring(new_tat - period - now))
+    end
+    tats[i] = new_tat
+end
+if #denials > 0 then
+    return denials
+end
+for i, key in ipairs(KEYS) do
+    local period = tonumber(ARGV[i * 2 + 1])
+    redis.call('SET', key, tostring(tats[i]), 'PX', math.ceil(period * 1000))
+end
+return denials
+"""
+
+    def __init__(self, cache_alias="default"):
+        super().__init__(cache_alias)
+        self._script = None
+        self._script_lock = threading.Lock()
+
+    def _get_script(self):
+        if self._script is None:
+            with self._script_lock:
+                if self._script is None:
+                    from django_redis import get_redis_connection
+
+                    client = get_redis_connection(self.cache_alias)
+                    self._script = client.register_script(self.HIT_SCRIPT)
+        return self._script
+
+    def check(self, limits, now):
+        make_key = self.cache.make_key
+        args = [repr(now)]
+        for _, limit, period in limits:
+            args.extend([repr(period / limit), period])
+        args.append(TOLERANCE)
+        result = self._get_script()(
+            keys=[make_key(RATE_LIMIT_KEY_PREFIX + key) for key, _, _ in limits],
+            args=args,
+        )
+        return [
+            (limits[int(index) - 1][0], float(wait))
+            for index, wait in zip(result[::2], result[1::2])
+        ]
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _get_limiter_class(cache_alias):
+    backend = getattr(settings, "RATE_LIMITER_BACKEND", None)
+    if backend:
+        return import_string(backend)
+
+    cache_backend = settings.CACHES.get(cache_alias, {}).get("BACKEND", "")
+    if cache_backend == "django_redis.cache.RedisCache":
+        return RedisRateLimiter
+    return CacheRateLimiter
+
+
+def get_rate_limiter(cache_alias="default"):
+    """
+    获取频率限制器实例
+
+    Returns:
+        CacheRateLimiter: 频率限制器实例（同一实现在进程内复用）
+    """
+    limiter_class = _get_limiter_class(cache_alias)
+    limiter_key = (limiter_class, cache_alias)
+    limiter = _limiters.get(limiter_key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(limiter_key, limiter_class(cache_alias))
+    return limiter
+
+
+@receiver(setting_changed)
+def _clear_on_settings_changed(setting, **kwargs):
+    if setting in ("CACHES", "RATE_LIMITS", "RATE_LIMIT_LOCAL_DENY"):
+        local_deny_cache.clear()
@@ -4,7 +4,14 @@
 
 import re
 
-from apps.users.utils import find_user_by_email_or_username, verify_captcha
+from apps.users.credential_proof import consume_credential_proof
+from apps.users.hashing import check_user_password, hash_password
+from apps.users.utils import (
+    filter_users_by_email,
+    find_user_by_email_or_username,
+    save_with_unique_username,
+    verify_captcha,
+)
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
@@ -32,8 +39,8 @@ class UserRegisterSerializer(serializers.Serializer):
     captcha_answer = serializers.CharField(required=True, help_text="验证码答案")
 
     def validate_email(self, value):
-        """验证邮箱唯一性"""
-        if User.objects.filter(email=value).exists():
+        """验证邮箱唯一性（不区分大小写）"""
+        if filter_users_by_email(value).exists():
             raise serializers.ValidationError(
                 {"error": "该邮箱已被注册", "code": "EMAIL_EXISTS"}
             )
@@ -89,24 +96,16 @@ class UserRegisterSerializer(serializers.Serializer):
         email = validated_data["email"]
         password = validated_data["password"]
 
-        # 使用email作为username（如果username字段需要）
-        # 或者生成一个基于email的username
-        username = email.split("@")[0]  # 使用邮箱前缀作为username
-
-        # 确保username唯一
-        base_username = username
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-
-        # 创建用户
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
+        # 使用邮箱前缀作为username前缀，由分配器保证唯一
+        base_username = User.normalize_username(email.split("@")[0])
+
+        # 创建用户（与create_user一致，密码哈希交给哈希执行器计算）
+        user = User(
+            email=User.objects.normalize_email(email),
             is_email_verified=False,  # 注册时邮箱未验证
         )
+        user.password = hash_password(password)
+        save_with_unique_username(user, base_username)
 
         return user
 
@@ -124,14 +123,30 @@ class UserLoginSerializer(serializers.Serializer):
     )
     captcha_id = serializers.CharField(required=True, help_text="验证码ID")
     captcha_answer = serializers.CharField(required=True, help_text="验证码答案")
+    credential_proof = serializers.CharField(
+        required=False,
+        write_only=True,
+        help_text="预验证返回的凭证证明（可选，有效时跳过重复的密码校验）",
+    )
+
+    # 查找到的用户（密码错误时视图据此记录失败次数，无需再次查询）
+    user = None
 
     def validate(self, attrs):
         """验证验证码和用户认证"""
-        # 验证验证码
         captcha_id = attrs.get("captcha_id")
         captcha_answer = attrs.get("captcha_answer")
 
-        if not verify_captcha(captcha_id, captcha_answer):
+        # 预验证时已消费验证码，携带有效凭证证明时不再重复验证验证码
+        request = self.context.get("request")
+        proof = None
+        if request is not None:
+            proof = consume_credential_proof(
+                attrs.get("credential_proof"), captcha_id, request
+            )
+
+        # 验证验证码
+        if proof is None and not verify_captcha(captcha_id, captcha_answer):
             raise serializers.ValidationError(
                 {"captcha_answer": "验证码错误"}, code="INVALID_CAPTCHA"
             )
@@ -140,20 +155,30 @@ class UserLoginSerializer(serializers.Serializer):
         email_or_username = attrs.get("email")
         password = attrs.get("password")
 
-        # 尝试通过邮箱或用户名查找用户
-        user = find_user_by_email_or_username(email_or_username)
+        # 尝试通过邮箱或用户名查找用户（每个请求只查询一次）
+        user = self.user = find_user_by_email_or_username(email_or_username)
+
+        # 凭证证明代替了验证码，只对预验证时的用户和密码有效；与本次提交的用户或
+        # 密码不一致时视为验证码未通过，不进行密码校验（否则一次预验证可以免验证码
+        # 尝试任意账户或密码）
+        if proof is not None and (user is None or not proof.matches(user, password)):
+            raise serializers.ValidationError(
+                {"captcha_answer": "验证码错误"}, code="INVALID_CAPTCHA"
+            )
 
         if user is None:
             raise serializers.ValidationError(
                 {"error": "用户不存在或密码错误", "code": "INVALID_CREDENTIALS"}
             )
 
-        # 将用户对象添加到validated_data中，供视图使用（即使密码错误也返回，以便视图处理失败次数）
+        # 将用户对象添加到validated_data中，供视图使用
         attrs["user"] = user
         attrs["password"] = password  # 保存密码供视图验证
 
-        # 验证密码
-        if not user.check_password(password):
+        # 验证密码（凭证证明与本次提交的用户和密码一致时无需重新哈希）
+        if proof is not None:
+            return attrs
+        if not check_user_password(user, password):
             raise serializers.ValidationError(
                 {"error": "用户不存在或密码错误", "code": "INVALID_CREDENTIALS"}
             )
@@ -200,7 +225,7 @@ class PreviewLoginSerializer(serializers.Serializer):
             return attrs
 
         # 验证密码
-        if not user.check_password(password):
+        if not check_user_password(user, password):
             # 密码错误，但不抛出错误，让视图返回valid: false
             attrs["user"] = None
             attrs["valid"] = False
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""用户相关信号处理"""
+
+from apps.users.authentication import invalidate_user_tokens
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# 只更新这些字段时不影响认证结果，无需使令牌缓存失效
+AUTH_IRRELEVANT_FIELDS = frozenset({"last_login"})
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_tokens_on_user_save(sender, instance, created, update_fields, **kw):
+    """用户保存后使其已验证令牌缓存失效（密码、is_active等可能已变化）"""
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= AUTH_IRRELEVANT_FIELDS:
+        return
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_tokens_on_user_delete(sender, instance, **kwargs):
+    """用户删除后使其已验证令牌缓存失效"""
+    invalidate_user_tokens(instance.pk)
@@ -1,202 +1,321 @@
 # -*- coding: utf-8 -*-
 # REQ-ID: REQ-2025-003-user-login
-"""用户相关Celery任务"""
+"""用户相关Celery任务
+
+邮件批量发送流程：
+
+1. send_email_verification / send_password_reset_email 将邮件写入邮件队列
+2. 第一封邮件入队时调度drain_mail_queue，延迟MAX_WAIT_MS毫秒执行以便攒批
+3. drain_mail_queue每次取出最多BATCH_SIZE封邮件，通过同一个邮件连接逐封发送；
+   邮件发送或安排重试后才从处理中列表删除，任务中断时未处理的邮件放回队列
+4. 发送失败的邮件单独重新入队（指数退避），不影响同批次的其他邮件
+
+邮件队列为进程内队列（非Redis缓存后端）且Celery未启用同步执行时，入队的工作进程
+与执行drain的进程可能不同，邮件改为在发送任务中直接发送（每封一个连接）。
+
+重复点击"重新发送"时，视图通过submit_user_mail()记录每个(用户, 用途)的最新令牌，
+被新令牌取代的任务和待发送邮件直接跳过（计为coalesced），不再发送过时的邮件。
+"""
 
 import logging
+import os
+import random
+import socket
+import uuid
 
+from apps.common import metrics
+from apps.users.emails import (
+    EMAIL_VERIFICATION,
+    MESSAGE_LABELS,
+    PASSWORD_RESET,
+    build_message,
+)
+from apps.users.mail_queue import get_mail_batching_config, get_mail_queue
+from apps.users.token_purge import purge_expired_tokens
 from celery import shared_task
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.core.mail import get_connection
 
 logger = logging.getLogger(__name__)
 
+# 已调度drain_mail_queue的标记（超时后允许重新调度，避免任务丢失后队列停滞）
+MAIL_DRAIN_SCHEDULED_KEY = "mail_queue:drain_scheduled"
+MAIL_DRAIN_SCHEDULED_TTL = 60
 
-@shared_task(
-    bind=True,
-    max_retries=3,
-    default_retry_delay=60,  # 60秒后重试
-    autoretry_for=(Exception,),  # 对所有异常自动重试
-    retry_backoff=True,  # 指数退避
-    retry_backoff_max=600,  # 最大退避时间600秒
-    retry_jitter=True,  # 添加随机抖动避免同时重试
-    time_limit=300,  # 任务超时时间：5分钟
-    soft_time_limit=240,  # 软超时时间：4分钟（允许优雅退出）
+# 每个(用户, 用途)最新令牌的缓存键前缀
+MAIL_LATEST_TOKEN_KEY_PREFIX = "mail_latest_token:"
+
+MAIL_MESSAGES = metrics.counter(
+    "mail_messages_total",
+    "邮件处理结果（sent、coalesced、retry、failed）",
+    ["kind", "result"],
 )
-def send_email_verification(self, user_id, email, token):
+
+
+def _latest_token_key(kind, user_id):
+    return f"{MAIL_LATEST_TOKEN_KEY_PREFIX}{kind}:{user_id}"
+
+
+def submit_user_mail(kind, user_id, email, token):
     """
-    发送邮箱验证邮件
+    提交(用户, 用途)邮件：记录最新令牌后提交发送任务
+
+    合并窗口内同一用户同一用途只发送最新令牌的邮件，旧令牌的任务和待发送邮件
+    在发送前被跳过。
+
+    Args:
+        kind: 邮件类型
+        user_id: 用户ID
+        email: 收件人邮箱
+        token: 验证/重置令牌（已写入数据库的最新令牌）
+    """
+    window = get_mail_batching_config()["COALESCE_WINDOW"]
+    cache.set(_latest_token_key(kind, user_id), token, window)
+    MAIL_TASKS[kind].delay(user_id=user_id, email=email, token=token)
+
+
+def _is_superseded(kind, user_id, token):
+    latest = cache.get(_latest_token_key(kind, user_id))
+    return latest is not None and latest != token
+
+
+def enqueue_mail(kind, user_id, email, token, attempts=0):
+    """
+    邮件入队并调度批量发送
+
+    Args:
+        kind: 邮件类型
+        user_id: 用户ID（用于日志）
+        email: 收件人邮箱
+        token: 验证/重置令牌
+        attempts: 已尝试发送的次数
+    """
+    item = {
+        "kind": kind,
+        "user_id": user_id,
+        "email": email,
+        "token": token,
+        "attempts": attempts,
+    }
+    queue = get_mail_queue()
+    if not queue.shared and not getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
+        # 进程内队列对执行drain的工作进程不可见，直接发送
+        connection = get_connection(fail_silently=False)
+        try:
+            deliver_mail_batch([item], connection, get_mail_batching_config())
+        finally:
+            connection.close()
+        return
+    queue.push(item)
+    schedule_mail_drain()
+
+
+def schedule_mail_drain():
+    """调度drain_mail_queue（已调度时不重复调度，入队的邮件由同一批次发送）"""
+    if cache.add(MAIL_DRAIN_SCHEDULED_KEY, True, MAIL_DRAIN_SCHEDULED_TTL):
+        countdown = get_mail_batching_config()["MAX_WAIT_MS"] / 1000
+        drain_mail_queue.apply_async(countdown=countdown)
+
+
+@shared_task
+def send_email_verification(user_id, email, token):
+    """
+    发送邮箱验证邮件（入队，由drain_mail_queue批量发送）
 
     Args:
         user_id: 用户ID
         email: 用户邮箱
         token: 验证令牌
-
-    Raises:
-        Exception: 邮件发送失败时抛出异常，触发重试机制
     """
-    try:
-        # 构建验证链接（使用后端API URL）
-        # 注意：这里使用后端API URL，前端会调用这个API
-        backend_domain = getattr(settings, "BACKEND_DOMAIN", "http://localhost:8000")
-        verification_url = f"{backend_domain}/api/auth/email/verify/{token}/"
-
-        # 邮件主题
-        subject = "请验证您的邮箱"
-
-        # 渲染HTML模板
-        html_content = render_to_string(
-            "users/emails/email_verification.html",
-            {"verification_url": verification_url},
-        )
+    if _is_superseded(EMAIL_VERIFICATION, user_id, token):
+        MAIL_MESSAGES.labels(kind=EMAIL_VERIFICATION, result="coalesced").inc()
+        return
+    enqueue_mail(EMAIL_VERIFICATION, user_id, email, token)
 
-        # 渲染纯文本模板
-        text_content = render_to_string(
-            "users/emails/email_verification.txt",
-            {"verification_url": verification_url},
-        )
 
-        # 获取发件人邮箱（如果未设置则使用默认值）
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@bravo.com")
+@shared_task
+def send_password_reset_email(user_id, email, token):
+    """
+    发送密码重置邮件（入队，由drain_mail_queue批量发送）
 
-        # 创建邮件消息（支持HTML和纯文本）
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,  # 纯文本版本
-            from_email=from_email,
-            to=[email],
-        )
-        msg.attach_alternative(html_content, "text/html")  # HTML版本
+    Args:
+        user_id: 用户ID
+        email: 用户邮箱
+        token: 重置令牌
+    """
+    if _is_superseded(PASSWORD_RESET, user_id, token):
+        MAIL_MESSAGES.labels(kind=PASSWORD_RESET, result="coalesced").inc()
+        return
+    enqueue_mail(PASSWORD_RESET, user_id, email, token)
 
-        # 发送邮件
-        msg.send(fail_silently=False)
 
-        # 记录成功日志
-        logger.info(
-            f"邮箱验证邮件发送成功: user_id={user_id}, email={email}, "
-            f"retry_count={self.request.retries}"
-        )
+MAIL_TASKS = {
+    EMAIL_VERIFICATION: send_email_verification,
+    PASSWORD_RESET: send_password_reset_email,
+}
 
-    except Exception as exc:
-        # 记录错误日志（包含更多上下文信息）
-        error_context = {
-            "user_id": user_id,
-            "email": email,
-            "error": str(exc),
-            "error_type": type(exc).__name__,
-            "retry_count": self.request.retries,
-            "max_retries": self.max_retries,
-        }
-        logger.error(
-            f"邮箱验证邮件发送失败: {error_context}",
-            exc_info=True,
-            extra=error_context,
-        )
 
-        # 如果重试次数未达到上限，则重新抛出异常触发重试
-        if self.request.retries < self.max_retries:
-            raise self.retry(exc=exc)
-        else:
-            # 达到最大重试次数，记录严重错误
-            logger.critical(
-                f"邮箱验证邮件发送最终失败（已重试{self.max_retries}次）: "
-                f"user_id={user_id}, email={email}, error={str(exc)}, "
-                f"error_type={type(exc).__name__}",
-                extra=error_context,
-            )
-            raise  # 重新抛出异常，让Celery记录任务失败
+@shared_task
+def requeue_mail(item):
+    """重试延迟到期后将发送失败的邮件重新入队"""
+    enqueue_mail(
+        item["kind"], item["user_id"], item["email"], item["token"], item["attempts"]
+    )
 
 
 @shared_task(
-    bind=True,
-    max_retries=3,
-    default_retry_delay=60,  # 60秒后重试
-    autoretry_for=(Exception,),  # 对所有异常自动重试
-    retry_backoff=True,  # 指数退避
-    retry_backoff_max=600,  # 最大退避时间600秒
-    retry_jitter=True,  # 添加随机抖动避免同时重试
     time_limit=300,  # 任务超时时间：5分钟
     soft_time_limit=240,  # 软超时时间：4分钟（允许优雅退出）
 )
-def send_password_reset_email(self, user_id, email, token):
+def drain_mail_queue():
     """
-    发送密码重置邮件
+    批量发送邮件队列中的邮件（所有批次共用一个邮件连接）
 
-    Args:
-        user_id: 用户ID
-        email: 用户邮箱
-        token: 重置令牌
+    先将已退出的drain未处理的邮件放回队首；取出的邮件在处理后才从处理中列表删除，
+    任务异常（包括软超时）结束时未处理的邮件放回队首并重新调度。
 
-    Raises:
-        Exception: 邮件发送失败时抛出异常，触发重试机制
+    Returns:
+        int: 发送成功的邮件数
     """
+    # 先清除调度标记：此后入队的邮件要么被本次循环取出，要么调度新的任务
+    cache.delete(MAIL_DRAIN_SCHEDULED_KEY)
+    config = get_mail_batching_config()
+    queue = get_mail_queue()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    recovered = queue.recover()
+    if recovered:
+        logger.warning(f"放回中断的drain未处理的邮件: count={recovered}")
+
+    sent = 0
+    connection = get_connection(fail_silently=False)
     try:
-        # 构建重置链接（使用后端API URL）
-        # 注意：这里使用后端API URL，前端会调用这个API
-        backend_domain = getattr(settings, "BACKEND_DOMAIN", "http://localhost:8000")
-        reset_url = f"{backend_domain}/api/auth/password/reset/?token={token}"
-
-        # 邮件主题
-        subject = "重置您的密码"
-
-        # 渲染HTML模板
-        html_content = render_to_string(
-            "users/emails/password_reset.html",
-            {"reset_url": reset_url},
-        )
+        while True:
+            items = queue.reserve_batch(owner, config["BATCH_SIZE"])
+            if not items:
+                break
+            sent += deliver_mail_batch(
+                items, connection, config, ack=lambda item: queue.ack(owner, item)
+            )
+    finally:
+        connection.close()
+        if queue.release(owner):
+            schedule_mail_drain()
+    return sent
 
-        # 渲染纯文本模板
-        text_content = render_to_string(
-            "users/emails/password_reset.txt",
-            {"reset_url": reset_url},
-        )
 
-        # 获取发件人邮箱（如果未设置则使用默认值）
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@bravo.com")
+def deliver_mail_batch(items, connection, config, ack=None):
+    """
+    通过已有连接逐封发送一批邮件，失败的邮件单独重试
 
-        # 创建邮件消息（支持HTML和纯文本）
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,  # 纯文本版本
-            from_email=from_email,
-            to=[email],
-        )
-        msg.attach_alternative(html_content, "text/html")  # HTML版本
+    Args:
+        items: 邮件字典列表
+        connection: 邮件连接
+        config: get_mail_batching_config()的结果
+        ack: 每封邮件发送、跳过或安排重试后调用，参数为邮件字典
 
-        # 发送邮件
-        msg.send(fail_silently=False)
+    Returns:
+        int: 发送成功的邮件数
+    """
+    # 一次读取本批邮件对应的最新令牌，跳过已被新令牌取代的邮件
+    latest_tokens = cache.get_many(
+        {_latest_token_key(item["kind"], item["user_id"]) for item in items}
+    )
 
-        # 记录成功日志
-        logger.info(
-            f"密码重置邮件发送成功: user_id={user_id}, email={email}, "
-            f"retry_count={self.request.retries}"
-        )
+    sent = 0
+    for item in items:
+        latest = latest_tokens.get(_latest_token_key(item["kind"], item["user_id"]))
+        if latest is not None and latest != item["token"]:
+            MAIL_MESSAGES.labels(kind=item["kind"], result="coalesced").inc()
+        else:
+            sent += _deliver_mail(item, connection, config)
+        if ack is not None:
+            ack(item)
+    return sent
+
+
+def _deliver_mail(item, connection, config):
+    """
+    发送一封邮件，失败时记录并安排重试
 
+    Returns:
+        int: 发送成功时为1，否则为0
+    """
+    label = MESSAGE_LABELS[item["kind"]]
+    try:
+        msg = build_message(item["kind"], item["email"], item["token"])
+        # 连接已打开时open()不会重新建立连接
+        connection.open()
+        connection.send_messages([msg])
     except Exception as exc:
-        # 记录错误日志（包含更多上下文信息）
-        error_context = {
-            "user_id": user_id,
-            "email": email,
-            "error": str(exc),
-            "error_type": type(exc).__name__,
-            "retry_count": self.request.retries,
-            "max_retries": self.max_retries,
-        }
-        logger.error(
-            f"密码重置邮件发送失败: {error_context}",
-            exc_info=True,
+        # 连接可能已损坏，关闭后下一封邮件重新建立连接
+        connection.close()
+        _handle_failure(item, label, exc, config)
+        return 0
+    MAIL_MESSAGES.labels(kind=item["kind"], result="sent").inc()
+    logger.info(
+        f"{label}发送成功: user_id={item['user_id']}, email={item['email']}, "
+        f"retry_count={item['attempts']}"
+    )
+    return 1
+
+
+def _handle_failure(item, label, exc, config):
+    """记录发送失败，未达到最大尝试次数时按指数退避重新入队"""
+    attempts = item["attempts"] + 1
+    max_retries = config["MAX_ATTEMPTS"] - 1
+    error_context = {
+        "user_id": item["user_id"],
+        "email": item["email"],
+        "error": str(exc),
+        "error_type": type(exc).__name__,
+        "retry_count": item["attempts"],
+        "max_retries": max_retries,
+    }
+    logger.error(
+        f"{label}发送失败: {error_context}",
+        exc_info=True,
+        extra=error_context,
+    )
+
+    if attempts < config["MAX_ATTEMPTS"]:
+        MAIL_MESSAGES.labels(kind=item["kind"], result="retry").inc()
+        # 指数退避 + 随机抖动，避免大量邮件同时重试
+        delay = min(
+            config["RETRY_DELAY"] * 2 ** (attempts - 1), config["RETRY_DELAY_MAX"]
+        )
+        requeue_mail.apply_async(
+            args=[dict(item, attempts=attempts)],
+            countdown=random.uniform(0, delay),  # nosec B311
+        )
+    else:
+        MAIL_MESSAGES.labels(kind=item["kind"], result="failed").inc()
+        # 达到最大尝试次数，记录严重错误
+        logger.critical(
+            f"{label}发送最终失败（已重试{max_retries}次）: "
+            f"user_id={item['user_id']}, email={item['email']}, error={str(exc)}, "
+            f"error_type={type(exc).__name__}",
             extra=error_context,
         )
 
-        # 如果重试次数未达到上限，则重新抛出异常触发重试
-        if self.request.retries < self.max_retries:
-            raise self.retry(exc=exc)
-        else:
-            # 达到最大重试次数，记录严重错误
-            logger.critical(
-                f"密码重置邮件发送最终失败（已重试{self.max_retries}次）: "
-                f"user_id={user_id}, email={email}, error={str(exc)}, "
-                f"error_type={type(exc).__name__}",
-                extra=error_context,
-            )
-            raise  # 重新抛出异常，让Celery记录任务失败
+
+@shared_task(
+    time_limit=3600,  # 任务超时时间：1小时
+    soft_time_limit=3300,
+)
+def purge_expired_tokens_task():
+    """
+    定期清理过期的邮箱验证和密码重置记录（由Celery beat调度）
+
+    Returns:
+        dict: 表名 → 删除记录数
+    """
+    results = purge_expired_tokens()
+    for table, result in results.items():
+        logger.info(
+            f"过期令牌清理完成: table={table}, rows={result['rows']}, "
+            f"chunks={result['chunks']}, "
+            f"max_chunk_seconds={result['max_chunk_seconds']:.3f}"
+        )
+    return {table: result["rows"] for table, result in results.items()}
@@ -1,38 +1,128 @@
 # -*- coding: utf-8 -*-
 # REQ-ID: REQ-2025-003-user-login
-"""用户认证相关的频率限制"""
+"""用户认证相关的频率限制
 
-from rest_framework.throttling import SimpleRateThrottle
+视图通过throttle_scope声明限制范围，RateLimitThrottle按RATE_LIMITS配置同时检查
+该范围的多个维度：
 
+- ip: 客户端IP（与DRF相同的识别方式）
+- user: 已登录用户ID
+- email: 请求中的email字段（登录时也可能是用户名，统一转为小写）
+- captcha: 请求中的captcha_id字段
 
-class PreviewLoginThrottle(SimpleRateThrottle):
-    """登录预验证API频率限制
+请求中没有对应值的维度跳过。全部维度通过rate_limit中的GCRA限制器一次检查，
+超限时返回429并在Retry-After中给出等待秒数。
+"""
+
+import hashlib
+
+from apps.users.rate_limit import get_rate_limiter, parse_rate
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+# 默认限制规则：范围 → {维度: 速率}，RATE_LIMITS中的同名范围整体覆盖
+DEFAULT_RATE_LIMITS = {
+    "preview_login": {"ip": "10/min", "user": "10/min", "email": "30/hour"},
+    "login": {"ip": "30/min", "email": "10/min", "captcha": "5/min"},
+    "register": {"ip": "30/hour", "email": "5/hour", "captcha": "5/min"},
+    "captcha": {"ip": "60/min"},
+    "password_reset": {"ip": "10/hour", "email": "5/hour", "captcha": "5/min"},
+    "password_reset_confirm": {"ip": "30/min"},
+    "email_verification": {"user": "5/hour", "email": "5/hour"},
+}
 
-    限制同一IP每分钟最多10次请求
+
+def get_rate_limits():
     """
+    读取频率限制规则
 
-    scope = "preview_login"
-    rate = "10/min"
+    Returns:
+        dict: 范围 → {维度: 速率}
+    """
+    rules = dict(DEFAULT_RATE_LIMITS)
+    rules.update(getattr(settings, "RATE_LIMITS", None) or {})
+    return rules
 
-    def get_cache_key(self, request, view):
-        """
-        获取缓存键，基于IP地址
 
-        Args:
-            request: HTTP请求对象
-            view: 视图对象
+def _request_field(request, name):
+    """读取请求体字段（非字符串或空值视为不存在）"""
+    try:
+        value = request.data.get(name)
+    except AttributeError:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip()
+
+
+class RateLimitThrottle(BaseThrottle):
+    """声明式多维度频率限制
+
+    限制范围取类属性scope，未设置时取视图的throttle_scope。
+    """
+
+    scope = None
+
+    # 维度 → 提取方法名
+    DIMENSIONS = {
+        "ip": "get_ip_ident",
+        "user": "get_user_ident",
+        "email": "get_email_ident",
+        "captcha": "get_captcha_ident",
+    }
+
+    def get_ip_ident(self, request):
+        return self.get_ident(request)
+
+    def get_user_ident(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return str(user.pk)
+        return None
+
+    def get_email_ident(self, request):
+        email = _request_field(request, "email")
+        if email is None:
+            return None
+        # 邮箱不直接写入缓存键
+        return hashlib.sha256(email.lower().encode()).hexdigest()[:32]
+
+    def get_captcha_ident(self, request):
+        return _request_field(request, "captcha_id")
+
+    def get_scope(self, view):
+        return self.scope or getattr(view, "throttle_scope", None)
+
+    def get_limits(self, request, view):
+        """
+        获取本次请求需要检查的限制
 
         Returns:
-            str: 缓存键，格式为 'throttle_preview_login_{ip}'
+            list: [(键, 次数, 周期秒数), ...]
         """
-        if request.user.is_authenticated:
-            # 如果用户已登录，使用用户ID作为键
-            ident = request.user.id
-        else:
-            # 如果用户未登录，使用IP地址作为键
-            ident = self.get_ident(request)
-
-        return self.cache_format % {
-            "scope": self.scope,
-            "ident": ident,
-        }
+        scope = self.get_scope(view)
+        rules = get_rate_limits().get(scope) or {}
+        limits = []
+        for dimension, rate in rules.items():
+            ident = getattr(self, self.DIMENSIONS[dimension])(request)
+            if ident is None:
+                continue
+            limit, period = parse_rate(rate)
+            limits.append((f"{scope}:{dimension}:{ident}", limit, period))
+        return limits
+
+    def allow_request(self, request, view):
+        allowed, self._wait = get_rate_limiter().hit(self.get_limits(request, view))
+        return allowed
+
+    def wait(self):
+        return getattr(self, "_wait", None) or None
+
+
+class PreviewLoginThrottle(RateLimitThrottle):
+    """登录预验证API频率限制
+
+    同一IP、同一用户每分钟最多10次请求，同一邮箱每小时最多30次
+    """
+
+    scope = "preview_login"
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""过期令牌清理
+
+users_email_verification和users_password_reset中过期或已使用的记录不会被删除，
+表和token索引持续增长。清理按主键区间分块执行：
+
+- 每块只删除主键在[start, start + CHUNK_SIZE)内且满足条件的记录，单条DELETE
+  只扫描一个主键区间，锁持有时间有上限
+- 每块单独提交（自动提交模式），块之间可休眠以限制删除速率
+- 只删除过期超过RETENTION_DAYS天的记录，保留期内用户点击旧链接仍能得到
+  "已过期/已使用"的明确提示。令牌签发后最多24小时过期，已使用的记录同样在
+  过期后的保留期满时删除，因此条件只需expires_at < cutoff
+
+MIN(id)/MAX(id)通过主键直接取得；expires_at索引用于统计待清理记录数（--dry-run）。
+"""
+
+import time
+from datetime import timedelta
+
+from apps.common import metrics
+from apps.users.models import EmailVerification, PasswordReset
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+PURGEABLE_MODELS = (EmailVerification, PasswordReset)
+
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_SLEEP = 0.05
+
+TOKEN_PURGE_ROWS = metrics.counter(
+    "token_purge_rows_total", "清理的过期/已使用令牌记录数", ["table"]
+)
+
+
+def get_token_purge_config():
+    """
+    读取TOKEN_PURGE配置
+
+    Returns:
+        dict: RETENTION_DAYS、CHUNK_SIZE、SLEEP
+    """
+    config = getattr(settings, "TOKEN_PURGE", None) or {}
+    return {
+        "RETENTION_DAYS": config.get("RETENTION_DAYS", DEFAULT_RETENTION_DAYS),
+        "CHUNK_SIZE": config.get("CHUNK_SIZE", DEFAULT_CHUNK_SIZE),
+        "SLEEP": config.get("SLEEP", DEFAULT_SLEEP),
+    }
+
+
+def purgeable(model, cutoff):
+    """
+    待清理记录：cutoff之前已过期
+
+    Returns:
+        QuerySet: 待清理记录（无排序）
+    """
+    return model.objects.filter(expires_at__lt=cutoff).order_by()
+
+
+def count_purgeable(model, cutoff):
+    """统计待清理记录数（expires_at索引范围扫描）"""
+    return purgeable(model, cutoff).count()
+
+
+def purge_model(model, cutoff, chunk_size, sleep=0.0, dry_run=False):
+    """
+    按主键区间分块清理一个模型的过期/已使用记录
+
+    Args:
+        model: EmailVerification或PasswordReset
+        cutoff: 过期时间早于该时间的记录会被删除
+        chunk_size: 每块主键区间大小
+        sleep: 块之间的休眠秒数（限制删除速率）
+        dry_run: 只统计待删除记录数和分块数，不删除
+
+    Returns:
+        dict: rows（删除或待删除的记录数）、chunks、max_chunk_seconds
+    """
+    bounds = model.objects.order_by().aggregate(low=Min("pk"), high=Max("pk"))
+    result = {"rows": 0, "chunks": 0, "max_chunk_seconds": 0.0}
+    if bounds["low"] is None:
+        return result
+
+    if dry_run:
+        result["rows"] = count_purgeable(model, cutoff)
+        result["chunks"] = (bounds["high"] - bounds["low"]) // chunk_size + 1
+        return result
+
+    table = model._meta.db_table
+    for start in range(bounds["low"], bounds["high"] + 1, chunk_size):
+        chunk = purgeable(model, cutoff).filter(
+            pk__gte=start, pk__lt=start + chunk_size
+        )
+        chunk_start = time.perf_counter()
+        rows, _ = chunk.delete()
+        TOKEN_PURGE_ROWS.labels(table=table).inc(rows)
+        elapsed = time.perf_counter() - chunk_start
+
+        result["rows"] += rows
+        result["chunks"] += 1
+        result["max_chunk_seconds"] = max(result["max_chunk_seconds"], elapsed)
+        if sleep:
+            time.sleep(sleep)
+    return result
+
+
+def purge_expired_tokens(
+    retention_days=None, chunk_size=None, sleep=None, dry_run=False
+):
+    """
+    清理全部令牌表（参数为None时使用TOKEN_PURGE配置）
+
+    Returns:
+        dict: 表名 → purge_model()的结果
+    """
+    config = get_token_purge_config()
+    if retention_days is None:
+        retention_days = config["RETENTION_DAYS"]
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    results = {}
+    for model in PURGEABLE_MODELS:
+        results[model._meta.db_table] = purge_model(
+            model,
+            cutoff,
+            chunk_size or config["CHUNK_SIZE"],
+            config["SLEEP"] if sleep is None else sleep,
+            dry_run,
+        )
+    return results
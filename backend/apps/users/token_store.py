@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮箱验证/密码重置令牌存储
+
+令牌一次性使用、24小时过期、只按令牌精确查找，属于典型的键值访问。存储实现：
+
+- DatabaseTokenStore: EmailVerification/PasswordReset表（原实现，保留审计记录）
+- CacheTokenStore: 通用Django缓存后端（LocMem等），依赖cache.add()保证只有一个
+  请求能消费成功
+- RedisTokenStore: Redis哈希 + 原生TTL，签发和消费各通过一个Lua脚本原子执行
+- DualTokenStore: 迁移用，签发同时写入缓存和数据库（审计），消费先查缓存，缓存中
+  不存在时回退到数据库（切换前签发的令牌仍然有效）
+
+缓存中的记录在过期后再保留GRACE秒，期间使用旧链接仍返回"已过期/已使用"的明确
+提示，之后由TTL自动删除。每个(用户, 用途)只有最新签发的令牌有效。
+
+TOKEN_STORE["BACKEND"]取值db、cache、dual或实现类的导入路径，cache在缓存后端为
+django-redis时使用RedisTokenStore。从数据库迁移：先部署dual，旧令牌全部过期
+（24小时）后切换为cache。
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from apps.common.db.routers import read_or_primary
+from apps.users.emails import EMAIL_VERIFICATION, PASSWORD_RESET
+from apps.users.models import EmailVerification, PasswordReset
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+TOKEN_KEY_PREFIX = "user_token:"
+TOKEN_OWNER_KEY_PREFIX = "user_token_owner:"
+
+# 令牌状态
+TOKEN_VALID = "valid"
+TOKEN_INVALID = "invalid"
+TOKEN_EXPIRED = "expired"
+TOKEN_USED = "used"
+
+# 查找/消费结果：status为上面的令牌状态，无效令牌的user_id和email为None
+TokenRecord = namedtuple("TokenRecord", ["status", "user_id", "email"])
+INVALID_RECORD = TokenRecord(TOKEN_INVALID, None, None)
+
+DEFAULT_BACKEND = "db"
+DEFAULT_CACHE_ALIAS = "default"
+DEFAULT_GRACE = 86400
+
+
+def get_token_store_config():
+    """
+    读取TOKEN_STORE配置
+
+    Returns:
+        dict: BACKEND、CACHE_ALIAS、GRACE
+    """
+    config = getattr(settings, "TOKEN_STORE", None) or {}
+    return {
+        "BACKEND": config.get("BACKEND", DEFAULT_BACKEND),
+        "CACHE_ALIAS": config.get("CACHE_ALIAS", DEFAULT_CACHE_ALIAS),
+        "GRACE": config.get("GRACE", DEFAULT_GRACE),
+    }
+
+
+class DatabaseTokenStore:
+    """基于EmailVerification/PasswordReset表的令牌存储"""
+
+    # 用途 → (模型, 使用时间字段)
+    MODELS = {
+        EMAIL_VERIFICATION: (EmailVerification, "verified_at"),
+        PASSWORD_RESET: (PasswordReset, "used_at"),
+    }
+
+    def __init__(self, cache_alias=DEFAULT_CACHE_ALIAS):
+        self.cache_alias = cache_alias
+
+    def issue(self, purpose, user_id, email, token, expires_at):
+        """
+        签发令牌（同一用户之前签发的令牌随之失效）
+
+        Args:
+            purpose: EMAIL_VERIFICATION或PASSWORD_RESET
+            user_id: 用户ID
+            email: 收件邮箱
+            token: 令牌
+            expires_at: 过期时间
+        """
+        model, used_field = self.MODELS[purpose]
+        lookup = {"user_id": user_id}
+        if purpose == EMAIL_VERIFICATION:
+            lookup["email"] = email
+        model.objects.update_or_create(
+            **lookup,
+            defaults={"token": token, "expires_at": expires_at, used_field: None},
+        )
+
+    def check(self, purpose, token):
+        """
+        查找令牌（不消费）
+
+        Returns:
+            TokenRecord: 令牌状态、用户ID和邮箱
+        """
+        model, used_field = self.MODELS[purpose]
+        fields = ["user_id", "expires_at", used_field]
+        if purpose == EMAIL_VERIFICATION:
+            fields.append("email")
+        # 只读副本可能尚未同步刚签发的令牌，查不到时回到主库重查
+        row = read_or_primary(
+            model.objects.filter(token=token).values(*fields), lambda qs: qs.first()
+        )
+        if row is None:
+            return INVALID_RECORD
+
+        if row["expires_at"] < timezone.now():
+            status = TOKEN_EXPIRED
+        elif row[used_field] is not None:
+            status = TOKEN_USED
+        else:
+            status = TOKEN_VALID
+        return TokenRecord(status, row["user_id"], row.get("email"))
+
+    def consume(self, purpose, token):
+        """
+        消费令牌（并发消费同一令牌时只有一个请求得到TOKEN_VALID）
+
+        Returns:
+            TokenRecord: 令牌状态、用户ID和邮箱
+        """
+        record = self.check(purpose, token)
+        if record.status != TOKEN_VALID:
+            return record
+
+        model, used_field = self.MODELS[purpose]
+        updated = model.objects.filter(
+            token=token, **{f"{used_field}__isnull": True}
+        ).update(**{used_field: timezone.now()})
+        if not updated:
+            return record._replace(status=TOKEN_USED)
+        return record
+
+
+class CacheTokenStore:
+    """基于Django缓存接口的令牌存储（接口同DatabaseTokenStore）"""
+
+    def __init__(self, cache_alias=DEFAULT_CACHE_ALIAS):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def token_key(purpose, token):
+        return f"{TOKEN_KEY_PREFIX}{purpose}:{token}"
+
+    @staticmethod
+    def owner_key(purpose, user_id):
+        return f"{TOKEN_OWNER_KEY_PREFIX}{purpose}:{user_id}"
+
+    @staticmethod
+    def ttl(expires_at):
+        """缓存记录的存活时间（expires_at为时间戳）：过期后再保留GRACE秒"""
+        remaining = expires_at - time.time()
+        return max(int(remaining + get_token_store_config()["GRACE"]), 1)
+
+    def issue(self, purpose, user_id, email, token, expires_at):
+        cache = self.cache
+        ttl = self.ttl(expires_at.timestamp())
+        owner_key = self.owner_key(purpose, user_id)
+        previous = cache.get(owner_key)
+        if previous is not None:
+            previous_key = self.token_key(purpose, previous)
+            cache.delete_many([previous_key, f"{previous_key}:used"])
+
+        record = {
+            "user_id": user_id,
+            "email": email,
+            "expires_at": expires_at.timestamp(),
+        }
+        cache.set(self.token_key(purpose, token), record, ttl)
+        cache.set(owner_key, token, ttl)
+
+    def _check(self, purpose, token):
+        key = self.token_key(purpose, token)
+        values = self.cache.get_many([key, f"{key}:used"])
+        record = values.get(key)
+        if record is None:
+            return INVALID_RECORD, None
+
+        if record["expires_at"] < time.time():
+            status = TOKEN_EXPIRED
+        elif f"{key}:used" in values:
+            status = TOKEN_USED
+        else:
+            status = TOKEN_VALID
+        return TokenRecord(status, record["user_id"], record["email"]), record
+
+    def check(self, purpose, token):
+        return self._check(purpose, token)[0]
+
+    def consume(self, purpose, token):
+        record, stored = self._check(purpose, token)
+        if record.status != TOKEN_VALID:
+            return record
+        # 并发消费同一令牌时，只有成功写入使用标记的请求视为有效
+        used_key = f"{self.token_key(purpose, token)}:used"
+        if not self.cache.add(used_key, time.time(), self.ttl(stored["expires_at"])):
+            return record._replace(status=TOKEN_USED)
+        return record
+
+
+class RedisTokenStore(CacheTokenStore):
+    """基于django-redis哈希的令牌存储，签发和消费各只需一次Redis往返"""
+
+    # 删除同一(用户, 用途)之前的令牌，写入新令牌并设置TTL
+    ISSUE_SCRIPT = """
+local previous = redis.call('GET', KEYS[2])
+if previous and previous ~= KEYS[1] then
+    redis.call('DEL', previous)
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'user_id', ARGV[1], 'email', ARGV[2], 'expires_at', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('SET', KEYS[2], KEYS[1], 'EX', ARGV[4])
+return 1
+"""
+
+    # 查找令牌，ARGV[2]为1时有效令牌同时写入使用时间
+    CONSUME_SCRIPT = """
+local record = redis.call('HMGET', KEYS[1], 'user_id', 'email', 'expires_at', 'used_at')
+if not record[1] then
+    return {'invalid'}
+end
+if tonumber(record[3]) < tonumber(ARGV[1]) then
+    return {'expired', record[1], record[2]}
+end
+if record[4] then
+    return {'used', record[1], record[2]}
+end
+if ARGV[2] == '1' then
+    redis.call('HSET', KEYS[1], 'used_at', ARGV[1])
+end
+return {'valid', record[1], record[2]}
+"""
+
+    def __init__(self, cache_alias=DEFAULT_CACHE_ALIAS):
+        super().__init__(cache_alias)
+        self._scripts = None
+        self._scripts_lock = threading.Lock()
+
+    def _get_scripts(self):
+        if self._scripts is None:
+            with self._scripts_lock:
+                if self._scripts is None:
+                    from django_redis import get_redis_connection
+
+                    client = get_redis_connection(self.cache_alias)
+                    self._scripts = (
+                        client.register_script(self.ISSUE_SCRIPT),
+                        client.register_script(self.CONSUME_SCRIPT),
+                    )
+        return self._scripts
+
+    def issue(self, purpose, user_id, email, token, expires_at):
+        issue_script, _ = self._get_scripts()
+        make_key = self.cache.make_key
+        issue_script(
+            keys=[
+                make_key(self.token_key(purpose, token)),
+                make_key(self.owner_key(purpose, user_id)),
+            ],
+            args=[
+                user_id,
+                email,
+                expires_at.timestamp(),
+                self.ttl(expires_at.timestamp()),
+            ],
+        )
+
+    def _run(self, purpose, token, consume):
+        _, consume_script = self._get_scripts()
+        result = consume_script(
+            keys=[self.cache.make_key(self.token_key(purpose, token))],
+            args=[time.time(), 1 if consume else 0],
+        )
+        if len(result) == 1:
+            return INVALID_RECORD
+        status, user_id, email = (value.decode() for value in result)
+        return TokenRecord(status, int(user_id), email)
+
+    def check(self, purpose, token):
+        return self._run(purpose, token, consume=False)
+
+    def consume(self, purpose, token):
+        return self._run(purpose, token, consume=True)
+
+
+class DualTokenStore:
+    """迁移用令牌存储：缓存为主，数据库保留审计记录并兼容切换前签发的令牌"""
+
+    def __init__(self, cache_alias=DEFAULT_CACHE_ALIAS):
+        self.cache_alias = cache_alias
+        self.legacy = DatabaseTokenStore(cache_alias)
+
+    @property
+    def primary(self):
+        return _get_store(_get_cache_store_class(self.cache_alias), self.cache_alias)
+
+    def issue(self, purpose, user_id, email, token, expires_at):
+        self.legacy.issue(purpose, user_id, email, token, expires_at)
+        self.primary.issue(purpose, user_id, email, token, expires_at)
+
+    def check(self, purpose, token):
+        record = self.primary.check(purpose, token)
+        if record.status == TOKEN_INVALID:
+            return self.legacy.check(purpose, token)
+        return record
+
+    def consume(self, purpose, token):
+        record = self.primary.consume(purpose, token)
+        if record.status == TOKEN_INVALID:
+            # 缓存中不存在：切换前只写入数据库的令牌
+            return self.legacy.consume(purpose, token)
+        if record.status == TOKEN_VALID:
+            # 同步标记数据库记录，保持审计记录完整
+            self.legacy.consume(purpose, token)
+        return record
+
+
+BACKENDS = {"db": DatabaseTokenStore, "dual": DualTokenStore}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _get_cache_store_class(cache_alias):
+    cache_backend = settings.CACHES.get(cache_alias, {}).get("BACKEND", "")
+    if cache_backend == "django_redis.cache.RedisCache":
+        return RedisTokenStore
+    return CacheTokenStore
+
+
+def _get_store_class(backend, cache_alias):
+    if backend == "cache":
+        return _get_cache_store_class(cache_alias)
+    if backend in BACKENDS:
+        return BACKENDS[backend]
+    return import_string(backend)
+
+
+def get_token_store():
+    """
+    获取令牌存储实例
+
+    Returns:
+        DatabaseTokenStore: 令牌存储实例（同一实现在进程内复用）
+    """
+    config = get_token_store_config()
+    cache_alias = config["CACHE_ALIAS"]
+    return _get_store(_get_store_class(config["BACKEND"], cache_alias), cache_alias)
+
+
+def _get_store(store_class, cache_alias):
+    store_key = (store_class, cache_alias)
+    store = _stores.get(store_key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(store_key, store_class(cache_alias))
+    return store
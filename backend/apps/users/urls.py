@@ -4,6 +4,7 @@
 
 from apps.users.views import (
     CaptchaAPIView,
+    CaptchaImageAPIView,
     CaptchaRefreshAPIView,
     LoginAPIView,
     LogoutAPIView,
@@ -22,6 +23,11 @@ app_name = "users"
 urlpatterns = [
     path("captcha/", CaptchaAPIView.as_view(), name="captcha"),
     path("captcha/refresh/", CaptchaRefreshAPIView.as_view(), name="captcha-refresh"),
+    path(
+        "captcha/<uuid:captcha_id>/image/",
+        CaptchaImageAPIView.as_view(),
+        name="captcha-image",
+    ),
     path("register/", RegisterAPIView.as_view(), name="register"),
     path("login/", LoginAPIView.as_view(), name="login"),
     path("preview/", PreviewAPIView.as_view(), name="preview"),
@@ -3,13 +3,65 @@
 """用户相关工具函数"""
 
 import base64
-import io
 import random
+import re
 import string
 import uuid
 
+from apps.common.async_cache import get_async_cache
+from apps.common.db.routers import read_or_primary
+from apps.users.captcha_renderer import get_captcha_renderer
+from apps.users.captcha_store import CAPTCHA_IMAGE_KEY_PREFIX, get_captcha_store
+from django.conf import settings
 from django.core.cache import cache
-from PIL import Image, ImageDraw, ImageFont
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Value, When
+from django.db.models.functions import Cast, Lower, Substr
+
+
+# 验证码字符集（数字+字母混合）
+CAPTCHA_CHARACTERS = string.ascii_uppercase + string.digits
+
+
+def generate_captcha_answer():
+    """
+    生成4位验证码答案
+
+    返回:
+        str: 4位数字+字母混合的验证码答案
+    """
+    # 注意：验证码生成不需要密码学级别的随机数，使用random模块即可
+    return "".join(random.choice(CAPTCHA_CHARACTERS) for _ in range(4))  # nosec B311
+
+
+def render_captcha_png(answer):
+    """
+    将验证码答案渲染为PNG图片（使用进程级字形缓存渲染器）
+
+    配置CAPTCHA_PALETTE_COLORS大于0时输出调色板PNG（体积约为真彩色的三分之一）
+
+    参数:
+        answer: 验证码答案
+
+    返回:
+        bytes: PNG图片的二进制内容
+    """
+    palette_colors = getattr(settings, "CAPTCHA_PALETTE_COLORS", 0)
+    return get_captcha_renderer().render_png(answer, palette_colors=palette_colors)
+
+
+def encode_captcha_image(image_bytes):
+    """
+    将PNG图片编码为Data URI
+
+    参数:
+        image_bytes: PNG图片的二进制内容
+
+    返回:
+        str: data:image/png;base64,...格式的字符串
+    """
+    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+    return f"data:image/png;base64,{image_base64}"
 
 
 def generate_captcha():
@@ -22,82 +74,8 @@ def generate_captcha():
         - captcha_image_base64: Base64编码的PNG图片（data:image/png;base64,...格式）
         - answer: 4位数字+字母混合的验证码答案
     """
-    # 生成4位验证码答案（数字+字母混合）
-    # 注意：验证码生成不需要密码学级别的随机数，使用random模块即可
-    characters = string.ascii_uppercase + string.digits
-    answer = "".join(random.choice(characters) for _ in range(4))  # nosec B311
-
-    # 创建图片（120x40像素）
-    width, height = 120, 40
-    image = Image.new("RGB", (width, height), color=(255, 255, 255))
-    draw = ImageDraw.Draw(image)
-
-    # 尝试使用系统字体，如果失败则使用默认字体
-    try:
-        # 尝试使用DejaVu Sans字体（Linux常见字体）
-        font = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24
-        )
-    except (OSError, IOError):
-        try:
-            # 尝试使用Arial字体（Windows常见字体）
-            font = ImageFont.truetype("arial.ttf", 24)
-        except (OSError, IOError):
-            # 使用默认字体
-            font = ImageFont.load_default()
-
-    # 绘制验证码文字
-    text_x = 10
-    text_y = 8
-    for char in answer:
-        # 随机颜色（深色，确保在白色背景上可见）
-        # 注意：验证码图片生成不需要密码学级别的随机数
-        color = (
-            random.randint(0, 100),  # nosec B311
-            random.randint(0, 100),  # nosec B311
-            random.randint(0, 100),  # nosec B311
-        )
-        # 随机位置偏移（增加识别难度）
-        offset_x = random.randint(-2, 2)  # nosec B311
-        offset_y = random.randint(-2, 2)  # nosec B311
-        draw.text(
-            (text_x + offset_x, text_y + offset_y),
-            char,
-            fill=color,
-            font=font,
-        )
-        text_x += 25
-
-    # 添加干扰线
-    for _ in range(3):
-        start_x = random.randint(0, width)  # nosec B311
-        start_y = random.randint(0, height)  # nosec B311
-        end_x = random.randint(0, width)  # nosec B311
-        end_y = random.randint(0, height)  # nosec B311
-        line_color = (
-            random.randint(150, 200),  # nosec B311
-            random.randint(150, 200),  # nosec B311
-            random.randint(150, 200),  # nosec B311
-        )
-        draw.line([(start_x, start_y), (end_x, end_y)], fill=line_color, width=1)
-
-    # 添加噪点
-    for _ in range(50):
-        x = random.randint(0, width)  # nosec B311
-        y = random.randint(0, height)  # nosec B311
-        noise_color = (
-            random.randint(100, 200),  # nosec B311
-            random.randint(100, 200),  # nosec B311
-            random.randint(100, 200),  # nosec B311
-        )
-        draw.point((x, y), fill=noise_color)
-
-    # 转换为Base64编码
-    buffer = io.BytesIO()
-    image.save(buffer, format="PNG")
-    image_bytes = buffer.getvalue()
-    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-    captcha_image = f"data:image/png;base64,{image_base64}"
+    answer = generate_captcha_answer()
+    captcha_image = encode_captcha_image(render_captcha_png(answer))
 
     # 生成UUID格式的验证码ID
     captcha_id = str(uuid.uuid4())
@@ -107,7 +85,7 @@ def generate_captcha():
 
 def store_captcha(captcha_id: str, answer: str, expires_in: int = 300):
     """
-    将验证码答案存储到Redis中
+    将验证码答案存储到Redis中（通过验证码存储后端）
 
     参数:
         captcha_id: 验证码ID
@@ -117,11 +95,55 @@ def store_captcha(captcha_id: str, answer: str, expires_in: int = 300):
     返回:
         bool: 存储是否成功
     """
-    key = f"captcha:{captcha_id}"
-    cache.set(key, answer, timeout=expires_in)
+    get_captcha_store().store(captcha_id, answer, expires_in)
+    return True
+
+
+def store_captcha_image(captcha_id: str, image_bytes: bytes, expires_in: int = 300):
+    """
+    将验证码图片存储到缓存中（供二进制图片接口读取）
+
+    参数:
+        captcha_id: 验证码ID
+        image_bytes: PNG图片的二进制内容
+        expires_in: 过期时间（秒），应与验证码答案的过期时间一致
+
+    返回:
+        bool: 存储是否成功
+    """
+    cache.set(CAPTCHA_IMAGE_KEY_PREFIX + captcha_id, image_bytes, timeout=expires_in)
+    return True
+
+
+async def astore_captcha(captcha_id: str, answer: str, expires_in: int = 300):
+    """store_captcha()的异步版本"""
+    await get_captcha_store().astore(captcha_id, answer, expires_in)
+    return True
+
+
+async def astore_captcha_image(
+    captcha_id: str, image_bytes: bytes, expires_in: int = 300
+):
+    """store_captcha_image()的异步版本"""
+    await get_async_cache().set(
+        CAPTCHA_IMAGE_KEY_PREFIX + captcha_id, image_bytes, expires_in
+    )
     return True
 
 
+def get_captcha_image(captcha_id: str):
+    """
+    读取缓存中的验证码图片
+
+    参数:
+        captcha_id: 验证码ID
+
+    返回:
+        bytes或None: PNG图片的二进制内容，不存在或已过期时返回None
+    """
+    return cache.get(CAPTCHA_IMAGE_KEY_PREFIX + captcha_id)
+
+
 def verify_captcha(captcha_id: str, answer: str) -> bool:
     """
     验证验证码答案是否正确
@@ -136,25 +158,55 @@ def verify_captcha(captcha_id: str, answer: str) -> bool:
     if not captcha_id or not answer:
         return False
 
-    key = f"captcha:{captcha_id}"
-    stored_answer = cache.get(key)
+    # 不区分大小写比较，比较与删除由存储后端原子完成（并发请求只有一个能验证成功）
+    return get_captcha_store().verify(captcha_id, answer)
 
-    if stored_answer is None:
-        # 验证码不存在或已过期
-        return False
 
-    # 不区分大小写比较
-    if stored_answer.upper() == answer.upper():
-        # 验证成功后删除验证码（防止重复使用）
-        cache.delete(key)
-        return True
+def filter_users_by_email(email):
+    """
+    大小写不敏感地按邮箱过滤用户
 
-    return False
+    使用LOWER(email) = lower(value)而不是email__iexact：MySQL中iexact会被翻译为
+    LIKE，无法命中idx_user_email_lower函数索引。
+
+    参数:
+        email: 邮箱地址
+
+    返回:
+        QuerySet: 邮箱匹配的用户查询集
+    """
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    return User.objects.alias(email_lower=Lower("email")).filter(
+        email_lower=email.lower()
+    )
+
+
+def filter_users_by_username(username):
+    """
+    大小写不敏感地按用户名过滤用户（命中idx_user_username_lower函数索引）
+
+    参数:
+        username: 用户名
+
+    返回:
+        QuerySet: 用户名匹配的用户查询集
+    """
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    return User.objects.alias(username_lower=Lower("username")).filter(
+        username_lower=username.lower()
+    )
 
 
 def find_user_by_email_or_username(email_or_username):
     """
-    通过邮箱或用户名查找用户
+    通过邮箱或用户名查找用户（不区分大小写）
+
+    历史数据中可能存在仅大小写不同的重复邮箱/用户名，此时优先返回大小写
+    完全一致的用户，没有完全一致的用户时返回None。
 
     Args:
         email_or_username: 邮箱地址或用户名
@@ -162,19 +214,91 @@ def find_user_by_email_or_username(email_or_username):
     Returns:
         User实例或None: 找到的用户，如果不存在则返回None
     """
-    from django.contrib.auth import get_user_model
-
-    User = get_user_model()
-
     if "@" in email_or_username:
         # 通过邮箱查找
-        try:
-            return User.objects.get(email=email_or_username)
-        except User.DoesNotExist:
-            return None
+        queryset, field = filter_users_by_email(email_or_username), "email"
     else:
         # 通过用户名查找
+        queryset, field = filter_users_by_username(email_or_username), "username"
+
+    # 去掉模型默认排序，避免为ORDER BY额外排序；只读副本上查不到时（例如刚注册的
+    # 用户）回到主库重查
+    users = read_or_primary(queryset.order_by()[:2], list)
+    if len(users) == 1:
+        return users[0]
+    for user in users:
+        if getattr(user, field) == email_or_username:
+            return user
+    return None
+
+
+def allocate_username(base_username):
+    """
+    分配以base_username为前缀的可用用户名（单条聚合查询）
+
+    前缀未被占用时直接返回前缀，否则返回"前缀 + (现有最大数字后缀 + 1)"。
+    查询通过LOWER(username)前缀范围命中函数索引，再用正则只保留"前缀 + 数字"
+    形式的用户名，不再按后缀逐个探测。
+
+    参数:
+        base_username: 用户名前缀
+
+    返回:
+        str: 当前未被占用的用户名（并发注册时仍可能冲突，需配合重试）
+    """
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    base_lower = base_username.lower()
+    result = (
+        User.objects.alias(username_lower=Lower("username"))
+        .filter(
+            username_lower__startswith=base_lower,
+            username__iregex=rf"^{re.escape(base_username)}[0-9]*$",
+        )
+        .aggregate(
+            base_taken=Count("pk", filter=Q(username_lower=base_lower)),
+            max_suffix=Max(
+                Case(
+                    When(username_lower=base_lower, then=Value(0)),
+                    default=Cast(
+                        Substr("username", len(base_username) + 1), IntegerField()
+                    ),
+                )
+            ),
+        )
+    )
+    if not result["base_taken"]:
+        return base_username
+    return f"{base_username}{(result['max_suffix'] or 0) + 1}"
+
+
+def save_with_unique_username(user, base_username, max_attempts=5):
+    """
+    使用分配的用户名保存新用户，用户名冲突时重新分配并重试
+
+    参数:
+        user: 未保存的用户实例
+        base_username: 用户名前缀
+        max_attempts: 最大尝试次数
+
+    返回:
+        User: 已保存的用户
+
+    异常:
+        IntegrityError: 重试次数用尽或非用户名冲突（例如邮箱重复）
+    """
+    for attempt in range(max_attempts):
+        user.username = allocate_username(base_username)
         try:
-            return User.objects.get(username=email_or_username)
-        except User.DoesNotExist:
-            return None
+            with transaction.atomic():
+                user.save(force_insert=True)
+            return user
+        except IntegrityError:
+            # 并发注册分配到相同用户名时重试；其他唯一约束冲突直接抛出
+            user_model = type(user)
+            if (
+                attempt == max_attempts - 1
+                or not user_model.objects.filter(username=user.username).exists()
+            ):
+                raise
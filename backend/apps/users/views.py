@@ -1,11 +1,25 @@
 # -*- coding: utf-8 -*-
 # REQ-ID: REQ-2025-003-user-login
-"""用户认证相关视图"""
+"""用户认证相关视图
+
+只访问缓存或以I/O等待为主的视图（获取/刷新验证码、刷新令牌、登出、验证邮箱）
+继承AsyncAPIView，处理函数为协程：ASGI部署下等待Redis、MySQL时不占用线程。
+"""
 
 import secrets
 from datetime import timedelta
 
-from apps.users.models import EmailVerification, PasswordReset
+from apps.common.async_views import AsyncAPIView
+from apps.common.db.routers import read_or_primary
+from apps.users.authentication import ainvalidate_user_tokens
+from apps.users.captcha_pool import next_captcha_png
+from apps.users.captcha_store import get_captcha_store
+from apps.users.credential_proof import (
+    get_credential_proof_ttl,
+    issue_credential_proof,
+)
+from apps.users.emails import EMAIL_VERIFICATION, PASSWORD_RESET
+from apps.users.hashing import PasswordHashingUnavailable, hash_password
 from apps.users.serializers import (
     PasswordResetSerializer,
     PreviewLoginSerializer,
@@ -14,15 +28,29 @@ from apps.users.serializers import (
     UserLoginSerializer,
     UserRegisterSerializer,
 )
-from apps.users.tasks import send_email_verification, send_password_reset_email
-from apps.users.throttling import PreviewLoginThrottle
+from apps.users.tasks import submit_user_mail
+from apps.users.throttling import PreviewLoginThrottle, RateLimitThrottle
+from apps.users.token_store import (
+    TOKEN_EXPIRED,
+    TOKEN_INVALID,
+    TOKEN_USED,
+    TOKEN_VALID,
+    get_token_store,
+)
 from apps.users.utils import (
+    astore_captcha,
+    astore_captcha_image,
+    encode_captcha_image,
+    filter_users_by_email,
     find_user_by_email_or_username,
-    generate_captcha,
-    store_captcha,
+    get_captcha_image,
 )
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -36,6 +64,9 @@ User = get_user_model()
 # 验证码过期时间（秒）
 CAPTCHA_EXPIRES_IN = 300  # 5分钟
 
+# 验证码图片返回方式：inline（JSON内嵌Base64）、url（JSON返回图片地址，图片由二进制接口返回）
+CAPTCHA_IMAGE_MODES = ("inline", "url")
+
 
 class BaseCaptchaView(APIView):
     """验证码API基类，提供公共方法"""
@@ -63,18 +94,51 @@ class BaseCaptchaView(APIView):
                 )
         return None
 
-    def _create_captcha_response(self):
+    def _get_captcha_image_mode(self, request):
+        """
+        获取验证码图片返回方式（查询参数image_mode优先，否则使用CAPTCHA_IMAGE_MODE配置）
+
+        Args:
+            request: HTTP请求对象
+
+        Returns:
+            str: inline或url
+        """
+        mode = request.query_params.get("image_mode") or getattr(
+            settings, "CAPTCHA_IMAGE_MODE", "inline"
+        )
+        return mode if mode in CAPTCHA_IMAGE_MODES else "inline"
+
+    async def _create_captcha_response(self, request):
         """
-        创建验证码响应（公共方法）
+        创建验证码响应（公共方法，验证码和图片通过异步缓存客户端写入）
+
+        Args:
+            request: HTTP请求对象
 
         返回:
             Response: 包含captcha_id, captcha_image, expires_in的JSON响应
+            （url模式下captcha_image为图片地址，否则为Base64 Data URI）
         """
-        # 生成验证码
-        captcha_id, captcha_image, answer = generate_captcha()
+        # 获取验证码（启用预渲染池时直接从池中取出）。池未命中时需要同步渲染PNG，
+        # 在线程池中执行以免阻塞事件循环；池是线程安全的，不必占用主线程
+        captcha_id, image_bytes, answer = await sync_to_async(
+            next_captcha_png, thread_sensitive=False
+        )()
 
         # 存储验证码答案到Redis
-        store_captcha(captcha_id, answer, expires_in=CAPTCHA_EXPIRES_IN)
+        await astore_captcha(captcha_id, answer, expires_in=CAPTCHA_EXPIRES_IN)
+
+        if self._get_captcha_image_mode(request) == "url":
+            # 图片存入缓存，由CaptchaImageAPIView以二进制形式返回
+            await astore_captcha_image(
+                captcha_id, image_bytes, expires_in=CAPTCHA_EXPIRES_IN
+            )
+            captcha_image = request.build_absolute_uri(
+                reverse("users:captcha-image", args=[captcha_id])
+            )
+        else:
+            captcha_image = encode_captcha_image(image_bytes)
 
         # 返回响应
         return Response(
@@ -100,23 +164,29 @@ class BaseCaptchaView(APIView):
         return str(refresh.access_token), str(refresh)
 
 
-class CaptchaAPIView(BaseCaptchaView):
+class CaptchaAPIView(AsyncAPIView, BaseCaptchaView):
     """获取验证码API视图"""
 
-    def get(self, request):
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "captcha"
+
+    async def get(self, request):
         """
         获取验证码
 
         返回:
             Response: 包含captcha_id, captcha_image, expires_in的JSON响应
         """
-        return self._create_captcha_response()
+        return await self._create_captcha_response(request)
 
 
-class CaptchaRefreshAPIView(BaseCaptchaView):
+class CaptchaRefreshAPIView(AsyncAPIView, BaseCaptchaView):
     """刷新验证码API视图"""
 
-    def post(self, request):
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "captcha"
+
+    async def post(self, request):
         """
         刷新验证码
 
@@ -131,16 +201,48 @@ class CaptchaRefreshAPIView(BaseCaptchaView):
         # 如果提供了旧的captcha_id，删除旧的验证码（可选）
         old_captcha_id = request.data.get("captcha_id")
         if old_captcha_id:
-            cache.delete(f"captcha:{old_captcha_id}")
+            await get_captcha_store().adiscard(old_captcha_id)
 
         # 生成并返回新的验证码
-        return self._create_captcha_response()
+        return await self._create_captcha_response(request)
+
+
+class CaptchaImageAPIView(APIView):
+    """验证码图片API视图（直接返回PNG二进制内容）"""
+
+    permission_classes = []  # 允许匿名访问
+    authentication_classes = []  # 无需解析认证信息
+
+    def get(self, request, captcha_id):
+        """
+        获取验证码图片
+
+        URL参数:
+            captcha_id: 验证码ID
+
+        返回:
+            HttpResponse: image/png响应；验证码不存在或已过期时返回404
+        """
+        image_bytes = get_captcha_image(str(captcha_id))
+        if image_bytes is None:
+            return Response(
+                {"error": "验证码不存在或已过期", "code": "CAPTCHA_NOT_FOUND"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        response = HttpResponse(image_bytes, content_type="image/png")
+        response["Content-Length"] = str(len(image_bytes))
+        # 同一captcha_id的图片不会变化，允许浏览器和nginx在有效期内缓存
+        response["Cache-Control"] = f"public, max-age={CAPTCHA_EXPIRES_IN}, immutable"
+        return response
 
 
 class RegisterAPIView(BaseCaptchaView):
     """用户注册API视图"""
 
     permission_classes = []  # 允许匿名访问
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "register"
 
     def _format_error_response(self, errors):
         """
@@ -242,7 +344,17 @@ class RegisterAPIView(BaseCaptchaView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         # 创建用户
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except IntegrityError:
+            # 邮箱唯一性检查读取的是只读副本（或与并发注册竞争），由数据库唯一约束兜底；
+            # 写操作之后的查询使用主库
+            if not filter_users_by_email(serializer.validated_data["email"]).exists():
+                raise
+            return Response(
+                {"error": "该邮箱已被注册", "code": "EMAIL_EXISTS"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         # 生成JWT Token
         access_token, refresh_token = self._generate_tokens(user)
@@ -267,6 +379,8 @@ class LoginAPIView(BaseCaptchaView):
     """用户登录API视图"""
 
     permission_classes = []  # 允许匿名访问
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "login"
 
     def post(self, request):
         """
@@ -277,13 +391,16 @@ class LoginAPIView(BaseCaptchaView):
                 "email": "user@example.com" 或 "username",
                 "password": "SecurePass123",
                 "captcha_id": "uuid",
-                "captcha_answer": "A3B7"
+                "captcha_answer": "A3B7",
+                "credential_proof": "预验证返回的凭证证明（可选）"
             }
 
         返回:
             Response: 包含user信息、token、refresh_token的JSON响应
         """
-        serializer = UserLoginSerializer(data=request.data)
+        serializer = UserLoginSerializer(
+            data=request.data, context={"request": request}
+        )
 
         if not serializer.is_valid():
             # 处理错误响应格式
@@ -307,42 +424,15 @@ class LoginAPIView(BaseCaptchaView):
                     if "用户不存在" in error_msg or "密码错误" in error_msg:
                         is_credential_error = True
 
-                # 如果是密码错误，处理失败次数
+                # 如果是密码错误，处理失败次数（复用序列化器中查找到的用户）
                 if is_credential_error:
-                    # 尝试从序列化器的validated_data中获取用户（如果存在）
-                    # 注意：如果验证失败，validated_data可能为空，需要手动查找用户
-                    from apps.users.utils import find_user_by_email_or_username
-
-                    email_or_username = request.data.get("email")
-                    if email_or_username:
-                        user = find_user_by_email_or_username(email_or_username)
-
-                        if user:
-                            # 增加失败次数
-                            user.failed_login_attempts += 1
-                            # 如果失败次数达到5次，锁定账户10分钟
-                            if user.failed_login_attempts >= 5:
-                                user.locked_until = timezone.now() + timedelta(
-                                    minutes=10
-                                )
-                                user.save(
-                                    update_fields=[
-                                        "failed_login_attempts",
-                                        "locked_until",
-                                    ]
-                                )
-                                # 返回账户锁定错误
-                                return Response(
-                                    {"error": "账户已被锁定，请稍后再试", "code": "ACCOUNT_LOCKED"},
-                                    status=status.HTTP_403_FORBIDDEN,
-                                )
-                            else:
-                                user.save(
-                                    update_fields=[
-                                        "failed_login_attempts",
-                                        "locked_until",
-                                    ]
-                                )
+                    user = serializer.user
+                    if user is not None and user.record_failed_login():
+                        # 失败次数达到上限，返回账户锁定错误
+                        return Response(
+                            {"error": "账户已被锁定，请稍后再试", "code": "ACCOUNT_LOCKED"},
+                            status=status.HTTP_403_FORBIDDEN,
+                        )
 
                     return Response(
                         {"error": "用户不存在或密码错误", "code": "INVALID_CREDENTIALS"},
@@ -359,17 +449,12 @@ class LoginAPIView(BaseCaptchaView):
         # 获取验证后的用户对象
         user = serializer.validated_data["user"]
 
-        # 检查账户是否被锁定（如果锁定已过期，自动解锁）
+        # 检查账户是否被锁定（已过期的锁定在登录成功时随失败次数一起清除）
         if user.is_locked():
             return Response(
                 {"error": "账户已被锁定，请稍后再试", "code": "ACCOUNT_LOCKED"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        # 如果锁定已过期，清除锁定状态
-        elif user.locked_until is not None and timezone.now() >= user.locked_until:
-            user.locked_until = None
-            user.failed_login_attempts = 0
-            user.save(update_fields=["locked_until", "failed_login_attempts"])
 
         # 检查邮箱是否已验证
         if not user.is_email_verified:
@@ -379,10 +464,7 @@ class LoginAPIView(BaseCaptchaView):
             )
 
         # 成功登录，重置失败次数和锁定时间
-        if user.failed_login_attempts > 0 or user.locked_until is not None:
-            user.failed_login_attempts = 0
-            user.locked_until = None
-            user.save(update_fields=["failed_login_attempts", "locked_until"])
+        user.reset_failed_logins()
 
         # 生成JWT Token
         access_token, refresh_token = self._generate_tokens(user)
@@ -406,7 +488,7 @@ class PreviewAPIView(BaseCaptchaView):
     """登录预验证API视图（用于获取用户头像）"""
 
     permission_classes = []  # 允许匿名访问
-    throttle_classes = [PreviewLoginThrottle]  # 频率限制：每分钟10次
+    throttle_classes = [PreviewLoginThrottle]  # 频率限制：同一IP/用户每分钟10次
 
     def _get_avatar_letter(self, user):
         """
@@ -464,7 +546,8 @@ class PreviewAPIView(BaseCaptchaView):
             }
 
         返回:
-            Response: 包含valid和user信息的JSON响应（始终返回200状态码）
+            Response: 包含valid和user信息的JSON响应（始终返回200状态码），
+                valid为true时附带credential_proof及其有效期credential_proof_expires_in
         """
         serializer = PreviewLoginSerializer(data=request.data)
 
@@ -495,18 +578,31 @@ class PreviewAPIView(BaseCaptchaView):
         # 账号密码正确，返回用户信息
         user_data = self._format_user_preview_data(user)
 
+        # 签发凭证证明，登录时携带可避免再次计算密码哈希
+        credential_proof = issue_credential_proof(
+            user,
+            validated_data["password"],
+            validated_data["captcha_id"],
+            request,
+        )
+
         return Response(
-            {"valid": True, "user": user_data},
+            {
+                "valid": True,
+                "user": user_data,
+                "credential_proof": credential_proof,
+                "credential_proof_expires_in": get_credential_proof_ttl(),
+            },
             status=status.HTTP_200_OK,
         )
 
 
-class TokenRefreshAPIView(APIView):
+class TokenRefreshAPIView(AsyncAPIView):
     """JWT Token刷新API视图"""
 
     permission_classes = []  # 允许匿名访问（只需要refresh token）
 
-    def post(self, request):
+    async def post(self, request):
         """
         刷新JWT Token
 
@@ -525,8 +621,8 @@ class TokenRefreshAPIView(APIView):
             )
 
         try:
-            # 验证并刷新token
-            refresh = RefreshToken(refresh_token)
+            # 验证并刷新token（启用令牌黑名单时需要查询数据库）
+            refresh = await sync_to_async(RefreshToken)(refresh_token)
             access_token = str(refresh.access_token)
 
             # 返回新的access token
@@ -547,12 +643,12 @@ class TokenRefreshAPIView(APIView):
             )
 
 
-class LogoutAPIView(APIView):
+class LogoutAPIView(AsyncAPIView):
     """用户登出API视图"""
 
     permission_classes = [IsAuthenticated]  # 需要认证
 
-    def post(self, request):
+    async def post(self, request):
         """
         用户登出
 
@@ -569,6 +665,9 @@ class LogoutAPIView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
+        # 清除该用户的已验证令牌缓存
+        await ainvalidate_user_tokens(request.user.pk)
+
         try:
             # 获取refresh token（如果提供）
             refresh_token = request.data.get("refresh_token")
@@ -576,8 +675,7 @@ class LogoutAPIView(APIView):
             if refresh_token:
                 try:
                     # 将refresh token加入黑名单（如果配置了黑名单）
-                    refresh = RefreshToken(refresh_token)
-                    refresh.blacklist()
+                    await sync_to_async(self._blacklist)(refresh_token)
                 except (TokenError, InvalidToken):
                     # 如果refresh token无效，忽略（不影响登出）
                     pass
@@ -595,11 +693,18 @@ class LogoutAPIView(APIView):
                 status=status.HTTP_200_OK,
             )
 
+    def _blacklist(self, refresh_token):
+        """校验refresh token并加入黑名单（访问数据库，在线程中执行）"""
+        refresh = RefreshToken(refresh_token)
+        refresh.blacklist()
+
 
 class SendEmailVerificationAPIView(APIView):
     """发送邮箱验证邮件API视图"""
 
     permission_classes = [IsAuthenticated]  # 需要认证
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "email_verification"
 
     def post(self, request):
         """
@@ -639,19 +744,14 @@ class SendEmailVerificationAPIView(APIView):
             # 设置过期时间（24小时）
             expires_at = timezone.now() + timedelta(hours=24)
 
-            # 创建或更新EmailVerification记录
-            verification, created = EmailVerification.objects.update_or_create(
-                user=request.user,
-                email=email,
-                defaults={
-                    "token": token,
-                    "expires_at": expires_at,
-                    "verified_at": None,  # 重置验证状态
-                },
+            # 签发令牌（该用户之前的验证令牌随之失效）
+            get_token_store().issue(
+                EMAIL_VERIFICATION, request.user.id, email, token, expires_at
             )
 
-            # 调用Celery任务发送邮件
-            send_email_verification.delay(
+            # 调用Celery任务发送邮件（重复点击时只发送最新令牌的邮件）
+            submit_user_mail(
+                EMAIL_VERIFICATION,
                 user_id=request.user.id,
                 email=email,
                 token=token,
@@ -679,12 +779,12 @@ class SendEmailVerificationAPIView(APIView):
             )
 
 
-class VerifyEmailAPIView(APIView):
+class VerifyEmailAPIView(AsyncAPIView):
     """邮箱验证API视图"""
 
     permission_classes = []  # 允许匿名访问（通过token验证）
 
-    def get(self, request, token):
+    async def get(self, request, token):
         """
         验证邮箱
 
@@ -695,38 +795,40 @@ class VerifyEmailAPIView(APIView):
             Response: 包含成功或错误消息的JSON响应
         """
         try:
-            # 查找验证记录
-            try:
-                verification = EmailVerification.objects.get(token=token)
-            except EmailVerification.DoesNotExist:
+            # 消费验证令牌（并发验证同一令牌时只有一个请求成功）
+            record = await sync_to_async(get_token_store().consume)(
+                EMAIL_VERIFICATION, token
+            )
+            user = None
+            if record.status != TOKEN_INVALID:
+                user = await sync_to_async(read_or_primary)(
+                    User.objects.filter(pk=record.user_id), lambda qs: qs.first()
+                )
+
+            if user is None:
                 return Response(
                     {"error": "无效的验证令牌", "code": "INVALID_TOKEN"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             # 检查是否已过期
-            if verification.is_expired():
+            if record.status == TOKEN_EXPIRED:
                 return Response(
                     {"error": "验证令牌已过期", "code": "TOKEN_EXPIRED"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             # 检查是否已验证
-            if verification.is_verified():
+            if record.status == TOKEN_USED:
                 return Response(
                     {"error": "该验证令牌已被使用（已验证）", "code": "TOKEN_ALREADY_VERIFIED"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             # 验证成功，更新用户状态
-            user = verification.user
             user.is_email_verified = True
             user.email_verified_at = timezone.now()
-            user.save()
-
-            # 标记验证记录为已验证
-            verification.verified_at = timezone.now()
-            verification.save()
+            await user.asave()
 
             return Response(
                 {"message": "邮箱验证成功"},
@@ -753,6 +855,8 @@ class SendPasswordResetAPIView(BaseCaptchaView):
     """发送密码重置邮件API视图"""
 
     permission_classes = []  # 允许匿名访问
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "password_reset"
 
     def post(self, request):
         """
@@ -807,18 +911,14 @@ class SendPasswordResetAPIView(BaseCaptchaView):
                 # 设置过期时间（24小时）
                 expires_at = timezone.now() + timedelta(hours=24)
 
-                # 创建或更新PasswordReset记录
-                reset, created = PasswordReset.objects.update_or_create(
-                    user=user,
-                    defaults={
-                        "token": token,
-                        "expires_at": expires_at,
-                        "used_at": None,  # 重置使用状态
-                    },
+                # 签发令牌（该用户之前的重置令牌随之失效）
+                get_token_store().issue(
+                    PASSWORD_RESET, user.id, email, token, expires_at
                 )
 
-                # 调用Celery任务发送邮件
-                send_password_reset_email.delay(
+                # 调用Celery任务发送邮件（重复点击时只发送最新令牌的邮件）
+                submit_user_mail(
+                    PASSWORD_RESET,
                     user_id=user.id,
                     email=email,
                     token=token,
@@ -850,6 +950,8 @@ class PasswordResetAPIView(APIView):
     """重置密码API视图"""
 
     permission_classes = []  # 允许匿名访问（通过token验证）
+    throttle_classes = [RateLimitThrottle]
+    throttle_scope = "password_reset_confirm"
 
     def post(self, request):
         """
@@ -927,43 +1029,53 @@ class PasswordResetAPIView(APIView):
             token = serializer.validated_data["token"]
             new_password = serializer.validated_data["password"]
 
-            # 查找重置记录
-            try:
-                reset = PasswordReset.objects.get(token=token)
-            except PasswordReset.DoesNotExist:
+            # 查找重置令牌（哈希密码之前不消费，哈希执行器繁忙时令牌仍可重试）
+            token_store = get_token_store()
+            record = token_store.check(PASSWORD_RESET, token)
+            user = None
+            if record.status != TOKEN_INVALID:
+                user = read_or_primary(
+                    User.objects.filter(pk=record.user_id), lambda qs: qs.first()
+                )
+
+            if user is None:
                 return Response(
                     {"error": "无效的重置令牌", "code": "INVALID_TOKEN"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             # 检查是否已过期
-            if reset.is_expired():
+            if record.status == TOKEN_EXPIRED:
                 return Response(
                     {"error": "重置令牌已过期", "code": "TOKEN_EXPIRED"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            # 哈希新密码后消费令牌（并发重置时只有成功消费令牌的请求修改密码）
+            if record.status == TOKEN_VALID:
+                password = hash_password(new_password)
+                record = token_store.consume(PASSWORD_RESET, token)
+
             # 检查是否已使用
-            if reset.is_used():
+            if record.status != TOKEN_VALID:
                 return Response(
                     {"error": "该重置令牌已被使用", "code": "TOKEN_ALREADY_USED"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             # 重置密码成功，更新用户密码
-            user = reset.user
-            user.set_password(new_password)
+            user.password = password
             user.save()
 
-            # 标记重置记录为已使用
-            reset.used_at = timezone.now()
-            reset.save()
-
             return Response(
                 {"message": "密码重置成功，请使用新密码登录"},
                 status=status.HTTP_200_OK,
             )
 
+        except PasswordHashingUnavailable:
+            # 哈希执行器繁忙，交给DRF返回503
+            raise
+
         except Exception as e:
             # 捕获所有未预期的异常
             import logging
@@ -0,0 +1,17 @@
+"""ASGI 配置模板
+
+它暴露了可调用的 ASGI 作为模块级变量 ``application``，供 uvicorn 或 gunicorn 的
+uvicorn worker 使用（见 gunicorn.conf.py 的 SERVER_MODE）。
+
+有关此文件的更多信息，请参阅
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bravo.settings.local")
+os.environ.setdefault("SERVER_MODE", "asgi")
+
+application = get_asgi_application()
@@ -12,7 +12,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 
-from decouple import config
+from celery.schedules import crontab
+from decouple import Csv, config
 
 # 构建项目内的路径，如下所示：BASE_DIR / 'subdir'。
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -62,6 +63,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "apps.common.middleware.MetricsMiddleware",
+    "apps.common.middleware.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -74,6 +77,16 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# 部署模式：wsgi（gunicorn gthread worker）或asgi（uvicorn worker，bravo/asgi.py）
+SERVER_MODE = config("SERVER_MODE", default="wsgi")
+if SERVER_MODE == "asgi":
+    # WhiteNoise只支持同步调用，会让之后的中间件和异步视图都在线程中执行；
+    # ASGI部署下静态文件由nginx提供
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
+# 异步视图使用的缓存客户端（apps.common.async_cache）：ASGI模式下直连Redis
+ASYNC_CACHE = {"NATIVE": SERVER_MODE == "asgi"}
+
 ROOT_URLCONF = "bravo.urls"
 
 TEMPLATES = [
@@ -94,10 +107,23 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "bravo.wsgi.application"
 
-# 数据库
+# 数据库连接池（apps.common.db.backends.mysql）：每个进程最多MAX_SIZE个连接，请求结束时
+# 连接归还连接池而不是断开；连接建立MAX_LIFETIME秒后回收（小于MySQL wait_timeout），
+# 闲置超过CHECK_IDLE秒的连接取出前先PING。总连接数 = 进程数 × MAX_SIZE，
+# 需小于MySQL的max_connections
+DATABASE_POOL = {
+    "MIN_SIZE": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+    "MAX_SIZE": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+    "MAX_LIFETIME": config("DB_POOL_MAX_LIFETIME", default=1800, cast=int),
+    "MAX_IDLE": config("DB_POOL_MAX_IDLE", default=300, cast=int),
+    "TIMEOUT": config("DB_POOL_TIMEOUT", default=5, cast=float),
+    "CHECK_IDLE": config("DB_POOL_CHECK_IDLE", default=1, cast=float),
+}
+
+# 数据库（连接的复用由连接池负责，CONN_MAX_AGE为0）
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "apps.common.db.backends.mysql",
         "NAME": config("DB_NAME", default="bravo"),
         "USER": config("DB_USER", default="bravo_user"),
         "PASSWORD": config("DB_PASSWORD", default="bravo_password"),
@@ -106,9 +132,36 @@ DATABASES = {
         "OPTIONS": {
             "charset": "utf8mb4",
         },
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": DATABASE_POOL,
     }
 }
 
+# 只读副本（设置DB_REPLICA_HOST后启用）：读查询发往副本，写操作、事务中的查询和
+# 写操作后STICKY_SECONDS秒内的读查询使用default；复制延迟超过MAX_LAG时回退default
+if config("DB_REPLICA_HOST", default=""):
+    DATABASES["replica"] = dict(
+        DATABASES["default"],
+        HOST=config("DB_REPLICA_HOST"),
+        PORT=config("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        USER=config("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        PASSWORD=config(
+            "DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]
+        ),
+        TEST={"MIRROR": "default"},
+    )
+
+DATABASE_ROUTERS = ["apps.common.db.routers.ReplicaRouter"]
+DATABASE_ROUTING = {
+    "REPLICAS": ["replica"],
+    "MAX_LAG": config("DB_REPLICA_MAX_LAG", default=5, cast=float),
+    "LAG_CHECK_INTERVAL": config(
+        "DB_REPLICA_LAG_CHECK_INTERVAL", default=5, cast=float
+    ),
+    "STICKY_SECONDS": config("DB_REPLICA_STICKY_SECONDS", default=10, cast=float),
+}
+
 # 密码验证
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -152,18 +205,27 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "users.User"
 
 # REST Framework 配置
+# JSON序列化/解析使用orjson（apps.common.renderers/parsers，输出与DRF的JSONRenderer
+# 一致）；可浏览API只在DEBUG时启用，避免生产环境的内容协商和模板渲染开销
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
+        "apps.common.renderers.ORJSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.common.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "apps.common.pagination.StandardResultsSetPagination",
+    # 列表接口默认使用键集分页（每页耗时与翻页深度无关）；需要页码跳转的小表在视图中
+    # 指定apps.common.pagination.StandardResultsSetPagination
+    "DEFAULT_PAGINATION_CLASS": "apps.common.pagination.KeysetPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -171,9 +233,49 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_THROTTLE_RATES": {
-        "preview_login": "10/min",  # 登录预验证API：每分钟10次
-    },
+}
+
+# 分页近似总数（请求参数count=1）的缓存时间：未过滤的MySQL查询读取表统计信息，
+# 其余查询缓存COUNT(*)结果
+PAGINATION = {
+    "COUNT_CACHE_TTL": config("PAGINATION_COUNT_CACHE_TTL", default=300, cast=int),
+}
+
+# 认证相关API的频率限制：范围 → {维度(ip/user/email/captcha): 速率}，未配置的范围
+# 使用apps.users.throttling.DEFAULT_RATE_LIMITS（例如preview_login为同一IP/用户
+# 每分钟10次）。缓存后端为Redis时每次检查全部维度只需一次往返
+RATE_LIMITS = {}
+
+# 频率限制进程内拒绝缓存：已超限的键在解除前直接拒绝，不访问Redis；每个条目最多
+# 保留MAX_TTL秒（手动清除Redis中的限制状态时，各进程最多延迟MAX_TTL秒生效）
+RATE_LIMIT_LOCAL_DENY = {
+    "ENABLED": config("RATE_LIMIT_LOCAL_DENY_ENABLED", default=True, cast=bool),
+    "MAX_ENTRIES": config("RATE_LIMIT_LOCAL_DENY_MAX_ENTRIES", default=10000, cast=int),
+    "MAX_TTL": config("RATE_LIMIT_LOCAL_DENY_MAX_TTL", default=60, cast=int),
+}
+
+# Prometheus指标（/metrics/）：请求耗时、每个请求的数据库查询次数/耗时、缓存命中率和
+# 耗时、Celery任务耗时。gunicorn多worker部署时设置PROMETHEUS_MULTIPROC_DIR（各进程
+# 共享的空目录，启动前清空），各进程每FLUSH_INTERVAL秒写入快照，抓取时合并
+METRICS = {
+    "ENABLED": config("METRICS_ENABLED", default=True, cast=bool),
+    "MULTIPROC_DIR": config("PROMETHEUS_MULTIPROC_DIR", default=""),
+    "FLUSH_INTERVAL": config("METRICS_FLUSH_INTERVAL", default=5, cast=float),
+}
+
+# /health/依赖探测：结果缓存INTERVAL秒，过期后由后台线程刷新；单个探测超过TIMEOUT
+# 秒记为timeout。database、cache为关键依赖（失败时就绪检查返回503），
+# celery_broker（队列积压超过CELERY_MAX_DEPTH时异常）和smtp失败时为degraded
+HEALTH_CHECKS = {
+    "INTERVAL": config("HEALTH_CHECK_INTERVAL", default=10, cast=float),
+    "TIMEOUT": config("HEALTH_CHECK_TIMEOUT", default=2, cast=float),
+    "PROBES": config(
+        "HEALTH_CHECK_PROBES", default="database,cache,celery_broker,smtp", cast=Csv()
+    ),
+    "CELERY_QUEUE": config("HEALTH_CHECK_CELERY_QUEUE", default="celery"),
+    "CELERY_MAX_DEPTH": config(
+        "HEALTH_CHECK_CELERY_MAX_DEPTH", default=10000, cast=int
+    ),
 }
 
 # JWT 配置
@@ -183,6 +285,15 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
 }
 
+# JWT认证缓存：进程内LRU缓存已验证令牌与用户快照，可选Redis二级缓存
+# 用户保存/删除或登出时失效，其他进程的进程内缓存最迟在LOCAL_TTL秒后失效
+JWT_AUTH_CACHE = {
+    "MAX_ENTRIES": config("JWT_AUTH_CACHE_MAX_ENTRIES", default=10000, cast=int),
+    "LOCAL_TTL": config("JWT_AUTH_CACHE_LOCAL_TTL", default=30, cast=int),
+    "SHARED": config("JWT_AUTH_CACHE_SHARED", default=False, cast=bool),
+    "SHARED_TTL": config("JWT_AUTH_CACHE_SHARED_TTL", default=300, cast=int),
+}
+
 # CORS 配置
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -228,6 +339,60 @@ CACHES = {
     }
 }
 
+# 验证码预渲染池配置（每个工作进程一个池，低于低水位时后台补充）
+CAPTCHA_POOL = {
+    "ENABLED": config("CAPTCHA_POOL_ENABLED", default=True, cast=bool),
+    "SIZE": config("CAPTCHA_POOL_SIZE", default=200, cast=int),
+    "LOW_WATERMARK": config("CAPTCHA_POOL_LOW_WATERMARK", default=50, cast=int),
+}
+
+# 验证码图片返回方式：inline（JSON内嵌Base64）或url（JSON返回图片地址）
+CAPTCHA_IMAGE_MODE = config("CAPTCHA_IMAGE_MODE", default="inline")
+# 验证码调色板PNG颜色数（0表示真彩色PNG）
+CAPTCHA_PALETTE_COLORS = config("CAPTCHA_PALETTE_COLORS", default=32, cast=int)
+
+# 登录预验证签发的凭证证明有效期（秒），登录时携带可跳过重复的密码校验
+CREDENTIAL_PROOF_TTL = config("CREDENTIAL_PROOF_TTL", default=60, cast=int)
+
+# 密码哈希执行器：inline（请求线程）、thread（线程池）或process（进程池）
+# WORKERS为空时使用CPU核数，MAX_PENDING为空时为WORKERS * 4，超出上限返回503
+PASSWORD_HASHING = {
+    "MODE": config("PASSWORD_HASHING_MODE", default="thread"),
+    "WORKERS": config("PASSWORD_HASHING_WORKERS", default=0, cast=int) or None,
+    "MAX_PENDING": config("PASSWORD_HASHING_MAX_PENDING", default=0, cast=int) or None,
+    "TIMEOUT": config("PASSWORD_HASHING_TIMEOUT", default=5.0, cast=float),
+}
+
+# 密码哈希策略：argon2、scrypt或pbkdf2_sha256，首选哈希器排在第一位，
+# 其余哈希器用于校验已有哈希，用户登录成功后自动按首选策略重新哈希
+# 成本参数可通过 python manage.py calibrate_password_hasher 按目标延迟校准
+PASSWORD_HASH_POLICY = config("PASSWORD_HASH_POLICY", default="argon2")
+PASSWORD_HASHER_PARAMS = {
+    "argon2": {
+        "time_cost": config("PASSWORD_ARGON2_TIME_COST", default=2, cast=int),
+        "memory_cost": config("PASSWORD_ARGON2_MEMORY_COST", default=19456, cast=int),
+        "parallelism": config("PASSWORD_ARGON2_PARALLELISM", default=1, cast=int),
+    },
+    "scrypt": {
+        "work_factor": config("PASSWORD_SCRYPT_WORK_FACTOR", default=2**14, cast=int),
+        "block_size": config("PASSWORD_SCRYPT_BLOCK_SIZE", default=8, cast=int),
+        "parallelism": config("PASSWORD_SCRYPT_PARALLELISM", default=1, cast=int),
+    },
+    "pbkdf2_sha256": {
+        "iterations": config("PASSWORD_PBKDF2_ITERATIONS", default=600000, cast=int),
+    },
+}
+_TUNABLE_PASSWORD_HASHERS = {
+    "argon2": "apps.users.hashers.TunableArgon2PasswordHasher",
+    "scrypt": "apps.users.hashers.TunableScryptPasswordHasher",
+    "pbkdf2_sha256": "apps.users.hashers.TunablePBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [_TUNABLE_PASSWORD_HASHERS[PASSWORD_HASH_POLICY]] + [
+    hasher
+    for policy, hasher in _TUNABLE_PASSWORD_HASHERS.items()
+    if policy != PASSWORD_HASH_POLICY
+]
+
 # Celery 配置
 CELERY_BROKER_URL = config("REDIS_URL", default="redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = config("REDIS_URL", default="redis://127.0.0.1:6379/0")
@@ -235,6 +400,46 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # 每天凌晨清理过期的邮箱验证和密码重置记录
+    "purge-expired-tokens": {
+        "task": "apps.users.tasks.purge_expired_tokens_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    # 定期drain邮件队列：放回中断的drain（工作进程被杀死、硬超时）未处理的邮件
+    "drain-mail-queue": {
+        "task": "apps.users.tasks.drain_mail_queue",
+        "schedule": crontab(minute="*/5"),
+    },
+}
+
+# 过期令牌清理：删除过期超过RETENTION_DAYS天的记录，按主键区间每块CHUNK_SIZE行，
+# 块之间休眠SLEEP秒以限制删除速率
+TOKEN_PURGE = {
+    "RETENTION_DAYS": config("TOKEN_PURGE_RETENTION_DAYS", default=7, cast=int),
+    "CHUNK_SIZE": config("TOKEN_PURGE_CHUNK_SIZE", default=5000, cast=int),
+    "SLEEP": config("TOKEN_PURGE_SLEEP", default=0.05, cast=float),
+}
+
+# 邮箱验证/密码重置令牌存储：db（数据库）、cache（Redis，原生TTL）或dual（写入
+# Redis和数据库，消费先查Redis再回退数据库）。从db迁移时先部署dual，24小时后切换为
+# cache；缓存记录在过期后再保留GRACE秒，用于返回"已过期/已使用"提示
+TOKEN_STORE = {
+    "BACKEND": config("TOKEN_STORE_BACKEND", default="dual"),
+    "GRACE": config("TOKEN_STORE_GRACE", default=86400, cast=int),
+}
+
+# 邮件批量发送：邮件任务只入队，第一封邮件入队MAX_WAIT_MS毫秒后由drain_mail_queue
+# 每批取出最多BATCH_SIZE封邮件共用一个SMTP连接发送，失败的邮件单独按指数退避重试
+MAIL_BATCHING = {
+    "BATCH_SIZE": config("MAIL_BATCH_SIZE", default=50, cast=int),
+    "MAX_WAIT_MS": config("MAIL_BATCH_MAX_WAIT_MS", default=200, cast=int),
+    "MAX_ATTEMPTS": config("MAIL_MAX_ATTEMPTS", default=4, cast=int),
+    "RETRY_DELAY": config("MAIL_RETRY_DELAY", default=60, cast=int),
+    "RETRY_DELAY_MAX": config("MAIL_RETRY_DELAY_MAX", default=600, cast=int),
+    # 同一用户重复点击"重新发送"时，窗口内只发送最新令牌的邮件
+    "COALESCE_WINDOW": config("MAIL_COALESCE_WINDOW", default=1800, cast=int),
+}
 
 # 日志配置
 LOGGING = {
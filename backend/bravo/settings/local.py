@@ -18,7 +18,7 @@ ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
 # 数据库配置 - 使用SQLite进行本地开发
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "apps.common.db.backends.mysql",
         "NAME": config("DB_NAME", default="bravo_local"),
         "USER": config("DB_USER", default="bravo_user"),
         "PASSWORD": config("DB_PASSWORD", default="bravo_password"),
@@ -27,6 +27,9 @@ DATABASES = {
         "OPTIONS": {
             "charset": "utf8mb4",
         },
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": DATABASE_POOL,
     }
 }
 
@@ -43,6 +46,12 @@ if DEBUG:
         "silk.middleware.SilkyMiddleware",
     ]
 
+    # 可浏览API（base.py只在环境变量DEBUG为True时启用）
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "apps.common.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+
     # 调试工具栏配置
     INTERNAL_IPS = [
         "127.0.0.1",
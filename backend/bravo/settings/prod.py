@@ -22,7 +22,7 @@ SECURE_REFERRER_POLICY = "strict-origin-when-cross-origin"
 # 数据库配置
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "apps.common.db.backends.mysql",
         "NAME": config("DB_NAME"),
         "USER": config("DB_USER"),
         "PASSWORD": config("DB_PASSWORD"),
@@ -31,6 +31,17 @@ DATABASES = {
         "OPTIONS": {
             "charset": "utf8mb4",
         },
+        # 连接的复用由连接池负责（与base.py中的DATABASE_POOL相同）
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": {
+            "MIN_SIZE": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            "MAX_SIZE": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+            "MAX_LIFETIME": config("DB_POOL_MAX_LIFETIME", default=1800, cast=int),
+            "MAX_IDLE": config("DB_POOL_MAX_IDLE", default=300, cast=int),
+            "TIMEOUT": config("DB_POOL_TIMEOUT", default=5, cast=float),
+            "CHECK_IDLE": config("DB_POOL_CHECK_IDLE", default=1, cast=float),
+        },
     }
 }
 
@@ -153,6 +164,5 @@ if config("NEW_RELIC_LICENSE_KEY", default=None):
     newrelic.agent.initialize("/etc/newrelic/newrelic.ini")
 
 # 性能优化
-CONN_MAX_AGE = 60
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
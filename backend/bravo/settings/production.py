@@ -27,7 +27,7 @@ SECRET_KEY = os.environ.get(
 # 数据库配置 - 生产环境使用MySQL
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "apps.common.db.backends.mysql",
         "NAME": os.environ.get("DB_NAME", "bravo_production"),
         "USER": os.environ.get("DB_USER", "root"),
         "PASSWORD": os.environ.get("DB_PASSWORD", "root_password"),
@@ -37,9 +37,25 @@ DATABASES = {
             "charset": "utf8mb4",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": DATABASE_POOL,
     }
 }
 
+# 只读副本（设置DB_REPLICA_HOST后启用，路由配置见base.py的DATABASE_ROUTING）
+if os.environ.get("DB_REPLICA_HOST"):
+    DATABASES["replica"] = dict(
+        DATABASES["default"],
+        HOST=os.environ["DB_REPLICA_HOST"],
+        PORT=os.environ.get("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        USER=os.environ.get("DB_REPLICA_USER", DATABASES["default"]["USER"]),
+        PASSWORD=os.environ.get(
+            "DB_REPLICA_PASSWORD", DATABASES["default"]["PASSWORD"]
+        ),
+        TEST={"MIRROR": "default"},
+    )
+
 # Redis缓存配置
 CACHES = {
     "default": {
@@ -160,9 +176,10 @@ CELERY_ENABLE_UTC = True
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 
-# API限流配置
+# API配置：不启用可浏览API，开启限流
 REST_FRAMEWORK.update(
     {
+        "DEFAULT_RENDERER_CLASSES": ["apps.common.renderers.ORJSONRenderer"],
         "DEFAULT_THROTTLE_CLASSES": [
             "rest_framework.throttling.AnonRateThrottle",
             "rest_framework.throttling.UserRateThrottle",
@@ -100,10 +100,12 @@ print(
     f"🔧 数据库配置: HOST={DATABASES['default']['HOST']}, PORT={DATABASES['default']['PORT']}, CI={os.environ.get('CI', 'False')}"
 )
 
-# 禁用缓存
+# 进程内缓存：验证码、令牌等依赖缓存的功能在测试中与Redis行为一致（每个测试在
+# setUp中自行清空缓存）
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bravo-tests",
     }
 }
 
@@ -162,7 +164,12 @@ CELERY_TASK_EAGER_PROPAGATES = True
 # REST Framework配置（测试环境）
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "apps.common.renderers.ORJSONRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.common.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -0,0 +1,41 @@
+"""读写分离测试环境配置
+
+在测试配置基础上使用两个独立的SQLite数据库：default（主库）和replica（只读副本）。
+两个库之间没有复制，测试据此判断查询发往了哪个库。
+
+用法:
+    pytest --ds=bravo.settings.test_replica tests/integration/test_replica_routing.py
+"""
+
+from .test import *  # noqa: F401,F403
+from .test import MIDDLEWARE, REST_FRAMEWORK
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+}
+
+DATABASE_ROUTERS = ["apps.common.db.routers.ReplicaRouter"]
+DATABASE_ROUTING = {
+    "REPLICAS": ["replica"],
+    "MAX_LAG": 5,
+    "LAG_CHECK_INTERVAL": 0,
+    "STICKY_SECONDS": 10,
+}
+
+MIDDLEWARE = ["apps.common.middleware.ReplicaRoutingMiddleware", *MIDDLEWARE]
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_AUTHENTICATION_CLASSES=[
+        "apps.users.authentication.CachedJWTAuthentication",
+    ],
+)
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -13,8 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-import datetime
-
+from apps.common.views import health_check, health_live, health_ready, metrics
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -27,21 +26,6 @@ from drf_spectacular.views import (
 )
 
 
-def health_check(request):
-    """健康检查端点"""
-    return JsonResponse(
-        {
-            "status": "healthy",
-            "timestamp": datetime.datetime.now().isoformat(),
-            "version": "1.0.0",
-            "services": {
-                "database": "connected",
-                "cache": "connected",
-            },
-        }
-    )
-
-
 def api_root(request):
     """API根端点"""
     return JsonResponse(
@@ -60,6 +44,9 @@ def api_root(request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health/", health_check, name="health-check"),
+    path("health/live/", health_live, name="health-live"),
+    path("health/ready/", health_ready, name="health-ready"),
+    path("metrics/", metrics, name="metrics"),
     path("api/", api_root, name="api-root"),
     path("api/auth/", include("apps.users.urls")),  # 用户认证相关API
     # API文档路由
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """测试环境URL配置 - 简化版本，不依赖外部包"""
 
-from apps.common.views import api_info, health_check
+from apps.common.views import api_info, health_check, health_live, health_ready, metrics
 from django.contrib import admin
 from django.http import JsonResponse
 from django.urls import include, path
@@ -30,6 +30,9 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     # 健康检查和API信息
     path("health/", health_check, name="health_check"),
+    path("health/live/", health_live, name="health_live"),
+    path("health/ready/", health_ready, name="health_ready"),
+    path("metrics/", metrics, name="metrics"),
     path("api-info/", api_info, name="api_info"),
     # 通用应用URL (使用common/前缀避免与根路径冲突)
     path("common/", include("apps.common.urls")),
@@ -0,0 +1,38 @@
+"""gunicorn配置
+
+SERVER_MODE选择部署模式：
+
+- wsgi（默认）: bravo.wsgi:application，gthread worker。每个worker同时处理的
+  请求数等于GUNICORN_THREADS，等待Redis、MySQL时线程被占用
+- asgi: bravo.asgi:application，uvicorn worker。每个worker在一个事件循环中并发
+  处理请求，异步视图等待I/O时不占用线程
+
+环境变量:
+    GUNICORN_BIND: 监听地址（默认0.0.0.0:8000）
+    GUNICORN_WORKERS: worker进程数（默认2）
+    GUNICORN_THREADS: wsgi模式下每个worker的线程数（默认2）
+    GUNICORN_TIMEOUT: worker超时秒数（默认30）
+
+用法:
+    gunicorn -c gunicorn.conf.py
+"""
+
+import os
+
+server_mode = os.environ.get("SERVER_MODE", "wsgi")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+max_requests = 1000
+max_requests_jitter = 50
+accesslog = "-"
+errorlog = "-"
+
+if server_mode == "asgi":
+    wsgi_app = "bravo.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "bravo.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", 2))
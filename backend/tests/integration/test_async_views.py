@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""异步视图集成测试
+
+通过AsyncClient（ASGIHandler）请求获取/刷新验证码、刷新令牌、登出和验证邮箱接口，
+同步代码写入的数据异步视图可以读到，反之亦然。
+"""
+
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from apps.users.captcha_pool import next_captcha_png
+from apps.users.captcha_store import CAPTCHA_KEY_PREFIX
+from apps.users.emails import EMAIL_VERIFICATION
+from apps.users.token_store import get_token_store
+from apps.users.utils import store_captcha, verify_captcha
+from apps.users.views import CaptchaAPIView, VerifyEmailAPIView
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+
+@pytest.mark.integration
+class AsyncViewsTests(TestCase):
+    """异步处理函数的认证接口"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+        self.user = User.objects.create_user(
+            username="asyncuser",
+            email="async@example.com",
+            password="SecurePass123",
+            is_email_verified=False,
+        )
+
+    def test_views_are_async(self):
+        self.assertTrue(asyncio.iscoroutinefunction(CaptchaAPIView.as_view()))
+        self.assertTrue(asyncio.iscoroutinefunction(VerifyEmailAPIView.as_view()))
+
+    async def test_captcha_stored_for_sync_verification(self):
+        response = await self.client.get("/api/auth/captcha/")
+        self.assertEqual(response.status_code, 200)
+        captcha_id = response.json()["captcha_id"]
+
+        answer = await cache.aget(CAPTCHA_KEY_PREFIX + captcha_id)
+        self.assertTrue(await sync_to_async(verify_captcha)(captcha_id, answer))
+
+    async def test_captcha_rendered_off_event_loop(self):
+        threads = []
+
+        def render():
+            threads.append(threading.get_ident())
+            return next_captcha_png()
+
+        with mock.patch("apps.users.views.next_captcha_png", side_effect=render):
+            response = await self.client.get("/api/auth/captcha/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    async def test_captcha_refresh_discards_old_captcha(self):
+        await sync_to_async(store_captcha)("old-captcha", "AB12")
+        response = await self.client.post(
+            "/api/auth/captcha/refresh/",
+            {"captcha_id": "old-captcha"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()["captcha_id"], "old-captcha")
+        self.assertIsNone(await cache.aget(CAPTCHA_KEY_PREFIX + "old-captcha"))
+
+    async def test_token_refresh(self):
+        refresh = await sync_to_async(RefreshToken.for_user)(self.user)
+        response = await self.client.post(
+            "/api/auth/token/refresh/",
+            {"refresh": str(refresh)},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json())
+
+        response = await self.client.post(
+            "/api/auth/token/refresh/",
+            {"refresh": "invalid"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["code"], "INVALID_REFRESH_TOKEN")
+
+    async def test_logout_requires_authentication(self):
+        response = await self.client.post("/api/auth/logout/")
+        self.assertEqual(response.status_code, 401)
+
+        refresh = await sync_to_async(RefreshToken.for_user)(self.user)
+        response = await self.client.post(
+            "/api/auth/logout/",
+            {"refresh_token": str(refresh)},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {refresh.access_token}"},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_verify_email(self):
+        await sync_to_async(get_token_store().issue)(
+            EMAIL_VERIFICATION,
+            self.user.pk,
+            self.user.email,
+            "async-token",
+            timezone.now() + timedelta(hours=1),
+        )
+        response = await self.client.get("/api/auth/email/verify/async-token/")
+        self.assertEqual(response.status_code, 200)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.is_email_verified)
+
+        response = await self.client.get("/api/auth/email/verify/async-token/")
+        self.assertEqual(response.json()["code"], "TOKEN_ALREADY_VERIFIED")
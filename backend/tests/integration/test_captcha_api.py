@@ -153,3 +153,79 @@ class CaptchaAPITests(TestCase):
         self.assertNotEqual(old_captcha_id, data2["captcha_id"])
         # 新的验证码图片应该不同
         self.assertNotEqual(data1["captcha_image"], data2["captcha_image"])
+
+
+@pytest.mark.integration
+@override_settings(CACHES=CACHES_TEST)
+class CaptchaImageAPITests(TestCase):
+    """验证码二进制图片API集成测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.client = Client()
+
+    def _get_url_mode_captcha(self):
+        response = self.client.get("/api/auth/captcha/", {"image_mode": "url"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_url_mode_returns_image_url(self):
+        """测试url模式下JSON只返回图片地址"""
+        data = self._get_url_mode_captcha()
+
+        expected_path = reverse("users:captcha-image", args=[data["captcha_id"]])
+        self.assertTrue(data["captcha_image"].endswith(expected_path))
+        self.assertFalse(data["captcha_image"].startswith("data:"))
+
+    def test_image_endpoint_streams_png(self):
+        """测试图片接口返回PNG二进制内容和Content-Length"""
+        data = self._get_url_mode_captcha()
+
+        response = self.client.get(data["captcha_image"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertTrue(response.content.startswith(b"\x89PNG\r\n\x1a\n"))
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+    def test_image_endpoint_unknown_captcha_returns_404(self):
+        """测试不存在的验证码图片返回404"""
+        response = self.client.get(
+            reverse("users:captcha-image", args=[str(uuid.uuid4())])
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["code"], "CAPTCHA_NOT_FOUND")
+
+    def test_url_mode_answer_still_verifiable(self):
+        """测试url模式下验证码答案仍可被verify_captcha验证"""
+        from apps.users.utils import verify_captcha
+        from django.core.cache import cache
+
+        data = self._get_url_mode_captcha()
+        answer = cache.get(f"captcha:{data['captcha_id']}")
+
+        self.assertTrue(verify_captcha(data["captcha_id"], answer))
+
+    def test_refresh_removes_old_image(self):
+        """测试刷新验证码后旧图片不可再获取"""
+        data = self._get_url_mode_captcha()
+
+        self.client.post(
+            "/api/auth/captcha/refresh/?image_mode=url",
+            data=json.dumps({"captcha_id": data["captcha_id"]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(self.client.get(data["captcha_image"]).status_code, 404)
+
+    def test_palette_png_is_smaller(self):
+        """测试调色板PNG体积小于真彩色PNG"""
+        from apps.users.captcha_renderer import get_captcha_renderer
+
+        renderer = get_captcha_renderer()
+        truecolor = renderer.render_png("AB12")
+        palette = renderer.render_png("AB12", palette_colors=32)
+
+        self.assertLess(len(palette), len(truecolor))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""登录API数据库查询次数测试
+
+每个登录请求只查询一次用户，失败计数与锁定由单条UPDATE原子完成。
+"""
+
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from apps.users.models import MAX_FAILED_LOGIN_ATTEMPTS, User
+from apps.users.utils import store_captcha
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.utils import timezone
+
+
+@pytest.mark.integration
+class LoginQueryCountTests(TestCase):
+    """登录各分支的查询次数"""
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="queryuser",
+            email="query@example.com",
+            password="SecurePass123",
+            is_email_verified=True,
+        )
+
+    def login(self, password, email="query@example.com"):
+        captcha_id = str(uuid.uuid4())
+        store_captcha(captcha_id, "AB12")
+        return self.client.post(
+            "/api/auth/login/",
+            data=json.dumps(
+                {
+                    "email": email,
+                    "password": password,
+                    "captcha_id": captcha_id,
+                    "captcha_answer": "AB12",
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_success_path_queries(self):
+        """测试登录成功：查询用户1次"""
+        with self.assertNumQueries(1):
+            response = self.login("SecurePass123")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_success_after_failures_queries(self):
+        """测试有失败记录时登录成功：查询用户 + 重置计数"""
+        self.user.failed_login_attempts = 2
+        self.user.save()
+
+        with self.assertNumQueries(2):
+            response = self.login("SecurePass123")
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+
+    def test_failure_path_queries(self):
+        """测试密码错误：查询用户 + 单条UPDATE"""
+        with self.assertNumQueries(2):
+            response = self.login("WrongPass123")
+
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 1)
+        self.assertIsNone(self.user.locked_until)
+
+    def test_unknown_user_queries(self):
+        """测试用户不存在：只查询一次"""
+        with self.assertNumQueries(1):
+            response = self.login("SecurePass123", email="nobody@example.com")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CREDENTIALS")
+
+    def test_lockout_path_queries(self):
+        """测试达到失败上限：查询用户 + 单条UPDATE完成计数和锁定"""
+        self.user.failed_login_attempts = MAX_FAILED_LOGIN_ATTEMPTS - 1
+        self.user.save()
+
+        with self.assertNumQueries(2):
+            response = self.login("WrongPass123")
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["code"], "ACCOUNT_LOCKED")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, MAX_FAILED_LOGIN_ATTEMPTS)
+        self.assertGreater(self.user.locked_until, timezone.now())
+
+    def test_locked_account_queries(self):
+        """测试锁定期间密码正确：只查询一次"""
+        self.user.failed_login_attempts = MAX_FAILED_LOGIN_ATTEMPTS
+        self.user.locked_until = timezone.now() + timedelta(minutes=10)
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            response = self.login("SecurePass123")
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unverified_with_expired_lock_not_written(self):
+        """测试锁定已过期但邮箱未验证：只查询一次，不清除锁定状态"""
+        locked_until = timezone.now() - timedelta(minutes=1)
+        self.user.is_email_verified = False
+        self.user.failed_login_attempts = MAX_FAILED_LOGIN_ATTEMPTS
+        self.user.locked_until = locked_until
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            response = self.login("SecurePass123")
+
+        self.assertEqual(response.json()["code"], "EMAIL_NOT_VERIFIED")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.locked_until, locked_until)
+
+
+@pytest.mark.integration
+class RecordFailedLoginTests(TestCase):
+    """User.record_failed_login原子更新测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="counter",
+            email="counter@example.com",
+            password="SecurePass123",
+        )
+
+    def test_increment_uses_database_value(self):
+        """测试基于数据库中的当前值递增，不会被旧实例覆盖"""
+        stale = User.objects.get(pk=self.user.pk)
+        self.user.record_failed_login()
+        stale.record_failed_login()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 2)
+
+    def test_lock_set_when_reaching_limit(self):
+        """测试达到上限时同一条语句设置锁定时间"""
+        for _ in range(MAX_FAILED_LOGIN_ATTEMPTS - 1):
+            self.assertFalse(self.user.record_failed_login())
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.locked_until)
+
+        self.assertTrue(self.user.record_failed_login())
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.locked_until, timezone.now())
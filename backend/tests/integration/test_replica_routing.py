@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""读写分离路由集成测试
+
+default和replica是两个独立的SQLite数据库（之间没有复制），通过数据出现在哪个库
+判断查询的路由。需要使用bravo.settings.test_replica运行，其他配置下跳过:
+
+    pytest --ds=bravo.settings.test_replica tests/integration/test_replica_routing.py
+"""
+
+import json
+from unittest import mock
+
+import pytest
+from apps.common.db import routers
+from apps.users.models import EmailVerification
+from apps.users.utils import find_user_by_email_or_username, store_captcha
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TransactionTestCase, override_settings
+
+User = get_user_model()
+
+pytestmark = pytest.mark.skipif(
+    "replica" not in settings.DATABASES,
+    reason="需要bravo.settings.test_replica（default和replica两个数据库）",
+)
+
+
+class ReplicaTestCase(TransactionTestCase):
+    """每个测试从未固定主库的上下文开始"""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        routers.reset_replica_lags()
+        context = routers.primary_until(0.0)
+        context.__enter__()
+        self.addCleanup(context.__exit__, None, None, None)
+
+    def create_user(self, using, email="replica@example.com"):
+        return User.objects.db_manager(using).create_user(
+            username=email.split("@")[0], email=email, password="SecurePass123"
+        )
+
+
+@pytest.mark.integration
+class ReplicaRouterTests(ReplicaTestCase):
+    """读查询、写操作和事务的路由"""
+
+    def test_reads_go_to_replica(self):
+        self.create_user("replica")
+        self.assertTrue(User.objects.filter(email="replica@example.com").exists())
+        self.assertFalse(
+            User.objects.using("default").filter(email="replica@example.com").exists()
+        )
+
+    def test_write_pins_reads_to_primary(self):
+        User.objects.create_user(
+            username="writer", email="writer@example.com", password="SecurePass123"
+        )
+        self.assertTrue(User.objects.filter(email="writer@example.com").exists())
+
+        with routers.primary_until(0.0):
+            self.assertFalse(User.objects.filter(email="writer@example.com").exists())
+
+    def test_instance_from_replica_saved_to_primary(self):
+        self.create_user("default")
+        self.create_user("replica")
+        user = User.objects.get(email="replica@example.com")
+        self.assertEqual(user._state.db, "replica")
+
+        user.first_name = "primary"
+        user.save()
+        self.assertEqual(
+            User.objects.using("default").get(pk=user.pk).first_name, "primary"
+        )
+        self.assertEqual(User.objects.using("replica").get(pk=user.pk).first_name, "")
+
+    def test_reads_in_transaction_use_primary(self):
+        self.create_user("default")
+        with transaction.atomic():
+            self.assertTrue(User.objects.filter(email="replica@example.com").exists())
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.create_user("default")
+        with mock.patch.object(routers, "measure_lag", return_value=60.0):
+            self.assertTrue(User.objects.filter(email="replica@example.com").exists())
+        self.assertEqual(routers.REPLICA_LAG.labels(alias="replica").get(), 60.0)
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        self.create_user("default")
+        with mock.patch.object(routers, "measure_lag", return_value=float("inf")):
+            self.assertTrue(User.objects.filter(email="replica@example.com").exists())
+
+    def test_read_or_primary_retries_on_primary(self):
+        user = self.create_user("default")
+        before = routers.PRIMARY_FALLBACKS.get()
+        self.assertEqual(find_user_by_email_or_username("replica@example.com"), user)
+        self.assertEqual(routers.PRIMARY_FALLBACKS.get(), before + 1)
+
+        # 副本上有结果时只查询一次
+        self.create_user("replica")
+        find_user_by_email_or_username("replica@example.com")
+        self.assertEqual(routers.PRIMARY_FALLBACKS.get(), before + 1)
+
+
+@pytest.mark.integration
+class ReadYourWritesAPITests(ReplicaTestCase):
+    """注册后立即验证邮箱、使用JWT（副本尚未同步新用户）"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def register(self, client):
+        store_captcha("replica-captcha", "AB12")
+        return client.post(
+            "/api/auth/register/",
+            data=json.dumps(
+                {
+                    "email": "new@example.com",
+                    "password": "SecurePass123",
+                    "password_confirm": "SecurePass123",
+                    "captcha_id": "replica-captcha",
+                    "captcha_answer": "AB12",
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_register_sets_sticky_cookie(self):
+        client = Client()
+        response = self.register(client)
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[routers.DEFAULT_COOKIE_NAME]
+        self.assertTrue(cookie["httponly"])
+        self.assertFalse(User.objects.using("replica").exists())
+
+        # 同一客户端的后续请求读取主库：邮箱已被注册
+        response = self.register(client)
+        self.assertEqual(response.json()["code"], "EMAIL_EXISTS")
+
+    def test_duplicate_email_missed_by_replica(self):
+        # 新客户端的唯一性检查读取副本，由数据库唯一约束兜底
+        self.assertEqual(self.register(Client()).status_code, 201)
+        response = self.register(Client())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "EMAIL_EXISTS")
+
+    @override_settings(TOKEN_STORE={"BACKEND": "db"})
+    def test_new_user_jwt_and_verification_without_cookie(self):
+        token = self.register(Client()).json()["token"]
+
+        # JWT用户查询和验证令牌查询在副本上查不到，回到主库重查
+        response = Client().post(
+            "/api/auth/email/verify/send/",
+            data=json.dumps({"email": "new@example.com"}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        verification = EmailVerification.objects.using("default").get(
+            email="new@example.com"
+        )
+        response = Client().get(f"/api/auth/email/verify/{verification.token}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            User.objects.using("default").get(email="new@example.com").is_email_verified
+        )
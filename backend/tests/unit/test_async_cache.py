@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-006-internal-common
+"""异步缓存客户端单元测试"""
+
+import asyncio
+from unittest import mock
+
+import pytest
+from apps.common import async_cache
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+REDIS_CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/1",
+        "KEY_PREFIX": "bravo",
+        "TIMEOUT": 300,
+    }
+}
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "async-cache-tests",
+    }
+}
+
+
+class FakeRedis:
+    """记录调用的redis.asyncio客户端"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.calls.append(("set", key, px))
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        self.calls.append(("delete", *keys))
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+@pytest.mark.unit
+class GetAsyncCacheTests(SimpleTestCase):
+    """按缓存后端与ASYNC_CACHE选择实现"""
+
+    @override_settings(CACHES=REDIS_CACHES, ASYNC_CACHE={"NATIVE": True})
+    def test_native_redis(self):
+        cache = async_cache.get_async_cache()
+        self.assertIsInstance(cache, async_cache.RedisAsyncCache)
+        self.assertIs(async_cache.get_async_cache(), cache)
+
+    @override_settings(CACHES=REDIS_CACHES, ASYNC_CACHE={"NATIVE": False})
+    def test_wsgi_mode_uses_django_cache(self):
+        cache = async_cache.get_async_cache()
+        self.assertNotIsInstance(cache, async_cache.RedisAsyncCache)
+
+    @override_settings(CACHES=LOCMEM_CACHES, ASYNC_CACHE={"NATIVE": True})
+    def test_non_redis_backend_uses_django_cache(self):
+        cache = async_cache.get_async_cache()
+        self.assertNotIsInstance(cache, async_cache.RedisAsyncCache)
+        asyncio.run(cache.set("key", {"value": 1}))
+        self.assertEqual(caches["default"].get("key"), {"value": 1})
+        self.assertEqual(asyncio.run(cache.get("key")), {"value": 1})
+        asyncio.run(cache.delete("key"))
+        self.assertIsNone(caches["default"].get("key"))
+
+
+@pytest.mark.unit
+@override_settings(CACHES=REDIS_CACHES)
+class RedisAsyncCacheTests(SimpleTestCase):
+    """与django-redis共用键和序列化格式"""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.cache = async_cache.RedisAsyncCache()
+        patcher = mock.patch.object(self.cache, "_connect", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_key_and_serialization_match_django_redis(self):
+        asyncio.run(self.cache.set("captcha", "AB12"))
+        codec = caches["default"].client
+        self.assertEqual(self.redis.calls, [("set", "bravo:1:captcha", 300000)])
+        self.assertEqual(codec.decode(self.redis.data["bravo:1:captcha"]), "AB12")
+        self.assertEqual(asyncio.run(self.cache.get("captcha")), "AB12")
+        self.assertEqual(asyncio.run(self.cache.get("missing", "default")), "default")
+
+    def test_timeouts(self):
+        asyncio.run(self.cache.set("forever", 1, timeout=None))
+        asyncio.run(self.cache.set("expired", 1, timeout=0))
+        self.assertEqual(
+            self.redis.calls,
+            [("set", "bravo:1:forever", None), ("delete", "bravo:1:expired")],
+        )
+
+    def test_delete(self):
+        asyncio.run(self.cache.set("a", 1))
+        self.assertTrue(asyncio.run(self.cache.delete("a")))
+        self.assertFalse(asyncio.run(self.cache.delete("a")))
+        asyncio.run(self.cache.delete_many(["a", "b"]))
+        asyncio.run(self.cache.delete_many([]))
+        self.assertEqual(self.redis.calls[-1], ("delete", "bravo:1:a", "bravo:1:b"))
+
+    def test_client_per_event_loop(self):
+        async def client():
+            return self.cache.client
+
+        first = asyncio.run(client())
+        self.assertIs(first, self.redis)
+        asyncio.run(client())
+        self.assertEqual(self.cache._connect.call_count, 2)
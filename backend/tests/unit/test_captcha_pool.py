@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""验证码预渲染池单元测试"""
+
+import base64
+import uuid
+
+import pytest
+from apps.users.captcha_pool import CaptchaPool, next_captcha
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.mark.unit
+class CaptchaPoolTests(TestCase):
+    """验证码池行为测试"""
+
+    def test_fill_renders_up_to_capacity(self):
+        """测试fill将池填充到容量上限"""
+        pool = CaptchaPool(name="test-fill", size=5, low_watermark=2)
+        rendered = pool.fill()
+
+        self.assertEqual(rendered, 5)
+        self.assertEqual(len(pool), 5)
+
+    def test_pop_returns_answer_and_png(self):
+        """测试pop返回答案和PNG图片"""
+        pool = CaptchaPool(name="test-pop", size=3, low_watermark=1)
+        pool.fill()
+
+        answer, image_bytes = pool.pop()
+
+        self.assertEqual(len(answer), 4)
+        self.assertTrue(answer.isalnum())
+        self.assertTrue(image_bytes.startswith(PNG_SIGNATURE))
+        self.assertEqual(pool.stats()["hits"], 1)
+
+    def test_pop_from_empty_pool_renders_synchronously(self):
+        """测试池为空时同步渲染并记录未命中"""
+        pool = CaptchaPool(name="test-miss", size=2, low_watermark=1)
+
+        answer, image_bytes = pool.pop()
+        pool.wait_for_refill(timeout=10)
+
+        self.assertEqual(len(answer), 4)
+        self.assertTrue(image_bytes.startswith(PNG_SIGNATURE))
+        self.assertEqual(pool.stats()["misses"], 1)
+
+    def test_low_watermark_triggers_background_refill(self):
+        """测试低于低水位时后台补充到容量上限"""
+        pool = CaptchaPool(name="test-refill", size=4, low_watermark=3)
+        pool.fill()
+
+        pool.pop()
+        pool.pop()
+        pool.wait_for_refill(timeout=10)
+
+        self.assertEqual(len(pool), 4)
+        self.assertGreaterEqual(pool.stats()["refills"], 1)
+
+
+@pytest.mark.unit
+class CaptchaPoolViewTests(TestCase):
+    """启用验证码池后的API测试"""
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    @override_settings(CAPTCHA_POOL={"ENABLED": True, "SIZE": 3, "LOW_WATERMARK": 1})
+    def test_next_captcha_uses_pool_when_enabled(self):
+        """测试启用时next_captcha返回与generate_captcha一致的格式"""
+        captcha_id, captcha_image, answer = next_captcha()
+
+        uuid.UUID(captcha_id)
+        self.assertTrue(captcha_image.startswith("data:image/png;base64,"))
+        decoded = base64.b64decode(captcha_image.split(",", 1)[1])
+        self.assertTrue(decoded.startswith(PNG_SIGNATURE))
+        self.assertEqual(len(answer), 4)
+
+    @override_settings(CAPTCHA_POOL={"ENABLED": True, "SIZE": 3, "LOW_WATERMARK": 1})
+    def test_captcha_api_stores_pooled_answer(self):
+        """测试验证码API从池中取图并存储答案"""
+        response = self.client.get("/api/auth/captcha/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIsNotNone(cache.get(f"captcha:{data['captcha_id']}"))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""验证码渲染器单元测试"""
+
+import io
+
+import pytest
+from apps.users.captcha_renderer import (
+    GLYPH_ROTATIONS,
+    CaptchaRenderer,
+    get_captcha_renderer,
+    load_captcha_font,
+)
+from apps.users.utils import CAPTCHA_CHARACTERS
+from django.test import TestCase
+from PIL import Image
+
+
+@pytest.mark.unit
+class CaptchaRendererTests(TestCase):
+    """字形缓存渲染器测试"""
+
+    def test_font_loaded_once_per_process(self):
+        """测试字体只加载一次"""
+        self.assertIs(load_captcha_font(), load_captcha_font())
+
+    def test_renderer_is_process_singleton(self):
+        """测试渲染器为进程级单例"""
+        self.assertIs(get_captcha_renderer(), get_captcha_renderer())
+
+    def test_sprites_cover_charset_and_rotations(self):
+        """测试每个字符都按全部旋转角度预栅格化"""
+        renderer = get_captcha_renderer()
+
+        self.assertEqual(set(renderer.sprites), set(CAPTCHA_CHARACTERS))
+        for sprites in renderer.sprites.values():
+            self.assertEqual(len(sprites), len(GLYPH_ROTATIONS))
+            self.assertTrue(all(sprite.mode == "L" for sprite in sprites))
+
+    def test_render_png_produces_captcha_sized_image(self):
+        """测试渲染结果为120x40的PNG图片"""
+        image_bytes = get_captcha_renderer().render_png("A1B2")
+
+        image = Image.open(io.BytesIO(image_bytes))
+        self.assertEqual(image.format, "PNG")
+        self.assertEqual(image.size, (120, 40))
+
+    def test_render_draws_glyphs_on_white_background(self):
+        """测试渲染结果包含深色字形像素"""
+        renderer = CaptchaRenderer("AB")
+        image = renderer.render_image("ABBA")
+
+        darkest = min(sum(pixel) for pixel in image.getdata())
+        self.assertLess(darkest, 3 * 100)
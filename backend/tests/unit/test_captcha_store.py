@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""验证码存储后端单元测试
+
+重点验证"比较并删除"的原子性：并发验证同一验证码时只能有一个请求成功。
+"""
+
+import os
+import threading
+import uuid
+
+import pytest
+from apps.users.captcha_store import (
+    CacheCaptchaStore,
+    RedisCaptchaStore,
+    get_captcha_store,
+)
+from apps.users.utils import store_captcha, verify_captcha
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1")
+CACHES_REDIS = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+    }
+}
+
+
+def redis_available():
+    """检查本地Redis是否可用"""
+    try:
+        import redis
+
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.2).ping()
+    except Exception:
+        return False
+
+
+def verify_concurrently(captcha_id, answer, workers=16):
+    """多个线程同时验证同一验证码，返回成功次数"""
+    barrier = threading.Barrier(workers)
+    results = []
+
+    def attempt():
+        barrier.wait()
+        results.append(verify_captcha(captcha_id, answer))
+
+    threads = [threading.Thread(target=attempt) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.count(True)
+
+
+@pytest.mark.unit
+class CacheCaptchaStoreTests(TestCase):
+    """通用缓存验证码存储测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.captcha_id = str(uuid.uuid4())
+
+    def test_locmem_uses_cache_store(self):
+        """测试非Redis缓存后端自动选择CacheCaptchaStore"""
+        self.assertIs(type(get_captcha_store()), CacheCaptchaStore)
+
+    @override_settings(CACHES=CACHES_REDIS)
+    def test_django_redis_uses_redis_store(self):
+        """测试django-redis缓存后端自动选择RedisCaptchaStore"""
+        self.assertIs(type(get_captcha_store()), RedisCaptchaStore)
+
+    def test_verify_is_case_insensitive_and_single_use(self):
+        """测试验证不区分大小写且只能使用一次"""
+        store_captcha(self.captcha_id, "AB12")
+
+        self.assertTrue(verify_captcha(self.captcha_id, "ab12"))
+        self.assertFalse(verify_captcha(self.captcha_id, "AB12"))
+
+    def test_wrong_answer_keeps_captcha(self):
+        """测试答案错误时验证码保留"""
+        store_captcha(self.captcha_id, "AB12")
+
+        self.assertFalse(verify_captcha(self.captcha_id, "ZZZZ"))
+        self.assertTrue(verify_captcha(self.captcha_id, "AB12"))
+
+    def test_discard_removes_answer_and_image(self):
+        """测试discard同时删除答案和图片"""
+        store_captcha(self.captcha_id, "AB12")
+        cache.set(f"captcha_image:{self.captcha_id}", b"png")
+
+        get_captcha_store().discard(self.captcha_id)
+
+        self.assertIsNone(cache.get(f"captcha:{self.captcha_id}"))
+        self.assertIsNone(cache.get(f"captcha_image:{self.captcha_id}"))
+
+    def test_concurrent_verification_succeeds_once(self):
+        """测试并发验证同一验证码只有一个请求成功"""
+        for _ in range(20):
+            captcha_id = str(uuid.uuid4())
+            store_captcha(captcha_id, "AB12")
+
+            self.assertEqual(verify_concurrently(captcha_id, "AB12"), 1)
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not redis_available(), reason="本地Redis不可用")
+@override_settings(CACHES=CACHES_REDIS)
+class RedisCaptchaStoreTests(TestCase):
+    """Redis验证码存储测试（需要本地Redis）"""
+
+    def setUp(self):
+        self.captcha_id = str(uuid.uuid4())
+
+    def tearDown(self):
+        get_captcha_store().discard(self.captcha_id)
+
+    def test_verify_is_case_insensitive_and_single_use(self):
+        """测试Lua脚本验证不区分大小写且只能使用一次"""
+        store_captcha(self.captcha_id, "AB12")
+
+        self.assertTrue(verify_captcha(self.captcha_id, "ab12"))
+        self.assertFalse(verify_captcha(self.captcha_id, "AB12"))
+
+    def test_wrong_answer_keeps_captcha(self):
+        """测试答案错误时验证码保留"""
+        store_captcha(self.captcha_id, "AB12")
+
+        self.assertFalse(verify_captcha(self.captcha_id, "ZZZZ"))
+        self.assertEqual(cache.get(f"captcha:{self.captcha_id}"), "AB12")
+
+    def test_concurrent_verification_succeeds_once(self):
+        """测试并发验证同一验证码只有一个请求成功"""
+        store_captcha(self.captcha_id, "AB12")
+
+        self.assertEqual(verify_concurrently(self.captcha_id, "AB12"), 1)
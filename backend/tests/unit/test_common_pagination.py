@@ -2,9 +2,18 @@
 # REQ-ID: REQ-2025-006-internal-common
 """Common分页模块单元测试"""
 
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
 import pytest
+from apps.common.pagination import KeysetPagination, decode_cursor, encode_cursor
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
 User = get_user_model()
 
@@ -135,3 +144,109 @@ class StandardResultsSetPaginationTests(TestCase):
         self.assertEqual(get_page_range(1, 5), [1, 2, 3])
         self.assertEqual(get_page_range(3, 5), [1, 2, 3, 4, 5])
         self.assertEqual(get_page_range(5, 5), [3, 4, 5])
+
+
+@pytest.mark.unit
+class KeysetPaginationTests(TestCase):
+    """键集分页测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # 每3个用户注册时间相同，验证按id区分同一时刻的行
+        now = timezone.now()
+        User.objects.bulk_create(
+            User(
+                username=f"keyset{i}",
+                email=f"keyset{i}@example.com",
+                date_joined=now - timedelta(seconds=i // 3),
+            )
+            for i in range(25)
+        )
+        cls.expected = list(
+            User.objects.order_by("-date_joined", "id").values_list("id", flat=True)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def paginate(self, url="/users/", queryset=None):
+        paginator = KeysetPagination()
+        request = Request(self.factory.get(url))
+        page = paginator.paginate_queryset(
+            queryset if queryset is not None else User.objects.all(), request
+        )
+        data = paginator.get_paginated_response([user.id for user in page]).data
+        return data
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(["2025-01-01T00:00:00+00:00", 7], reverse=True)
+        self.assertEqual(
+            decode_cursor(cursor), (["2025-01-01T00:00:00+00:00", 7], True)
+        )
+        for invalid in ("not-base64!", encode_cursor([1]).replace("e", "x"), ""):
+            with self.subTest(cursor=invalid):
+                with self.assertRaises(ValueError):
+                    decode_cursor(invalid)
+
+    def test_ordering_appends_primary_key(self):
+        paginator = KeysetPagination()
+        self.assertEqual(
+            paginator.get_ordering(User.objects.all(), None), ["-date_joined", "pk"]
+        )
+        paginator.ordering = ["-id"]
+        self.assertEqual(paginator.get_ordering(User.objects.all(), None), ["-id"])
+
+    def test_walk_forward_and_backward(self):
+        seen = []
+        pages = []
+        url = "/users/?page_size=10"
+        while url:
+            with self.assertNumQueries(1):
+                data = self.paginate(url)
+            pages.append(data)
+            seen.extend(data["results"])
+            url = data["next"]
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page["results"]) for page in pages], [10, 10, 5])
+        self.assertIsNone(pages[0]["previous"])
+        self.assertNotIn("count", pages[0])
+
+        previous = self.paginate(pages[2]["previous"])
+        self.assertEqual(previous["results"], self.expected[10:20])
+        first = self.paginate(previous["previous"])
+        self.assertEqual(first["results"], self.expected[:10])
+        self.assertIsNone(first["previous"])
+        self.assertIsNotNone(first["next"])
+
+    def test_cursor_keeps_other_query_params(self):
+        data = self.paginate("/users/?page_size=5&search=keyset")
+        query = parse_qs(urlparse(data["next"]).query)
+        self.assertEqual(query["page_size"], ["5"])
+        self.assertEqual(query["search"], ["keyset"])
+
+    def test_page_size_limits(self):
+        self.assertEqual(len(self.paginate("/users/?page_size=0")["results"]), 20)
+        self.assertEqual(len(self.paginate("/users/?page_size=abc")["results"]), 20)
+        paginator = KeysetPagination()
+        request = Request(self.factory.get("/users/?page_size=1000"))
+        self.assertEqual(paginator.get_page_size(request), 100)
+
+    def test_invalid_cursor(self):
+        for cursor in ("invalid", encode_cursor(["not-a-date", 1]), encode_cursor([1])):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(NotFound):
+                    self.paginate(f"/users/?cursor={cursor}")
+
+    def test_approximate_count_cached(self):
+        queryset = User.objects.filter(username__startswith="keyset")
+        with self.assertNumQueries(2):
+            data = self.paginate("/users/?count=1", queryset)
+        self.assertEqual(data["count"], 25)
+
+        User.objects.create_user(username="keyset-new", email="new@example.com")
+        with self.assertNumQueries(1):
+            data = self.paginate("/users/?count=true", queryset)
+        # 缓存期内返回缓存的总数
+        self.assertEqual(data["count"], 25)
+        self.assertEqual(self.paginate("/users/?count=1", queryset.none())["count"], 0)
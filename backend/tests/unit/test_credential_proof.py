@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""登录凭证证明单元测试
+
+预验证成功后签发一次性凭证证明，登录时携带证明可跳过重复的密码哈希校验。
+"""
+
+import uuid
+from unittest import mock
+
+import pytest
+from apps.users.utils import store_captcha
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+User = get_user_model()
+
+
+@pytest.mark.unit
+class CredentialProofTests(TestCase):
+    """预验证 → 登录流程测试"""
+
+    def setUp(self):
+        self.client = Client(HTTP_USER_AGENT="pytest-browser")
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="proofuser",
+            email="proof@example.com",
+            password="SecurePass123",
+            is_email_verified=True,
+        )
+
+    def preview(self, password="SecurePass123"):
+        """调用预验证API，返回(验证码ID, 响应数据)"""
+        captcha_id = str(uuid.uuid4())
+        store_captcha(captcha_id, "AB12")
+        response = self.client.post(
+            "/api/auth/preview/",
+            {
+                "email": "proof@example.com",
+                "password": password,
+                "captcha_id": captcha_id,
+                "captcha_answer": "AB12",
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return captcha_id, response.json()
+
+    def login(self, captcha_id, proof, password="SecurePass123", client=None):
+        return (client or self.client).post(
+            "/api/auth/login/",
+            {
+                "email": "proof@example.com",
+                "password": password,
+                "captcha_id": captcha_id,
+                "captcha_answer": "AB12",
+                "credential_proof": proof,
+            },
+            content_type="application/json",
+        )
+
+    def test_preview_issues_proof(self):
+        """测试预验证成功时返回凭证证明"""
+        _, data = self.preview()
+
+        self.assertTrue(data["valid"])
+        self.assertTrue(data["credential_proof"])
+        self.assertEqual(data["credential_proof_expires_in"], 60)
+
+    def test_failed_preview_issues_no_proof(self):
+        """测试预验证失败时不返回凭证证明"""
+        _, data = self.preview(password="WrongPass123")
+
+        self.assertFalse(data["valid"])
+        self.assertNotIn("credential_proof", data)
+
+    def test_login_with_proof_skips_password_hashing(self):
+        """测试携带证明登录时不再计算密码哈希，且可复用预验证的验证码"""
+        captcha_id, data = self.preview()
+
+        with mock.patch("apps.users.serializers.check_user_password") as check:
+            response = self.login(captcha_id, data["credential_proof"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("token", response.json())
+        check.assert_not_called()
+
+    def test_proof_is_single_use(self):
+        """测试证明只能使用一次"""
+        captcha_id, data = self.preview()
+        self.login(captcha_id, data["credential_proof"])
+
+        response = self.login(captcha_id, data["credential_proof"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
+
+    def test_changed_password_input_rejected_as_captcha_error(self):
+        """测试登录时输入的密码与预验证不一致时视为验证码错误，不校验密码"""
+        captcha_id, data = self.preview()
+
+        with mock.patch("apps.users.serializers.check_user_password") as check:
+            response = self.login(
+                captcha_id, data["credential_proof"], password="WrongPass123"
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
+        check.assert_not_called()
+
+    def test_proof_not_usable_for_other_account(self):
+        """测试用户A的证明不能用于用户B的登录（不校验B的密码）"""
+        User.objects.create_user(
+            username="otheruser",
+            email="other@example.com",
+            password="OtherPass123",
+            is_email_verified=True,
+        )
+        captcha_id, data = self.preview()
+
+        with mock.patch("apps.users.serializers.check_user_password") as check:
+            response = self.client.post(
+                "/api/auth/login/",
+                {
+                    "email": "other@example.com",
+                    "password": "OtherPass123",
+                    "captcha_id": captcha_id,
+                    "captcha_answer": "AB12",
+                    "credential_proof": data["credential_proof"],
+                },
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
+        check.assert_not_called()
+
+    def test_password_change_invalidates_proof(self):
+        """测试预验证后修改密码，证明失效"""
+        captcha_id, data = self.preview()
+        self.user.set_password("AnotherPass456")
+        self.user.save()
+
+        response = self.login(captcha_id, data["credential_proof"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
+
+    def test_proof_bound_to_client(self):
+        """测试其他客户端无法使用证明"""
+        captcha_id, data = self.preview()
+        other_client = Client(HTTP_USER_AGENT="another-browser")
+
+        response = self.login(captcha_id, data["credential_proof"], client=other_client)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
+
+    def test_proof_bound_to_captcha(self):
+        """测试证明与预验证时的验证码绑定"""
+        _, data = self.preview()
+
+        response = self.login(str(uuid.uuid4()), data["credential_proof"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
+
+    def test_new_proof_evicts_previous(self):
+        """测试同一用户签发新证明后旧证明失效"""
+        first_captcha_id, first = self.preview()
+        self.preview()
+
+        response = self.login(first_captcha_id, first["credential_proof"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "INVALID_CAPTCHA")
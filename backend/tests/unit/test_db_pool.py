@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-006-internal-common
+"""数据库连接池单元测试"""
+
+import threading
+from unittest import mock
+
+import pytest
+from apps.common.db import pool as pool_module
+from apps.common.db.pool import POOL_CLOSED, POOL_WAIT, ConnectionPool, PoolTimeout
+from django.test import SimpleTestCase
+
+
+class FakeConnection:
+    """记录状态的假连接"""
+
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+        self.pings = 0
+
+    def ping(self):
+        self.pings += 1
+        return self.healthy
+
+
+@pytest.mark.unit
+class ConnectionPoolTests(SimpleTestCase):
+    """连接复用、容量、回收和健康检查"""
+
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch.object(
+            pool_module.time, "monotonic", side_effect=lambda: self.clock
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.created = []
+
+    def make_pool(self, **config):
+        config = dict(
+            {
+                "MIN_SIZE": 1,
+                "MAX_SIZE": 2,
+                "MAX_LIFETIME": 100,
+                "MAX_IDLE": 50,
+                "TIMEOUT": 0,
+                "CHECK_IDLE": 1,
+            },
+            **config,
+        )
+
+        def connect():
+            connection = FakeConnection()
+            self.created.append(connection)
+            return connection
+
+        def close(connection):
+            connection.closed = True
+
+        return ConnectionPool(
+            "test", connect, FakeConnection.ping, lambda c: True, close, config
+        )
+
+    def test_returned_connection_reused(self):
+        pool = self.make_pool()
+        first = pool.checkout()
+        pool.checkin(first)
+        self.assertIs(pool.checkout(), first)
+        self.assertEqual(len(self.created), 1)
+        # 刚归还的连接不做健康检查
+        self.assertEqual(first.pings, 0)
+
+    def test_max_size_timeout(self):
+        pool = self.make_pool()
+        pool.checkout()
+        pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        self.assertEqual(pool.stats(), {"size": 2, "idle": 0, "in_use": 2})
+
+    def test_waiter_gets_returned_connection(self):
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=5)
+        connection = pool.checkout()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+        waiter.start()
+        pool.checkin(connection)
+        waiter.join(5)
+        self.assertEqual(result, [connection])
+
+    def test_max_lifetime_recycles(self):
+        pool = self.make_pool()
+        first = pool.checkout()
+        pool.checkin(first)
+        self.clock += 100
+        second = pool.checkout()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+    def test_idle_connection_health_checked(self):
+        pool = self.make_pool()
+        first = pool.checkout()
+        pool.checkin(first)
+        self.clock += 2
+        first.healthy = False
+        before = POOL_CLOSED.labels(alias="test", reason="unhealthy").get()
+
+        second = pool.checkout()
+        self.assertIsNot(second, first)
+        self.assertEqual(first.pings, 1)
+        self.assertTrue(first.closed)
+        self.assertEqual(
+            POOL_CLOSED.labels(alias="test", reason="unhealthy").get(), before + 1
+        )
+
+    def test_verify_forces_health_check(self):
+        pool = self.make_pool()
+        first = pool.checkout()
+        pool.checkin(first, verify=True)
+        self.assertIs(pool.checkout(), first)
+        self.assertEqual(first.pings, 1)
+
+    def test_not_reusable_closed(self):
+        pool = self.make_pool()
+        first = pool.checkout()
+        pool.checkin(first, reusable=False)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_idle_connections_above_min_size_pruned(self):
+        pool = self.make_pool()
+        first = pool.checkout()
+        second = pool.checkout()
+        pool.checkin(first)
+        self.clock += 60
+        pool.checkin(second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats(), {"size": 1, "idle": 1, "in_use": 0})
+
+    def test_wait_observed(self):
+        pool = self.make_pool()
+        histogram = POOL_WAIT.labels(alias="test")
+        before = histogram._value()["count"]
+        pool.checkin(pool.checkout())
+        pool.checkout()
+        self.assertEqual(histogram._value()["count"], before + 2)
+
+
+@pytest.mark.unit
+class GetPoolTests(SimpleTestCase):
+    """进程内连接池注册表"""
+
+    def tearDown(self):
+        pool_module.close_pools()
+
+    def test_pool_reused_within_process(self):
+        factory = mock.Mock(side_effect=lambda: mock.Mock())
+        first = pool_module.get_pool(("default",), factory)
+        self.assertIs(pool_module.get_pool(("default",), factory), first)
+        self.assertEqual(factory.call_count, 1)
+
+    def test_new_pool_after_fork(self):
+        factory = mock.Mock(side_effect=lambda: mock.Mock())
+        first = pool_module.get_pool(("default",), factory)
+        with mock.patch.object(pool_module.os, "getpid", return_value=-1):
+            child = pool_module.get_pool(("default",), factory)
+        self.assertIsNot(child, first)
+        self.assertIn(
+            first, [p for pools in pool_module._inherited for p in pools.values()]
+        )
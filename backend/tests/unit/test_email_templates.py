@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮件模板编译缓存单元测试"""
+
+import pytest
+from apps.users.email_templates import (
+    CompiledEmailTemplate,
+    clear_template_cache,
+    get_compiled_template,
+    render_email_template,
+)
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.utils.safestring import mark_safe
+
+EMAIL_TEMPLATES = {
+    "users/emails/email_verification.html": "verification_url",
+    "users/emails/email_verification.txt": "verification_url",
+    "users/emails/password_reset.html": "reset_url",
+    "users/emails/password_reset.txt": "reset_url",
+}
+
+
+@pytest.mark.unit
+class CompiledEmailTemplateTests(TestCase):
+    """编译渲染与Django渲染一致性测试"""
+
+    def setUp(self):
+        clear_template_cache()
+
+    def test_email_templates_are_compiled(self):
+        """测试全部邮件模板都能编译为静态片段 + 变量槽位"""
+        for name in EMAIL_TEMPLATES:
+            with self.subTest(name=name):
+                self.assertTrue(get_compiled_template(name).compiled)
+
+    def test_matches_render_to_string(self):
+        """测试渲染结果与render_to_string一致（含需要转义的字符）"""
+        urls = [
+            "http://localhost:8000/api/auth/email/verify/abc/",
+            "http://localhost:8000/api/auth/password/reset/?token=a&b=<c>\"'",
+            mark_safe("http://localhost:8000/?a=1&b=2"),
+        ]
+        for name, variable in EMAIL_TEMPLATES.items():
+            for url in urls:
+                with self.subTest(name=name, url=url):
+                    context = {variable: url}
+                    self.assertEqual(
+                        render_email_template(name, context),
+                        render_to_string(name, context),
+                    )
+
+    def test_compiled_once_per_process(self):
+        """测试同一模板只编译一次"""
+        name = "users/emails/email_verification.txt"
+        self.assertIs(get_compiled_template(name), get_compiled_template(name))
+
+    def test_missing_or_non_string_value_falls_back(self):
+        """测试缺少变量或变量不是字符串时回退到Django渲染"""
+        name = "users/emails/email_verification.txt"
+        for context in ({}, {"verification_url": 42}):
+            with self.subTest(context=context):
+                self.assertEqual(
+                    render_email_template(name, context),
+                    render_to_string(name, context),
+                )
+
+    def test_templates_with_tags_or_filters_are_not_compiled(self):
+        """测试包含标签、过滤器或多层变量的模板不编译，仍按Django渲染"""
+        for source in (
+            "{{ url|upper }}",
+            "{% if url %}{{ url }}{% endif %}",
+            "{{ a.b }}",
+        ):
+            with self.subTest(source=source):
+                template = CompiledEmailTemplate(Template(source))
+                self.assertFalse(template.compiled)
+                self.assertEqual(
+                    template.render({"url": "x&y"}),
+                    Template(source).render(Context({"url": "x&y"})),
+                )
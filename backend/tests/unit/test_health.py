@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-006-internal-common
+"""依赖健康检查单元测试"""
+
+import json
+import threading
+import time
+from unittest import mock
+
+import pytest
+from apps.common import health
+from django.test import Client, TestCase, override_settings
+
+FAKE_CONFIG = {"PROBES": ("db", "broker"), "INTERVAL": 10, "TIMEOUT": 1}
+
+
+@pytest.mark.unit
+@override_settings(HEALTH_CHECKS=FAKE_CONFIG)
+class HealthMonitorTests(TestCase):
+    """探测结果缓存与后台刷新"""
+
+    def setUp(self):
+        self.calls = {"db": 0, "broker": 0}
+        self.failing = set()
+        self.probes = {
+            "db": (self.make_probe("db"), True),
+            "broker": (self.make_probe("broker"), False),
+        }
+        patcher = mock.patch.dict(health.PROBES, self.probes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        health.monitor.reset()
+        self.addCleanup(health.monitor.reset)
+        self.client = Client()
+
+    def make_probe(self, name):
+        def probe(config):
+            self.calls[name] += 1
+            if name in self.failing:
+                raise ConnectionError(f"{name} down")
+            return {"name": name}
+
+        return probe
+
+    def test_results_cached_within_interval(self):
+        """间隔内的重复请求不再探测"""
+        for _ in range(5):
+            results = health.monitor.results()
+        self.assertEqual(self.calls, {"db": 1, "broker": 1})
+        self.assertEqual(results["db"]["status"], health.STATUS_OK)
+        self.assertEqual(results["db"]["detail"], {"name": "db"})
+
+    def test_stale_results_refreshed_in_background(self):
+        """结果过期时立即返回旧结果，由后台线程刷新"""
+        health.monitor.results()
+        self.failing.add("db")
+        health.monitor._refreshed_at -= FAKE_CONFIG["INTERVAL"]
+
+        results = health.monitor.results()
+        self.assertEqual(results["db"]["status"], health.STATUS_OK)
+
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if health.monitor.results()["db"]["status"] == health.STATUS_ERROR:
+                break
+            time.sleep(0.01)
+        self.assertEqual(health.monitor.results()["db"]["status"], health.STATUS_ERROR)
+        self.assertEqual(self.calls["db"], 2)
+
+    @override_settings(HEALTH_CHECKS=dict(FAKE_CONFIG, TIMEOUT=0.05))
+    def test_slow_probe_marked_timeout(self):
+        """探测超时记为timeout，不阻塞请求，未结束的探测不重复提交"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        started = []
+
+        def hang(config):
+            started.append(1)
+            release.wait(5)
+            return {}
+
+        health.PROBES["broker"] = (hang, False)
+        start = time.perf_counter()
+        results = health.monitor.results()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(results["broker"]["status"], health.STATUS_TIMEOUT)
+        self.assertEqual(health.overall_status(results), health.DEGRADED)
+
+        health.monitor.refresh()
+        self.assertEqual(len(started), 1)
+
+    def test_probe_duration_observed(self):
+        """探测耗时记入直方图"""
+        histogram = health.PROBE_DURATION.labels(probe="db")
+        before = histogram._value()["count"]
+        health.monitor.results()
+        self.assertEqual(histogram._value()["count"], before + 1)
+        self.assertEqual(health.PROBE_UP.labels(probe="db").get(), 1)
+
+    def test_critical_failure_returns_503(self):
+        """关键依赖失败时就绪检查和/health/返回503"""
+        self.failing.add("db")
+        response = self.client.get("/health/ready/")
+        self.assertEqual(response.status_code, 503)
+        data = json.loads(response.content)
+        self.assertEqual(data["status"], health.UNHEALTHY)
+        self.assertEqual(data["checks"]["db"]["detail"], {"error": "db down"})
+
+        response = self.client.get("/health/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content)["services"]["db"], "unavailable")
+
+    def test_non_critical_failure_degraded(self):
+        """非关键依赖失败时为degraded，仍返回200"""
+        self.failing.add("broker")
+        response = self.client.get("/health/ready/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["status"], health.DEGRADED)
+
+    def test_live_does_not_probe(self):
+        """存活检查不探测依赖"""
+        response = self.client.get("/health/live/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {"status": "alive"})
+        self.assertEqual(self.calls, {"db": 0, "broker": 0})
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-006-internal-common
+"""orjson渲染器与解析器单元测试：输出与DRF的JSONRenderer/JSONParser一致"""
+
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from apps.common import renderers
+from apps.common.parsers import ORJSONParser
+from apps.common.renderers import ORJSONRenderer
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+
+@pytest.mark.unit
+class ORJSONRendererTests(SimpleTestCase):
+    """与JSONRenderer逐字节比较"""
+
+    def assertSameOutput(self, data, accepted_media_type=None):
+        expected = JSONRenderer().render(data, accepted_media_type)
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type), expected)
+
+    def test_login_and_captcha_payloads(self):
+        self.assertSameOutput(
+            {
+                "user": {
+                    "id": str(uuid.uuid4()),
+                    "email": "user@example.com",
+                    "is_email_verified": True,
+                },
+                "token": "a.b.c",
+                "refresh_token": "d.e.f",
+            }
+        )
+        self.assertSameOutput(
+            {
+                "captcha_id": str(uuid.uuid4()),
+                "captcha_image": "data:image/png;base64,iVBORw0KGgo=",
+                "expires_in": 300,
+            }
+        )
+        self.assertSameOutput({"error": "用户不存在或密码错误", "code": "INVALID"})
+
+    def test_special_types(self):
+        self.assertSameOutput(
+            {
+                "aware": datetime.datetime(
+                    2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+                ),
+                "local": timezone.localtime(
+                    datetime.datetime(2025, 1, 2, tzinfo=datetime.timezone.utc)
+                ),
+                "naive": datetime.datetime(2025, 1, 2, 3, 4, 5),
+                "date": datetime.date(2025, 1, 2),
+                "time": datetime.time(3, 4, 5, 123),
+                "duration": datetime.timedelta(minutes=5),
+                "decimal": Decimal("1.50"),
+                "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+                "lazy": gettext_lazy("Enter a valid email address."),
+                "bytes": b"raw",
+                "tuple": (1, 2),
+                "set": {1},
+                1: "int key",
+            }
+        )
+
+    def test_serializer_return_types_and_separators(self):
+        self.assertSameOutput(ReturnDict({"a": [1, 2.5, None]}, serializer=None))
+        self.assertSameOutput({"text": "line\u2028separator\u2029end"})
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_indent_falls_back(self):
+        self.assertSameOutput({"a": 1}, "application/json; indent=4")
+
+    def test_unsupported_data_falls_back(self):
+        self.assertSameOutput({"big": 2**70})
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render(
+                {"time": datetime.time(tzinfo=datetime.timezone.utc)}
+            )
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertSameOutput({"a": Decimal("1.5")})
+
+
+@pytest.mark.unit
+class ORJSONParserTests(SimpleTestCase):
+    """解析结果和错误与JSONParser一致"""
+
+    def parse(self, body, encoding="utf-8"):
+        return ORJSONParser().parse(io.BytesIO(body), None, {"encoding": encoding})
+
+    def test_parse(self):
+        data = {"email": "用户@example.com", "nested": [1, 2.5, None, True]}
+        self.assertEqual(self.parse(json.dumps(data).encode()), data)
+
+    def test_invalid_json(self):
+        with self.assertRaisesMessage(ParseError, "JSON parse error"):
+            self.parse(b"{invalid")
+        with self.assertRaises(ParseError):
+            self.parse(b'{"value": NaN}')
+
+    def test_non_utf8_falls_back(self):
+        body = json.dumps({"name": "é"}, ensure_ascii=False).encode("latin-1")
+        self.assertEqual(self.parse(body, "latin-1"), {"name": "é"})
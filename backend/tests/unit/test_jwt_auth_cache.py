@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""JWT认证缓存单元测试"""
+
+import asyncio
+import hashlib
+import time
+from unittest import mock
+
+import pytest
+from apps.users.authentication import (
+    JWT_AUTH_KEY_PREFIX,
+    CachedJWTAuthentication,
+    VerifiedTokenCache,
+    ainvalidate_user_tokens,
+    invalidate_user_tokens,
+    local_token_cache,
+)
+from apps.users.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+
+def auth_request(token):
+    return Request(RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+
+
+@pytest.mark.unit
+class CachedJWTAuthenticationTests(TestCase):
+    """进程内缓存测试"""
+
+    def setUp(self):
+        local_token_cache.clear()
+        self.addCleanup(local_token_cache.clear)
+        self.user = User.objects.create_user(
+            username="authcache",
+            email="authcache@example.com",
+            password="SecurePass123",
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.auth = CachedJWTAuthentication()
+
+    def test_cache_hit_skips_database(self):
+        """测试缓存命中时不查询数据库"""
+        first_user, _ = self.auth.authenticate(auth_request(self.token))
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate(auth_request(self.token))
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.email, self.user.email)
+        self.assertIsNot(user, first_user)
+        self.assertEqual(token["user_id"], self.user.pk)
+
+    def test_no_header_returns_none(self):
+        """测试未携带认证头时返回None"""
+        self.assertIsNone(self.auth.authenticate(Request(RequestFactory().get("/"))))
+
+    def test_user_save_invalidates(self):
+        """测试用户被禁用后缓存失效"""
+        self.auth.authenticate(auth_request(self.token))
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(auth_request(self.token))
+
+    def test_last_login_update_keeps_cache(self):
+        """测试只更新last_login时不使缓存失效"""
+        self.auth.authenticate(auth_request(self.token))
+        self.user.save(update_fields=["last_login"])
+
+        with self.assertNumQueries(0):
+            self.auth.authenticate(auth_request(self.token))
+
+    def test_user_delete_invalidates(self):
+        """测试用户删除后缓存失效"""
+        self.auth.authenticate(auth_request(self.token))
+        self.user.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(auth_request(self.token))
+
+    def test_entry_expires_with_local_ttl(self):
+        """测试条目在LOCAL_TTL后失效"""
+        self.auth.authenticate(auth_request(self.token))
+
+        later = time.time() + 31
+        with mock.patch("apps.users.authentication.time.time", return_value=later):
+            with self.assertNumQueries(1):
+                self.auth.authenticate(auth_request(self.token))
+
+    @override_settings(JWT_AUTH_CACHE={"LOCAL_TTL": 0})
+    def test_local_cache_can_be_disabled(self):
+        """测试LOCAL_TTL为0时每次都完整校验"""
+        self.auth.authenticate(auth_request(self.token))
+
+        with self.assertNumQueries(1):
+            self.auth.authenticate(auth_request(self.token))
+
+
+@pytest.mark.unit
+@override_settings(JWT_AUTH_CACHE={"LOCAL_TTL": 0, "SHARED": True})
+class SharedJWTAuthenticationCacheTests(TestCase):
+    """二级缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="sharedauth",
+            email="sharedauth@example.com",
+            password="SecurePass123",
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.auth = CachedJWTAuthentication()
+
+    def test_shared_hit_skips_database(self):
+        """测试二级缓存命中时不查询数据库"""
+        self.auth.authenticate(auth_request(self.token))
+
+        with self.assertNumQueries(0):
+            user, token = CachedJWTAuthentication().authenticate(
+                auth_request(self.token)
+            )
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token["user_id"], self.user.pk)
+
+    def test_shared_entry_excludes_password(self):
+        """测试二级缓存条目不包含密码哈希，其余字段按需从数据库加载"""
+        self.auth.authenticate(auth_request(self.token))
+        key = hashlib.sha256(self.token.encode()).hexdigest()
+        fields, values = cache.get(JWT_AUTH_KEY_PREFIX + key)["snapshot"]
+
+        self.assertNotIn("password", fields)
+        self.assertNotIn(self.user.password, values)
+        self.assertEqual(
+            set(fields),
+            {
+                "id",
+                "username",
+                "is_active",
+                "is_staff",
+                "is_superuser",
+                "is_email_verified",
+            },
+        )
+
+        user, _ = CachedJWTAuthentication().authenticate(auth_request(self.token))
+        self.assertLessEqual({"password", "email"}, user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+
+    def test_invalidate_bumps_generation(self):
+        """测试失效后二级缓存条目不再命中"""
+        self.auth.authenticate(auth_request(self.token))
+        invalidate_user_tokens(self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.auth.authenticate(auth_request(self.token))
+
+    @override_settings(
+        JWT_AUTH_CACHE={"LOCAL_TTL": 0, "SHARED": True, "SHARED_TTL": 100}
+    )
+    def test_generation_key_expires(self):
+        """测试代次键设置有效期（长于二级缓存条目的存活时间），不会永久保留"""
+        with mock.patch("apps.users.authentication.cache.set") as cache_set:
+            invalidate_user_tokens(self.user.pk)
+        self.assertEqual(cache_set.call_args.args[2], 130)
+
+        with mock.patch("apps.users.authentication.get_async_cache") as get_cache:
+            get_cache.return_value.set = mock.AsyncMock()
+            asyncio.run(ainvalidate_user_tokens(self.user.pk))
+        self.assertEqual(get_cache.return_value.set.call_args.args[2], 130)
+
+    def test_logout_invalidates(self):
+        """测试登出后二级缓存条目不再命中"""
+        self.auth.authenticate(auth_request(self.token))
+
+        with override_settings(
+            REST_FRAMEWORK={
+                "DEFAULT_AUTHENTICATION_CLASSES": [
+                    "apps.users.authentication.CachedJWTAuthentication"
+                ]
+            }
+        ):
+            response = self.client.post(
+                "/api/auth/logout/",
+                {"refresh_token": str(RefreshToken.for_user(self.user))},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1):
+            self.auth.authenticate(auth_request(self.token))
+
+
+@pytest.mark.unit
+class VerifiedTokenCacheTests(TestCase):
+    """进程内LRU测试"""
+
+    def test_evicts_least_recently_used(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        lru = VerifiedTokenCache()
+        expires_at = time.time() + 60
+        lru.set("a", expires_at, 1, None, None, max_entries=2)
+        lru.set("b", expires_at, 2, None, None, max_entries=2)
+        lru.get("a")
+        lru.set("c", expires_at, 3, None, None, max_entries=2)
+
+        self.assertIsNotNone(lru.get("a"))
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(len(lru), 2)
+
+    def test_discard_user(self):
+        """测试按用户删除条目"""
+        lru = VerifiedTokenCache()
+        expires_at = time.time() + 60
+        lru.set("a", expires_at, 1, None, None, max_entries=10)
+        lru.set("b", expires_at, 1, None, None, max_entries=10)
+        lru.set("c", expires_at, 2, None, None, max_entries=10)
+
+        lru.discard_user(1)
+
+        self.assertEqual(len(lru), 1)
+        self.assertIsNotNone(lru.get("c"))
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮件批量发送单元测试"""
+
+from unittest import mock
+
+import pytest
+from apps.users import tasks
+from apps.users.emails import EMAIL_VERIFICATION, PASSWORD_RESET
+from apps.users.mail_queue import (
+    MAIL_QUEUE_LEASE_KEY_PREFIX,
+    MemoryMailQueue,
+    RedisMailQueue,
+    get_mail_queue,
+)
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+
+from tests.unit.test_captcha_store import CACHES_REDIS, redis_available
+
+
+class WorkerKilled(BaseException):
+    """模拟工作进程在发送中途被终止"""
+
+
+class CountingEmailBackend(EmailBackend):
+    """记录连接创建次数，向bad@example.com发送时失败的测试邮件后端"""
+
+    connections = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingEmailBackend.connections += 1
+
+    def send_messages(self, messages):
+        if any("bad@example.com" in message.to for message in messages):
+            raise OSError("recipient refused")
+        if any("killed@example.com" in message.to for message in messages):
+            raise WorkerKilled()
+        return super().send_messages(messages)
+
+
+@pytest.mark.unit
+@override_settings(
+    EMAIL_BACKEND="tests.unit.test_mail_batching.CountingEmailBackend",
+)
+class MailBatchingTests(TestCase):
+    """邮件入队与批量发送测试"""
+
+    def setUp(self):
+        cache.clear()
+        mail.outbox = []
+        CountingEmailBackend.connections = 0
+        get_mail_queue().clear()
+
+    def enqueue(self, *emails, kind=EMAIL_VERIFICATION):
+        """入队邮件但不立即发送（模拟drain任务尚未到期）"""
+        with mock.patch.object(tasks.drain_mail_queue, "apply_async") as apply_async:
+            for index, email in enumerate(emails):
+                tasks.enqueue_mail(kind, index, email, f"token-{index}")
+        return apply_async
+
+    def test_enqueue_schedules_single_drain(self):
+        """测试连续入队只调度一次drain任务，且延迟MAX_WAIT_MS执行"""
+        apply_async = self.enqueue("a@example.com", "b@example.com", "c@example.com")
+
+        apply_async.assert_called_once_with(countdown=0.2)
+        self.assertEqual(get_mail_queue().size(), 3)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(MAIL_BATCHING={"BATCH_SIZE": 2})
+    def test_drain_sends_all_batches_over_one_connection(self):
+        """测试drain分批取出全部邮件，只建立一个连接"""
+        self.enqueue(*[f"user{i}@example.com" for i in range(5)])
+
+        self.assertEqual(tasks.drain_mail_queue(), 5)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingEmailBackend.connections, 1)
+        self.assertEqual(get_mail_queue().size(), 0)
+
+    def test_message_content(self):
+        """测试邮件包含链接，并带有HTML版本"""
+        self.enqueue("reset@example.com", kind=PASSWORD_RESET)
+        tasks.drain_mail_queue()
+
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ["reset@example.com"])
+        self.assertIn("重置", message.subject)
+        self.assertIn("/api/auth/password/reset/?token=token-0", message.body)
+        self.assertEqual(message.alternatives[0][1], "text/html")
+
+    def test_failed_message_retried_individually(self):
+        """测试单封邮件失败只重试该邮件，同批次其他邮件正常发送"""
+        self.enqueue("a@example.com", "bad@example.com", "c@example.com")
+
+        with mock.patch.object(tasks.requeue_mail, "apply_async") as requeue:
+            self.assertEqual(tasks.drain_mail_queue(), 2)
+
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            ["a@example.com", "c@example.com"],
+        )
+        requeue.assert_called_once()
+        retried = requeue.call_args.kwargs["args"][0]
+        self.assertEqual(retried["email"], "bad@example.com")
+        self.assertEqual(retried["attempts"], 1)
+        self.assertLessEqual(requeue.call_args.kwargs["countdown"], 60)
+
+    def test_gives_up_after_max_attempts(self):
+        """测试达到最大尝试次数后不再重试"""
+        with mock.patch.object(tasks.drain_mail_queue, "apply_async"):
+            tasks.enqueue_mail(EMAIL_VERIFICATION, 1, "bad@example.com", "t", 3)
+
+        with mock.patch.object(tasks.requeue_mail, "apply_async") as requeue:
+            with self.assertLogs("apps.users.tasks", level="CRITICAL"):
+                self.assertEqual(tasks.drain_mail_queue(), 0)
+
+        requeue.assert_not_called()
+
+    def test_interrupted_drain_requeues_unhandled_mail(self):
+        """测试drain中途退出时已发送的邮件不再入队，未处理的邮件放回队首"""
+        self.enqueue("a@example.com", "killed@example.com", "c@example.com")
+
+        with mock.patch.object(tasks.drain_mail_queue, "apply_async") as apply_async:
+            with self.assertRaises(WorkerKilled):
+                tasks.drain_mail_queue()
+
+        apply_async.assert_called_once()
+        self.assertEqual([message.to[0] for message in mail.outbox], ["a@example.com"])
+        queue = get_mail_queue()
+        self.assertEqual(
+            [item["email"] for item in queue.reserve_batch("check", 10)],
+            ["killed@example.com", "c@example.com"],
+        )
+
+    def test_process_local_queue_sends_directly_without_eager(self):
+        """测试进程内队列在Celery非同步执行时不入队，直接发送"""
+        with override_settings(CELERY_TASK_ALWAYS_EAGER=False):
+            apply_async = self.enqueue("direct@example.com")
+
+        apply_async.assert_not_called()
+        self.assertEqual(get_mail_queue().size(), 0)
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox], ["direct@example.com"]
+        )
+
+    def test_task_sends_via_queue(self):
+        """测试发送任务（Celery同步执行时）经队列发送邮件"""
+        tasks.send_email_verification.delay(
+            user_id=1, email="eager@example.com", token="abc"
+        )
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("/api/auth/email/verify/abc/", mail.outbox[0].body)
+
+
+@pytest.mark.unit
+class MemoryMailQueueTests(TestCase):
+    """进程内邮件队列测试"""
+
+    def test_reserve_batch_is_fifo_and_bounded(self):
+        """测试按入队顺序取出，且不超过批大小"""
+        queue = MemoryMailQueue()
+        for index in range(3):
+            queue.push({"index": index})
+
+        self.assertEqual(queue.reserve_batch("w", 2), [{"index": 0}, {"index": 1}])
+        self.assertEqual(queue.reserve_batch("w", 2), [{"index": 2}])
+        self.assertEqual(queue.reserve_batch("w", 2), [])
+
+    def test_release_requeues_unacked_items(self):
+        """测试release将未确认的邮件按原顺序放回队首"""
+        queue = MemoryMailQueue()
+        for index in range(4):
+            queue.push({"index": index})
+
+        queue.reserve_batch("w", 3)
+        queue.ack("w", {"index": 0})
+
+        self.assertEqual(queue.release("w"), 2)
+        self.assertEqual(
+            queue.reserve_batch("w", 10), [{"index": 1}, {"index": 2}, {"index": 3}]
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not redis_available(), reason="需要本地Redis")
+@override_settings(CACHES=CACHES_REDIS)
+class RedisMailQueueTests(TestCase):
+    """Redis邮件队列测试"""
+
+    def setUp(self):
+        self.queue = RedisMailQueue()
+        self.queue.clear()
+        self.addCleanup(self.queue.clear)
+        for index in range(4):
+            self.queue.push({"index": index})
+
+    def test_reserved_items_stay_until_acked(self):
+        """测试取出的邮件在确认前保留在处理中列表，release放回未确认的邮件"""
+        self.assertEqual(self.queue.reserve_batch("w", 2), [{"index": 0}, {"index": 1}])
+        self.assertEqual(self.queue.size(), 2)
+        self.queue.ack("w", {"index": 0})
+
+        self.assertEqual(self.queue.release("w"), 1)
+        self.assertEqual(
+            self.queue.reserve_batch("w", 10),
+            [{"index": 1}, {"index": 2}, {"index": 3}],
+        )
+
+    def test_recover_requeues_items_of_expired_owner(self):
+        """测试租约过期（取出者已退出）后recover放回其处理中的邮件"""
+        self.queue.reserve_batch("dead", 2)
+        self.queue.reserve_batch("alive", 1)
+
+        self.assertEqual(self.queue.recover(), 0)
+        self.queue.client.delete(cache.make_key(MAIL_QUEUE_LEASE_KEY_PREFIX + "dead"))
+
+        self.assertEqual(self.queue.recover(), 2)
+        self.assertEqual(
+            self.queue.reserve_batch("w", 10),
+            [{"index": 0}, {"index": 1}, {"index": 3}],
+        )
+
+
+@pytest.mark.unit
+class MailCoalescingTests(TestCase):
+    """同一(用户, 用途)重复提交时只发送最新令牌"""
+
+    def setUp(self):
+        cache.clear()
+        mail.outbox = []
+        get_mail_queue().clear()
+
+    def count(self, result, kind=EMAIL_VERIFICATION):
+        return tasks.MAIL_MESSAGES.labels(kind=kind, result=result).get()
+
+    def test_only_latest_token_sent(self):
+        """测试连续重新发送时只发送最后一个令牌的邮件"""
+        coalesced, sent = self.count("coalesced"), self.count("sent")
+        with mock.patch.object(tasks.drain_mail_queue, "apply_async"):
+            for token in ("first", "second", "third"):
+                tasks.submit_user_mail(EMAIL_VERIFICATION, 1, "a@example.com", token)
+
+        self.assertEqual(tasks.drain_mail_queue(), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("/verify/third/", mail.outbox[0].body)
+        self.assertEqual(self.count("coalesced") - coalesced, 2)
+        self.assertEqual(self.count("sent") - sent, 1)
+
+    def test_superseded_task_exits_without_enqueue(self):
+        """测试执行时已被取代的任务直接退出"""
+        coalesced = self.count("coalesced", PASSWORD_RESET)
+        with mock.patch.object(tasks.send_password_reset_email, "delay"):
+            tasks.submit_user_mail(PASSWORD_RESET, 1, "a@example.com", "new")
+
+        tasks.send_password_reset_email(user_id=1, email="a@example.com", token="old")
+
+        self.assertEqual(get_mail_queue().size(), 0)
+        self.assertEqual(self.count("coalesced", PASSWORD_RESET) - coalesced, 1)
+
+    def test_users_and_purposes_are_independent(self):
+        """测试不同用户、不同用途的邮件互不合并"""
+        with mock.patch.object(tasks.drain_mail_queue, "apply_async"):
+            tasks.submit_user_mail(EMAIL_VERIFICATION, 1, "a@example.com", "a1")
+            tasks.submit_user_mail(EMAIL_VERIFICATION, 2, "b@example.com", "b1")
+            tasks.submit_user_mail(PASSWORD_RESET, 1, "a@example.com", "a2")
+
+        self.assertEqual(tasks.drain_mail_queue(), 3)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""可调参数密码哈希器单元测试"""
+
+import io
+import uuid
+
+import pytest
+from apps.users.hashers import (
+    TunableArgon2PasswordHasher,
+    TunablePBKDF2PasswordHasher,
+    TunableScryptPasswordHasher,
+)
+from apps.users.models import User
+from apps.users.utils import store_captcha
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+# 测试用低成本参数
+FAST_PARAMS = {
+    "argon2": {"time_cost": 1, "memory_cost": 1024, "parallelism": 1},
+    "scrypt": {"work_factor": 2**10, "block_size": 8, "parallelism": 1},
+    "pbkdf2_sha256": {"iterations": 1000},
+}
+
+ARGON2_FIRST = [
+    "apps.users.hashers.TunableArgon2PasswordHasher",
+    "apps.users.hashers.TunablePBKDF2PasswordHasher",
+]
+PBKDF2_FIRST = [
+    "apps.users.hashers.TunablePBKDF2PasswordHasher",
+    "apps.users.hashers.TunableArgon2PasswordHasher",
+]
+
+try:
+    import argon2  # noqa: F401
+
+    HAS_ARGON2 = True
+except ImportError:
+    HAS_ARGON2 = False
+
+
+@pytest.mark.unit
+@override_settings(PASSWORD_HASHER_PARAMS=FAST_PARAMS)
+class TunableHasherTests(TestCase):
+    """哈希器参数读取测试"""
+
+    def test_pbkdf2_reads_iterations(self):
+        """测试PBKDF2迭代次数来自配置"""
+        hasher = TunablePBKDF2PasswordHasher()
+        encoded = hasher.encode("SecurePass123", hasher.salt())
+
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(hasher.verify("SecurePass123", encoded))
+
+    def test_scrypt_reads_params(self):
+        """测试scrypt参数来自配置"""
+        hasher = TunableScryptPasswordHasher()
+        encoded = hasher.encode("SecurePass123", hasher.salt())
+
+        self.assertEqual(hasher.decode(encoded)["work_factor"], 2**10)
+        self.assertTrue(hasher.verify("SecurePass123", encoded))
+
+    @pytest.mark.skipif(not HAS_ARGON2, reason="未安装argon2-cffi")
+    def test_argon2_reads_params(self):
+        """测试Argon2参数来自配置"""
+        hasher = TunableArgon2PasswordHasher()
+        encoded = hasher.encode("SecurePass123", hasher.salt())
+
+        self.assertIn("m=1024,t=1,p=1", encoded)
+        self.assertTrue(hasher.verify("SecurePass123", encoded))
+
+    def test_param_change_requires_update(self):
+        """测试成本参数变化后must_update返回True"""
+        hasher = TunablePBKDF2PasswordHasher()
+        encoded = hasher.encode("SecurePass123", hasher.salt())
+
+        self.assertFalse(hasher.must_update(encoded))
+        with override_settings(
+            PASSWORD_HASHER_PARAMS={"pbkdf2_sha256": {"iterations": 2000}}
+        ):
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_defaults_without_params(self):
+        """测试未配置参数时使用Django默认值"""
+        with override_settings(PASSWORD_HASHER_PARAMS={}):
+            self.assertEqual(
+                TunablePBKDF2PasswordHasher().iterations,
+                PBKDF2PasswordHasher.iterations,
+            )
+
+
+@pytest.mark.unit
+@override_settings(PASSWORD_HASHER_PARAMS=FAST_PARAMS)
+class LoginRehashTests(TestCase):
+    """登录成功后透明升级密码哈希测试"""
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def login(self, email, password):
+        captcha_id = str(uuid.uuid4())
+        store_captcha(captcha_id, "AB12")
+        return self.client.post(
+            "/api/auth/login/",
+            {
+                "email": email,
+                "password": password,
+                "captcha_id": captcha_id,
+                "captcha_answer": "AB12",
+            },
+            content_type="application/json",
+        )
+
+    def create_user(self, encoded):
+        return User.objects.create(
+            username="rehash",
+            email="rehash@example.com",
+            password=encoded,
+            is_email_verified=True,
+        )
+
+    @pytest.mark.skipif(not HAS_ARGON2, reason="未安装argon2-cffi")
+    @override_settings(PASSWORD_HASHERS=ARGON2_FIRST)
+    def test_login_upgrades_to_preferred_algorithm(self):
+        """测试旧算法哈希在登录成功后升级为首选算法"""
+        user = self.create_user(make_password("SecurePass123", hasher="pbkdf2_sha256"))
+
+        response = self.login("rehash@example.com", "SecurePass123")
+
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("argon2$argon2id$"))
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_FIRST)
+    def test_login_upgrades_cost_params(self):
+        """测试成本参数调整后登录成功时按新参数重新哈希"""
+        user = self.create_user(make_password("SecurePass123"))
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+        with override_settings(
+            PASSWORD_HASHER_PARAMS={"pbkdf2_sha256": {"iterations": 2000}}
+        ):
+            response = self.login("rehash@example.com", "SecurePass123")
+
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_FIRST)
+    def test_failed_login_keeps_hash(self):
+        """测试密码错误时不重新哈希"""
+        user = self.create_user(make_password("SecurePass123"))
+        original = user.password
+
+        with override_settings(
+            PASSWORD_HASHER_PARAMS={"pbkdf2_sha256": {"iterations": 2000}}
+        ):
+            self.login("rehash@example.com", "WrongPass123")
+
+        user.refresh_from_db()
+        self.assertEqual(user.password, original)
+
+
+@pytest.mark.unit
+class CalibratePasswordHasherCommandTests(TestCase):
+    """校准命令测试"""
+
+    def test_calibrate_pbkdf2_outputs_env(self):
+        """测试校准命令输出环境变量配置"""
+        out = io.StringIO()
+        call_command(
+            "calibrate_password_hasher",
+            "--algorithm",
+            "pbkdf2_sha256",
+            "--target-ms",
+            "5",
+            "--samples",
+            "1",
+            stdout=out,
+        )
+
+        self.assertIn("PASSWORD_PBKDF2_ITERATIONS=", out.getvalue())
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""密码哈希执行器单元测试"""
+
+import threading
+import uuid
+
+import pytest
+from apps.users.hashing import (
+    PasswordHashingExecutor,
+    PasswordHashingUnavailable,
+    check_user_password,
+    get_hashing_executor,
+    hash_password,
+)
+from apps.users.models import User
+from apps.users.utils import store_captcha
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+PBKDF2_PREFERRED = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
+
+
+def slow_task(started, release):
+    """占用执行器直到release被设置"""
+    started.set()
+    release.wait(5)
+    return True
+
+
+@pytest.mark.unit
+class PasswordHashingExecutorTests(TestCase):
+    """执行器行为测试"""
+
+    def test_inline_mode_runs_in_caller_thread(self):
+        """测试inline模式在调用线程中执行"""
+        executor = PasswordHashingExecutor(mode="inline")
+
+        self.assertEqual(
+            executor.submit("verify", threading.current_thread),
+            threading.current_thread(),
+        )
+
+    def test_thread_mode_runs_in_pool(self):
+        """测试thread模式在线程池中执行"""
+        executor = PasswordHashingExecutor(mode="thread", workers=2)
+        try:
+            worker = executor.submit("verify", threading.current_thread)
+        finally:
+            executor.shutdown()
+
+        self.assertNotEqual(worker, threading.current_thread())
+        self.assertTrue(worker.name.startswith("password-hashing"))
+
+    def test_invalid_mode_raises(self):
+        """测试不支持的执行模式"""
+        with self.assertRaises(ValueError):
+            PasswordHashingExecutor(mode="gpu")
+
+    def test_queue_full_raises_unavailable(self):
+        """测试排队任务数达到上限时拒绝新任务"""
+        executor = PasswordHashingExecutor(mode="thread", workers=1, max_pending=1)
+        started, release = threading.Event(), threading.Event()
+        runner = threading.Thread(
+            target=executor.submit, args=("verify", slow_task, started, release)
+        )
+        runner.start()
+        try:
+            started.wait(5)
+            with self.assertRaises(PasswordHashingUnavailable):
+                executor.submit("verify", threading.current_thread)
+        finally:
+            release.set()
+            runner.join()
+            executor.shutdown()
+
+        # 任务结束后名额释放
+        self.assertEqual(executor.stats()["pending"], 0)
+
+    def test_timeout_raises_unavailable(self):
+        """测试等待结果超时时返回繁忙"""
+        executor = PasswordHashingExecutor(mode="thread", workers=1, timeout=0.05)
+        started, release = threading.Event(), threading.Event()
+        try:
+            with self.assertRaises(PasswordHashingUnavailable):
+                executor.submit("verify", slow_task, started, release)
+        finally:
+            release.set()
+            executor.shutdown()
+
+    def test_process_mode_hashes_in_subprocess(self):
+        """测试process模式在子进程中生成可校验的哈希"""
+        executor = PasswordHashingExecutor(mode="process", workers=1, timeout=60)
+        try:
+            from apps.users.hashing import _make_password
+
+            encoded = executor.submit("make", _make_password, "SecurePass123")
+        finally:
+            executor.shutdown()
+
+        self.assertTrue(check_password("SecurePass123", encoded))
+
+
+@pytest.mark.unit
+class CheckUserPasswordTests(TestCase):
+    """check_user_password测试"""
+
+    def test_hash_password_roundtrip(self):
+        """测试hash_password生成的哈希可被校验"""
+        user = User(username="hashuser", email="hash@example.com")
+        user.password = hash_password("SecurePass123")
+
+        self.assertTrue(check_user_password(user, "SecurePass123"))
+        self.assertFalse(check_user_password(user, "WrongPass123"))
+
+    def test_unusable_password_rejected(self):
+        """测试不可用密码直接返回False"""
+        user = User(username="nopass", email="nopass@example.com")
+        user.set_unusable_password()
+
+        self.assertFalse(check_user_password(user, "SecurePass123"))
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_PREFERRED)
+    def test_outdated_hash_is_upgraded(self):
+        """测试密码正确且哈希算法过时时重新哈希并保存"""
+        user = User.objects.create(
+            username="legacy",
+            email="legacy@example.com",
+            password=make_password("SecurePass123", hasher="md5"),
+        )
+
+        self.assertTrue(check_user_password(user, "SecurePass123"))
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+
+    @override_settings(PASSWORD_HASHING={"MODE": "thread", "WORKERS": 2})
+    def test_executor_follows_settings(self):
+        """测试执行器按PASSWORD_HASHING配置创建"""
+        executor = get_hashing_executor()
+
+        self.assertEqual(executor.mode, "thread")
+        self.assertEqual(executor.workers, 2)
+        self.assertEqual(executor.max_pending, 8)
+
+
+@pytest.mark.unit
+@override_settings(
+    PASSWORD_HASHING={"MODE": "thread", "WORKERS": 1, "MAX_PENDING": 1},
+)
+class PasswordHashingBackpressureTests(TestCase):
+    """执行器繁忙时的API响应测试"""
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        User.objects.create_user(
+            username="busyuser",
+            email="busy@example.com",
+            password="SecurePass123",
+            is_email_verified=True,
+        )
+
+    def test_login_returns_503_when_executor_busy(self):
+        """测试哈希执行器繁忙时登录返回503和Retry-After"""
+        captcha_id = str(uuid.uuid4())
+        store_captcha(captcha_id, "AB12")
+        executor = get_hashing_executor()
+        started, release = threading.Event(), threading.Event()
+        runner = threading.Thread(
+            target=executor.submit, args=("verify", slow_task, started, release)
+        )
+        runner.start()
+        try:
+            started.wait(5)
+            response = self.client.post(
+                "/api/auth/login/",
+                {
+                    "email": "busy@example.com",
+                    "password": "SecurePass123",
+                    "captcha_id": captcha_id,
+                    "captcha_answer": "AB12",
+                },
+                content_type="application/json",
+            )
+        finally:
+            release.set()
+            runner.join()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["code"], "SERVICE_BUSY")
+        self.assertEqual(response["Retry-After"], "1")
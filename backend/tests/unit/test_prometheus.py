@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-006-internal-common
+"""Prometheus指标采集与导出单元测试"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+from apps.common import instrumentation, metrics, prometheus
+from apps.common.middleware import REQUEST_QUERIES, REQUESTS, MetricsMiddleware
+from apps.users.models import User
+from bravo.celery import debug_task
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve
+
+
+def _dead_pid():
+    """返回一个已退出进程的pid"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.mark.unit
+class RenderTests(TestCase):
+    """文本格式导出与多进程合并"""
+
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+        self.counter = self.registry.register(
+            metrics.Counter, "jobs_total", "任务数", ["queue"]
+        )
+        self.gauge = self.registry.register(metrics.Gauge, "pool_size", "池大小")
+        self.histogram = self.registry.register(
+            metrics.Histogram, "latency_seconds", "耗时", buckets=(0.1, 1.0)
+        )
+
+    def test_render_text_format(self):
+        self.counter.labels(queue='a"b').inc(2)
+        self.gauge.set(3)
+        self.histogram.observe(0.05)
+        self.histogram.observe(0.5)
+
+        text = prometheus.render(prometheus.dump(self.registry))
+        self.assertIn("# TYPE jobs_total counter", text)
+        self.assertIn('jobs_total{queue="a\\"b"} 2.0', text)
+        self.assertIn("pool_size 3.0", text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn("latency_seconds_count 2", text)
+
+    def test_merge_sums_counters_and_labels_gauges(self):
+        self.counter.labels(queue="a").inc(2)
+        self.gauge.set(1)
+        self.histogram.observe(0.5)
+        data = prometheus.dump(self.registry)
+
+        merged = prometheus.merge([(101, data), (102, data)])
+        self.assertEqual(merged["jobs_total"]["samples"][0][1]["value"], 4)
+        self.assertEqual(merged["latency_seconds"]["samples"][0][1]["count"], 2)
+        self.assertEqual(
+            merged["latency_seconds"]["samples"][0][1]["buckets"]["1.0"], 2
+        )
+        self.assertEqual(
+            sorted(labels["pid"] for labels, _ in merged["pool_size"]["samples"]),
+            ["101", "102"],
+        )
+
+
+@pytest.mark.unit
+class MultiprocessTests(TestCase):
+    """多进程快照目录"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.override = override_settings(METRICS={"MULTIPROC_DIR": self.directory})
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+
+    def write_snapshot(self, name, value):
+        data = {
+            "multiproc_test_total": {
+                "kind": "counter",
+                "documentation": "",
+                "samples": [[{}, {"value": value}]],
+            },
+            "multiproc_test_up": {
+                "kind": "gauge",
+                "documentation": "",
+                "samples": [[{}, {"value": 1}]],
+            },
+        }
+        with open(os.path.join(self.directory, name), "w") as file:
+            json.dump(data, file)
+
+    def test_collect_merges_and_archives_dead_processes(self):
+        dead_pid = _dead_pid()
+        self.write_snapshot(f"metrics-{dead_pid}.json", 5)
+        self.write_snapshot(f"metrics-{os.getppid()}.json", 2)
+
+        merged = prometheus.collect()
+        self.assertEqual(merged["multiproc_test_total"]["samples"][0][1]["value"], 7)
+        self.assertEqual(
+            merged["multiproc_test_up"]["samples"],
+            [[{"pid": str(os.getppid())}, {"value": 1}]],
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, f"metrics-{dead_pid}.json"))
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, prometheus.ARCHIVE_NAME))
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, f"metrics-{os.getpid()}.json"))
+        )
+
+        # 归档后的计数保持不变
+        merged = prometheus.collect()
+        self.assertEqual(merged["multiproc_test_total"]["samples"][0][1]["value"], 7)
+
+
+@pytest.mark.unit
+class MetricsMiddlewareTests(TestCase):
+    """请求耗时与数据库查询统计"""
+
+    def test_records_view_duration_and_queries(self):
+        def view(request):
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse()
+
+        request = RequestFactory().get("/health/live/")
+        request.resolver_match = resolve("/health/live/")
+        queries = REQUEST_QUERIES.labels(view="health_live")
+        requests = REQUESTS.labels(view="health_live", method="GET", status=200)
+        before_queries = queries._value()["sum"]
+        before_requests = requests.get()
+
+        MetricsMiddleware(view)(request)
+        self.assertEqual(queries._value()["sum"] - before_queries, 2)
+        self.assertEqual(requests.get() - before_requests, 1)
+
+    def test_unmatched_request_label(self):
+        request = RequestFactory().get("/missing/")
+        MetricsMiddleware(lambda request: HttpResponse(status=404))(request)
+        requests = REQUESTS.labels(view="<unmatched>", method="GET", status=404)
+        self.assertGreaterEqual(requests.get(), 1)
+
+    @override_settings(METRICS={"ENABLED": True})
+    def test_metrics_endpoint(self):
+        response = Client().get("/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], prometheus.CONTENT_TYPE)
+        self.assertIn(b"# TYPE cache_requests_total counter", response.content)
+
+    @override_settings(METRICS={"ENABLED": False})
+    def test_metrics_endpoint_disabled(self):
+        self.assertEqual(Client().get("/metrics/").status_code, 404)
+
+
+@pytest.mark.unit
+class CacheInstrumentationTests(TestCase):
+    """缓存命中/未命中统计"""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.hits = instrumentation.CACHE_REQUESTS.labels(alias="default", result="hit")
+        self.misses = instrumentation.CACHE_REQUESTS.labels(
+            alias="default", result="miss"
+        )
+
+    def counts(self):
+        return self.hits.get(), self.misses.get()
+
+    def test_get_hit_and_miss(self):
+        cache = caches["default"]
+        hits, misses = self.counts()
+        cache.set("present", None)
+        self.assertIsNone(cache.get("present", "default"))
+        self.assertEqual(cache.get("absent", "default"), "default")
+        self.assertEqual(self.counts(), (hits + 1, misses + 1))
+
+    def test_get_many_counts_keys_once(self):
+        cache = caches["default"]
+        cache.set("a", 1)
+        hits, misses = self.counts()
+        # LocMemCache.get_many内部逐个调用get，只统计最外层
+        self.assertEqual(cache.get_many(["a", "b"]), {"a": 1})
+        self.assertEqual(self.counts(), (hits + 1, misses + 1))
+
+        duration = instrumentation.CACHE_DURATION.labels(
+            alias="default", operation="get"
+        )
+        before = duration._value()["count"]
+        cache.get_many(["a", "b"])
+        self.assertEqual(duration._value()["count"], before)
+
+
+@pytest.mark.unit
+class CeleryInstrumentationTests(TestCase):
+    """Celery任务耗时"""
+
+    def test_task_duration_observed(self):
+        duration = instrumentation.TASK_DURATION.labels(
+            task=debug_task.name, state="SUCCESS"
+        )
+        before = duration._value()["count"]
+        debug_task.apply()
+        self.assertEqual(duration._value()["count"], before + 1)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""GCRA多维度频率限制单元测试"""
+
+import json
+from unittest import mock
+
+import pytest
+from apps.users.rate_limit import (
+    CacheRateLimiter,
+    LocalDenyCache,
+    RedisRateLimiter,
+    get_rate_limiter,
+    local_deny_cache,
+    parse_rate,
+)
+from apps.users.throttling import PreviewLoginThrottle, RateLimitThrottle
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+
+from tests.unit.test_captcha_store import CACHES_REDIS, redis_available
+
+NOW = 1_700_000_000.0
+
+
+class RateLimiterContract:
+    """各频率限制器实现共同遵守的行为"""
+
+    limiter_class = None
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = self.limiter_class()
+
+    def test_allows_burst_up_to_limit(self):
+        """测试同一时刻最多允许limit次请求，超出后给出等待时间"""
+        limits = [("burst", 3, 60)]
+        for _ in range(3):
+            self.assertEqual(self.limiter.hit(limits, NOW), (True, 0.0))
+
+        allowed, wait = self.limiter.hit(limits, NOW)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 20, places=2)
+
+    def test_capacity_refills_per_interval(self):
+        """测试每经过一个发射间隔恢复一次请求"""
+        limits = [("refill", 2, 60)]
+        self.limiter.hit(limits, NOW)
+        self.limiter.hit(limits, NOW)
+
+        self.assertFalse(self.limiter.hit(limits, NOW + 29)[0])
+        self.assertTrue(self.limiter.hit(limits, NOW + 30)[0])
+        self.assertFalse(self.limiter.hit(limits, NOW + 30)[0])
+
+    def test_denied_request_is_not_counted(self):
+        """测试任一维度超限时整个请求被拒绝，且不计入其他维度"""
+        self.limiter.hit([("ip", 1, 60)], NOW)
+
+        for _ in range(3):
+            allowed, _ = self.limiter.hit([("ip", 1, 60), ("email", 2, 60)], NOW)
+            self.assertFalse(allowed)
+        self.assertTrue(self.limiter.hit([("email", 2, 60)], NOW)[0])
+        self.assertTrue(self.limiter.hit([("email", 2, 60)], NOW)[0])
+
+
+@pytest.mark.unit
+class CacheRateLimiterTests(RateLimiterContract, TestCase):
+    limiter_class = CacheRateLimiter
+
+    def test_locmem_uses_cache_limiter(self):
+        self.assertIs(type(get_rate_limiter()), CacheRateLimiter)
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not redis_available(), reason="需要本地Redis")
+@override_settings(CACHES=CACHES_REDIS)
+class RedisRateLimiterTests(RateLimiterContract, TestCase):
+    limiter_class = RedisRateLimiter
+
+
+@pytest.mark.unit
+class ParseRateTests(TestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/min"), (10, 60))
+        self.assertEqual(parse_rate("5/hour"), (5, 3600))
+        self.assertEqual(parse_rate("100/day"), (100, 86400))
+
+
+@pytest.mark.unit
+@override_settings(
+    RATE_LIMIT_LOCAL_DENY={"ENABLED": True, "MAX_ENTRIES": 100, "MAX_TTL": 10},
+)
+class LocalDenyTests(TestCase):
+    """进程内拒绝缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        local_deny_cache.clear()
+        self.limiter = CacheRateLimiter()
+        self.limiter.hit([("flood", 1, 60)], NOW)
+        self.assertFalse(self.limiter.hit([("flood", 1, 60)], NOW)[0])
+
+    def test_denial_answered_locally(self):
+        """测试已超限的键不再访问共享限制器，等待时间与共享限制器一致"""
+        with mock.patch.object(self.limiter, "check") as check:
+            allowed, wait = self.limiter.hit(
+                [("flood", 1, 60), ("other", 5, 60)], NOW + 5
+            )
+
+        check.assert_not_called()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 55, places=3)
+
+    def test_other_keys_still_checked(self):
+        with mock.patch.object(self.limiter, "check", return_value=[]) as check:
+            self.assertTrue(self.limiter.hit([("other", 1, 60)], NOW)[0])
+        check.assert_called_once()
+
+    def test_entry_capped_by_max_ttl(self):
+        """测试条目超过MAX_TTL后回到共享限制器检查（仍然超限）"""
+        with mock.patch.object(
+            self.limiter, "check", wraps=self.limiter.check
+        ) as check:
+            self.assertFalse(self.limiter.hit([("flood", 1, 60)], NOW + 11)[0])
+        check.assert_called_once()
+
+    def test_shared_state_is_authoritative_after_expiry(self):
+        """测试解除时间之后请求重新被允许"""
+        self.assertTrue(self.limiter.hit([("flood", 1, 60)], NOW + 60)[0])
+
+    @override_settings(RATE_LIMIT_LOCAL_DENY={"ENABLED": False})
+    def test_disabled(self):
+        with mock.patch.object(self.limiter, "check", return_value=[]) as check:
+            self.limiter.hit([("flood", 1, 60)], NOW)
+        check.assert_called_once()
+
+    def test_bounded_size(self):
+        deny_cache = LocalDenyCache()
+        for index in range(5):
+            deny_cache.add(f"key-{index}", NOW, 30, 10, max_entries=3)
+
+        self.assertEqual(len(deny_cache), 3)
+        self.assertEqual(deny_cache.wait(["key-0"], NOW), 0.0)
+        self.assertEqual(deny_cache.wait(["key-4"], NOW), 30)
+
+
+class ScopedView:
+    throttle_scope = "login"
+
+
+@pytest.mark.unit
+@override_settings(
+    RATE_LIMITS={"login": {"ip": "5/min", "email": "2/min", "captcha": "1/min"}},
+)
+class RateLimitThrottleTests(TestCase):
+    """多维度频率限制测试"""
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, data=None, ip="10.0.0.1"):
+        request = Request(
+            RequestFactory().post(
+                "/api/auth/login/",
+                data=json.dumps(data or {}),
+                content_type="application/json",
+                REMOTE_ADDR=ip,
+            ),
+            parsers=[JSONParser()],
+        )
+        request.user = AnonymousUser()
+        return request
+
+    def test_limits_built_from_present_dimensions(self):
+        """测试请求中不存在的维度被跳过，邮箱不区分大小写且不以明文写入键"""
+        throttle = RateLimitThrottle()
+        limits = throttle.get_limits(
+            self.request({"email": "User@Example.com"}), ScopedView()
+        )
+
+        self.assertEqual([key.split(":")[1] for key, _, _ in limits], ["ip", "email"])
+        self.assertNotIn("example", limits[1][0].lower())
+        self.assertEqual(
+            limits[1][0],
+            throttle.get_limits(
+                self.request({"email": "user@example.com"}), ScopedView()
+            )[1][0],
+        )
+
+    def test_email_limited_across_ips(self):
+        """测试同一邮箱从不同IP请求也受限制"""
+        view = ScopedView()
+        for ip in ("10.0.0.1", "10.0.0.2"):
+            request = self.request({"email": "a@example.com"}, ip)
+            self.assertTrue(RateLimitThrottle().allow_request(request, view))
+
+        throttle = RateLimitThrottle()
+        request = self.request({"email": "a@example.com"}, "10.0.0.3")
+        self.assertFalse(throttle.allow_request(request, view))
+        self.assertGreater(throttle.wait(), 0)
+
+    def test_view_without_scope_is_not_limited(self):
+        self.assertEqual(RateLimitThrottle().get_limits(self.request(), object()), [])
+
+    def test_preview_throttle_has_fixed_scope(self):
+        self.assertEqual(
+            PreviewLoginThrottle().get_scope(ScopedView()), "preview_login"
+        )
+
+
+@pytest.mark.unit
+@override_settings(RATE_LIMITS={"captcha": {"ip": "2/min"}})
+class RateLimitedViewTests(TestCase):
+    """视图声明throttle_scope后生效"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_captcha_endpoint_returns_429_with_retry_after(self):
+        client = Client()
+        for _ in range(2):
+            self.assertEqual(client.get("/api/auth/captcha/").status_code, 200)
+
+        response = client.get("/api/auth/captcha/")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-006-internal-common
+"""读写分离路由单元测试（两个数据库的路由见tests/integration/test_replica_routing.py）"""
+
+import time
+from unittest import mock
+
+import pytest
+from apps.common.db import routers
+from apps.common.middleware import ReplicaRoutingMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+ROUTING_CONFIG = {
+    "REPLICAS": ["replica"],
+    "MAX_LAG": 5,
+    "LAG_CHECK_INTERVAL": 60,
+    "STICKY_SECONDS": 10,
+    "COOKIE_NAME": "db_primary_until",
+}
+
+
+@pytest.mark.unit
+class PinningTests(SimpleTestCase):
+    """读己之写的上下文状态"""
+
+    def setUp(self):
+        context = routers.primary_until(0.0)
+        context.__enter__()
+        self.addCleanup(context.__exit__, None, None, None)
+
+    def test_pin_primary_only_extends(self):
+        routers.pin_primary(10)
+        until = routers.get_primary_until()
+        self.assertAlmostEqual(until, time.time() + 10, delta=1)
+        routers.pin_primary(1)
+        self.assertEqual(routers.get_primary_until(), until)
+
+    def test_contexts_restore_state(self):
+        with routers.use_primary():
+            self.assertEqual(routers.get_primary_until(), float("inf"))
+        with routers.primary_until(123.0):
+            routers.pin_primary(10)
+        self.assertEqual(routers.get_primary_until(), 0.0)
+
+    @override_settings(DATABASE_ROUTING={"REPLICAS": ["missing", "default"]})
+    def test_unknown_and_default_aliases_ignored(self):
+        self.assertEqual(routers.get_routing_config()["REPLICAS"], [])
+
+    @override_settings(DATABASE_ROUTING={"REPLICAS": []})
+    def test_router_without_replicas(self):
+        router = routers.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(None))
+        self.assertEqual(router.db_for_write(None), "default")
+        self.assertEqual(routers.get_primary_until(), 0.0)
+
+
+@pytest.mark.unit
+class ReplicaLagTests(TestCase):
+    """复制延迟检查与缓存"""
+
+    def setUp(self):
+        routers.reset_replica_lags()
+        self.addCleanup(routers.reset_replica_lags)
+
+    def test_non_mysql_reports_no_lag(self):
+        self.assertEqual(routers.measure_lag("default"), 0.0)
+
+    def mysql_replica(self):
+        connection = mock.MagicMock(vendor="mysql")
+        return connection, mock.patch.object(
+            routers, "connections", {"replica": connection}
+        )
+
+    def errors(self, reason):
+        return routers.LAG_CHECK_ERRORS.labels(alias="replica", reason=reason).get()
+
+    def test_unmeasurable_lag_logged_and_counted(self):
+        """测试复制状态语句均失败（缺少权限）时记录警告并单独计数"""
+        connection, patch = self.mysql_replica()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = DatabaseError("Access denied; REPLICATION CLIENT")
+        before = self.errors("query")
+
+        with patch, self.assertLogs("apps.common.db.routers", "WARNING") as logs:
+            self.assertEqual(routers.measure_lag("replica"), float("inf"))
+
+        self.assertEqual(self.errors("query") - before, 1)
+        self.assertIn("REPLICATION CLIENT", logs.output[0])
+
+    def test_unavailable_replica_counted(self):
+        """测试副本不可用时按connection计数"""
+        connection, patch = self.mysql_replica()
+        connection.cursor.side_effect = OperationalError("Can't connect")
+        before = self.errors("connection")
+
+        with patch, self.assertLogs("apps.common.db.routers", "WARNING"):
+            self.assertEqual(routers.measure_lag("replica"), float("inf"))
+
+        self.assertEqual(self.errors("connection") - before, 1)
+
+    def test_lag_cached_for_interval(self):
+        with mock.patch.object(routers, "measure_lag", return_value=2.0) as measure:
+            self.assertEqual(routers.get_replica_lag("default", 60), 2.0)
+            self.assertEqual(routers.get_replica_lag("default", 60), 2.0)
+            self.assertEqual(measure.call_count, 1)
+            routers.get_replica_lag("default", 0)
+            self.assertEqual(measure.call_count, 2)
+
+    def test_unavailable_replica_gauge(self):
+        with mock.patch.object(routers, "measure_lag", return_value=float("inf")):
+            routers.get_replica_lag("default", 60)
+        self.assertEqual(routers.REPLICA_LAG.labels(alias="default").get(), -1)
+
+
+@pytest.mark.unit
+@mock.patch.object(routers, "get_routing_config", return_value=ROUTING_CONFIG)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """通过Cookie延续读己之写"""
+
+    def call(self, view, cookie=None):
+        request = RequestFactory().get("/")
+        if cookie is not None:
+            request.COOKIES["db_primary_until"] = cookie
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_write_sets_cookie(self, _):
+        def view(request):
+            routers.pin_primary(10)
+            return HttpResponse()
+
+        before = routers.get_primary_until()
+        response = self.call(view)
+        cookie = response.cookies["db_primary_until"]
+        self.assertAlmostEqual(float(cookie.value), time.time() + 10, delta=1)
+        self.assertEqual(cookie["max-age"], 10)
+        self.assertTrue(cookie["httponly"])
+        # 请求结束后还原上下文
+        self.assertEqual(routers.get_primary_until(), before)
+
+    def test_read_only_request_sets_no_cookie(self, _):
+        response = self.call(lambda request: HttpResponse())
+        self.assertNotIn("db_primary_until", response.cookies)
+
+    def test_cookie_pins_request(self, _):
+        seen = []
+
+        def view(request):
+            seen.append(routers.get_primary_until())
+            return HttpResponse()
+
+        now = time.time()
+        self.call(view, str(now + 5))
+        self.call(view, str(now + 3600))
+        self.call(view, "invalid")
+        self.assertAlmostEqual(seen[0], now + 5, delta=0.01)
+        # 客户端提供的时刻最多信任STICKY_SECONDS秒
+        self.assertLessEqual(seen[1], time.time() + 10)
+        self.assertEqual(seen[2], 0.0)
+
+    def test_not_used_without_replicas(self, get_routing_config):
+        get_routing_config.return_value = dict(ROUTING_CONFIG, REPLICAS=[])
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""过期令牌清理单元测试"""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from apps.users import tasks
+from apps.users.models import EmailVerification, PasswordReset, User
+from apps.users.token_purge import purge_expired_tokens, purge_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@pytest.mark.unit
+@override_settings(TOKEN_PURGE={"RETENTION_DAYS": 7, "CHUNK_SIZE": 2, "SLEEP": 0})
+class TokenPurgeTests(TestCase):
+    """按主键区间分块清理过期令牌"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="purge", email="purge@example.com", password="Pass1234"
+        )
+        now = timezone.now()
+        self.old = now - timedelta(days=8)
+        self.recent = now - timedelta(days=1)
+        self.valid = now + timedelta(hours=24)
+
+    def create_verifications(self, *expires):
+        return [
+            EmailVerification.objects.create(
+                user=self.user,
+                email=self.user.email,
+                token=f"verify-{index}",
+                expires_at=expires_at,
+                verified_at=expires_at if index % 2 == 0 else None,
+            )
+            for index, expires_at in enumerate(expires)
+        ]
+
+    def test_only_rows_past_retention_are_deleted(self):
+        """测试只删除过期超过保留期的记录（无论是否已使用）"""
+        kept = self.create_verifications(self.recent, self.valid)
+        for index in range(3):
+            EmailVerification.objects.create(
+                user=self.user,
+                email=self.user.email,
+                token=f"old-{index}",
+                expires_at=self.old,
+                verified_at=self.old if index == 0 else None,
+            )
+        PasswordReset.objects.create(
+            user=self.user, token="reset-old", expires_at=self.old, used_at=self.old
+        )
+
+        results = purge_expired_tokens()
+
+        self.assertEqual(results["users_email_verification"]["rows"], 3)
+        self.assertEqual(results["users_password_reset"]["rows"], 1)
+        self.assertCountEqual(
+            EmailVerification.objects.values_list("pk", flat=True),
+            [row.pk for row in kept],
+        )
+        self.assertFalse(PasswordReset.objects.exists())
+
+    def test_dry_run_deletes_nothing(self):
+        """测试--dry-run只统计不删除"""
+        self.create_verifications(self.old, self.old, self.valid)
+
+        results = purge_expired_tokens(dry_run=True)
+
+        self.assertEqual(results["users_email_verification"]["rows"], 2)
+        self.assertEqual(results["users_email_verification"]["chunks"], 2)
+        self.assertEqual(EmailVerification.objects.count(), 3)
+
+    def test_deletes_in_primary_key_chunks(self):
+        """测试每个主键区间执行一条DELETE"""
+        self.create_verifications(*[self.old] * 5)
+        cutoff = timezone.now() - timedelta(days=7)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = purge_model(EmailVerification, cutoff, chunk_size=2)
+
+        deletes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("DELETE")
+        ]
+        self.assertEqual(result["rows"], 5)
+        self.assertEqual(result["chunks"], 3)
+        self.assertEqual(len(deletes), 3)
+        self.assertTrue(all('"id" >=' in sql for sql in deletes))
+
+    def test_empty_table(self):
+        """测试空表直接返回"""
+        cutoff = timezone.now()
+        self.assertEqual(
+            purge_model(PasswordReset, cutoff, chunk_size=2),
+            {"rows": 0, "chunks": 0, "max_chunk_seconds": 0.0},
+        )
+
+    def test_command_output(self):
+        """测试管理命令输出每张表的清理结果"""
+        self.create_verifications(self.old, self.valid)
+        out = StringIO()
+
+        call_command("purge_expired_tokens", "--sleep", "0", stdout=out)
+
+        self.assertIn("users_email_verification: 已清理 1 条记录", out.getvalue())
+        self.assertIn("users_password_reset: 已清理 0 条记录", out.getvalue())
+        self.assertEqual(EmailVerification.objects.count(), 1)
+
+    def test_task_returns_row_counts(self):
+        """测试定时任务返回每张表删除的记录数"""
+        self.create_verifications(self.old)
+
+        self.assertEqual(
+            tasks.purge_expired_tokens_task(),
+            {"users_email_verification": 1, "users_password_reset": 0},
+        )
+
+    def test_expires_at_indexes_declared(self):
+        """测试两张令牌表都有expires_at索引"""
+        for model in (EmailVerification, PasswordReset):
+            self.assertIn(
+                ["expires_at"], [index.fields for index in model._meta.indexes]
+            )
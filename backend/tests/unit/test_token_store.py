@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""邮箱验证/密码重置令牌存储单元测试"""
+
+import json
+import threading
+from datetime import timedelta
+
+import pytest
+from apps.users.emails import EMAIL_VERIFICATION, PASSWORD_RESET
+from apps.users.models import EmailVerification, PasswordReset, User
+from apps.users.token_store import (
+    TOKEN_EXPIRED,
+    TOKEN_INVALID,
+    TOKEN_USED,
+    TOKEN_VALID,
+    CacheTokenStore,
+    DatabaseTokenStore,
+    DualTokenStore,
+    RedisTokenStore,
+    get_token_store,
+)
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from tests.unit.test_captcha_store import CACHES_REDIS, redis_available
+
+
+class TokenStoreContract:
+    """各令牌存储实现共同遵守的行为"""
+
+    store_class = None
+
+    def setUp(self):
+        cache.clear()
+        self.store = self.store_class()
+        self.user = User.objects.create_user(
+            username="tokenstore", email="store@example.com", password="Pass1234"
+        )
+
+    def issue(self, token, purpose=EMAIL_VERIFICATION, hours=24):
+        expires_at = timezone.now() + timedelta(hours=hours)
+        self.store.issue(purpose, self.user.id, self.user.email, token, expires_at)
+
+    def test_consume_once(self):
+        """测试有效令牌只能消费一次"""
+        self.issue("token-a")
+
+        record = self.store.consume(EMAIL_VERIFICATION, "token-a")
+        self.assertEqual(record.status, TOKEN_VALID)
+        self.assertEqual(record.user_id, self.user.id)
+        self.assertEqual(record.email, self.user.email)
+        self.assertEqual(
+            self.store.consume(EMAIL_VERIFICATION, "token-a").status, TOKEN_USED
+        )
+
+    def test_check_does_not_consume(self):
+        """测试check不消费令牌"""
+        self.issue("token-a", PASSWORD_RESET)
+
+        self.assertEqual(
+            self.store.check(PASSWORD_RESET, "token-a").status, TOKEN_VALID
+        )
+        self.assertEqual(
+            self.store.consume(PASSWORD_RESET, "token-a").status, TOKEN_VALID
+        )
+
+    def test_unknown_token(self):
+        """测试不存在的令牌"""
+        record = self.store.consume(EMAIL_VERIFICATION, "missing")
+        self.assertEqual(record.status, TOKEN_INVALID)
+        self.assertIsNone(record.user_id)
+
+    def test_expired_token(self):
+        """测试过期令牌在保留期内返回已过期"""
+        self.issue("token-a", hours=-1)
+
+        self.assertEqual(
+            self.store.consume(EMAIL_VERIFICATION, "token-a").status, TOKEN_EXPIRED
+        )
+
+    def test_reissue_revokes_previous_token(self):
+        """测试重新签发后旧令牌失效"""
+        self.issue("token-a", PASSWORD_RESET)
+        self.issue("token-b", PASSWORD_RESET)
+
+        self.assertEqual(
+            self.store.consume(PASSWORD_RESET, "token-a").status, TOKEN_INVALID
+        )
+        self.assertEqual(
+            self.store.consume(PASSWORD_RESET, "token-b").status, TOKEN_VALID
+        )
+
+    def test_purposes_are_independent(self):
+        """测试验证令牌不能用于密码重置"""
+        self.issue("token-a", EMAIL_VERIFICATION)
+
+        self.assertEqual(
+            self.store.consume(PASSWORD_RESET, "token-a").status, TOKEN_INVALID
+        )
+
+
+@pytest.mark.unit
+class DatabaseTokenStoreTests(TokenStoreContract, TestCase):
+    """数据库令牌存储测试"""
+
+    store_class = DatabaseTokenStore
+
+    def test_consume_marks_row(self):
+        """测试消费后记录验证时间（审计）"""
+        self.issue("token-a")
+        self.store.consume(EMAIL_VERIFICATION, "token-a")
+
+        self.assertIsNotNone(EmailVerification.objects.get(token="token-a").verified_at)
+
+
+@pytest.mark.unit
+class CacheTokenStoreTests(TokenStoreContract, TestCase):
+    """通用缓存令牌存储测试"""
+
+    store_class = CacheTokenStore
+
+    def test_no_database_rows(self):
+        """测试令牌只写入缓存"""
+        self.issue("token-a")
+        self.issue("token-b", PASSWORD_RESET)
+
+        self.assertFalse(EmailVerification.objects.exists())
+        self.assertFalse(PasswordReset.objects.exists())
+
+    @override_settings(TOKEN_STORE={"GRACE": 60})
+    def test_record_ttl_covers_grace(self):
+        """测试缓存记录在过期后再保留GRACE秒"""
+        expires_at = timezone.now() + timedelta(seconds=100)
+        self.assertAlmostEqual(self.store.ttl(expires_at.timestamp()), 160, delta=1)
+
+
+@pytest.mark.unit
+class DualTokenStoreTests(TokenStoreContract, TestCase):
+    """迁移用令牌存储测试"""
+
+    store_class = DualTokenStore
+
+    def test_issue_writes_audit_row(self):
+        """测试签发同时写入数据库，消费后数据库记录标记为已验证"""
+        self.issue("token-a")
+        self.store.consume(EMAIL_VERIFICATION, "token-a")
+
+        self.assertIsNotNone(EmailVerification.objects.get(token="token-a").verified_at)
+
+    def test_legacy_database_token_still_valid(self):
+        """测试切换前只写入数据库的令牌仍可消费"""
+        PasswordReset.objects.create(
+            user=self.user,
+            token="legacy",
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        self.assertEqual(
+            self.store.consume(PASSWORD_RESET, "legacy").status, TOKEN_VALID
+        )
+        self.assertEqual(
+            self.store.consume(PASSWORD_RESET, "legacy").status, TOKEN_USED
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not redis_available(), reason="需要本地Redis")
+@override_settings(CACHES=CACHES_REDIS)
+class RedisTokenStoreTests(TokenStoreContract, TestCase):
+    """Redis令牌存储测试"""
+
+    store_class = RedisTokenStore
+
+
+@pytest.mark.unit
+class ConcurrentConsumeTests(TransactionTestCase):
+    """并发消费同一令牌时只有一个请求成功"""
+
+    def consume_concurrently(self, store, workers=8):
+        user = User.objects.create_user(
+            username="race", email="race@example.com", password="Pass1234"
+        )
+        store.issue(
+            EMAIL_VERIFICATION,
+            user.id,
+            user.email,
+            "race-token",
+            timezone.now() + timedelta(hours=1),
+        )
+        barrier = threading.Barrier(workers)
+        results = []
+
+        def attempt():
+            barrier.wait()
+            results.append(store.consume(EMAIL_VERIFICATION, "race-token").status)
+
+        threads = [threading.Thread(target=attempt) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results.count(TOKEN_VALID)
+
+    def test_cache_store(self):
+        cache.clear()
+        self.assertEqual(self.consume_concurrently(CacheTokenStore()), 1)
+
+
+@pytest.mark.unit
+@override_settings(TOKEN_STORE={"BACKEND": "cache"})
+class CacheTokenStoreAPITests(TestCase):
+    """使用缓存令牌存储时的邮箱验证和密码重置流程"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="apiuser", email="api@example.com", password="Pass1234"
+        )
+
+    def issue(self, purpose, token, hours=24):
+        get_token_store().issue(
+            purpose,
+            self.user.id,
+            self.user.email,
+            token,
+            timezone.now() + timedelta(hours=hours),
+        )
+
+    def test_selects_cache_store(self):
+        self.assertIs(type(get_token_store()), CacheTokenStore)
+
+    def test_verify_email(self):
+        """测试验证成功后令牌不能再次使用"""
+        self.issue(EMAIL_VERIFICATION, "verify-token")
+
+        response = self.client.get("/api/auth/email/verify/verify-token/")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_email_verified)
+
+        response = self.client.get("/api/auth/email/verify/verify-token/")
+        self.assertEqual(response.json()["code"], "TOKEN_ALREADY_VERIFIED")
+        self.assertFalse(EmailVerification.objects.exists())
+
+    def test_verify_expired_email_token(self):
+        self.issue(EMAIL_VERIFICATION, "verify-token", hours=-1)
+
+        response = self.client.get("/api/auth/email/verify/verify-token/")
+        self.assertEqual(response.json()["code"], "TOKEN_EXPIRED")
+
+    def reset_password(self, token):
+        return self.client.post(
+            "/api/auth/password/reset/",
+            data=json.dumps(
+                {
+                    "token": token,
+                    "password": "NewSecurePass123",
+                    "password_confirm": "NewSecurePass123",
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_reset_password(self):
+        """测试重置成功后令牌不能再次使用"""
+        self.issue(PASSWORD_RESET, "reset-token")
+
+        self.assertEqual(self.reset_password("reset-token").status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("NewSecurePass123"))
+
+        response = self.reset_password("reset-token")
+        self.assertEqual(response.json()["code"], "TOKEN_ALREADY_USED")
+
+    def test_reset_with_unknown_token(self):
+        self.assertEqual(self.reset_password("missing").json()["code"], "INVALID_TOKEN")
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""大小写不敏感的用户查找单元测试"""
+
+import uuid
+
+import pytest
+from apps.users.models import User
+from apps.users.utils import (
+    filter_users_by_email,
+    find_user_by_email_or_username,
+    store_captcha,
+)
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+
+@pytest.mark.unit
+class FindUserCaseInsensitiveTests(TestCase):
+    """find_user_by_email_or_username测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="MixedCase",
+            email="Mixed.Case@Example.com",
+            password="SecurePass123",
+        )
+
+    def test_find_by_email_ignores_case(self):
+        """测试邮箱查找不区分大小写"""
+        self.assertEqual(
+            find_user_by_email_or_username("mixed.case@example.com"), self.user
+        )
+        self.assertEqual(
+            find_user_by_email_or_username("MIXED.CASE@EXAMPLE.COM"), self.user
+        )
+
+    def test_find_by_username_ignores_case(self):
+        """测试用户名查找不区分大小写"""
+        self.assertEqual(find_user_by_email_or_username("mixedcase"), self.user)
+
+    def test_missing_user_returns_none(self):
+        """测试用户不存在时返回None"""
+        self.assertIsNone(find_user_by_email_or_username("nobody@example.com"))
+
+    def test_legacy_case_duplicates_prefer_exact_match(self):
+        """测试历史数据中仅大小写不同的重复邮箱优先返回完全一致的用户"""
+        other = User.objects.create_user(
+            username="other",
+            email="mixed.case@example.com",
+            password="SecurePass123",
+        )
+
+        self.assertEqual(
+            find_user_by_email_or_username("mixed.case@example.com"), other
+        )
+        self.assertEqual(find_user_by_email_or_username(self.user.email), self.user)
+        self.assertIsNone(find_user_by_email_or_username("MIXED.CASE@EXAMPLE.COM"))
+
+    def test_lookup_uses_lower_expression(self):
+        """测试查找使用LOWER(email)，与函数索引表达式一致"""
+        sql = str(filter_users_by_email("A@B.com").query).upper()
+
+        self.assertIn("LOWER(", sql)
+        self.assertNotIn("LIKE", sql)
+
+    def test_model_declares_lower_indexes(self):
+        """测试模型声明了LOWER(email)和LOWER(username)函数索引"""
+        names = {index.name for index in User._meta.indexes}
+
+        self.assertIn("idx_user_email_lower", names)
+        self.assertIn("idx_user_username_lower", names)
+
+
+@pytest.mark.unit
+class RegisterEmailCaseTests(TestCase):
+    """注册时邮箱唯一性检查不区分大小写"""
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        User.objects.create_user(
+            username="existing",
+            email="existing@example.com",
+            password="SecurePass123",
+        )
+
+    def test_register_rejects_mixed_case_duplicate(self):
+        """测试仅大小写不同的邮箱不能重复注册"""
+        captcha_id = str(uuid.uuid4())
+        store_captcha(captcha_id, "AB12")
+
+        response = self.client.post(
+            "/api/auth/register/",
+            {
+                "email": "Existing@Example.com",
+                "password": "SecurePass123",
+                "password_confirm": "SecurePass123",
+                "captcha_id": captcha_id,
+                "captcha_answer": "AB12",
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "EMAIL_EXISTS")
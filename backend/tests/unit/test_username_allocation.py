@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# REQ-ID: REQ-2025-003-user-login
+"""注册用户名分配单元测试"""
+
+import threading
+from unittest import mock
+
+import pytest
+from apps.users import utils
+from apps.users.models import User
+from apps.users.utils import allocate_username, save_with_unique_username
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+REGISTRATIONS = 1000
+
+
+def new_user(index):
+    """构造未保存的用户（使用不可用密码，避免计算哈希）"""
+    return User(email=f"admin{index}@example{index}.com", password="!")
+
+
+@pytest.mark.unit
+class AllocateUsernameTests(TestCase):
+    """allocate_username测试"""
+
+    def test_free_prefix_is_used_as_is(self):
+        """测试前缀未被占用时直接使用"""
+        self.assertEqual(allocate_username("admin"), "admin")
+
+    def test_next_suffix_after_max(self):
+        """测试返回最大数字后缀+1"""
+        for username in ("admin", "admin1", "admin7", "administrator", "admin7x"):
+            User.objects.create(username=username, email=f"{username}@example.com")
+
+        self.assertEqual(allocate_username("admin"), "admin8")
+
+    def test_prefix_match_ignores_case(self):
+        """测试前缀匹配不区分大小写"""
+        User.objects.create(username="Admin", email="a@example.com")
+        User.objects.create(username="ADMIN3", email="b@example.com")
+
+        self.assertEqual(allocate_username("admin"), "admin4")
+
+    def test_suffix_only_usernames_without_base(self):
+        """测试前缀本身未被占用时即使存在带后缀的用户名也直接使用前缀"""
+        User.objects.create(username="admin5", email="a@example.com")
+
+        self.assertEqual(allocate_username("admin"), "admin")
+
+    def test_regex_special_characters_in_prefix(self):
+        """测试邮箱前缀中的正则特殊字符按字面匹配"""
+        User.objects.create(username="first.last", email="a@example.com")
+        User.objects.create(username="firstxlast9", email="b@example.com")
+
+        self.assertEqual(allocate_username("first.last"), "first.last1")
+
+    def test_allocation_is_single_query(self):
+        """测试分配只需一条查询"""
+        for index in range(20):
+            User.objects.create(username=f"info{index or ''}", email=f"{index}@x.com")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_username("info"), "info20")
+
+    def test_sequential_registrations_with_same_prefix(self):
+        """测试同一前缀连续注册1000个用户，每次分配一条查询 + 一条INSERT"""
+        for index in range(REGISTRATIONS):
+            with CaptureQueriesContext(connection) as queries:
+                save_with_unique_username(new_user(index), "admin")
+            # 测试用例运行在事务中，atomic()额外产生SAVEPOINT语句，不计入
+            statements = [
+                query["sql"].split()[0]
+                for query in queries.captured_queries
+                if "SAVEPOINT" not in query["sql"]
+            ]
+            self.assertEqual(statements, ["SELECT", "INSERT"])
+
+        usernames = set(
+            User.objects.filter(email__startswith="admin").values_list(
+                "username", flat=True
+            )
+        )
+        self.assertEqual(len(usernames), REGISTRATIONS)
+        self.assertIn("admin", usernames)
+        self.assertIn(f"admin{REGISTRATIONS - 1}", usernames)
+
+    def test_retry_on_username_conflict(self):
+        """测试并发分配到相同用户名时重试"""
+        User.objects.create(username="admin", email="first@example.com")
+        allocations = iter(["admin", "admin1"])
+
+        with mock.patch.object(
+            utils, "allocate_username", side_effect=lambda base: next(allocations)
+        ):
+            user = save_with_unique_username(new_user(1), "admin")
+
+        self.assertEqual(user.username, "admin1")
+        self.assertIsNotNone(user.pk)
+
+    def test_email_conflict_is_not_retried(self):
+        """测试邮箱重复等非用户名冲突直接抛出，不重试"""
+        save_with_unique_username(new_user(1), "admin")
+
+        with mock.patch.object(
+            utils, "allocate_username", wraps=utils.allocate_username
+        ) as allocate:
+            with self.assertRaises(IntegrityError):
+                save_with_unique_username(new_user(1), "other")
+
+        self.assertEqual(allocate.call_count, 1)
+
+
+@pytest.mark.unit
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """并发注册测试（SQLite不支持并发写入，仅在MySQL等数据库上运行）"""
+
+    def test_concurrent_registrations_with_same_prefix(self):
+        """测试多线程并发注册1000个同前缀用户，用户名全部唯一"""
+        workers = 8
+        errors = []
+
+        def register(offset):
+            try:
+                for index in range(offset, REGISTRATIONS, workers):
+                    save_with_unique_username(new_user(index), "admin", 20)
+            except Exception as e:  # pragma: no cover - 失败时由断言报告
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=register, args=(offset,))
+            for offset in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            User.objects.filter(email__startswith="admin")
+            .values("username")
+            .distinct()
+            .count(),
+            REGISTRATIONS,
+        )
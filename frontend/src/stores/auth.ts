@@ -48,6 +48,7 @@ export interface LoginCredentials {
   password: string
   captcha_id: string
   captcha_answer: string
+  credential_proof?: string
 }
 
 export interface RegisterCredentials {
@@ -93,6 +94,8 @@ export interface PreviewUser {
 export interface PreviewResponse {
   valid: boolean
   user: PreviewUser | null
+  credential_proof?: string
+  credential_proof_expires_in?: number
 }
 
 export interface PreviewCredentials {